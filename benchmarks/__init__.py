@@ -0,0 +1,17 @@
+"""
+CPU benchmarks of the hot paths in TFSnippet.
+
+Run all the benchmarks at the default scales, and compare with a baseline::
+
+    python -m benchmarks -o results.json -b baseline.json
+
+Run the benchmarks whose names match a glob pattern, at all scales::
+
+    python -m benchmarks -k 'dataflows.*' -s small -s medium -s large
+
+A baseline is just the results of a previous run, e.g., on the target
+branch.  A benchmark is reported as regressed if its median time per call
+exceeds the baseline by more than the tolerance (``-t``, or
+``--tolerance-for PATTERN=TOLERANCE`` for specific benchmarks), in which
+case the process exits with code 1.
+"""
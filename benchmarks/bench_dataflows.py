@@ -0,0 +1,62 @@
+import numpy as np
+
+from tfsnippet.dataflows import DataFlow
+from .runner import benchmark
+
+
+def _make_arrays(scale, n_features=32):
+    random_state = np.random.RandomState(1234)
+    x = random_state.normal(size=[1000 * scale, n_features]). \
+        astype(np.float32)
+    y = random_state.randint(0, 10, size=[1000 * scale]).astype(np.int32)
+    return x, y
+
+
+@benchmark('dataflows.array_flow')
+def array_flow(scale):
+    x, y = _make_arrays(scale)
+    flow = DataFlow.arrays([x, y], batch_size=64)
+
+    def run():
+        for _ in flow:
+            pass
+
+    yield run
+
+
+@benchmark('dataflows.array_flow_shuffled')
+def array_flow_shuffled(scale):
+    # the shuffled flow gathers each mini-batch by random indices
+    x, y = _make_arrays(scale)
+    flow = DataFlow.arrays([x, y], batch_size=64, shuffle=True,
+                           random_state=np.random.RandomState(1234))
+
+    def run():
+        for _ in flow:
+            pass
+
+    yield run
+
+
+@benchmark('dataflows.threading_flow')
+def threading_flow(scale):
+    x, y = _make_arrays(scale)
+    with DataFlow.arrays([x, y], batch_size=64).threaded(5) as flow:
+        def run():
+            for _ in flow:
+                pass
+
+        yield run
+
+
+@benchmark('dataflows.mapper_flow')
+def mapper_flow(scale):
+    x, y = _make_arrays(scale)
+    flow = DataFlow.arrays([x, y], batch_size=64). \
+        map(lambda x, y: (x * 2., y))
+
+    def run():
+        for _ in flow:
+            pass
+
+    yield run
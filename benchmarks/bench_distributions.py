@@ -0,0 +1,66 @@
+import numpy as np
+import tensorflow as tf
+
+from tfsnippet.distributions import Categorical, Mixture, Normal
+from .runner import benchmark
+
+
+def _make_mixture(random_state, n_components, n_features, batch_components):
+    logits = tf.constant(random_state.normal(
+        size=[n_features, n_components]).astype(np.float32))
+    components = [
+        Normal(
+            mean=tf.constant(random_state.normal(
+                size=[n_features]).astype(np.float32)),
+            logstd=tf.constant(random_state.normal(
+                size=[n_features]).astype(np.float32))
+        )
+        for _ in range(n_components)
+    ]
+    return Mixture(Categorical(logits=logits), components,
+                   batch_components=batch_components)
+
+
+def _mixture_log_prob(scale, n_components, n_features, batch_components):
+    random_state = np.random.RandomState(1234)
+    batch_size = 100 * scale
+
+    with tf.Graph().as_default(), tf.Session() as session:
+        mixture = _make_mixture(
+            random_state, n_components, n_features, batch_components)
+        x = tf.constant(random_state.normal(
+            size=[batch_size, n_features]).astype(np.float32))
+        log_prob = mixture.log_prob(x)
+
+        yield lambda: session.run(log_prob)
+
+
+def _mixture_sample(scale, n_components, n_features, batch_components):
+    random_state = np.random.RandomState(1234)
+
+    with tf.Graph().as_default(), tf.Session() as session:
+        mixture = _make_mixture(
+            random_state, n_components, n_features, batch_components)
+        samples = mixture.sample(100 * scale)
+
+        yield lambda: session.run(samples)
+
+
+@benchmark('distributions.mixture_log_prob')
+def mixture_log_prob(scale, n_components=8, n_features=16):
+    return _mixture_log_prob(scale, n_components, n_features, True)
+
+
+@benchmark('distributions.mixture_log_prob_unbatched')
+def mixture_log_prob_unbatched(scale, n_components=8, n_features=16):
+    return _mixture_log_prob(scale, n_components, n_features, False)
+
+
+@benchmark('distributions.mixture_sample')
+def mixture_sample(scale, n_components=8, n_features=16):
+    return _mixture_sample(scale, n_components, n_features, True)
+
+
+@benchmark('distributions.mixture_sample_unbatched')
+def mixture_sample_unbatched(scale, n_components=8, n_features=16):
+    return _mixture_sample(scale, n_components, n_features, False)
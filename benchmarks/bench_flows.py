@@ -0,0 +1,51 @@
+import numpy as np
+import tensorflow as tf
+
+from tfsnippet.layers import (CouplingLayer, InvertibleDense, SequentialFlow,
+                              dense)
+from .runner import benchmark
+
+
+def _make_flow(n_layers):
+    def shift_and_scale(x1, n2):
+        h = dense(x1, 64, activation_fn=tf.nn.leaky_relu, name='hidden')
+        shift = dense(h, n2, name='shift')
+        scale = dense(h, n2, name='scale')
+        return shift, scale
+
+    flows = []
+    for i in range(n_layers):
+        flows.append(InvertibleDense(strict_invertible=True))
+        flows.append(CouplingLayer(
+            tf.make_template('shift_and_scale_{}'.format(i), shift_and_scale),
+            scale_type='sigmoid'
+        ))
+    return SequentialFlow(flows)
+
+
+@benchmark('flows.transform')
+def flow_transform(scale, n_layers=4, n_features=32):
+    random_state = np.random.RandomState(1234)
+
+    with tf.Graph().as_default(), tf.Session() as session:
+        flow = _make_flow(n_layers)
+        x = tf.constant(random_state.normal(
+            size=[100 * scale, n_features]).astype(np.float32))
+        y, log_det = flow.transform(x)
+        session.run(tf.global_variables_initializer())
+
+        yield lambda: session.run([y, log_det])
+
+
+@benchmark('flows.inverse_transform')
+def flow_inverse_transform(scale, n_layers=4, n_features=32):
+    random_state = np.random.RandomState(1234)
+
+    with tf.Graph().as_default(), tf.Session() as session:
+        flow = _make_flow(n_layers)
+        y = tf.constant(random_state.normal(
+            size=[100 * scale, n_features]).astype(np.float32))
+        x, log_det = flow.inverse_transform(y)
+        session.run(tf.global_variables_initializer())
+
+        yield lambda: session.run([x, log_det])
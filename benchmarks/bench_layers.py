@@ -0,0 +1,128 @@
+from functools import partial
+
+import numpy as np
+import tensorflow as tf
+
+from tfsnippet.layers import recompute_sequential, resnet_conv2d_block
+from .runner import benchmark
+
+
+def peak_memory_bytes(run_metadata, graph):
+    """
+    Estimate the peak memory of the op outputs in a traced step.
+
+    Each buffer (aliases of the same allocation are merged) is regarded as
+    being alive from the start of its producer, until the end of its last
+    consumer.  The temporary buffers used within the ops are not counted.
+
+    Args:
+        run_metadata (tf.RunMetadata): The run metadata of a step, traced
+            with ``tf.RunOptions.FULL_TRACE``.
+        graph (tf.Graph): The graph of the step.
+
+    Returns:
+        int: The peak memory, in bytes.
+    """
+    # the execution time range of each op
+    op_times = {}
+    outputs = []
+    for dev_stats in run_metadata.step_stats.dev_stats:
+        for node_stats in dev_stats.node_stats:
+            name = node_stats.node_name.split(':', 1)[0]
+            start = node_stats.all_start_micros
+            end = start + node_stats.all_end_rel_micros
+            if name in op_times:
+                start = min(start, op_times[name][0])
+                end = max(end, op_times[name][1])
+            op_times[name] = (start, end)
+            for output in node_stats.output:
+                outputs.append(
+                    (name, output.slot,
+                     output.tensor_description.allocation_description))
+
+    # the live range of each buffer
+    buffers = {}
+    for name, slot, alloc in outputs:
+        if alloc.allocated_bytes <= 0:
+            continue
+        start, end = op_times[name]
+        try:
+            consumers = graph.get_operation_by_name(name). \
+                outputs[slot].consumers()
+        except (KeyError, IndexError, ValueError):
+            consumers = []
+        for op in consumers:
+            if op.name in op_times:
+                end = max(end, op_times[op.name][1])
+
+        if alloc.allocation_id:
+            key = (alloc.allocator_name, alloc.allocation_id)
+        else:
+            key = (name, slot)
+        if key in buffers:
+            size, old_start, old_end = buffers[key]
+            buffers[key] = (size, min(start, old_start), max(end, old_end))
+        else:
+            buffers[key] = (alloc.allocated_bytes, start, end)
+
+    # sweep over the allocation and deallocation events, where the
+    # allocations at the same time are ordered before the deallocations
+    events = []
+    for size, start, end in buffers.values():
+        events.append((start, 0, size))
+        events.append((end, 1, -size))
+    peak = in_use = 0
+    for _, _, delta in sorted(events):
+        in_use += delta
+        peak = max(peak, in_use)
+    return peak
+
+
+def resnet_backprop(scale, depth, segment_size, recompute,
+                    size=16, channels=16):
+    random_state = np.random.RandomState(1234)
+
+    with tf.Graph().as_default() as graph, tf.Session() as session:
+        x = tf.constant(random_state.normal(
+            size=[8 * scale, size, size, channels]).astype(np.float32))
+        layers = [
+            partial(resnet_conv2d_block, out_channels=channels,
+                    kernel_size=3, activation_fn=tf.nn.leaky_relu)
+        ] * depth
+        if recompute:
+            y = recompute_sequential(x, layers, segment_size=segment_size)
+        else:
+            y = x
+            for layer in layers:
+                y = layer(y)
+        loss = tf.reduce_mean(tf.square(y))
+        train_op = tf.train.GradientDescentOptimizer(0.001).minimize(loss)
+        session.run(tf.global_variables_initializer())
+
+        # measure the peak memory of one traced training step
+        run_metadata = tf.RunMetadata()
+        session.run(
+            train_op,
+            options=tf.RunOptions(trace_level=tf.RunOptions.FULL_TRACE),
+            run_metadata=run_metadata
+        )
+        info = {'peak_memory_bytes': peak_memory_bytes(run_metadata, graph)}
+
+        yield (lambda: session.run(train_op)), info
+
+
+# peak memory against depth, without re-computation, with re-computation of
+# each block, and with re-computation of every sqrt(depth) blocks
+for _depth in (4, 16):
+    benchmark(
+        'layers.resnet_backprop.depth_{}'.format(_depth),
+        scales=('small', 'medium')
+    )(partial(resnet_backprop, depth=_depth, segment_size=1,
+              recompute=False))
+    for _segment_size in sorted({1, int(np.sqrt(_depth))}):
+        benchmark(
+            'layers.resnet_backprop.depth_{}.recompute_{}'.format(
+                _depth, _segment_size),
+            scales=('small', 'medium')
+        )(partial(resnet_backprop, depth=_depth, segment_size=_segment_size,
+                  recompute=True))
@@ -0,0 +1,77 @@
+import numpy as np
+import tensorflow as tf
+
+from tfsnippet.layers import (conv2d, pixelcnn_2d_input, pixelcnn_2d_output,
+                              pixelcnn_conv2d_resnet,
+                              pixelcnn_conv2d_resnet_receptive_field)
+from tfsnippet.ops import pixelcnn_2d_sample
+from .runner import benchmark
+
+
+@benchmark('ops.pixelcnn_2d_sample', scales=('small', 'medium'))
+def pixelcnn_sample(scale, size=8, channels=3):
+    # the sampling loop re-computes the whole network at each pixel, thus
+    # the batch size rather than the image size grows with the scale
+    random_state = np.random.RandomState(1234)
+
+    with tf.Graph().as_default(), tf.Session() as session:
+        x = tf.constant(random_state.normal(
+            size=[4 * scale, size, size, channels]).astype(np.float32))
+        net = tf.make_template(
+            'net',
+            lambda x: conv2d(x, channels, kernel_size=(3, 3),
+                             channels_last=True)
+        )
+        _ = net(x)  # create the variables outside of the sampling loop
+
+        def fn(i, inputs):
+            return [net(inputs[0])]
+
+        y = pixelcnn_2d_sample(fn, [x], size, size, channels_last=True)[0]
+        session.run(tf.global_variables_initializer())
+
+        yield lambda: session.run(y)
+
+
+def _pixelcnn_resnet_sample(scale, receptive_field, size=16, channels=3,
+                            n_layers=2):
+    random_state = np.random.RandomState(1234)
+
+    with tf.Graph().as_default(), tf.Session() as session:
+        x = tf.constant(random_state.normal(
+            size=[scale, size, size, channels]).astype(np.float32))
+
+        def net(x):
+            h = pixelcnn_2d_input(x)
+            for _ in range(n_layers):
+                h = pixelcnn_conv2d_resnet(
+                    h, out_channels=32, activation_fn=tf.nn.leaky_relu)
+            return tf.tanh(conv2d(
+                pixelcnn_2d_output(h), channels, kernel_size=(1, 1)))
+
+        net = tf.make_template('net', net)
+        _ = net(x)  # create the variables outside of the sampling loop
+
+        if receptive_field:
+            y = pixelcnn_2d_sample(
+                lambda i, inputs, window: [net(inputs[0])], [x], size, size,
+                receptive_field=pixelcnn_conv2d_resnet_receptive_field(
+                    n_layers)
+            )[0]
+        else:
+            y = pixelcnn_2d_sample(
+                lambda i, inputs: [net(inputs[0])], [x], size, size)[0]
+        session.run(tf.global_variables_initializer())
+
+        yield lambda: session.run(y)
+
+
+@benchmark('ops.pixelcnn_2d_sample.resnet', scales=('small', 'medium'))
+def pixelcnn_resnet_sample(scale):
+    return _pixelcnn_resnet_sample(scale, receptive_field=False)
+
+
+@benchmark('ops.pixelcnn_2d_sample.resnet_receptive_field',
+           scales=('small', 'medium'))
+def pixelcnn_resnet_sample_receptive_field(scale):
+    return _pixelcnn_resnet_sample(scale, receptive_field=True)
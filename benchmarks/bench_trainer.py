@@ -0,0 +1,37 @@
+import numpy as np
+import tensorflow as tf
+
+from tfsnippet.dataflows import DataFlow
+from tfsnippet.scaffold import TrainLoop
+from tfsnippet.trainer import Trainer
+from tfsnippet.utils import ensure_variables_initialized
+from .runner import benchmark
+
+
+@benchmark('trainer.run')
+def trainer_run(scale, n_features=32):
+    # a trivial train operation, such that the time is dominated by the
+    # overhead of the training loop and the trainer
+    random_state = np.random.RandomState(1234)
+    x = random_state.normal(size=[640 * scale, n_features]). \
+        astype(np.float32)
+    df = DataFlow.arrays([x], batch_size=64)
+
+    with tf.Graph().as_default(), tf.Session().as_default():
+        ph = tf.placeholder(tf.float32, [None, n_features])
+        var = tf.get_variable('var', shape=[n_features], dtype=tf.float32,
+                              initializer=tf.zeros_initializer())
+        loss = tf.reduce_mean(ph)
+        train_op = tf.assign(var, tf.reduce_mean(ph, axis=0))
+        ensure_variables_initialized()
+
+        def run():
+            with TrainLoop([var], max_epoch=1, early_stopping=False,
+                           print_func=lambda *args: None,
+                           show_eta=False) as loop:
+                trainer = Trainer(loop, train_op, [ph], df,
+                                  metrics={'loss': loss})
+                trainer.log_after_steps(100)
+                trainer.run()
+
+        yield run
@@ -0,0 +1,45 @@
+import numpy as np
+
+from tfsnippet.utils import StatisticsCollector, ColumnarStatisticsCollector
+from .runner import benchmark
+
+
+@benchmark('utils.statistics_collector_scalar')
+def statistics_collector_scalar(scale):
+    values = np.random.RandomState(1234).normal(size=[1000 * scale]).tolist()
+    collector = StatisticsCollector()
+
+    def run():
+        collector.reset()
+        for v in values:
+            collector.collect(v)
+
+    yield run
+
+
+@benchmark('utils.statistics_collector_array')
+def statistics_collector_array(scale):
+    values = np.random.RandomState(1234).normal(size=[100 * scale, 64])
+    collector = StatisticsCollector(shape=[64])
+
+    def run():
+        collector.reset()
+        for v in values:
+            collector.collect(v)
+
+    yield run
+
+
+@benchmark('utils.columnar_statistics_collector')
+def columnar_statistics_collector(scale):
+    names = ['metric_{}'.format(i) for i in range(16)]
+    values = np.random.RandomState(1234).normal(size=[1000 * scale, 16])
+    collector = ColumnarStatisticsCollector()
+    indices = collector.indices_of(names)
+
+    def run():
+        collector.reset()
+        for v in values:
+            collector.collect_columns(indices, v)
+
+    yield run
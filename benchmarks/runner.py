@@ -0,0 +1,284 @@
+from __future__ import print_function
+
+import codecs
+import fnmatch
+import importlib
+import json
+import os
+import platform
+import sys
+import time
+from argparse import ArgumentParser
+from collections import OrderedDict
+
+import numpy as np
+import six
+
+__all__ = ['SCALES', 'benchmark', 'run_benchmarks', 'compare_results',
+           'main']
+
+SCALES = OrderedDict([('small', 1), ('medium', 10), ('large', 100)])
+"""The multipliers of the synthetic data sizes at each scale."""
+
+BENCHMARK_MODULES = ['bench_dataflows', 'bench_distributions', 'bench_flows',
+                     'bench_layers', 'bench_ops', 'bench_trainer',
+                     'bench_utils']
+
+_BENCHMARKS = OrderedDict()
+
+
+def benchmark(name, scales=tuple(SCALES)):
+    """
+    Register a benchmark.
+
+    The decorated function should be a generator, which receives the scale
+    multiplier, does all the setup work, and then yields the function to be
+    timed.  The teardown work can be placed after the `yield` statement.
+    For example::
+
+        @benchmark('dataflows.array_flow')
+        def array_flow(scale):
+            x = np.random.normal(size=[1000 * scale, 32])
+            flow = DataFlow.arrays([x], batch_size=64)
+
+            def run():
+                for _ in flow:
+                    pass
+
+            yield run
+
+    The generator may also yield a tuple of ``(run, info)``, where `info` is
+    a dict of extra results measured during the setup (e.g., the peak
+    memory), to be recorded along with the timings under ``"info"``.
+
+    Args:
+        name (str): Name of the benchmark.
+        scales (Iterable[str]): The scales supported by this benchmark.
+            (default all the scales in :data:`SCALES`)
+    """
+    scales = tuple(scales)
+    for scale in scales:
+        if scale not in SCALES:
+            raise ValueError('Unknown scale: {!r}'.format(scale))
+
+    def wrapper(fn):
+        if name in _BENCHMARKS:
+            raise KeyError('Benchmark already registered: {!r}'.format(name))
+        _BENCHMARKS[name] = (fn, scales)
+        return fn
+    return wrapper
+
+
+def _load_benchmarks():
+    for module in BENCHMARK_MODULES:
+        importlib.import_module('benchmarks.' + module)
+
+
+def _time_function(run, repeat, min_time):
+    # calibrate the number of calls in each repeat, such that each repeat
+    # takes at least `min_time` seconds
+    number = 1
+    while True:
+        start_time = time.time()
+        for _ in range(number):
+            run()
+        elapsed = time.time() - start_time
+        if elapsed >= min_time or number >= 1 << 20:
+            break
+        number *= 10 if elapsed < min_time / 10. else 2
+
+    timings = [elapsed / number]
+    for _ in range(repeat - 1):
+        start_time = time.time()
+        for _ in range(number):
+            run()
+        timings.append((time.time() - start_time) / number)
+
+    return OrderedDict([
+        ('min', float(np.min(timings))),
+        ('median', float(np.median(timings))),
+        ('mean', float(np.mean(timings))),
+        ('std', float(np.std(timings))),
+        ('number', number),
+        ('repeat', repeat),
+    ])
+
+
+def _get_environment():
+    env = OrderedDict([
+        ('python', platform.python_version()),
+        ('platform', platform.platform()),
+        ('numpy', np.__version__),
+        ('time', time.strftime('%Y-%m-%d %H:%M:%S')),
+    ])
+    tf = sys.modules.get('tensorflow')
+    if tf is not None:
+        env['tensorflow'] = tf.__version__
+    return env
+
+
+def run_benchmarks(patterns=None, scales=('small', 'medium'), repeat=5,
+                   min_time=0.2, print_func=print):
+    """
+    Run the registered benchmarks.
+
+    Args:
+        patterns (Iterable[str]): If specified, only the benchmarks whose
+            names match any of these glob patterns will be run.
+        scales (Iterable[str]): The scales to run. (default small, medium)
+        repeat (int): The number of timing repeats of each benchmark.
+        min_time (float): The minimum time of each timing repeat, in seconds.
+        print_func: The function to print the progress.
+
+    Returns:
+        dict: The benchmark results, with the environment information
+            under ``"environment"``, and the timings (in seconds per call)
+            and the extra information of ``"<name>[<scale>]"`` under
+            ``"results"``.
+    """
+    _load_benchmarks()
+    patterns = list(patterns or ())
+    results = OrderedDict()
+
+    for name, (fn, supported_scales) in six.iteritems(_BENCHMARKS):
+        if patterns and not any(fnmatch.fnmatch(name, p) for p in patterns):
+            continue
+        for scale in scales:
+            if scale not in supported_scales:
+                continue
+            key = '{}[{}]'.format(name, scale)
+            gen = fn(SCALES[scale])
+            try:
+                run = next(gen)
+                info = None
+                if isinstance(run, tuple):
+                    run, info = run
+                run()  # warm up
+                results[key] = _time_function(run, repeat, min_time)
+                if info is not None:
+                    results[key]['info'] = OrderedDict(sorted(info.items()))
+            finally:
+                gen.close()
+            info_str = ''.join(
+                ' {}={}'.format(k, v)
+                for k, v in six.iteritems(results[key].get('info', {}))
+            )
+            print_func('{}: {:.6g}s{}'.format(
+                key, results[key]['median'], info_str))
+
+    return OrderedDict([
+        ('environment', _get_environment()),
+        ('results', results),
+    ])
+
+
+def compare_results(results, baseline, tolerance=0.2, tolerances=None):
+    """
+    Compare the benchmark results with the baseline.
+
+    A benchmark is regarded as regressed, if its median time per call
+    exceeds ``(1 + tolerance)`` times of the baseline.
+
+    Args:
+        results (dict): The benchmark results.
+        baseline (dict): The baseline benchmark results.
+        tolerance (float): The default tolerance of slowdown. (default 0.2)
+        tolerances (dict[str, float]): The tolerances of the benchmarks,
+            whose names match these glob patterns.
+
+    Returns:
+        list[(str, float, float, float, bool)]: The ``(key, baseline time,
+            time, ratio, is_regressed)`` of each benchmark in both results.
+    """
+    tolerances = dict(tolerances or ())
+    ret = []
+    for key, value in six.iteritems(results['results']):
+        base_value = baseline['results'].get(key)
+        if base_value is None:
+            continue
+        tol = tolerance
+        for pattern, t in six.iteritems(tolerances):
+            if fnmatch.fnmatch(key.split('[', 1)[0], pattern):
+                tol = t
+        ratio = value['median'] / max(base_value['median'], 1e-12)
+        ret.append((key, base_value['median'], value['median'], ratio,
+                    ratio > 1. + tol))
+    return ret
+
+
+def _load_json(path):
+    with codecs.open(path, 'rb', 'utf-8') as f:
+        return json.load(f, object_pairs_hook=OrderedDict)
+
+
+def _save_json(obj, path):
+    parent = os.path.split(os.path.abspath(path))[0]
+    if not os.path.isdir(parent):
+        os.makedirs(parent)
+    with codecs.open(path, 'wb', 'utf-8') as f:
+        f.write(json.dumps(obj, indent=2))
+        f.write('\n')
+
+
+def main(argv=None):
+    parser = ArgumentParser(
+        prog='python -m benchmarks',
+        description='Run the TFSnippet benchmarks on CPU.')
+    parser.add_argument('-k', '--pattern', action='append', default=[],
+                        help='Only run the benchmarks matching this glob '
+                             'pattern.  Can be specified multiple times.')
+    parser.add_argument('-s', '--scale', action='append', default=[],
+                        choices=list(SCALES),
+                        help='The scale to run.  Can be specified multiple '
+                             'times.  (default small and medium)')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='The number of timing repeats.')
+    parser.add_argument('--min-time', type=float, default=0.2,
+                        help='The minimum time of each repeat, in seconds.')
+    parser.add_argument('-o', '--output',
+                        help='Save the results as JSON to this file.')
+    parser.add_argument('-b', '--baseline',
+                        help='Compare the results with this baseline file.')
+    parser.add_argument('-t', '--tolerance', type=float, default=0.2,
+                        help='The default tolerance of slowdown against the '
+                             'baseline.  (default 0.2)')
+    parser.add_argument('--tolerance-for', action='append', default=[],
+                        metavar='PATTERN=TOLERANCE',
+                        help='The tolerance of benchmarks matching the glob '
+                             'pattern.  Can be specified multiple times.')
+    args = parser.parse_args(argv)
+
+    # run the benchmarks on CPU only
+    os.environ.setdefault('CUDA_VISIBLE_DEVICES', '')
+
+    tolerances = OrderedDict()
+    for s in args.tolerance_for:
+        pattern, tol = s.rsplit('=', 1)
+        tolerances[pattern] = float(tol)
+
+    results = run_benchmarks(
+        patterns=args.pattern,
+        scales=args.scale or ('small', 'medium'),
+        repeat=args.repeat,
+        min_time=args.min_time,
+        print_func=lambda s: print(s, file=sys.stderr)
+    )
+    if args.output:
+        _save_json(results, args.output)
+    else:
+        print(json.dumps(results, indent=2))
+
+    if args.baseline:
+        comparison = compare_results(
+            results, _load_json(args.baseline), tolerance=args.tolerance,
+            tolerances=tolerances
+        )
+        regressed = False
+        for key, base_time, new_time, ratio, is_regressed in comparison:
+            print('{}{}: {:.6g}s -> {:.6g}s ({:+.1%})'.format(
+                'REGRESSED ' if is_regressed else '', key, base_time,
+                new_time, ratio - 1.), file=sys.stderr)
+            regressed = regressed or is_regressed
+        if regressed:
+            return 1
+    return 0
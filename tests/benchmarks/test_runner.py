@@ -0,0 +1,128 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from collections import OrderedDict
+
+from mock import mock
+
+from benchmarks import runner
+from benchmarks.runner import compare_results, main
+
+
+def make_results(medians):
+    return OrderedDict([
+        ('environment', OrderedDict()),
+        ('results', OrderedDict(
+            (key, OrderedDict([('median', median)]))
+            for key, median in medians
+        )),
+    ])
+
+
+class CompareResultsTestCase(unittest.TestCase):
+
+    def test_compare(self):
+        baseline = make_results([
+            ('ops.a[small]', 1.), ('ops.a[medium]', 2.), ('flows.b[small]', 1.)
+        ])
+
+        # test all the benchmarks pass within the default tolerance
+        results = make_results([
+            ('ops.a[small]', 1.1), ('ops.a[medium]', 1.5),
+            ('flows.b[small]', 1.2)
+        ])
+        self.assertEqual(
+            [('ops.a[small]', 1., 1.1, 1.1, False),
+             ('ops.a[medium]', 2., 1.5, .75, False),
+             ('flows.b[small]', 1., 1.2, 1.2, False)],
+            [(k, b, t, round(r, 6), g)
+             for k, b, t, r, g in compare_results(results, baseline)]
+        )
+
+        # test the regression above the tolerance
+        results = make_results([
+            ('ops.a[small]', 1.3), ('flows.b[small]', 1.3)
+        ])
+        self.assertEqual(
+            [('ops.a[small]', True), ('flows.b[small]', True)],
+            [(k, g) for k, _, _, _, g in compare_results(results, baseline)]
+        )
+
+        # test the per-pattern tolerances, where the last matching pattern
+        # takes effect
+        self.assertEqual(
+            [('ops.a[small]', False), ('flows.b[small]', True)],
+            [(k, g) for k, _, _, _, g in compare_results(
+                results, baseline,
+                tolerances=OrderedDict([('*', .1), ('ops.*', .5)])
+            )]
+        )
+        self.assertEqual(
+            [('ops.a[small]', True), ('flows.b[small]', True)],
+            [(k, g) for k, _, _, _, g in compare_results(
+                results, baseline, tolerance=.5,
+                tolerances={'ops.a[*': .5, 'flows.*': .1, 'ops.a': .1}
+            )]
+        )
+
+    def test_missing_baseline_entries(self):
+        # the benchmarks not found in the baseline are not compared
+        baseline = make_results([('ops.a[small]', 1.)])
+        results = make_results([('ops.a[small]', 1.), ('ops.new[small]', 9.)])
+        self.assertEqual(
+            [('ops.a[small]', 1., 1., 1., False)],
+            compare_results(results, baseline)
+        )
+        self.assertEqual([], compare_results(results, make_results([])))
+
+
+class MainTestCase(unittest.TestCase):
+
+    def run_main(self, medians, baseline_medians, args=()):
+        # the runner does not depend on TensorFlow, thus neither should the
+        # tests, so `tfsnippet.utils.TemporaryDirectory` is not used
+        tempdir = tempfile.mkdtemp()
+        try:
+            baseline_path = os.path.join(tempdir, 'baseline.json')
+            output_path = os.path.join(tempdir, 'results.json')
+            with open(baseline_path, 'w') as f:
+                json.dump(make_results(baseline_medians), f)
+            with mock.patch.object(
+                    runner, 'run_benchmarks',
+                    return_value=make_results(medians)) as run_benchmarks:
+                code = main(['-b', baseline_path, '-o', output_path] +
+                            list(args))
+            with open(output_path) as f:
+                self.assertEqual(make_results(medians), json.load(f))
+            self.assertEqual(1, run_benchmarks.call_count)
+        finally:
+            shutil.rmtree(tempdir)
+        return code
+
+    def test_exit_code(self):
+        baseline = [('ops.a[small]', 1.), ('flows.b[small]', 1.)]
+
+        # test pass
+        self.assertEqual(0, self.run_main(
+            [('ops.a[small]', 1.1), ('flows.b[small]', .9)], baseline))
+
+        # test regression above the tolerance
+        self.assertEqual(1, self.run_main(
+            [('ops.a[small]', 1.1), ('flows.b[small]', 1.3)], baseline))
+        self.assertEqual(1, self.run_main(
+            [('ops.a[small]', 1.1), ('flows.b[small]', 1.3)], baseline,
+            ['-t', '.05', '--tolerance-for', 'flows.*=0.5']
+        ))
+        self.assertEqual(0, self.run_main(
+            [('ops.a[small]', 1.1), ('flows.b[small]', 1.3)], baseline,
+            ['--tolerance-for', 'flows.*=0.5']
+        ))
+
+        # test missing baseline entries are not regarded as regressions
+        self.assertEqual(0, self.run_main(
+            [('ops.a[small]', 1.), ('ops.new[small]', 100.)],
+            [('ops.a[small]', 1.)]
+        ))
+        self.assertEqual(0, self.run_main([('ops.a[small]', 100.)], []))
@@ -0,0 +1,152 @@
+import os
+import unittest
+
+import numpy as np
+import pytest
+from mock import mock
+
+from tfsnippet.dataflows import DataFlow
+from tfsnippet.dataflows.archive_flow import ArchiveFlow
+from tfsnippet.utils import TemporaryDirectory, Extractor
+
+
+class _MyError(Exception):
+    pass
+
+
+def get_asset_path(name):
+    return os.path.join(
+        os.path.split(os.path.split(os.path.abspath(__file__))[0])[0],
+        'utils',
+        'assets',
+        name
+    )
+
+
+def decode(name, content):
+    return name, len(content)
+
+
+PAYLOAD_NAMES = ['a/1.txt', 'b/2.txt', 'c.txt']
+PAYLOAD_SIZES = [7, 7, 5]
+
+
+class ArchiveFlowTestCase(unittest.TestCase):
+
+    def test_errors(self):
+        with pytest.raises(ValueError, match='`batch_size` must be at '
+                                             'least 1'):
+            _ = ArchiveFlow(get_asset_path('payload.zip'), decode,
+                            batch_size=0)
+        with pytest.raises(ValueError, match='`num_workers` must be at '
+                                             'least 0'):
+            _ = ArchiveFlow(get_asset_path('payload.zip'), decode,
+                            batch_size=2, num_workers=-1)
+        with pytest.raises(ValueError, match='The archive file cannot be '
+                                             'randomly accessed'):
+            _ = ArchiveFlow(get_asset_path('payload.tar.gz'), decode,
+                            batch_size=2, shuffle=True)
+        with TemporaryDirectory() as tmpdir:
+            archive_file = os.path.join(tmpdir, 'payload.txt')
+            with open(archive_file, 'wb') as f:
+                f.write(b'')
+            with pytest.raises(IOError, match='File is not a supported '
+                                              'archive file'):
+                _ = ArchiveFlow(archive_file, decode, batch_size=2)
+
+    def test_props(self):
+        flow = DataFlow.archive(get_asset_path('payload.zip'), decode,
+                                batch_size=2, shuffle=True,
+                                skip_incomplete=True, num_workers=3)
+        self.assertIsInstance(flow, ArchiveFlow)
+        self.assertEqual(get_asset_path('payload.zip'), flow.archive_file)
+        self.assertEqual(2, flow.batch_size)
+        self.assertTrue(flow.is_shuffled)
+        self.assertTrue(flow.skip_incomplete)
+        self.assertEqual(3, flow.num_workers)
+
+    def test_iterator(self):
+        for archive in ('payload.zip', 'payload.tar', 'payload.tar.gz'):
+            for num_workers in (0, 1, 3):
+                # test a single mini-batch
+                flow = DataFlow.archive(get_asset_path(archive), decode,
+                                        batch_size=3, num_workers=num_workers)
+                batches = list(flow)
+                self.assertEqual(1, len(batches))
+                self.assertListEqual(PAYLOAD_NAMES, batches[0][0].tolist())
+                self.assertListEqual(PAYLOAD_SIZES, batches[0][1].tolist())
+
+                # test multiple mini-batches
+                flow = DataFlow.archive(get_asset_path(archive), decode,
+                                        batch_size=2, num_workers=num_workers)
+                for epoch in range(2):
+                    batches = list(flow)
+                    self.assertEqual(2, len(batches))
+                    self.assertListEqual(
+                        PAYLOAD_NAMES,
+                        np.concatenate([b[0] for b in batches]).tolist()
+                    )
+
+                # test skip incomplete
+                flow = DataFlow.archive(get_asset_path(archive), decode,
+                                        batch_size=2, skip_incomplete=True,
+                                        num_workers=num_workers)
+                batches = list(flow)
+                self.assertEqual(1, len(batches))
+                self.assertListEqual(PAYLOAD_NAMES[:2],
+                                     batches[0][0].tolist())
+
+        # test name filter, and decoder returning a single item
+        flow = DataFlow.archive(
+            get_asset_path('payload.zip'),
+            lambda name, content: np.frombuffer(content, dtype=np.uint8),
+            batch_size=2,
+            name_filter=lambda name: name.endswith('.txt') and '/' in name
+        )
+        batches = list(flow)
+        self.assertEqual(1, len(batches))
+        self.assertEqual(1, len(batches[0]))
+        np.testing.assert_equal(
+            [np.frombuffer(b'a/1.txt', dtype=np.uint8),
+             np.frombuffer(b'b/2.txt', dtype=np.uint8)],
+            batches[0][0]
+        )
+
+    def test_shuffle(self):
+        for archive in ('payload.zip', 'payload.tar'):
+            with Extractor.open(get_asset_path(archive)) as extractor:
+                extractor_class = type(extractor)
+            with mock.patch.object(
+                    extractor_class, '_list_members', autospec=True,
+                    side_effect=extractor_class._list_members) as m:
+                flow = DataFlow.archive(
+                    get_asset_path(archive), decode, batch_size=3,
+                    shuffle=True, name_filter=lambda name: name != 'b/2.txt',
+                    random_state=np.random.RandomState(1234)
+                )
+                orders = set()
+                for epoch in range(20):
+                    [(names, sizes)] = list(flow)
+                    self.assertListEqual(['a/1.txt', 'c.txt'], sorted(names))
+                    sizes_map = dict(zip(PAYLOAD_NAMES, PAYLOAD_SIZES))
+                    self.assertListEqual([sizes_map[n] for n in names],
+                                         sizes.tolist())
+                    orders.add(tuple(names.tolist()))
+                self.assertEqual(2, len(orders))
+
+                # the archive should have been indexed only once
+                self.assertEqual(1, m.call_count)
+
+    def test_decoder_error(self):
+        def decoder(name, content):
+            if name == 'b/2.txt':
+                raise _MyError('cannot decode')
+            return name,
+
+        for num_workers in (0, 2):
+            flow = DataFlow.archive(get_asset_path('payload.zip'), decoder,
+                                    batch_size=1, num_workers=num_workers)
+            it = iter(flow)
+            self.assertEqual(('a/1.txt',), tuple(a[0] for a in next(it)))
+            with pytest.raises(_MyError, match='cannot decode'):
+                _ = next(it)
@@ -0,0 +1,66 @@
+import unittest
+
+import numpy as np
+import pytest
+from mock import Mock
+
+from tfsnippet.dataflows import DataFlow
+from tfsnippet.dataflows.shard_flow import ShardFlow
+
+
+class ShardFlowTestCase(unittest.TestCase):
+
+    def test_flow(self):
+        source = DataFlow.arrays([np.arange(14)], batch_size=2)
+        flows = [source.shard(3, i) for i in range(3)]
+        for i, flow in enumerate(flows):
+            self.assertIsInstance(flow, ShardFlow)
+            self.assertIs(source, flow.source)
+            self.assertEqual(3, flow.num_shards)
+            self.assertEqual(i, flow.index)
+
+        # the last batch [12, 13] is dropped, since it is an incomplete round
+        batches = [[b[0] for b in flow] for flow in flows]
+        np.testing.assert_equal([[0, 1], [6, 7]], batches[0])
+        np.testing.assert_equal([[2, 3], [8, 9]], batches[1])
+        np.testing.assert_equal([[4, 5], [10, 11]], batches[2])
+
+        # a single shard should produce all the batches
+        np.testing.assert_equal(
+            np.arange(14), source.shard(1, 0).get_arrays()[0])
+
+    def test_shuffled_flow(self):
+        source = DataFlow.arrays([np.arange(14)], batch_size=3, shuffle=True,
+                                 random_state=np.random.RandomState(1234))
+        flows = [source.shard(3, i) for i in range(3)]
+
+        # the samples are sharded before shuffling, such that the shards
+        # never overlap, and the remaining samples [12, 13] are dropped
+        for epoch in range(2):
+            batches = [[b[0] for b in flow] for flow in flows]
+            for i, flow_batches in enumerate(batches):
+                self.assertEqual([3, 1], [len(b) for b in flow_batches])
+                np.testing.assert_equal(
+                    np.arange(i * 4, (i + 1) * 4),
+                    np.sort(np.concatenate(flow_batches))
+                )
+
+        # test `skip_incomplete` is respected
+        source = DataFlow.arrays([np.arange(14)], batch_size=3, shuffle=True,
+                                 skip_incomplete=True)
+        self.assertEqual([3], [len(b[0]) for b in source.shard(3, 1)])
+
+    def test_errors(self):
+        source = DataFlow.arrays([np.arange(10)], batch_size=2)
+        with pytest.raises(ValueError,
+                           match='`num_shards` must be at least 1'):
+            _ = source.shard(0, 0)
+        with pytest.raises(ValueError,
+                           match=r'`index` must be within \[0, 2\)'):
+            _ = source.shard(2, 2)
+        with pytest.raises(ValueError,
+                           match=r'`index` must be within \[0, 2\)'):
+            _ = source.shard(2, -1)
+        with pytest.raises(ValueError,
+                           match='Only a shuffled `ArrayFlow` can be sharded'):
+            _ = ShardFlow(Mock(is_shuffled=True), 2, 0)
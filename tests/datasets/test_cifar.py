@@ -40,6 +40,19 @@ class CifarTestCase(unittest.TestCase):
                            match='`x_shape` does not product to 3072'):
             _ = load_cifar10(x_shape=(1, 2, 3))
 
+        # test lazy = True
+        train, test = load_cifar10(x_shape=(1024, 3), lazy=True)
+        self.assertEqual(np.uint8, train.x.dtype)
+        self.assertTupleEqual(train.x.shape, (50000, 32, 32, 3))
+        train_x2, train_y2 = train.get_arrays()
+        self.assertEqual(np.float32, train_x2.dtype)
+        np.testing.assert_equal(train_x2, train_x)
+        np.testing.assert_equal(train_y2, train_y)
+        [batch_x, batch_y] = next(iter(test.as_flow(
+            batch_size=100, normalize_x=True, x_shape=(32, 32, 3))))
+        self.assertTupleEqual(batch_x.shape, (100, 32, 32, 3))
+        self.assertLess(np.max(batch_x), 1. + 1e-5)
+
     @skipUnlessRunDatasetsTests()
     def test_fetch_cifar100(self):
         # test channels_last = True, normalize_x = False
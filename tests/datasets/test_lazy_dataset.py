@@ -0,0 +1,76 @@
+import unittest
+
+import numpy as np
+import pytest
+
+from tfsnippet.datasets import LazyDataset
+
+
+class LazyDatasetTestCase(unittest.TestCase):
+
+    def test_props(self):
+        x = np.arange(60, dtype=np.uint8).reshape([5, 3, 4])
+        y = np.arange(5, dtype=np.int32)
+        ds = LazyDataset(x, y)
+        self.assertEqual(5, len(ds))
+        self.assertIs(ds.x, x)
+        self.assertIs(ds.y, y)
+        self.assertEqual((3, 4), ds.x_shape)
+        self.assertEqual(np.float32, ds.x_dtype)
+        self.assertFalse(ds.normalize_x)
+
+        ds = LazyDataset(x, y, x_shape=(12,), x_dtype=np.float64,
+                         normalize_x=True)
+        self.assertEqual((12,), ds.x_shape)
+        self.assertEqual(np.float64, ds.x_dtype)
+        self.assertTrue(ds.normalize_x)
+
+        with pytest.raises(ValueError, match='`x_shape` does not product to '
+                                             '12'):
+            _ = LazyDataset(x, y, x_shape=(5,))
+        with pytest.raises(ValueError, match='`x` and `y` must have the same '
+                                             'data length'):
+            _ = LazyDataset(x, y[:-1])
+        with pytest.raises(ValueError, match='`x` must be at least 1-d array'):
+            _ = LazyDataset(np.array(1, dtype=np.uint8), y)
+
+    def test_as_flow_and_get_arrays(self):
+        x = np.arange(60, dtype=np.uint8).reshape([5, 3, 4])
+        y = np.arange(5, dtype=np.int32)
+        ds = LazyDataset(x, y, x_shape=(12,), normalize_x=True)
+
+        # test the default conversion
+        batches = list(ds.as_flow(batch_size=2))
+        self.assertEqual(3, len(batches))
+        for i, (bx, by) in enumerate(batches):
+            self.assertEqual(np.float32, bx.dtype)
+            np.testing.assert_allclose(
+                x[i * 2: (i + 1) * 2].reshape([-1, 12]) / 255., bx)
+            np.testing.assert_equal(y[i * 2: (i + 1) * 2], by)
+        np.testing.assert_equal(x, ds.x)  # the raw array is not modified
+
+        ax, ay = ds.get_arrays()
+        self.assertEqual(np.float32, ax.dtype)
+        np.testing.assert_allclose(x.reshape([-1, 12]) / 255., ax)
+        np.testing.assert_equal(y, ay)
+
+        # test overriding the default conversion
+        batches = list(ds.as_flow(batch_size=3, x_dtype=np.int64,
+                                  normalize_x=False, x_shape=(4, 3)))
+        self.assertEqual(2, len(batches))
+        for i, (bx, by) in enumerate(batches):
+            self.assertEqual(np.int64, bx.dtype)
+            np.testing.assert_equal(
+                x[i * 3: (i + 1) * 3].reshape([-1, 4, 3]), bx)
+
+        ax, ay = ds.get_arrays(x_dtype=np.uint8, normalize_x=False)
+        self.assertEqual(np.uint8, ax.dtype)
+        np.testing.assert_equal(x.reshape([-1, 12]), ax)
+
+        # test shuffle and skip_incomplete
+        flow = ds.as_flow(batch_size=2, shuffle=True, skip_incomplete=True,
+                          random_state=np.random.RandomState(1234))
+        batches = list(flow)
+        self.assertEqual(2, len(batches))
+        for bx, by in batches:
+            np.testing.assert_allclose(x[by].reshape([-1, 12]) / 255., bx)
@@ -37,3 +37,17 @@ class MnistTestCase(unittest.TestCase):
         with pytest.raises(ValueError,
                            match='`x_shape` does not product to 784'):
             _ = load_mnist(x_shape=(1, 2, 3))
+
+        # test lazy = True
+        train, test = load_mnist(x_shape=(784,), normalize_x=True, lazy=True)
+        self.assertEqual(60000, len(train))
+        self.assertEqual(10000, len(test))
+        self.assertEqual(np.uint8, train.x.dtype)
+        self.assertTupleEqual(train.x.shape, (60000, 28, 28))
+        self.assertTupleEqual(train.y.shape, (60000,))
+        train_x2, train_y2 = train.get_arrays()
+        np.testing.assert_allclose(train_x2, train_x / 255.)
+        np.testing.assert_equal(train_y2, train_y)
+        [batch_x, batch_y] = next(iter(test.as_flow(batch_size=100)))
+        self.assertEqual(np.float32, batch_x.dtype)
+        np.testing.assert_allclose(batch_x, test_x[:100] / 255.)
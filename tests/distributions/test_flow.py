@@ -257,3 +257,98 @@ class FlowDistributionTestCase(tf.test.TestCase):
                 *sess.run([distrib.log_prob(y, group_ndims=2), log_py]),
                 rtol=1e-5
             )
+
+    def test_log_prob_cache(self):
+        mean = tf.constant([0., 1., 2.], dtype=tf.float64)
+        normal = Normal(mean=mean, std=tf.constant(1., dtype=tf.float64))
+        flow = QuadraticFlow(2., 5.)
+        flow.build(tf.constant(0., dtype=tf.float64))
+        distrib = FlowDistribution(normal, flow)
+        inverse_transform = flow.inverse_transform
+        flow.inverse_transform = Mock(wraps=inverse_transform)
+
+        # test the log-densities of a given tensor
+        y = tf.random_normal(shape=[2, 5, 3], dtype=tf.float64)
+        x, log_det = inverse_transform(y)
+        log_py = normal.log_prob(x) + log_det
+
+        log_prob = distrib.log_prob(y)
+        self.assertIs(distrib.log_prob(y), log_prob)
+        log_prob_1 = distrib.log_prob(y, group_ndims=1)
+        self.assertIsInstance(log_prob_1, FlowDistributionDerivedTensor)
+        self.assertIs(log_prob_1.flow_origin, log_prob.flow_origin)
+        self.assertIs(distrib.log_prob(y, group_ndims=1), log_prob_1)
+        log_prob_2 = distrib.log_prob(
+            y, group_ndims=tf.constant(2, dtype=tf.int32))
+        prob = distrib.prob(y, group_ndims=1)
+        self.assertEqual(flow.inverse_transform.call_count, 1)
+
+        with self.test_session() as sess:
+            np.testing.assert_allclose(
+                *sess.run([log_py, log_prob]), rtol=1e-5)
+            np.testing.assert_allclose(
+                *sess.run([tf.reduce_sum(log_py, axis=-1), log_prob_1]),
+                rtol=1e-5
+            )
+            np.testing.assert_allclose(
+                *sess.run([tf.reduce_sum(log_py, axis=[-1, -2]),
+                           log_prob_2]),
+                rtol=1e-5
+            )
+            np.testing.assert_allclose(
+                *sess.run([tf.exp(tf.reduce_sum(log_py, axis=-1)), prob]),
+                rtol=1e-5
+            )
+
+        # test the log-densities of the samples, which should never
+        # perform the inverse transformation
+        flow.inverse_transform.reset_mock()
+        y = distrib.sample(n_samples=5)
+        log_prob = y.log_prob()
+        self.assertIs(distrib.log_prob(y), log_prob)
+        self.assertIs(distrib.log_prob(y.tensor), log_prob)
+        log_prob_1 = y.log_prob(group_ndims=1)
+        self.assertIsInstance(log_prob_1, FlowDistributionDerivedTensor)
+        self.assertIs(log_prob_1.flow_origin, y.flow_origin)
+        self.assertIs(y.log_prob(group_ndims=1), log_prob_1)
+        log_prob_1b = distrib.log_prob(y, group_ndims=1)
+        flow.inverse_transform.assert_not_called()
+
+        x, log_det = inverse_transform(y)
+        log_py = normal.log_prob(x) + log_det
+        with self.test_session() as sess:
+            np.testing.assert_allclose(
+                *sess.run([log_py, log_prob]), rtol=1e-5)
+            np.testing.assert_allclose(
+                *sess.run([tf.reduce_sum(log_py, axis=-1), log_prob_1]),
+                rtol=1e-5
+            )
+            np.testing.assert_allclose(
+                *sess.run([tf.reduce_sum(log_py, axis=-1), log_prob_1b]),
+                rtol=1e-5
+            )
+
+    def test_log_prob_cache_in_while_loop(self):
+        normal = Normal(mean=tf.zeros([3], dtype=tf.float64),
+                        std=tf.constant(1., dtype=tf.float64))
+        flow = QuadraticFlow(2., 5.)
+        flow.build(tf.constant(0., dtype=tf.float64))
+        distrib = FlowDistribution(normal, flow)
+        y = tf.random_normal(shape=[2, 3], dtype=tf.float64)
+
+        def body(i, s):
+            y2 = distrib.sample(n_samples=2)
+            log_p = distrib.log_prob(y, group_ndims=1) + y2.log_prob(1)
+            return i + 1, s + tf.reduce_sum(log_p)
+
+        # the log-densities built inside the loop should not be cached
+        _, s = tf.while_loop(lambda i, s: i < 3, body,
+                             [tf.constant(0), tf.constant(0., tf.float64)])
+        self.assertEqual({}, distrib._log_prob_cache)
+
+        # thus the log-densities used outside of the loop should be
+        # built outside of the loop, and then be cached
+        log_prob = distrib.log_prob(y, group_ndims=1)
+        self.assertIs(distrib.log_prob(y, group_ndims=1), log_prob)
+        with self.test_session() as sess:
+            _ = sess.run([s, log_prob])
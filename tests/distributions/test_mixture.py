@@ -3,10 +3,15 @@ import pytest
 import tensorflow as tf
 from mock import Mock
 
-from tfsnippet import Categorical, Normal, Mixture, OnehotCategorical
+from tfsnippet import (Categorical, Normal, Mixture, OnehotCategorical,
+                       Uniform, Bernoulli)
 from tfsnippet.utils import set_random_seed
 
 
+class _MyNormal(Normal):
+    """A Normal distribution whose parameters cannot be gathered."""
+
+
 class MixtureTestCase(tf.test.TestCase):
 
     def test_errors(self):
@@ -182,7 +187,10 @@ class MixtureTestCase(tf.test.TestCase):
             categorical, components, cat_sample, c_samples = \
                 make_distributions(n_samples)
             mixture = Mixture(categorical, components,
-                              is_reparameterized=is_reparameterized)
+                              is_reparameterized=is_reparameterized,
+                              batch_components=False,
+                              ancestral_sampling=False)
+            self.assertIsNone(mixture.batched_components)
 
             self.assertIs(mixture.categorical, categorical)
             self.assertTupleEqual(mixture.components, tuple(components))
@@ -231,3 +239,213 @@ class MixtureTestCase(tf.test.TestCase):
             logits_dtype=np.float32,
             is_reparameterized=False
         )
+
+    def test_batched_components(self):
+        def check_batched(component_factory, batch_shape, n_samples):
+            logits = np.random.normal(size=batch_shape + [3])
+            components = [component_factory(i) for i in range(3)]
+            categorical = Categorical(logits=logits)
+            mixture = Mixture(categorical, components)
+            slow_mixture = Mixture(categorical, components,
+                                   batch_components=False)
+            self.assertIsInstance(mixture.batched_components,
+                                  type(components[0]))
+            self.assertEqual(
+                mixture.batched_components.get_batch_shape().as_list(),
+                batch_shape + [3]
+            )
+
+            # the log-densities should agree with the slow routine
+            t = slow_mixture.sample(n_samples)
+            x, log_prob, ans = sess.run([
+                t, mixture.log_prob(t, group_ndims=1),
+                slow_mixture.log_prob(t, group_ndims=1)
+            ])
+            np.testing.assert_allclose(log_prob, ans, rtol=1e-5, atol=1e-6)
+
+            t = mixture.sample(n_samples, compute_density=True)
+            self.assertEqual(t.dtype, mixture.dtype)
+            x, log_prob, ans = sess.run(
+                [t, t.log_prob(), slow_mixture.log_prob(t)])
+            self.assertEqual(
+                x.shape,
+                (n_samples,) + tuple(batch_shape) +
+                tuple(mixture.get_value_shape().as_list())
+            )
+            np.testing.assert_allclose(log_prob, ans, rtol=1e-5, atol=1e-6)
+
+        with self.test_session() as sess:
+            check_batched(
+                lambda i: Normal(
+                    mean=np.random.normal(size=[4, 5]).astype(np.float64),
+                    logstd=np.random.normal(size=[5]).astype(np.float64)
+                ),
+                batch_shape=[4, 5],
+                n_samples=11
+            )
+            check_batched(
+                lambda i: Normal(
+                    mean=np.random.normal(size=[4, 5]).astype(np.float64),
+                    std=np.exp(np.random.normal()).astype(np.float64)
+                ),
+                batch_shape=[4, 5],
+                n_samples=11
+            )
+            check_batched(
+                lambda i: OnehotCategorical(
+                    logits=np.random.normal(size=[4, 5, 7]).astype(np.float64),
+                    dtype=tf.int32
+                ),
+                batch_shape=[4, 5],
+                n_samples=11
+            )
+            check_batched(
+                lambda i: Categorical(
+                    logits=np.random.normal(size=[4, 7]).astype(np.float64),
+                    dtype=tf.int32
+                ),
+                batch_shape=[4],
+                n_samples=11
+            )
+
+    def test_batched_components_sample(self):
+        means = np.random.normal(size=[3, 4, 5]).astype(np.float64)
+        cat = np.random.randint(0, 3, size=[11, 4, 5]).astype(np.int32)
+        with self.test_session() as sess:
+            categorical = Categorical(
+                logits=np.random.normal(size=[4, 5, 3]).astype(np.float64))
+            categorical.sample = Mock(return_value=tf.constant(cat))
+            components = [Normal(mean=tf.constant(means[i]), logstd=-30.)
+                          for i in range(3)]
+            mixture = Mixture(categorical, components, is_reparameterized=True)
+            self.assertIsNotNone(mixture.batched_components)
+
+            # the samples should be drawn from the selected components
+            t = mixture.sample(11)
+            ans = np.choose(cat, means)
+            np.testing.assert_allclose(sess.run(t), ans, atol=1e-8)
+
+            # the gradients should be propagated back to the selected means
+            grads = tf.gradients(
+                tf.reduce_sum(t), [c.mean for c in components])
+            for i, g in enumerate(sess.run(grads)):
+                np.testing.assert_allclose(
+                    g, np.sum(cat == i, axis=0).astype(np.float64))
+
+    def test_batched_components_inf_logits(self):
+        # the logits of each component are -inf except the labels, such
+        # that the samples are deterministic
+        labels = np.random.randint(0, 7, size=[3, 4, 5])
+        logits = np.where(np.eye(7, dtype=np.bool_)[labels], 0., -np.inf)
+        cat = np.random.randint(0, 3, size=[11, 4, 5]).astype(np.int32)
+
+        with self.test_session() as sess:
+            categorical = Categorical(
+                logits=np.random.normal(size=[4, 5, 3]).astype(np.float64))
+            categorical.sample = Mock(return_value=tf.constant(cat))
+            components = [Categorical(logits=tf.constant(logits[i]),
+                                      dtype=tf.int32)
+                          for i in range(3)]
+            mixture = Mixture(categorical, components)
+            self.assertIsNotNone(mixture.batched_components)
+
+            # the selected logits should not be NaN
+            selected = mixture._select_batched_params(tf.constant(cat))
+            self.assertEqual(selected.logits.get_shape().as_list(),
+                             [11, 4, 5, 7])
+            np.testing.assert_equal(
+                sess.run(selected.logits), logits[cat, np.arange(4)[:, None],
+                                                  np.arange(5)])
+
+            t = mixture.sample(11)
+            self.assertEqual(t.get_shape().as_list(), [11, 4, 5])
+            np.testing.assert_equal(sess.run(t), np.choose(cat, labels))
+
+    def test_not_batched_components(self):
+        # different families
+        mixture = Mixture(
+            Categorical(logits=tf.zeros([2])),
+            [Normal(0., 0.), Uniform(-1., 1.)]
+        )
+        self.assertIsNone(mixture.batched_components)
+
+        # different numbers of categories
+        mixture = Mixture(
+            Categorical(logits=tf.zeros([2])),
+            [OnehotCategorical(tf.zeros([3])),
+             OnehotCategorical(tf.zeros([4]))]
+        )
+        self.assertIsNone(mixture.batched_components)
+
+        # different parameter dtypes
+        mixture = Mixture(
+            Categorical(logits=tf.zeros([2])),
+            [Bernoulli(tf.zeros([3], dtype=tf.float32)),
+             Bernoulli(tf.zeros([3], dtype=tf.float64))]
+        )
+        self.assertIsNone(mixture.batched_components)
+
+    def test_ancestral_sampling(self):
+        means = np.random.normal(size=[3, 4, 5]).astype(np.float64)
+        cat = np.random.randint(0, 3, size=[11, 4, 5]).astype(np.int32)
+
+        with self.test_session() as sess:
+            categorical = Categorical(
+                logits=np.random.normal(size=[4, 5, 3]).astype(np.float64))
+            categorical.sample = Mock(return_value=tf.constant(cat))
+            components = [
+                Normal(mean=tf.constant(means[0]), logstd=-30.),
+                Uniform(minval=tf.constant(means[1]),
+                        maxval=tf.constant(means[1] + 1e-10)),
+                _MyNormal(mean=tf.constant(means[2]), logstd=-30.),
+            ]
+            mixture = Mixture(categorical, components, is_reparameterized=True)
+            self.assertIsNone(mixture.batched_components)
+
+            # the samples should be drawn from the selected components
+            t = mixture.sample(11)
+            self.assertEqual(t.get_shape().as_list(), [11, 4, 5])
+            np.testing.assert_allclose(
+                sess.run(t), np.choose(cat, means), atol=1e-8)
+
+            # the gradients should be propagated back to the selected means
+            grads = tf.gradients(
+                tf.reduce_sum(t), [components[0].mean, components[2].mean])
+            for i, g in zip([0, 2], sess.run(grads)):
+                np.testing.assert_allclose(
+                    g, np.sum(cat == i, axis=0).astype(np.float64))
+
+            # test without n_samples
+            categorical.sample = Mock(return_value=tf.constant(cat[0]))
+            t = mixture.sample()
+            self.assertEqual(t.get_shape().as_list(), [4, 5])
+            np.testing.assert_allclose(
+                sess.run(t), np.choose(cat[0], means), atol=1e-8)
+
+            # test with dynamic categorical samples
+            cat_ph = tf.placeholder(tf.int32, [None, 4, 5])
+            categorical.sample = Mock(return_value=cat_ph)
+            t = mixture.sample(11)
+            np.testing.assert_allclose(
+                sess.run(t, feed_dict={cat_ph: cat}), np.choose(cat, means),
+                atol=1e-8
+            )
+
+    def test_ancestral_sampling_value_ndims_1(self):
+        # use very sharp logits, such that the samples are deterministic
+        labels = np.random.randint(0, 7, size=[3, 4, 5])
+        logits = (np.eye(7)[labels] * 100.).astype(np.float32)
+        cat = np.random.randint(0, 3, size=[11, 4, 5]).astype(np.int32)
+
+        with self.test_session() as sess:
+            categorical = Categorical(
+                logits=np.random.normal(size=[4, 5, 3]).astype(np.float32))
+            categorical.sample = Mock(return_value=tf.constant(cat))
+            components = [OnehotCategorical(logits=logits[i], dtype=tf.int32)
+                          for i in range(3)]
+            mixture = Mixture(categorical, components, batch_components=False)
+
+            t = mixture.sample(11)
+            self.assertEqual(t.get_shape().as_list(), [11, 4, 5, 7])
+            np.testing.assert_equal(
+                sess.run(t), np.eye(7)[np.choose(cat, labels)])
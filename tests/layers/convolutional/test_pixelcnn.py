@@ -212,6 +212,42 @@ class PixelCNN2DTestCase(tf.test.TestCase):
                 self.assertEqual(kwargs['kernel_regularizer'],
                                  kernel_regularizer)
 
+    def test_pixelcnn_conv2d_resnet_receptive_field(self):
+        # consistent with the one layer dependency in the test below
+        self.assertEqual(pixelcnn_conv2d_resnet_receptive_field(0), (0, 1, 0))
+        self.assertEqual(pixelcnn_conv2d_resnet_receptive_field(1), (4, 3, 2))
+        self.assertEqual(
+            pixelcnn_conv2d_resnet_receptive_field(
+                2, vertical_kernel_size=3, horizontal_kernel_size=(3, 2)),
+            (11, 5, 4)
+        )
+        with pytest.raises(ValueError,
+                           match='`n_layers` must be non-negative: got -1'):
+            _ = pixelcnn_conv2d_resnet_receptive_field(-1)
+
+        # check against the gradients of a multi-layer network
+        np.random.seed(1234)
+        H, W, n_layers = 15, 17, 3
+        top, left, right = pixelcnn_conv2d_resnet_receptive_field(n_layers)
+        self.assertEqual((top, left, right), (8, 7, 6))
+
+        x = tf.constant(np.random.normal(size=[1, H, W, 2]).astype(np.float32))
+        y = pixelcnn_2d_input(x, auxiliary_channel=False)
+        for _ in range(n_layers):
+            y = pixelcnn_conv2d_resnet(
+                y, out_channels=3, activation_fn=tf.nn.leaky_relu)
+        i, j = H - 1, W // 2
+        grad = tf.gradients(
+            tf.reduce_sum(pixelcnn_2d_output(y)[:, i, j]), x)[0]
+
+        with self.test_session() as sess:
+            ensure_variables_initialized()
+            rows, cols = np.where(np.any(sess.run(grad)[0] != 0., axis=-1))
+            self.assertEqual(rows.min(), i - top)
+            self.assertEqual(rows.max(), i)
+            self.assertEqual(cols.min(), j - left)
+            self.assertEqual(cols.max(), j + right)
+
     def test_pixelcnn_conv2d_resnet_pixel_dep(self):
         tf.set_random_seed(1234)
 
@@ -125,9 +125,10 @@ class FlowTestCase(tf.test.TestCase):
 
 class MultiLayerQuadraticFlow(MultiLayerFlow):
 
-    def __init__(self, n_layers):
+    def __init__(self, n_layers, **kwargs):
         super(MultiLayerQuadraticFlow, self).__init__(x_value_ndims=0,
-                                                      n_layers=n_layers)
+                                                      n_layers=n_layers,
+                                                      **kwargs)
         self._flows = []
 
         with tf.variable_scope(None, default_name='MultiLayerQuadraticFlow'):
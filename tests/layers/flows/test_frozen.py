@@ -0,0 +1,172 @@
+import numpy as np
+import pytest
+import tensorflow as tf
+
+from tests.layers.flows.helper import (QuadraticFlow,
+                                       invertible_flow_standard_check)
+from tests.layers.flows.test_linear import naive_invertible_linear
+from tfsnippet.layers import (FrozenAffineFlow, SequentialFlow, ActNorm,
+                              InvertibleDense, InvertibleConv2d, InvertFlow)
+
+
+class FrozenAffineFlowTestCase(tf.test.TestCase):
+
+    def test_frozen_affine_flow(self):
+        np.random.seed(1234)
+
+        with self.test_session() as sess:
+            x = np.random.normal(size=[3, 4, 5, 6]).astype(np.float32)
+
+            for axis, value_ndims in [(-1, 1), (-3, 3)]:
+                n = x.shape[axis]
+                bias = np.random.normal(size=[n]).astype(np.float32)
+                bias_shape = [-1] + [1] * (-axis - 1)
+
+                # test the full kernel
+                kernel = np.random.normal(size=[n, n]).astype(np.float32)
+                y, log_det = naive_invertible_linear(
+                    x, kernel, axis, value_ndims)
+                y += np.reshape(bias, bias_shape)
+
+                flow = FrozenAffineFlow(kernel, bias=bias, axis=axis,
+                                        value_ndims=value_ndims)
+                y_out, log_det_out = sess.run(flow.transform(x))
+                np.testing.assert_allclose(y_out, y, rtol=1e-5, atol=1e-5)
+                np.testing.assert_allclose(log_det_out, log_det, rtol=1e-5)
+                invertible_flow_standard_check(
+                    self, flow, sess, x, atol=1e-5, rtol=1e-4)
+                invertible_flow_standard_check(
+                    self, flow.invert(), sess, y, atol=1e-5, rtol=1e-4)
+
+                # test the diagonal kernel
+                kernel = np.random.uniform(-2., 2., size=[n]). \
+                    astype(np.float32)
+                y, log_det = naive_invertible_linear(
+                    x, np.diag(kernel), axis, value_ndims)
+
+                flow = FrozenAffineFlow(kernel, axis=axis,
+                                        value_ndims=value_ndims)
+                y_out, log_det_out = sess.run(flow.transform(x))
+                np.testing.assert_allclose(y_out, y, rtol=1e-5, atol=1e-5)
+                np.testing.assert_allclose(log_det_out, log_det, rtol=1e-5)
+                invertible_flow_standard_check(
+                    self, flow, sess, x, atol=1e-5, rtol=1e-4)
+
+                # test the inverted flow is also a frozen affine flow
+                inv_flow = flow.invert()
+                self.assertIsInstance(inv_flow, FrozenAffineFlow)
+                np.testing.assert_allclose(inv_flow.kernel, flow.inv_kernel)
+                np.testing.assert_allclose(inv_flow.log_det, -flow.log_det)
+
+    def test_errors(self):
+        with pytest.raises(ValueError,
+                           match='`kernel` must be a 1-d array or a square '
+                                 'matrix'):
+            _ = FrozenAffineFlow(np.zeros([2, 3]))
+        with pytest.raises(ValueError,
+                           match='The shape of `bias` does not match the '
+                                 'kernel'):
+            _ = FrozenAffineFlow(np.ones([3]), bias=np.zeros([2]))
+        with pytest.raises(ValueError,
+                           match='The shape of `inv_kernel` does not match '
+                                 'the kernel'):
+            _ = FrozenAffineFlow(np.eye(3), inv_kernel=np.ones([3]))
+        with pytest.raises(ValueError,
+                           match='The feature axis of `input` does not match '
+                                 'the kernel'):
+            _ = FrozenAffineFlow(np.ones([3])).transform(tf.zeros([2, 4]))
+
+
+class FreezeFlowTestCase(tf.test.TestCase):
+
+    def test_freeze(self):
+        np.random.seed(1234)
+
+        with self.test_session() as sess:
+            # test folding all the flows into one frozen affine flow
+            # (NHWC, since the NCHW convolution is not supported on CPU)
+            x = tf.constant(
+                np.random.normal(size=[5, 4, 4, 3]).astype(np.float32))
+            inverted_conv = InvertibleConv2d(channels_last=True)
+            inverted_conv.build(x)
+            flow = SequentialFlow([
+                ActNorm(axis=-1, value_ndims=3),
+                InvertibleConv2d(channels_last=True),
+                ActNorm(axis=-1, value_ndims=3, scale_type='linear'),
+                InvertFlow(inverted_conv),
+            ])
+            # initialize the variables, and then the ActNorm layers
+            y = flow.transform(x)
+            sess.run(tf.global_variables_initializer())
+            _ = sess.run(y)
+
+            frozen = flow.freeze()
+            self.assertIsInstance(frozen, FrozenAffineFlow)
+            self.assertEqual(frozen.axis, -1)
+            self.assertEqual(frozen.value_ndims, 3)
+
+            y, log_det = flow.transform(x)
+            y2, log_det2 = frozen.transform(x)
+            x3, log_det3 = flow.inverse_transform(y)
+            x4, log_det4 = frozen.inverse_transform(y)
+            y_out, log_det_out, y2_out, log_det2_out = \
+                sess.run([y, log_det, y2, log_det2])
+            np.testing.assert_allclose(y2_out, y_out, rtol=1e-4, atol=1e-4)
+            np.testing.assert_allclose(log_det2_out, log_det_out, rtol=1e-4)
+            x3_out, log_det3_out, x4_out, log_det4_out = \
+                sess.run([x3, log_det3, x4, log_det4])
+            np.testing.assert_allclose(x4_out, x3_out, rtol=1e-4, atol=1e-4)
+            np.testing.assert_allclose(log_det4_out, log_det3_out, rtol=1e-4)
+            invertible_flow_standard_check(
+                self, frozen, sess, x, atol=1e-4, rtol=1e-4)
+
+            # test flows without a constant form are kept as-is
+            x = tf.constant(np.random.normal(size=[5, 4]).astype(np.float32))
+            quadratic = QuadraticFlow(2., 5., value_ndims=1)
+            flow = SequentialFlow([
+                ActNorm(),
+                InvertibleDense(),
+                quadratic,
+                InvertibleDense(),
+            ])
+            y = flow.transform(x)
+            sess.run(tf.global_variables_initializer())
+            _ = sess.run(y)
+
+            frozen = flow.freeze(sess)
+            self.assertIsInstance(frozen, SequentialFlow)
+            self.assertEqual(len(frozen.flows), 3)
+            self.assertIsInstance(frozen.flows[0], FrozenAffineFlow)
+            self.assertIs(frozen.flows[1], quadratic)
+            self.assertIsInstance(frozen.flows[2], FrozenAffineFlow)
+            self.assertIs(quadratic.freeze(), quadratic)
+
+            y, log_det = flow.transform(x)
+            y2, log_det2 = frozen.transform(x)
+            y_out, log_det_out, y2_out, log_det2_out = \
+                sess.run([y, log_det, y2, log_det2])
+            np.testing.assert_allclose(y2_out, y_out, rtol=1e-4, atol=1e-4)
+            np.testing.assert_allclose(log_det2_out, log_det_out, rtol=1e-4)
+
+            # test the frozen flow is ready for `inverse_transform`
+            flow = InvertibleDense()
+            _ = flow.transform(x)
+            sess.run(tf.global_variables_initializer())
+            x2, log_det = flow.freeze().inverse_transform(x)
+            x3, log_det3 = flow.inverse_transform(x)
+            np.testing.assert_allclose(
+                *sess.run([x2, x3]), rtol=1e-5, atol=1e-5)
+
+    def test_freeze_errors(self):
+        with self.test_session():
+            with pytest.raises(RuntimeError,
+                               match='`freeze` cannot be called before the '
+                                     'flow has been built'):
+                _ = InvertibleDense().freeze()
+
+            flow = ActNorm()
+            flow.build(tf.zeros([2, 3]))
+            with pytest.raises(RuntimeError,
+                               match='`ActNorm` must be initialized by '
+                                     '`transform` or `apply` before freezing'):
+                _ = flow.freeze()
@@ -2,7 +2,8 @@ import pytest
 import numpy as np
 import tensorflow as tf
 
-from tfsnippet.layers import SequentialFlow, BaseFlow
+from tfsnippet.layers import (SequentialFlow, BaseFlow, InvertibleDense,
+                              CouplingLayer, dense)
 from tests.layers.flows.test_base import MultiLayerQuadraticFlow
 from tests.layers.flows.helper import (QuadraticFlow,
                                        invertible_flow_standard_check)
@@ -79,3 +80,104 @@ class SequentialFlowTestCase(tf.test.TestCase):
             _Flow(x_value_ndims=0),
         ])
         self.assertFalse(flow.explicitly_invertible)
+
+    def test_invertible_backprop(self):
+        class _Flow(BaseFlow):
+            @property
+            def explicitly_invertible(self):
+                return False
+
+        with pytest.raises(ValueError,
+                           match='`invertible_backprop` requires all the '
+                                 'flows to be explicitly invertible, but the '
+                                 '1-th flow is not'):
+            _ = SequentialFlow([QuadraticFlow(2., 3.), _Flow(x_value_ndims=0)],
+                               invertible_backprop=True)
+
+        # the flows must be well-conditioned, such that the inputs of each
+        # flow can be accurately reconstructed from its outputs
+        def shift_and_scale(x1, n2):
+            h = dense(x1, 2 * n2, scope='dense')
+            return h[..., :n2], h[..., n2:]
+
+        tf.set_random_seed(1234)
+        np.random.seed(1234)
+        flows = [
+            InvertibleDense(strict_invertible=True),
+            CouplingLayer(tf.make_template('shift_and_scale', shift_and_scale),
+                          scale_type='sigmoid'),
+            InvertibleDense(strict_invertible=True),
+        ]
+        flow1 = SequentialFlow(flows)
+        flow2 = SequentialFlow(flows, invertible_backprop=True)
+        self.assertFalse(flow1.invertible_backprop)
+        self.assertTrue(flow2.invertible_backprop)
+
+        x = tf.constant(np.random.normal(size=[3, 4, 5]).astype(np.float32))
+        y1, log_det1 = flow1.transform(x)
+        y2, log_det2 = flow2.transform(x)
+        params = tf.trainable_variables()
+        self.assertGreater(len(params), 0)
+
+        def get_grads(y, log_det):
+            loss = tf.reduce_sum(tf.square(y)) + tf.reduce_sum(log_det)
+            return tf.gradients(loss, [x] + params)
+
+        grads1 = get_grads(y1, log_det1)
+        grads2 = get_grads(y2, log_det2)
+
+        with self.test_session() as sess:
+            sess.run(tf.global_variables_initializer())
+            np.testing.assert_allclose(*sess.run([y1, y2]), rtol=1e-5)
+            np.testing.assert_allclose(*sess.run([log_det1, log_det2]),
+                                       rtol=1e-5)
+            for g1, g2 in zip(grads1, grads2):
+                if g1 is None:
+                    self.assertIsNone(g2)
+                else:
+                    np.testing.assert_allclose(
+                        *sess.run([g1, g2]), rtol=1e-4, atol=1e-5)
+
+            # test compute_y = False or compute_log_det = False
+            y3, log_det3 = flow2.transform(x, compute_y=False)
+            self.assertIsNone(y3)
+            np.testing.assert_allclose(*sess.run([log_det1, log_det3]),
+                                       rtol=1e-5)
+            grad_x3 = tf.gradients(tf.reduce_sum(log_det3), x)[0]
+            grad_x1 = tf.gradients(tf.reduce_sum(log_det1), x)[0]
+            np.testing.assert_allclose(*sess.run([grad_x1, grad_x3]),
+                                       rtol=1e-4, atol=1e-5)
+            y4, log_det4 = flow2.transform(x, compute_log_det=False)
+            self.assertIsNone(log_det4)
+            grad_x4 = tf.gradients(tf.reduce_sum(tf.square(y4)), x)[0]
+            grad_x1 = tf.gradients(tf.reduce_sum(tf.square(y1)), x)[0]
+            np.testing.assert_allclose(*sess.run([grad_x1, grad_x4]),
+                                       rtol=1e-4, atol=1e-5)
+
+    def test_invertible_backprop_with_multi_layer_flow(self):
+        class _Flow(MultiLayerQuadraticFlow):
+            @property
+            def explicitly_invertible(self):
+                return False
+
+        flow = _Flow(3, invertible_backprop=True)
+        with pytest.raises(RuntimeError,
+                           match='`invertible_backprop` requires the flow to '
+                                 'be explicitly invertible'):
+            _ = flow.transform(tf.zeros([2, 3]))
+
+        flow1 = MultiLayerQuadraticFlow(3)
+        flow2 = MultiLayerQuadraticFlow(3, invertible_backprop=True)
+        self.assertTrue(flow2.invertible_backprop)
+        x = tf.range(12, dtype=tf.float32) + 1.
+        y1, log_det1 = flow1.transform(x)
+        y2, log_det2 = flow2.transform(x)
+        grad1 = tf.gradients(
+            tf.reduce_sum(y1) + tf.reduce_sum(log_det1), x)[0]
+        grad2 = tf.gradients(
+            tf.reduce_sum(y2) + tf.reduce_sum(log_det2), x)[0]
+
+        with self.test_session() as sess:
+            np.testing.assert_allclose(*sess.run([y1, y2]))
+            np.testing.assert_allclose(*sess.run([log_det1, log_det2]))
+            np.testing.assert_allclose(*sess.run([grad1, grad2]), rtol=1e-5)
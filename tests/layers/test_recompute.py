@@ -0,0 +1,97 @@
+from functools import partial
+
+import numpy as np
+import pytest
+import tensorflow as tf
+
+from tfsnippet.layers import *
+
+
+def get_scope_variables(scope):
+    return sorted(
+        [v for v in tf.trainable_variables()
+         if v.name.startswith(scope + '/')],
+        key=lambda v: v.name
+    )
+
+
+class RecomputeSequentialTestCase(tf.test.TestCase):
+
+    def check_recompute_sequential(self, input, make_layers, get_output,
+                                   segment_size, suffix):
+        plain_scope = 'plain_{}'.format(suffix)
+        recompute_scope = 'recompute_{}'.format(suffix)
+        with tf.variable_scope(plain_scope):
+            output = input
+            for layer in make_layers():
+                output = layer(output)
+            y1 = get_output(output)
+        with tf.variable_scope(recompute_scope):
+            y2 = get_output(recompute_sequential(
+                input, make_layers(), segment_size=segment_size))
+
+        # the variables should be named as if not re-computed
+        params1 = get_scope_variables(plain_scope)
+        params2 = get_scope_variables(recompute_scope)
+        self.assertGreater(len(params1), 0)
+        self.assertEqual(
+            [v.name[len(plain_scope):] for v in params1],
+            [v.name[len(recompute_scope):] for v in params2]
+        )
+
+        n_vars = len(tf.trainable_variables())
+        grads1 = tf.gradients(tf.reduce_sum(tf.square(y1)), params1)
+        grads2 = tf.gradients(tf.reduce_sum(tf.square(y2)), params2)
+        # no variable should be created when re-computing
+        self.assertEqual(len(tf.trainable_variables()), n_vars)
+
+        with self.test_session() as sess:
+            sess.run(tf.global_variables_initializer())
+            sess.run([tf.assign(b, a) for a, b in zip(params1, params2)])
+            np.testing.assert_allclose(*sess.run([y1, y2]), rtol=1e-5)
+            for g1, g2 in zip(grads1, grads2):
+                np.testing.assert_allclose(
+                    *sess.run([g1, g2]), rtol=1e-4, atol=1e-6)
+
+    def test_resnet_blocks(self):
+        np.random.seed(1234)
+        x = tf.constant(np.random.normal(size=[2, 8, 8, 3]).astype(np.float32))
+
+        def make_layers():
+            return [
+                partial(resnet_conv2d_block, out_channels=4, kernel_size=3,
+                        activation_fn=tf.nn.leaky_relu),
+                partial(resnet_conv2d_block, out_channels=4, kernel_size=3,
+                        strides=2, activation_fn=tf.nn.leaky_relu),
+                partial(resnet_deconv2d_block, out_channels=3, kernel_size=3,
+                        strides=2, activation_fn=tf.nn.leaky_relu),
+            ]
+
+        for i, segment_size in enumerate((1, 2, None)):
+            self.check_recompute_sequential(
+                x, make_layers, lambda h: h, segment_size, i)
+
+    def test_pixelcnn_blocks(self):
+        np.random.seed(1234)
+        x = tf.constant(np.random.normal(size=[2, 8, 8, 3]).astype(np.float32))
+
+        def make_layers():
+            return [
+                pixelcnn_2d_input,
+                partial(pixelcnn_conv2d_resnet, out_channels=4,
+                        activation_fn=tf.nn.leaky_relu),
+                partial(pixelcnn_conv2d_resnet, out_channels=4,
+                        activation_fn=tf.nn.leaky_relu, gated=True),
+            ]
+
+        for i, segment_size in enumerate((1, 2)):
+            self.check_recompute_sequential(
+                x, make_layers, pixelcnn_2d_output, segment_size, i)
+
+    def test_errors(self):
+        with pytest.raises(ValueError, match='`layers` must not be empty'):
+            _ = recompute_sequential(tf.zeros([2, 3]), [])
+        with pytest.raises(ValueError,
+                           match='`segment_size` must be at least 1: got 0'):
+            _ = recompute_sequential(tf.zeros([2, 3]), [tf.identity],
+                                     segment_size=0)
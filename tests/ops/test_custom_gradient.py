@@ -0,0 +1,118 @@
+import pytest
+import numpy as np
+import tensorflow as tf
+from tensorflow.contrib.framework import add_arg_scope, arg_scope
+
+from tfsnippet.ops import recompute_grad, with_custom_gradient
+
+
+class WithCustomGradientTestCase(tf.test.TestCase):
+
+    def test_with_custom_gradient(self):
+        x = tf.constant([1., 2., 3.])
+        w = tf.get_variable('w', initializer=tf.constant(2.))
+        u = tf.get_variable('u', initializer=tf.constant(3.))
+        x2 = x * u  # `u` is used to compute the input, not by `fn`
+
+        def fn(t):
+            return [t * w, tf.reduce_sum(t)]
+
+        def grad_fn(inputs, variables, outputs, grad_outputs):
+            self.assertEqual(len(inputs), 1)
+            self.assertEqual(inputs[0].get_shape().as_list(), [3])
+            self.assertEqual(variables, [w])
+            self.assertEqual(len(outputs), 2)
+            self.assertEqual(len(grad_outputs), 2)
+            # deliberately scale the true gradients by 10
+            grads = tf.gradients(
+                fn(inputs[0]), inputs + variables, grad_ys=grad_outputs)
+            return [g * 10. for g in grads[:1]], [g * 10. for g in grads[1:]]
+
+        y, s = with_custom_gradient(fn, [x2], grad_fn)
+        self.assertEqual(y.get_shape().as_list(), [3])
+        self.assertEqual(s.get_shape().as_list(), [])
+        grad_x, grad_w, grad_u = tf.gradients(
+            tf.reduce_sum(y) + s, [x, w, u])
+
+        with self.test_session() as sess:
+            sess.run(tf.global_variables_initializer())
+            np.testing.assert_allclose(sess.run(y), [6., 12., 18.])
+            np.testing.assert_allclose(sess.run(s), 18.)
+            # d(loss)/d(x2) = w + 1 = 3, d(loss)/d(w) = sum(x2) = 18
+            np.testing.assert_allclose(sess.run(grad_x), [90.] * 3)
+            np.testing.assert_allclose(sess.run(grad_w), 180.)
+            np.testing.assert_allclose(sess.run(grad_u), 30. * 6.)
+
+    def test_errors(self):
+        with pytest.raises(ValueError,
+                           match='`fn` must return at least one output'):
+            _ = with_custom_gradient(lambda t: [], [tf.constant(1.)], None)
+
+        x = tf.constant(1.)
+        y = with_custom_gradient(
+            lambda t: [t * 2.], [x], lambda *args: ([], []))[0]
+        with pytest.raises(ValueError,
+                           match='The number of gradients returned by '
+                                 '`grad_fn` does not match'):
+            _ = tf.gradients(y, x)
+
+
+class RecomputeGradTestCase(tf.test.TestCase):
+
+    def test_recompute_grad(self):
+        np.random.seed(1234)
+        x = tf.constant(np.random.normal(size=[4, 5]).astype(np.float32))
+        n_calls = [0]
+
+        def fn(t):
+            n_calls[0] += 1
+            with tf.variable_scope(None, default_name='fn'):
+                w = tf.get_variable(
+                    'w', initializer=tf.constant(
+                        np.random.normal(size=[5, 3]).astype(np.float32)))
+                b = tf.get_variable('b', initializer=tf.zeros([3]))
+                h = tf.nn.tanh(tf.matmul(t, w) + b)
+            return [h, tf.reduce_sum(h, axis=-1)]
+
+        y1, s1 = fn(x)
+        with tf.variable_scope('recompute'):
+            y2, s2 = recompute_grad(fn, [x])
+        self.assertEqual(n_calls[0], 2)
+        params1 = [v for v in tf.trainable_variables()
+                   if not v.name.startswith('recompute/')]
+        params2 = [v for v in tf.trainable_variables()
+                   if v.name.startswith('recompute/')]
+        self.assertEqual(len(params1), 2)
+        self.assertEqual([v.name for v in params2],
+                         ['recompute/fn/w:0', 'recompute/fn/b:0'])
+
+        grads1 = tf.gradients(
+            tf.reduce_sum(tf.square(y1)) + tf.reduce_sum(s1), [x] + params1)
+        grads2 = tf.gradients(
+            tf.reduce_sum(tf.square(y2)) + tf.reduce_sum(s2), [x] + params2)
+        # `fn` is re-computed once when building the gradients,
+        # without creating new variables
+        self.assertEqual(n_calls[0], 3)
+        self.assertEqual(len(tf.trainable_variables()), 4)
+
+        with self.test_session() as sess:
+            sess.run(tf.global_variables_initializer())
+            sess.run([tf.assign(a, b) for a, b in zip(params2, params1)])
+            np.testing.assert_allclose(*sess.run([y1, y2]), rtol=1e-5)
+            np.testing.assert_allclose(*sess.run([s1, s2]), rtol=1e-5)
+            for g1, g2 in zip(grads1, grads2):
+                np.testing.assert_allclose(*sess.run([g1, g2]), rtol=1e-5)
+
+    def test_recompute_grad_arg_scope(self):
+        @add_arg_scope
+        def scale(t, factor=1.):
+            return t * factor
+
+        x = tf.constant([1., 2., 3.])
+        with arg_scope([scale], factor=3.):
+            y = recompute_grad(lambda t: [scale(t) ** 2], [x])[0]
+        grad = tf.gradients(tf.reduce_sum(y), x)[0]
+
+        with self.test_session() as sess:
+            np.testing.assert_allclose(sess.run(y), [9., 36., 81.])
+            np.testing.assert_allclose(sess.run(grad), [18., 36., 54.])
@@ -2,6 +2,9 @@ import numpy as np
 import pytest
 import tensorflow as tf
 
+from tfsnippet.layers import (pixelcnn_2d_input, pixelcnn_2d_output,
+                              pixelcnn_conv2d_resnet,
+                              pixelcnn_conv2d_resnet_receptive_field)
 from tfsnippet.ops import pixelcnn_2d_sample, convert_to_tensor_and_cast
 
 
@@ -61,9 +64,84 @@ class PixelCNN2DSampleTestCase(tf.test.TestCase):
                 ans
             )
 
+    def test_pixelcnn_2d_sample_receptive_field(self):
+        np.random.seed(1234)
+        height, width, n_layers = 11, 12, 2
+        receptive_field = pixelcnn_conv2d_resnet_receptive_field(n_layers)
+        top, left, right = receptive_field
+
+        net = tf.make_template('net', lambda x: pixelcnn_2d_output(
+            pixelcnn_conv2d_resnet(
+                pixelcnn_conv2d_resnet(
+                    pixelcnn_2d_input(x), out_channels=3,
+                    activation_fn=tf.nn.leaky_relu
+                ),
+                out_channels=3, activation_fn=tf.nn.leaky_relu
+            )
+        ))
+        windows = []
+
+        def f(i, inputs):
+            return [tf.tanh(net(inputs[0]))]
+
+        def f_window(i, inputs, window):
+            windows.append(window)
+            self.assertEqual(
+                inputs[0].get_shape().as_list(),
+                [2, min(height, top + 1), min(width, left + right + 1), 3]
+            )
+            return [tf.tanh(net(inputs[0]))]
+
+        with self.test_session() as sess:
+            x = tf.constant(np.random.normal(
+                size=[2, height, width, 3]).astype(np.float32))
+            y = pixelcnn_2d_sample(f, [x], height, width)[0]
+            y_window = pixelcnn_2d_sample(
+                f_window, [x], height, width,
+                receptive_field=receptive_field
+            )[0]
+            self.assertEqual(len(windows), 1)
+            sess.run(tf.global_variables_initializer())
+            np.testing.assert_allclose(*sess.run([y, y_window]), rtol=1e-5,
+                                       atol=1e-6)
+
+            # test channels first, dynamic shape, start and end
+            x_t = tf.transpose(x, [0, 3, 1, 2])
+            height_t = tf.placeholder(dtype=tf.int32, shape=())
+            width_t = tf.placeholder(dtype=tf.int32, shape=())
+
+            def f(i, inputs, window):
+                return [inputs[0] + tf.cast(
+                    tf.stack(window)[0] * 100 + tf.stack(window)[1],
+                    dtype=tf.float32
+                )]
+
+            y = pixelcnn_2d_sample(
+                f, [x_t], height_t, width_t, channels_last=False,
+                start=10, end=20, receptive_field=(2, 3, 1)
+            )[0]
+            y_out, x_out = sess.run(
+                [y, x_t], feed_dict={height_t: height, width_t: width})
+            ans = x_out.reshape([2, 3, -1]).copy()
+            for idx in range(10, 20):
+                row, col = idx // width, idx % width
+                row = min(max(row - 2, 0), height - 3)
+                col = min(max(col - 3, 0), width - 5)
+                ans[..., idx] += row * 100 + col
+            np.testing.assert_allclose(y_out, ans.reshape(x_out.shape))
+
     def test_errors(self):
         height, width = 31, 32
 
+        with pytest.raises(ValueError,
+                           match='`receptive_field` must be a tuple of three '
+                                 'non-negative integers'):
+            _ = pixelcnn_2d_sample(
+                lambda i, inputs, window: inputs,
+                [tf.zeros([1, height, width, 1])], height, width,
+                receptive_field=(1, -1, 1)
+            )
+
         def fn(i, inputs):
             return inputs
 
@@ -1,8 +1,10 @@
 import os
 
+import numpy as np
+
 import pytest
 import tensorflow as tf
-from mock import Mock
+from mock import Mock, patch
 
 from tfsnippet.scaffold import *
 from tfsnippet.scaffold.checkpoint import CHECKPOINT_VAR_NAME
@@ -165,3 +167,165 @@ class CheckpointSaverTestCase(tf.test.TestCase):
             with pytest.raises(KeyError, match='Object `obj3` not found in the '
                                                'checkpoint'):
                 saver.restore_latest()
+
+    def test_async_save_restore(self):
+        class MyObject(CheckpointSavableObject):
+            def __init__(self, value):
+                self.value = value
+
+            def get_state(self):
+                return {'value': self.value}
+
+            def set_state(self, state):
+                self.value = state['value']
+
+        with TemporaryDirectory() as tmpdir, \
+                self.test_session() as sess:
+            save_dir = os.path.join(tmpdir, 'saves')
+            v = tf.get_variable('v', dtype=tf.int32, initializer=12)
+            w = tf.get_variable('w', dtype=tf.float32,
+                                initializer=[1., 2., 3.])
+            step = tf.get_variable('step', dtype=tf.int32, initializer=0)
+            obj = MyObject(56)
+            ensure_variables_initialized()
+
+            with pytest.raises(ValueError, match='`max_pending_saves` must be '
+                                                 'at least 1'):
+                _ = CheckpointSaver([v], save_dir, async_save=True,
+                                    max_pending_saves=0)
+
+            saver = CheckpointSaver([v, w], save_dir, objects={'obj': obj},
+                                    max_to_keep=2, async_save=True,
+                                    max_pending_saves=2)
+            self.assertTrue(saver.async_save)
+            self.assertEqual(2, saver.max_pending_saves)
+            self.assertIsNone(saver.latest_checkpoint())
+
+            # the values should be taken at the time `save` is called
+            checkpoints = []
+            for i in range(3):
+                sess.run([tf.assign(v, 100 + i), tf.assign(step, i)])
+                obj.value = 200 + i
+                checkpoints.append(saver.save(step, session=sess))
+                sess.run(tf.assign(w, [-1., -2., -3.]))
+            saver.wait()
+            self.assertEqual(
+                [os.path.join(save_dir, 'checkpoint.dat-{}'.format(i))
+                 for i in range(3)],
+                checkpoints
+            )
+            self.assertEqual(checkpoints[-1], saver.latest_checkpoint())
+
+            # the old checkpoint should be removed, and there should be no
+            # temporary file left
+            names = sorted(os.listdir(save_dir))
+            self.assertFalse(any(n.startswith('checkpoint.dat-0.')
+                                 for n in names))
+            self.assertFalse(any(n.startswith('._') for n in names))
+            for i in (1, 2):
+                self.assertIn('checkpoint.dat-{}.index'.format(i), names)
+                self.assertIn('checkpoint.dat-{}.meta'.format(i), names)
+
+            # the checkpoints should be restorable by a synchronous saver
+            saver2 = CheckpointSaver([v, w], save_dir, objects={'obj': obj})
+            self.assertEqual(checkpoints[-1], saver2.latest_checkpoint())
+            saver2.restore(checkpoints[1])
+            self.assertEqual(101, sess.run(v))
+            np.testing.assert_equal([-1., -2., -3.], sess.run(w))
+            self.assertEqual(201, obj.value)
+
+            saver.restore_latest()
+            self.assertEqual(102, sess.run(v))
+            self.assertEqual(202, obj.value)
+
+    def test_async_close(self):
+        with TemporaryDirectory() as tmpdir, \
+                self.test_session() as sess:
+            v = tf.get_variable('v', dtype=tf.int32, initializer=12)
+            ensure_variables_initialized()
+
+            # test the temporary files of a failed checkpoint are removed
+            saver = CheckpointSaver([v], tmpdir, async_save=True)
+            writer = saver._async_writer
+            with patch.object(tf.train.Saver, 'save',
+                              side_effect=IOError('write failed')):
+                saver.save(1, session=sess)
+                with pytest.raises(IOError, match='write failed'):
+                    saver.wait()
+            self.assertEqual([], os.listdir(tmpdir))
+
+            # test close the saver releases the background thread
+            saver.save(2, session=sess)
+            saver.close()
+            self.assertFalse(writer._worker.is_alive())
+            self.assertIsNone(writer._session)
+            self.assertEqual(
+                os.path.join(tmpdir, 'checkpoint.dat-2'),
+                saver.latest_checkpoint()
+            )
+            saver.close()  # closing twice should cause no error
+            with pytest.raises(RuntimeError,
+                               match='The checkpoint writer has been closed'):
+                saver.save(3, session=sess)
+
+    def test_save_values(self):
+        with TemporaryDirectory() as tmpdir, \
+                self.test_session() as sess:
+            v = tf.get_variable('v', dtype=tf.int32, initializer=12)
+            w = tf.get_variable('w', dtype=tf.float32, initializer=[1., 2.])
+            ensure_variables_initialized()
+
+            saver = CheckpointSaver([v, w], tmpdir)
+            with pytest.raises(RuntimeError,
+                               match='`save_values` requires `async_save`'):
+                saver.save_values({'v': 1, 'w': [3., 4.]})
+
+            saver = CheckpointSaver([v, w], tmpdir, async_save=True)
+            with pytest.raises(KeyError,
+                               match='`values` does not match the variables'):
+                saver.save_values({'v': 1})
+            with pytest.raises(ValueError,
+                               match=r'The shape of `values\[\'w\'\]` does '
+                                     r'not match the variable'):
+                saver.save_values({'v': 1, 'w': [3., 4., 5.]})
+
+            path = saver.save_values({'v': 1, 'w': [3., 4.]}, global_step=5)
+            self.assertEqual(path, saver.latest_checkpoint())
+            self.assertEqual(12, sess.run(v))
+            saver.restore(path)
+            self.assertEqual(1, sess.run(v))
+            np.testing.assert_equal([3., 4.], sess.run(w))
+
+
+class VariableSnapshotTestCase(tf.test.TestCase):
+
+    def test_snapshot(self):
+        with self.test_session() as sess:
+            v = tf.get_variable('v', dtype=tf.int32, initializer=12)
+            w = ScheduledVariable('w', initial_value=[1., 2.],
+                                  dtype=tf.float32)
+            ensure_variables_initialized()
+
+            snapshot = VariableSnapshot([v, w])
+            self.assertFalse(snapshot.has_value)
+            self.assertIsNone(snapshot.values)
+            with pytest.raises(RuntimeError,
+                               match='No snapshot has been taken'):
+                snapshot.restore()
+
+            snapshot.take()
+            self.assertTrue(snapshot.has_value)
+            self.assertEqual(['v', 'w'], sorted(snapshot.values))
+            self.assertEqual(12, snapshot.values['v'])
+            np.testing.assert_equal([1., 2.], snapshot.values['w'])
+
+            sess.run([tf.assign(v, 34), tf.assign(w.variable, [3., 4.])])
+            snapshot.restore()
+            self.assertEqual(12, sess.run(v))
+            np.testing.assert_equal([1., 2.], w.get())
+
+            snapshot.clear()
+            self.assertFalse(snapshot.has_value)
+
+            with pytest.raises(TypeError, match='Not a variable'):
+                _ = VariableSnapshot([tf.constant(1)])
@@ -138,6 +138,18 @@ class MetricLoggerTestCase(tf.test.TestCase):
             'valid acc: 6 (±1); '
             'valid loss: 3'
         )
+        self.assertEqual(
+            ['loss', 'other_metric', 'train_time', 'valid_acc', 'valid_loss',
+             'valid_timer'],
+            sorted(logger.metrics)
+        )
+        self.assertEqual(4, logger.metrics['loss'].counter)
+        self.assertAlmostEqual(3.25, logger.metrics['loss'].mean)
+
+        # test collecting array metrics
+        logger.collect_metrics(dict(loss=np.asarray([8., 10.])))
+        self.assertEqual(6, logger.metrics['loss'].counter)
+        self.assertAlmostEqual(31. / 6, logger.metrics['loss'].mean)
 
         logger.clear()
         self.assertEqual(logger.format_logs(), '')
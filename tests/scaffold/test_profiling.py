@@ -0,0 +1,69 @@
+import json
+import os
+import unittest
+
+import tensorflow as tf
+
+from tfsnippet.scaffold import *
+from tfsnippet.utils import TemporaryDirectory
+
+
+def make_run_metadata():
+    run_metadata = tf.RunMetadata()
+    cpu = run_metadata.step_stats.dev_stats.add(device='/cpu:0')
+    node = cpu.node_stats.add(node_name='a', all_end_rel_micros=1500,
+                              timeline_label='a = MatMul(x, y)')
+    node.memory.add(total_bytes=2048)
+    node = cpu.node_stats.add(node_name='b', all_end_rel_micros=500,
+                              timeline_label='b = Add(a, c)')
+    node.memory.add(total_bytes=4096)
+
+    # the same node reported by another device
+    gpu = run_metadata.step_stats.dev_stats.add(device='/gpu:0/stream:all')
+    gpu.node_stats.add(node_name='b', all_end_rel_micros=700,
+                       timeline_label='Add')
+    return run_metadata
+
+
+class ProfilingTestCase(unittest.TestCase):
+
+    def test_get_op_stats(self):
+        self.assertEqual(
+            [OpStats('a', 'MatMul', 1500, 2048),
+             OpStats('b', 'Add', 700, 4096)],
+            get_op_stats(make_run_metadata())
+        )
+        self.assertEqual([], get_op_stats(tf.RunMetadata()))
+
+    def test_format_op_stats(self):
+        text = format_op_stats(get_op_stats(make_run_metadata()), top_k=1)
+        by_time, by_memory = text.split('\n\n')
+
+        self.assertIn('Top Ops by Time', by_time)
+        self.assertIn('MatMul', by_time)
+        self.assertIn('1.500 ms', by_time)
+        self.assertNotIn('Add', by_time)
+        self.assertIn('Total (2 ops)', by_time)
+        self.assertIn('2.200 ms', by_time)
+
+        self.assertIn('Top Ops by Memory', by_memory)
+        self.assertIn('Add', by_memory)
+        self.assertIn('4 KB', by_memory)
+        self.assertNotIn('MatMul', by_memory)
+        self.assertIn('6 KB', by_memory)
+
+    def test_save_step_profile(self):
+        with TemporaryDirectory() as tmpdir:
+            save_dir = os.path.join(tmpdir, 'profile')
+            trace_path, stats_path = save_step_profile(
+                make_run_metadata(), save_dir, 'step_1')
+            self.assertEqual(os.path.join(save_dir, 'step_1.trace.json'),
+                             trace_path)
+            self.assertEqual(os.path.join(save_dir, 'step_1.ops.txt'),
+                             stats_path)
+
+            with open(trace_path, 'rb') as f:
+                trace = json.loads(f.read().decode('utf-8'))
+            self.assertIn('traceEvents', trace)
+            with open(stats_path, 'rb') as f:
+                self.assertIn(b'Top Ops by Memory', f.read())
@@ -0,0 +1,99 @@
+import time
+import unittest
+
+import pytest
+import tensorflow as tf
+
+from tfsnippet.scaffold import AsyncSummaryWriter
+
+
+class _MyError(Exception):
+    pass
+
+
+class _RecordingWriter(object):
+
+    def __init__(self, delay=0.):
+        self.delay = delay
+        self.summaries = []
+        self.flush_count = 0
+
+    def add_summary(self, summary, global_step=None):
+        time.sleep(self.delay)
+        if isinstance(summary, tf.summary.Summary):
+            summary = {v.tag: v.simple_value for v in summary.value}
+        self.summaries.append((global_step, summary))
+
+    def add_run_metadata(self, run_metadata, tag, global_step=None):
+        self.summaries.append((global_step, (tag, run_metadata)))
+
+    def flush(self):
+        self.flush_count += 1
+
+
+class AsyncSummaryWriterTestCase(unittest.TestCase):
+
+    def test_errors(self):
+        with pytest.raises(ValueError, match='`max_queue` must be at '
+                                             'least 1'):
+            _ = AsyncSummaryWriter(_RecordingWriter(), max_queue=0)
+
+    def test_write(self):
+        sw = _RecordingWriter(delay=0.01)
+        writer = AsyncSummaryWriter(sw, max_queue=2)
+        self.assertIs(sw, writer.summary_writer)
+        self.assertEqual(2, writer.max_queue)
+
+        # metrics for the same step should be merged
+        writer.add_metrics({'a': 1.}, global_step=1)
+        writer.add_metrics({'b': 2.}, global_step=1)
+        writer.add_metrics({'a': 3.}, global_step=1)
+        writer.add_metrics({}, global_step=1)
+        writer.add_metrics({'a': 4.}, global_step=2)
+        writer.add_summary(b'serialized summary', global_step=2)
+        writer.add_metrics({'b': 5.}, global_step=2)
+        writer.add_run_metadata('run metadata', 'step_2', global_step=2)
+        writer.flush()
+        self.assertEqual(
+            [(1, {'a': 3., 'b': 2.}), (2, {'a': 4.}),
+             (2, b'serialized summary'), (2, {'b': 5.}),
+             (2, ('step_2', 'run metadata'))],
+            sw.summaries
+        )
+        self.assertEqual(1, sw.flush_count)
+
+        # the pending metrics should be written after the merge timeout
+        writer = AsyncSummaryWriter(sw, merge_timeout=0.01)
+        writer.add_metrics({'c': 6.}, global_step=3)
+        time.sleep(0.5)
+        self.assertEqual((3, {'c': 6.}), sw.summaries[-1])
+        self.assertEqual(1, sw.flush_count)
+
+        # close should flush the pending metrics
+        writer.add_metrics({'d': 7.}, global_step=4)
+        writer.close()
+        self.assertEqual((4, {'d': 7.}), sw.summaries[-1])
+        self.assertEqual(2, sw.flush_count)
+        writer.close()  # closing twice should cause no error
+        with pytest.raises(RuntimeError, match='The summary writer has been '
+                                               'closed'):
+            writer.add_metrics({'e': 8.}, global_step=5)
+
+    def test_write_error(self):
+        class _ErrorWriter(_RecordingWriter):
+            def add_summary(self, summary, global_step=None):
+                if global_step == 2:
+                    raise _MyError('write error')
+                super(_ErrorWriter, self).add_summary(summary, global_step)
+
+        sw = _ErrorWriter()
+        writer = AsyncSummaryWriter(sw)
+        writer.add_metrics({'a': 1.}, global_step=1)
+        writer.add_summary(b'summary', global_step=2)
+        with pytest.raises(_MyError, match='write error'):
+            writer.flush()
+
+        # the writer should still work after the error is reported
+        writer.add_metrics({'a': 3.}, global_step=3)
+        writer.close()
+        self.assertEqual([(1, {'a': 1.}), (3, {'a': 3.})], sw.summaries)
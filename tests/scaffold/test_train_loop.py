@@ -7,11 +7,11 @@ from collections import OrderedDict
 import pytest
 import numpy as np
 import tensorflow as tf
-from mock import Mock
+from mock import Mock, patch
 
 from tfsnippet.dataflows import DataFlow
 from tfsnippet.scaffold import (TrainLoop, CheckpointSavableObject,
-                                ScheduledVariable)
+                                ScheduledVariable, AsyncSummaryWriter)
 from tfsnippet.scaffold.train_loop_ import (TRAIN_LOOP_STATES_CKPT_NAME,
                                             EARLY_STOPPING_STATES_CKPT_NAME)
 from tfsnippet.utils import (TemporaryDirectory,
@@ -365,6 +365,82 @@ class TrainLoopTestCase(tf.test.TestCase):
             r'$'
         ))
 
+    def test_throughput_metrics(self):
+        def data_generator():
+            for i in range(3):
+                time.sleep(0.01)
+                yield np.arange(4), np.arange(4)
+
+        # test the metrics with a data flow
+        with TrainLoop([], max_epoch=1, throughput_metrics=True) as loop:
+            loop.collect_metrics = Mock(wraps=loop.collect_metrics)
+            for _ in loop.iter_epochs():
+                for _ in loop.iter_steps(data_generator()):
+                    time.sleep(0.03)
+
+        metrics = [c[1]['metrics'] for c in loop.collect_metrics.call_args_list
+                   if 'compute_time' in c[1]['metrics']]
+        self.assertEqual(3, len(metrics))
+        for m in metrics:
+            self.assertEqual(
+                ['compute_time', 'data_time', 'examples_per_sec',
+                 'input_bound_ratio'],
+                sorted(m)
+            )
+            self.assertGreater(m['data_time'], 0.005)
+            self.assertLess(m['data_time'], m['compute_time'])
+            self.assertGreater(m['compute_time'], 0.025)
+            self.assertAlmostEqual(
+                m['examples_per_sec'],
+                4. / (m['data_time'] + m['compute_time'])
+            )
+            self.assertGreater(m['input_bound_ratio'], 0.)
+            self.assertLess(m['input_bound_ratio'], .5)
+
+        # test the metrics without a data flow
+        with TrainLoop([], max_epoch=1, max_step=2,
+                       throughput_metrics=True) as loop:
+            loop.collect_metrics = Mock(wraps=loop.collect_metrics)
+            for _ in loop.iter_epochs():
+                for _ in loop.iter_steps():
+                    pass
+        metrics = [c[1]['metrics'] for c in loop.collect_metrics.call_args_list
+                   if 'compute_time' in c[1]['metrics']]
+        self.assertEqual(2, len(metrics))
+        for m in metrics:
+            self.assertEqual(['compute_time'], list(m))
+
+        # test the batch size cannot be inferred
+        with TrainLoop([], max_epoch=1, throughput_metrics=True) as loop:
+            loop.collect_metrics = Mock(wraps=loop.collect_metrics)
+            for _ in loop.iter_epochs():
+                for _ in loop.iter_steps([1, 2]):
+                    pass
+        metrics = [c[1]['metrics'] for c in loop.collect_metrics.call_args_list
+                   if 'compute_time' in c[1]['metrics']]
+        self.assertEqual(2, len(metrics))
+        for m in metrics:
+            self.assertNotIn('examples_per_sec', m)
+
+        # test the batch size reported by the step data, e.g., a group of
+        # micro-batches with gradient accumulation
+        class _MicroBatchGroup(list):
+            batch_size = 10
+
+        group = _MicroBatchGroup([(np.arange(4),), (np.arange(6),)])
+        with TrainLoop([], max_epoch=1, throughput_metrics=True) as loop:
+            loop.collect_metrics = Mock(wraps=loop.collect_metrics)
+            for _ in loop.iter_epochs():
+                for _ in loop.iter_steps([group]):
+                    pass
+        metrics = [c[1]['metrics'] for c in loop.collect_metrics.call_args_list
+                   if 'compute_time' in c[1]['metrics']]
+        self.assertEqual(1, len(metrics))
+        self.assertAlmostEqual(
+            metrics[0]['examples_per_sec'],
+            10. / (metrics[0]['data_time'] + metrics[0]['compute_time'])
+        )
+
     def test_metric_collector(self):
         logs = []
         with TrainLoop([], max_epoch=1, print_func=logs.append,
@@ -469,6 +545,55 @@ class TrainLoopTestCase(tf.test.TestCase):
                 ['metrics/loss', 'metrics/valid_loss']
             )
 
+        # test writing the summaries in background
+        with TemporaryDirectory() as tempdir:
+            sw = tf.summary.FileWriter(tempdir)
+            with TrainLoop([], max_epoch=2, summary_writer=sw,
+                           summary_async=True) as loop:
+                self.assertIs(loop.summary_writer, sw)
+                self.assertIsInstance(loop._async_summary_writer,
+                                      AsyncSummaryWriter)
+                for epoch in loop.iter_epochs():
+                    for _, loss in loop.iter_steps([0.7, 0.6, 0.8]):
+                        loop.collect_metrics(loss=epoch + loss)
+                    loop.collect_metrics(valid_loss=epoch)
+
+                # use a fresh graph, otherwise the tag would be renamed to
+                # "x_1", since "x" has been used by the test above
+                with tf.Graph().as_default() as graph, \
+                        self.test_session(graph=graph):
+                    summary_op = tf.summary.scalar('x', tf.constant(1.23))
+                    loop.add_summary(summary_op.eval())
+            self.assertIsNone(loop._async_summary_writer)
+            sw.close()
+
+            obj = read_summary(tempdir)
+            self.assertEqual(
+                ['metrics/loss', 'metrics/valid_loss', 'x'],
+                sorted(obj[0])
+            )
+            np.testing.assert_equal(obj[1], [1, 2, 3, 4, 5, 6])
+            np.testing.assert_almost_equal(
+                obj[2],
+                [1.7, 1.6, 1.8, 2.7, 2.6, 2.8]
+            )
+            np.testing.assert_equal(obj[3], [3, 6])
+            np.testing.assert_almost_equal(obj[4], [1, 2])
+            np.testing.assert_equal(obj[5], [6])
+            np.testing.assert_almost_equal(obj[6], [1.23])
+
+        # test the error of the background summary writer neither interrupts
+        # the cleanup, nor replaces the error in flight
+        with TemporaryDirectory() as tempdir, \
+                patch.object(AsyncSummaryWriter, 'close',
+                             side_effect=IOError('write failed')):
+            with pytest.raises(ValueError, match='error in flight'):
+                with TrainLoop([], max_epoch=2, summary_dir=tempdir,
+                               summary_async=True) as loop:
+                    raise ValueError('error in flight')
+            self.assertIsNone(loop._async_summary_writer)
+            self.assertIsNone(loop._summary_writer)
+
     def test_early_stopping(self):
         with self.test_session():
             a = tf.get_variable('a', shape=(), dtype=tf.int32)
@@ -508,6 +633,111 @@ class TrainLoopTestCase(tf.test.TestCase):
             self.assertAlmostEqual(loop.best_valid_metric, 0.8)
             self.assertEqual(get_variable_values([a, b]), [13, 23])
 
+    def test_early_stopping_in_memory(self):
+        with self.test_session():
+            a = tf.get_variable('a', shape=(), dtype=tf.int32)
+            b = tf.get_variable('b', shape=(), dtype=tf.int32)
+
+            # test early-stopping with no valid metric committed
+            set_variable_values([a, b], [1, 2])
+            with TrainLoop([a], early_stopping=True,
+                           early_stopping_in_memory=True) as loop:
+                self.assertIsNone(loop._early_stopping_saver)
+                set_variable_values([a, b], [10, 20])
+            self.assertEqual(get_variable_values([a, b]), [10, 20])
+
+            # test early-stopping with smaller-better metric
+            set_variable_values([a, b], [1, 2])
+            with TrainLoop([a], max_epoch=1, early_stopping=True,
+                           early_stopping_in_memory=True) as loop:
+                for _ in loop.iter_epochs():
+                    for step, valid_loss in loop.iter_steps([0.7, 0.6, 0.8]):
+                        set_variable_values([a, b], [10 + step, 20 + step])
+                        loop.collect_metrics(valid_loss=valid_loss)
+            self.assertAlmostEqual(loop.best_valid_metric, 0.6)
+            self.assertEqual(get_variable_values([a, b]), [12, 23])
+
+            # test the variables are not restored on error
+            set_variable_values([a, b], [1, 2])
+            with pytest.raises(KeyboardInterrupt):
+                with TrainLoop([a], max_epoch=1, early_stopping=True,
+                               early_stopping_in_memory=True) as loop:
+                    for _ in loop.iter_epochs():
+                        for step, valid_loss in loop.iter_steps([0.7, 0.8]):
+                            set_variable_values([a, b], [10 + step, 20 + step])
+                            loop.collect_metrics(valid_loss=valid_loss)
+                        raise KeyboardInterrupt()
+            self.assertEqual(get_variable_values([a, b]), [12, 22])
+
+    def test_early_stopping_in_memory_with_checkpoint(self):
+        with self.test_session(), TemporaryDirectory() as tempdir:
+            a = tf.get_variable('a', shape=(), dtype=tf.int32)
+            b = tf.get_variable('b', shape=(), dtype=tf.int32)
+            es_dir = os.path.join(tempdir, 'early_stopping')
+
+            # the best values should only be written at checkpoints,
+            # if `early_stopping_save_interval` is not specified
+            set_variable_values([a, b], [1, 2])
+            with pytest.raises(KeyboardInterrupt):
+                with TrainLoop([a],
+                               max_epoch=2,
+                               checkpoint_dir=tempdir,
+                               early_stopping=True,
+                               early_stopping_in_memory=True) as loop:
+                    for _ in loop.iter_epochs():
+                        for step, valid_loss in \
+                                loop.iter_steps([0.7, 0.6, 0.8]):
+                            set_variable_values([a, b], [10 + step, 20 + step])
+                            loop.collect_metrics(valid_loss=valid_loss)
+                            self.assertIsNone(
+                                tf.train.latest_checkpoint(es_dir))
+                        loop.make_checkpoint()
+                        raise KeyboardInterrupt()
+            self.assertEqual(get_variable_values([a, b]), [13, 23])
+            self.assertEqual(os.path.join(es_dir, 'checkpoint.dat-2'),
+                             tf.train.latest_checkpoint(es_dir))
+
+            # resume training, and restore the best values from disk
+            with TrainLoop([a],
+                           max_epoch=2,
+                           checkpoint_dir=tempdir,
+                           early_stopping=True,
+                           early_stopping_in_memory=True) as loop:
+                self.assertEqual(loop.best_valid_metric, 0.6)
+                for _ in loop.iter_epochs():
+                    for step, valid_loss in loop.iter_steps([0.9]):
+                        set_variable_values([a, b], [10 + step, 20 + step])
+                        loop.collect_metrics(valid_loss=valid_loss)
+            self.assertEqual(get_variable_values([a, b]), [12, 24])
+
+            # resume training, and restore the new best values from memory,
+            # while the best values are written with debouncing
+            with TrainLoop([a],
+                           max_epoch=1,
+                           checkpoint_dir=tempdir,
+                           restore_checkpoint=False,
+                           early_stopping=True,
+                           early_stopping_in_memory=True,
+                           early_stopping_save_interval=0) as loop:
+                for _ in loop.iter_epochs():
+                    for step, valid_loss in loop.iter_steps([0.5, 0.4]):
+                        set_variable_values([a, b], [10 + step, 20 + step])
+                        loop.collect_metrics(valid_loss=valid_loss)
+                        loop._early_stopping_saver.wait()
+                        self.assertEqual(
+                            os.path.join(es_dir,
+                                         'checkpoint.dat-{}'.format(step)),
+                            tf.train.latest_checkpoint(es_dir)
+                        )
+            self.assertEqual(get_variable_values([a, b]), [12, 22])
+
+            with pytest.raises(ValueError,
+                               match='`early_stopping_save_interval` must be '
+                                     'non-negative'):
+                _ = TrainLoop([a], early_stopping=True,
+                              early_stopping_in_memory=True,
+                              early_stopping_save_interval=-1)
+
     def test_checkpoint(self):
         class MyObject(CheckpointSavableObject):
             def __init__(self):
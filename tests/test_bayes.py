@@ -3,9 +3,11 @@ import numpy as np
 import tensorflow as tf
 from mock import Mock, mock
 
-from tfsnippet.bayes import BayesianNet
+from tfsnippet.bayes import BayesianNet, memoized_builder
 from tfsnippet.distributions import Normal
 from tfsnippet.stochastic import StochasticTensor
+from tfsnippet.utils import Config, is_in_control_flow_context
+from tfsnippet.variational import chunked_importance_sampling_log_likelihood
 
 
 class BayesianNetTestCase(tf.test.TestCase):
@@ -285,3 +287,170 @@ class BayesianNetTestCase(tf.test.TestCase):
         with self.test_session():
             np.testing.assert_equal(
                 chain.log_joint.eval(), fake_log_joint.eval())
+
+    def test_variational_chain_memoized(self):
+        q_net = BayesianNet({'x': [1.]})
+        q_net.add('z', Normal(q_net.observed['x'], 1.))
+
+        @memoized_builder
+        def model_builder(observed, std=1.):
+            model = BayesianNet(observed)
+            z = model.add('z', Normal([0.], [std]))
+            x = model.add('x', Normal(z, [std]))
+            return model
+
+        # the chain should be reused with the same arguments
+        chain = q_net.variational_chain(
+            model_builder, observed=q_net.observed)
+        self.assertIs(
+            q_net.variational_chain(model_builder, observed=q_net.observed),
+            chain
+        )
+        self.assertIs(chain.model, model_builder(
+            {'x': q_net.observed['x'], 'z': q_net['z']}))
+
+        # but not with different arguments
+        chain2 = q_net.variational_chain(
+            model_builder, observed=q_net.observed, std=2.)
+        self.assertIsNot(chain2, chain)
+        self.assertIsNot(chain2.model, chain.model)
+        self.assertIs(
+            q_net.variational_chain(
+                model_builder, observed=q_net.observed, std=2.),
+            chain2
+        )
+        self.assertIsNot(
+            q_net.variational_chain(model_builder, latent_axis=0), chain)
+
+        # the chain should not be cached if `model_builder` is not memoized
+        def model_builder_2(observed):
+            return model_builder(observed)
+
+        self.assertIsNot(
+            q_net.variational_chain(model_builder_2, observed=q_net.observed),
+            q_net.variational_chain(model_builder_2, observed=q_net.observed)
+        )
+
+
+class MemoizedBuilderTestCase(tf.test.TestCase):
+
+    def test_memoized_builder(self):
+        class MyConfig(Config):
+            n_z = 1
+
+        calls = []
+
+        @memoized_builder
+        def builder(x, observed=None, n_z=None, config=None):
+            """builder doc"""
+            calls.append((x, observed, n_z, config))
+            net = BayesianNet(observed)
+            net.add('z', Normal(x, 1.), n_samples=n_z)
+            return net
+
+        self.assertEqual(builder.__name__, 'builder')
+        self.assertEqual(builder.__doc__, 'builder doc')
+
+        with tf.Graph().as_default():
+            x = tf.placeholder(tf.float32, [None])
+            x2 = tf.placeholder(tf.float32, [None])
+            z = tf.placeholder(tf.float32, [None])
+
+            # test the same arguments
+            net = builder(x, observed={'z': z}, n_z=3)
+            self.assertEqual(len(calls), 1)
+            self.assertIs(builder(x, observed={'z': z}, n_z=3), net)
+            self.assertIs(builder(x, n_z=3, observed={'z': z}), net)
+            self.assertEqual(len(calls), 1)
+
+            # the StochasticTensor and its log_prob should be reused
+            self.assertIs(builder(x, observed={'z': z}, n_z=3)['z'],
+                          net['z'])
+            self.assertIs(
+                builder(x, observed={'z': z}, n_z=3).local_log_prob('z'),
+                net.local_log_prob('z')
+            )
+
+            # test different arguments
+            self.assertIsNot(builder(x2, observed={'z': z}, n_z=3), net)
+            self.assertIsNot(builder(x, observed={'z': x2}, n_z=3), net)
+            self.assertIsNot(builder(x, observed={'z': z}, n_z=4), net)
+            self.assertIsNot(builder(x, n_z=3), net)
+            self.assertEqual(len(calls), 5)
+
+            # test configs, which are keyed by their values
+            config = MyConfig()
+            net = builder(x, config=config)
+            self.assertIs(builder(x, config=MyConfig()), net)
+            config.n_z = 2
+            self.assertIsNot(builder(x, config=config), net)
+            self.assertEqual(len(calls), 7)
+
+            # test arguments which cannot be converted into keys
+            self.assertIsNot(builder(np.zeros([2], dtype=np.float32)),
+                             builder(np.zeros([2], dtype=np.float32)))
+            self.assertEqual(len(calls), 9)
+
+            # test clear cache
+            net = builder(x)
+            self.assertIs(builder(x), net)
+            builder.clear_cache()
+            self.assertIsNot(builder(x), net)
+            self.assertEqual(len(calls), 11)
+
+        # test the cache is bound to the graph
+        with tf.Graph().as_default():
+            x = tf.placeholder(tf.float32, [None])
+            _ = builder(x)
+            self.assertEqual(len(calls), 12)
+
+    def test_memoized_builder_variable_scope(self):
+        @memoized_builder
+        def builder(x):
+            net = BayesianNet()
+            net.add('z', Normal(x, 1.))
+            return net
+
+        with tf.Graph().as_default():
+            x = tf.placeholder(tf.float32, [None])
+            net = builder(x)
+
+            # the results are cached per variable scope
+            with tf.variable_scope('vs'):
+                net2 = builder(x)
+                self.assertIsNot(net2, net)
+                self.assertIs(builder(x), net2)
+            self.assertIs(builder(x), net)
+
+    def test_memoized_builder_in_while_loop(self):
+        calls = []
+        nets = []
+
+        @memoized_builder
+        def q_net(x, n_z=None):
+            calls.append(is_in_control_flow_context())
+            net = BayesianNet()
+            net.add('z', Normal(x, 1.), n_samples=n_z)
+            return net
+
+        def log_weights_fn(n_z):
+            # use the samples of `z` as the log-weights
+            q = q_net(x, n_z=n_z)
+            nets.append(q)
+            return q['z'].tensor, tf.zeros_like(q['z'].tensor)
+
+        with self.test_session() as sess:
+            x = tf.constant([0., 1.])
+            ll = chunked_importance_sampling_log_likelihood(
+                log_weights_fn, n_samples=10000, chunk_size=1000)
+
+            # the net built inside the while loop should neither be taken
+            # from, nor be put into the cache
+            self.assertEqual([False, True], calls)
+            self.assertIsNot(nets[1], nets[0])
+            self.assertIs(q_net(x, n_z=1000), nets[0])
+            self.assertEqual(2, len(calls))
+
+            # each chunk should draw new samples, such that the estimator
+            # converges to ``log E[exp(z)] = x + 1/2``
+            np.testing.assert_allclose(sess.run(ll), [.5, 1.5], atol=5e-2)
@@ -3,6 +3,7 @@ import numpy as np
 import tensorflow as tf
 from mock import Mock
 
+from tfsnippet.distributions import Normal
 from tfsnippet.stochastic import StochasticTensor
 from tfsnippet.utils import TensorWrapper, register_tensor_wrapper_class
 
@@ -121,23 +122,50 @@ class StochasticTensorTestCase(tf.test.TestCase):
         distrib.log_prob.assert_not_called()
         distrib.prob.assert_not_called()
 
-        # test group_ndims different from default
-        distrib.log_prob.reset_mock()
+        # test group_ndims different from default, which should be derived
+        # from the cached log-densities of each element
+        log_p = np.random.normal(size=[2, 3, 4]).astype(np.float32)
+        distrib.log_prob = Mock(return_value=tf.constant(log_p))
         distrib.prob.reset_mock()
+        t = StochasticTensor(distrib, tf.zeros([2, 3, 4]), group_ndims=1)
+        given = t.tensor
         with self.test_session():
-            self.assertEqual(t.log_prob(group_ndims=1).eval(), 1.)
-            np.testing.assert_allclose(t.prob(group_ndims=2).eval(), exp_1)
+            np.testing.assert_allclose(
+                t.log_prob().eval(), np.sum(log_p, axis=-1), rtol=1e-5)
+            np.testing.assert_allclose(
+                t.log_prob(group_ndims=0).eval(), log_p, rtol=1e-5)
+            np.testing.assert_allclose(
+                t.log_prob(group_ndims=2).eval(),
+                np.sum(log_p, axis=(-1, -2)), rtol=1e-5
+            )
+            np.testing.assert_allclose(
+                t.prob(group_ndims=3).eval(), np.exp(np.sum(log_p)),
+                rtol=1e-5
+            )
+        self.assertIs(t.log_prob(group_ndims=0), t.log_prob(group_ndims=0))
+        self.assertIs(t.log_prob(group_ndims=2), t.log_prob(group_ndims=2))
         self.assertEqual(
             distrib.log_prob.call_args_list,
-            [((given, 1), {'name': None}), ((given, 2),)]
+            [((given, 0), {'name': None})]
         )
         self.assertEqual(distrib.prob.call_args_list, [])
 
+        # test the reduction from the pre-computed log-densities
+        distrib.log_prob.reset_mock()
+        t = StochasticTensor(distrib, tf.zeros([2, 3, 4]), group_ndims=1,
+                             log_prob=tf.constant(np.sum(log_p, axis=-1)))
+        with self.test_session():
+            np.testing.assert_allclose(
+                t.log_prob(group_ndims=2).eval(),
+                np.sum(log_p, axis=(-1, -2)), rtol=1e-5
+            )
+        distrib.log_prob.assert_not_called()
+
         # test use dynamic group_ndims
         t = StochasticTensor(distrib, tf.constant(0.),
                              group_ndims=tf.constant(1, dtype=tf.int32))
         given = t.tensor
-        distrib.log_prob.reset_mock()
+        distrib.log_prob = Mock(return_value=tf.constant(1.))
         distrib.prob.reset_mock()
         with self.test_session():
             self.assertEqual(t.log_prob(group_ndims=t.group_ndims).eval(), 1.)
@@ -152,6 +180,27 @@ class StochasticTensorTestCase(tf.test.TestCase):
         )
         self.assertEqual(distrib.prob.call_args_list, [])
 
+    def test_log_prob_cache_in_while_loop(self):
+        distrib = Normal(mean=tf.zeros([3]), std=1.)
+        t = distrib.sample(n_samples=2)
+
+        def body(i, s):
+            return i + 1, s + tf.reduce_sum(t.log_prob(group_ndims=1))
+
+        # the log-densities built inside the loop should not be cached
+        _, s = tf.while_loop(lambda i, s: i < 3, body,
+                             [tf.constant(0), tf.constant(0.)])
+        self.assertEqual({}, t._self_log_prob_cache)
+
+        # thus the log-densities used outside of the loop should be
+        # built outside of the loop, and then be cached
+        log_prob = t.log_prob(group_ndims=1)
+        self.assertIs(t.log_prob(group_ndims=1), log_prob)
+        self.assertIs(t.log_prob(group_ndims=0), t.log_prob())
+        with self.test_session() as sess:
+            s, log_prob = sess.run([s, log_prob])
+            self.assertEqual(log_prob.shape, (2,))
+
     def test_repr(self):
         t = StochasticTensor(
             Mock(is_reparameterized=False),
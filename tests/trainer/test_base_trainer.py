@@ -8,6 +8,7 @@ from mock import Mock
 from tfsnippet.dataflows import DataFlow
 from tfsnippet.scaffold import TrainLoop, AnnealingVariable, EventKeys
 from tfsnippet.trainer import *
+from tfsnippet.trainer.base_trainer import StepEventScheduler
 from tfsnippet.utils import EventSource
 
 
@@ -148,6 +149,68 @@ class BaseTrainerTestCase(tf.test.TestCase):
 
         self.assertEqual(f.call_count, 2)
 
+    def test_step_event_scheduler(self):
+        loop = Mock(valid_metric_name='valid_loss')
+        t = BaseTrainer(loop)
+        logged = []
+
+        def hook(name):
+            return Mock(
+                side_effect=lambda: logged.append((name, loop.step)))
+
+        def fire(scheduler, step):
+            loop.step = step
+            scheduler.fire(t)
+
+        # test the hooks are only called at the due steps
+        scheduler = StepEventScheduler(t.events, EventKeys.STEP_EVALUATION)
+        fire(scheduler, 1)  # no handler
+        t.evaluate_after_steps(hook('a'), 3)
+        t.evaluate_after_steps(hook('b'), 2)
+        for step in range(1, 8):
+            fire(scheduler, step)
+        self.assertEqual(
+            [('b', 2), ('a', 3), ('b', 4), ('a', 6), ('b', 6)], logged)
+
+        # test the schedule is re-computed if the step counter is reset
+        del logged[:]
+        for step in range(2, 5):
+            fire(scheduler, step)
+        self.assertEqual([('b', 2), ('a', 3), ('b', 4)], logged)
+
+        # test the schedule is re-computed if the handlers are changed
+        del logged[:]
+        t.evaluate_after_steps(hook('c'), 1)
+        for step in range(5, 7):
+            fire(scheduler, step)
+        self.assertEqual([('c', 5), ('a', 6), ('b', 6), ('c', 6)], logged)
+
+        # test the step counter is read at the time the event is fired,
+        # just as the handlers would do, such that a change of the counter
+        # between two events (e.g., by `_run_step`) is respected
+        del logged[:]
+        t2 = BaseTrainer(loop)
+        scheduler = StepEventScheduler(t2.events, EventKeys.STEP_EVALUATION)
+        t2.evaluate_after_steps(hook('d'), 4)
+        loop.step = 3
+        scheduler.fire(t2)
+        loop.step = 4
+        scheduler.fire(t2)
+        self.assertEqual([('d', 4)], logged)
+
+        # test fallback to fire all the handlers, if any handler is not
+        # a step hook, and test the reversed order
+        scheduler = StepEventScheduler(
+            t.events, EventKeys.STEP_LOGGING, reverse=True)
+        t.log_after_steps(2)
+        f = Mock(return_value=None)
+        t.events.on(EventKeys.STEP_LOGGING, f)
+        loop.print_logs.reset_mock()
+        for step in range(1, 5):
+            fire(scheduler, step)
+        self.assertEqual(4, f.call_count)
+        self.assertEqual(2, loop.print_logs.call_count)
+
     def test_run(self):
         with self.test_session() as session:
             df = DataFlow.arrays([np.arange(6, dtype=np.float32)], batch_size=4)
@@ -0,0 +1,171 @@
+import time
+
+import numpy as np
+import pytest
+import tensorflow as tf
+from mock import MagicMock, Mock, PropertyMock, patch
+
+from tfsnippet.dataflows import DataFlow
+from tfsnippet.dataflows.shard_flow import ShardFlow
+from tfsnippet.scaffold import TrainLoop
+from tfsnippet.trainer import *
+
+
+def train_worker(ctx, max_epoch):
+    # the worker function must be at module-level, to be picklable
+    with tf.device(ctx.replica_device_setter()):
+        ph = tf.placeholder(tf.float32, [None])
+        var = tf.get_variable('var', shape=(), dtype=tf.float32,
+                              initializer=tf.zeros_initializer())
+        loss = tf.reduce_mean(tf.square(var - ph))
+        global_step = tf.train.get_or_create_global_step()
+        optimizer = ctx.wrap_optimizer(tf.train.GradientDescentOptimizer(.1))
+        train_op = optimizer.minimize(loss, global_step=global_step)
+
+    df = DataFlow.arrays([np.ones([70], dtype=np.float32)], batch_size=10)
+    with ctx.session() as session, \
+            TrainLoop([var], max_epoch=max_epoch,
+                      print_func=lambda *args: None) as loop:
+        trainer = Trainer(loop, train_op, [ph], ctx.shard(df))
+        trainer.run()
+        return loop.step, session.run([var, global_step])
+
+
+def sleep_worker(ctx, seconds):
+    time.sleep(seconds)
+
+
+class DistributedContextTestCase(tf.test.TestCase):
+
+    def test_props(self):
+        cluster_spec = {'ps': ['127.0.0.1:2222'],
+                        'worker': ['127.0.0.1:2223', '127.0.0.1:2224']}
+        ctx = DistributedContext(cluster_spec, 1, sync=False)
+        self.assertEqual(cluster_spec, ctx.cluster_spec.as_dict())
+        self.assertEqual(1, ctx.task_index)
+        self.assertEqual(2, ctx.num_workers)
+        self.assertFalse(ctx.is_chief)
+        self.assertFalse(ctx.sync)
+        self.assertEqual(['/job:ps', '/job:worker/task:1'],
+                         list(ctx.session_config.device_filters))
+        self.assertTrue(DistributedContext(cluster_spec, 0).is_chief)
+
+        flow = ctx.shard(DataFlow.arrays([np.arange(10)], batch_size=2))
+        self.assertIsInstance(flow, ShardFlow)
+        self.assertEqual((2, 1), (flow.num_shards, flow.index))
+
+        with pytest.raises(ValueError,
+                           match=r'`task_index` must be within \[0, 2\)'):
+            _ = DistributedContext(cluster_spec, 2)
+
+    def test_wrap_optimizer(self):
+        cluster_spec = {'ps': ['127.0.0.1:2222'],
+                        'worker': ['127.0.0.1:2223', '127.0.0.1:2224']}
+        optimizer = tf.train.GradientDescentOptimizer(.1)
+        ctx = DistributedContext(cluster_spec, 0, sync=False)
+        self.assertIs(optimizer, ctx.wrap_optimizer(optimizer))
+
+        ctx = DistributedContext(cluster_spec, 0, sync=True)
+        self.assertIsInstance(ctx.wrap_optimizer(optimizer),
+                              tf.train.SyncReplicasOptimizer)
+        with pytest.raises(RuntimeError, match='`wrap_optimizer` can only be '
+                                               'called once'):
+            _ = ctx.wrap_optimizer(optimizer)
+
+    def test_supply_tokens(self):
+        cluster_spec = {'ps': ['127.0.0.1:2222'],
+                        'worker': ['127.0.0.1:2223', '127.0.0.1:2224']}
+        ctx = DistributedContext(cluster_spec, 0)
+        coord = tf.train.Coordinator()
+
+        # test stop supplying the tokens once all the workers have finished
+        session = Mock(run=Mock(side_effect=[1, None, 2]))
+        ctx._supply_tokens(session, coord, 'tokens', 'finished', None)
+        self.assertEqual(['finished', 'tokens', 'finished'],
+                         [c[0][0] for c in session.run.call_args_list])
+
+        # test stop supplying the tokens after the timeout
+        session = Mock(run=Mock(return_value=1))
+        start_time = time.time()
+        ctx._supply_tokens(session, coord, 'tokens', 'finished', .5)
+        self.assertLess(time.time() - start_time, 5.)
+
+        # test stop supplying the tokens once the coordinator stops
+        coord.request_stop()
+        session = Mock(run=Mock(return_value=1))
+        ctx._supply_tokens(session, coord, 'tokens', 'finished', None)
+        self.assertFalse(session.run.called)
+
+    def test_session_errors(self):
+        cluster_spec = {'ps': ['127.0.0.1:2222'],
+                        'worker': ['127.0.0.1:2223', '127.0.0.1:2224']}
+
+        def run(fetches):
+            if fetches is finish_op:
+                raise RuntimeError('cannot finish')
+
+        def make_context():
+            ctx = DistributedContext(cluster_spec, 1)
+            ctx._sync_optimizer = Mock()
+            return ctx
+
+        finish_op = object()
+        session = MagicMock(run=Mock(side_effect=run))
+        session_manager = Mock(wait_for_session=Mock(return_value=session))
+
+        with patch.object(DistributedContext, 'server',
+                          new_callable=PropertyMock), \
+                patch('tensorflow.train.SessionManager',
+                      Mock(return_value=session_manager)), \
+                patch('tensorflow.assign_add', Mock(return_value=finish_op)):
+            # test the error of the finish op is raised if no other error
+            with pytest.raises(RuntimeError, match='cannot finish'):
+                with make_context().session():
+                    pass
+            self.assertTrue(session.close.called)
+
+            # test the error of the finish op does not mask the error
+            # raised within the context
+            session.close.reset_mock()
+            with pytest.raises(ValueError, match='worker error'):
+                with make_context().session():
+                    raise ValueError('worker error')
+            self.assertTrue(session.close.called)
+
+
+class RunDistributedTestCase(tf.test.TestCase):
+
+    def test_sync(self):
+        # 7 batches are dealt to 3 workers, such that each worker runs
+        # 2 steps per epoch, and the variables are updated once per round
+        results = run_distributed(train_worker, 3, sync=True, args=(2,),
+                                  timeout=300)
+        self.assertEqual(3, len(results))
+        values = []
+        for step, (value, global_step) in results:
+            self.assertEqual(4, step)
+            self.assertEqual(4, global_step)
+            values.append(value)
+        np.testing.assert_allclose(1. - .8 ** 4, values, rtol=1e-5)
+
+    def test_async(self):
+        results = run_distributed(train_worker, 2, sync=False,
+                                  kwargs={'max_epoch': 1}, timeout=300)
+        self.assertEqual(2, len(results))
+        for step, _ in results:
+            self.assertEqual(3, step)
+        self.assertEqual(6, max(global_step for _, (_, global_step)
+                                in results))
+
+    def test_errors(self):
+        with pytest.raises(ValueError,
+                           match='`num_workers` must be at least 1'):
+            _ = run_distributed(train_worker, 0)
+        with pytest.raises(ValueError, match='`num_ps` must be at least 1'):
+            _ = run_distributed(train_worker, 1, num_ps=0)
+        with pytest.raises(RuntimeError, match='Worker 0 failed'):
+            _ = run_distributed(train_worker, 1, args=(None,))
+        with pytest.raises(RuntimeError,
+                           match=r'The workers have not finished within 1\.0 '
+                                 r'seconds: workers \[0\] are still running'):
+            _ = run_distributed(sleep_worker, 1, args=(60,), timeout=1)
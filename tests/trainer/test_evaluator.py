@@ -49,6 +49,10 @@ class EvaluatorTestCase(tf.test.TestCase):
     def test_error(self):
         with pytest.raises(ValueError, match='Metric is not a scalar tensor'):
             _ = Evaluator(Mock(), {'x': tf.constant([1, 2])}, [], Mock())
+        with pytest.raises(KeyError, match='Log-mean-exp metric is not one of '
+                                           'the metrics'):
+            _ = Evaluator(Mock(), {'x': tf.constant(1)}, [], Mock(),
+                          log_mean_exp_metrics=['y'])
 
     def test_run(self):
         with self.test_session() as session:
@@ -103,3 +107,30 @@ class EvaluatorTestCase(tf.test.TestCase):
                     call_session, call_feed_dict = call_args[0]
                     self.assertEqual(56, call_feed_dict[ph2])
                     self.assertNotIn(ph3, call_feed_dict)
+
+    def test_log_mean_exp_metrics(self):
+        with self.test_session():
+            x = np.random.normal(size=[10]).astype(np.float32) * 100.
+            df = DataFlow.arrays([x], batch_size=4)
+            ph = tf.placeholder(tf.float32, shape=[None])
+            offsets = np.asarray([[-1.], [0.], [2.]], dtype=np.float32)
+
+            with TrainLoop([], max_epoch=1) as loop:
+                # the log-weights of 3 samples for each data point
+                v = Evaluator(loop, {'valid_loss': tf.reduce_mean(ph),
+                                     'valid_ll': ph + offsets},
+                              [ph], df, log_mean_exp_metrics=['valid_ll'])
+                self.assertEqual(('valid_ll',), v.log_mean_exp_metrics)
+
+                for epoch in loop.iter_epochs():
+                    v.run()
+                    # log-mean-exp over the samples, then average over the
+                    # data points
+                    np.testing.assert_allclose(
+                        np.mean(x + np.log(np.mean(np.exp(offsets)))),
+                        v.last_metrics_dict['valid_ll'], rtol=1e-5
+                    )
+                    np.testing.assert_allclose(
+                        np.mean(x), v.last_metrics_dict['valid_loss'],
+                        rtol=1e-5
+                    )
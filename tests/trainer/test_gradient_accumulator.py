@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+import tensorflow as tf
+
+from tfsnippet.trainer import GradientAccumulator
+from tfsnippet.utils import ensure_variables_initialized
+
+
+class GradientAccumulatorTestCase(tf.test.TestCase):
+
+    def test_accumulate_and_apply(self):
+        ph = tf.placeholder(tf.float32, [None])
+        idx = tf.placeholder(tf.int32, [None])
+        a = tf.get_variable('a', initializer=np.asarray([1., 2.], np.float32))
+        b = tf.get_variable('b', initializer=np.asarray([3., 4.], np.float32))
+        c = tf.get_variable('c', shape=(), dtype=tf.float32)
+        loss = tf.reduce_sum(a * ph) + tf.reduce_sum(tf.gather(b, idx))
+        optimizer = tf.train.GradientDescentOptimizer(.5)
+        grads = optimizer.compute_gradients(loss, var_list=[a, b, c])
+
+        # test errors
+        with pytest.raises(ValueError, match='No gradient is given'):
+            _ = GradientAccumulator(optimizer, [(None, c)])
+
+        accumulator = GradientAccumulator(optimizer, grads)
+        self.assertIs(optimizer, accumulator.optimizer)
+        self.assertEqual([a, b], accumulator.variables)  # `c` has no gradient
+        self.assertEqual(2, len(accumulator.accumulators))
+        self.assertFalse(any(v in tf.trainable_variables()
+                             for v in accumulator.accumulators))
+
+        with self.test_session() as sess:
+            ensure_variables_initialized()
+
+            # accumulate and reset
+            sess.run(accumulator.accumulate_op,
+                     feed_dict={ph: [1., 2.], idx: [1]})
+            self.assertEqual(1., sess.run(accumulator.count))
+            np.testing.assert_allclose(
+                [[1., 2.], [0., 1.]], sess.run(accumulator.accumulators))
+            sess.run(accumulator.reset_op)
+            self.assertEqual(0., sess.run(accumulator.count))
+            np.testing.assert_allclose(
+                [[0., 0.], [0., 0.]], sess.run(accumulator.accumulators))
+
+            # accumulate two micro-batches and apply their average
+            sess.run(accumulator.accumulate_op,
+                     feed_dict={ph: [1., 2.], idx: [1]})
+            sess.run(accumulator.accumulate_op,
+                     feed_dict={ph: [3., 4.], idx: [0, 0, 1]})
+            np.testing.assert_allclose(
+                [[4., 6.], [2., 2.]], sess.run(accumulator.accumulators))
+            sess.run(accumulator.apply_op)
+            np.testing.assert_allclose([0., 0.5], sess.run(a))
+            np.testing.assert_allclose([2.5, 3.5], sess.run(b))
+            self.assertEqual(0., sess.run(accumulator.count))
+            np.testing.assert_allclose(
+                [[0., 0.], [0., 0.]], sess.run(accumulator.accumulators))
@@ -1,3 +1,6 @@
+import json
+import os
+
 import numpy as np
 import pytest
 import tensorflow as tf
@@ -85,6 +88,111 @@ class TrainerTestCase(tf.test.TestCase):
             )
             self.assertFalse(loop.add_summary.called)
 
+    def test_profile(self):
+        ph = tf.placeholder(tf.int32, [5])
+        var = tf.get_variable('var', shape=[5], dtype=tf.int32,
+                              initializer=tf.zeros_initializer())
+        train_op = tf.assign(var, ph)
+        df = DataFlow.arrays([np.arange(10, 30, dtype=np.int32)], batch_size=5)
+
+        with TemporaryDirectory() as tmpdir:
+            profile_dir = os.path.join(tmpdir, 'profile')
+            with self.test_session(), \
+                    TrainLoop([var], max_epoch=1, summary_dir=tmpdir,
+                              profile_steps=[2, 4],
+                              profile_dir=profile_dir) as loop:
+                self.assertEqual(frozenset([2, 4]), loop.profile_steps)
+                self.assertEqual(profile_dir, loop.profile_dir)
+                self.assertFalse(loop.is_profile_step)
+                loop.add_run_metadata = Mock(wraps=loop.add_run_metadata)
+                t = Trainer(loop, train_op, [ph], df)
+                ensure_variables_initialized()
+                t.run()
+
+                self.assertEqual(2, loop.add_run_metadata.call_count)
+                for step in (2, 4):
+                    name = os.path.join(profile_dir, 'step_{}'.format(step))
+                    with open(name + '.trace.json', 'rb') as f:
+                        self.assertIn('traceEvents',
+                                      json.loads(f.read().decode('utf-8')))
+                    with open(name + '.ops.txt', 'rb') as f:
+                        self.assertIn(b'Top Ops by Time', f.read())
+                self.assertEqual(
+                    ['step_2.ops.txt', 'step_2.trace.json', 'step_4.ops.txt',
+                     'step_4.trace.json'],
+                    sorted(os.listdir(profile_dir))
+                )
+
+    def test_accumulate_steps(self):
+        ph = tf.placeholder(tf.float32, [None, 2])
+        var = tf.get_variable('var', shape=[2], dtype=tf.float32,
+                              initializer=tf.zeros_initializer())
+        loss = tf.reduce_sum(var * ph)
+        optimizer = tf.train.GradientDescentOptimizer(1.)
+        accumulator = GradientAccumulator(
+            optimizer, optimizer.compute_gradients(loss, var_list=[var]))
+        x = np.arange(20, dtype=np.float32).reshape([10, 2])
+        df = DataFlow.arrays([x], batch_size=2)
+
+        # the gradient of each micro-batch is the sum of its rows, while
+        # the micro-batches are grouped as [[0, 1], [2, 3], [4]]
+        grads = [np.sum(x[i * 2: (i + 1) * 2], axis=0) for i in range(5)]
+        groups = [grads[0: 2], grads[2: 4], grads[4:]]
+        expected_var = -np.sum([np.mean(g, axis=0) for g in groups], axis=0)
+        expected_metrics = [np.mean([np.sum(g) for g in group])
+                            for group in groups]
+
+        # test errors
+        loop = Mock(max_epoch=1, max_step=None)
+        with pytest.raises(ValueError,
+                           match='`accumulate_steps` must be at least 1'):
+            _ = Trainer(loop, accumulator, [ph], df, accumulate_steps=0)
+        with pytest.raises(TypeError,
+                           match='`train_op` must be a `GradientAccumulator` '
+                                 'if `accumulate_steps` > 1'):
+            _ = Trainer(loop, Mock(), [ph], df, accumulate_steps=2)
+
+        for count_micro_steps in (False, True):
+            with self.test_session() as session, \
+                    TrainLoop([var], max_epoch=1) as loop:
+                loop.collect_metrics = Mock(wraps=loop.collect_metrics)
+                t = Trainer(loop, accumulator, [ph], df,
+                            metrics={'loss_x': tf.reduce_sum(ph)},
+                            accumulate_steps=2,
+                            count_micro_steps=count_micro_steps)
+                self.assertEqual(2, t.accumulate_steps)
+                self.assertEqual(count_micro_steps, t.count_micro_steps)
+                ensure_variables_initialized()
+                session.run(tf.assign(var, tf.zeros_like(var)))
+                t.run()
+
+                self.assertEqual(5 if count_micro_steps else 3, loop.step)
+                np.testing.assert_allclose(expected_var, session.run(var))
+                metrics = [c[0][0]['loss_x']
+                           for c in loop.collect_metrics.call_args_list
+                           if c[0] and 'loss_x' in c[0][0]]
+                np.testing.assert_allclose(expected_metrics, metrics)
+                self.assertEqual(0., session.run(accumulator.count))
+
+        # test the examples per second count all the micro-batches of
+        # each optimizer step
+        with self.test_session() as session, \
+                TrainLoop([var], max_epoch=1,
+                          throughput_metrics=True) as loop:
+            loop.collect_metrics = Mock(wraps=loop.collect_metrics)
+            t = Trainer(loop, accumulator, [ph], df, accumulate_steps=2)
+            ensure_variables_initialized()
+            t.run()
+            metrics = [c[1]['metrics']
+                       for c in loop.collect_metrics.call_args_list
+                       if 'examples_per_sec' in c[1].get('metrics', {})]
+            np.testing.assert_allclose(
+                [4, 4, 2],
+                [m['examples_per_sec'] * (m['data_time'] + m['compute_time'])
+                 for m in metrics],
+                rtol=1e-5
+            )
+
 
 class LossTrainerTestCase(tf.test.TestCase):
 
@@ -1,6 +1,8 @@
 import hashlib
+import json
 import mimetypes
 import os
+import re
 import shutil
 import socket
 import unittest
@@ -9,8 +11,10 @@ from threading import Thread
 
 import six
 import pytest
+from filelock import FileLock
 from mock import mock
 
+import tfsnippet.utils.caching
 from tfsnippet.utils import *
 
 if six.PY2:
@@ -58,12 +62,54 @@ class AssetsHTTPRequestHandler(BaseHTTPRequestHandler):
             self.send_header('Content-Length', os.stat(asset_file).st_size)
             self.send_header('Connection', 'close')
             self.end_headers()
+            self.server.counter[0] += 1
             with open(asset_file, 'rb') as f:
                 shutil.copyfileobj(f, self.wfile)
-            self.server.counter[0] += 1
         return
 
 
+class RangeAssetsHTTPRequestHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        asset_file = get_asset_path(self.path.lstrip('/'))
+        if not os.path.isfile(asset_file):
+            self.send_error(404, 'Not Found')
+            return
+
+        with open(asset_file, 'rb') as f:
+            content = f.read()
+        range_header = self.headers.get('Range')
+        self.server.range_headers.append(range_header)
+
+        # the full content is sent if "If-Range" does not match the ETag
+        if_range = self.headers.get('If-Range')
+        if if_range is not None and if_range != self.server.etag:
+            range_header = None
+
+        if range_header:
+            m = re.match(r'^bytes=(\d+)-(\d*)$', range_header)
+            start = int(m.group(1))
+            end = int(m.group(2)) if m.group(2) else len(content) - 1
+            end = min(end, len(content) - 1)
+            if start >= len(content):
+                self.send_error(416, 'Requested Range Not Satisfiable')
+                return
+            self.send_response(206)
+            self.send_header('Content-Range', 'bytes {}-{}/{}'.format(
+                start, end, len(content)))
+            content = content[start: end + 1]
+        else:
+            self.send_response(200)
+        if self.server.etag is not None:
+            self.send_header('ETag', self.server.etag)
+        self.send_header('Content-type', mimetypes.guess_type(asset_file))
+        self.send_header('Content-Length', len(content))
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.server.counter[0] += 1
+        self.wfile.write(content)
+
+
 @contextmanager
 def set_cache_root_var(value):
     import tfsnippet.utils.caching
@@ -106,10 +152,12 @@ def get_free_port():
 
 
 @contextmanager
-def assets_server():
+def assets_server(handler_class=AssetsHTTPRequestHandler):
     port = get_free_port()
-    server = HTTPServer(('127.0.0.1', port), AssetsHTTPRequestHandler)
+    server = HTTPServer(('127.0.0.1', port), handler_class)
     server.counter = [0]
+    server.range_headers = []
+    server.etag = None
     background_thread = Thread(target=server.serve_forever)
     background_thread.daemon = True
     background_thread.start()
@@ -287,6 +335,295 @@ class CacheDirTestCase(unittest.TestCase):
                                                hasher=hashlib.sha1(),
                                                expected_hash=payload_tar_sha1)
 
+    def test_checksum_manifest(self):
+        with open(get_asset_path('payload.zip'), 'rb') as f:
+            payload = f.read()
+        payload_md5 = hashlib.md5(payload).hexdigest()
+
+        with TemporaryDirectory() as tmpdir:
+            cache_dir = CacheDir('sub-dir', cache_root=tmpdir)
+            manifest_path = os.path.join(cache_dir.path, '.manifest.json')
+
+            with assets_server() as (server, url), \
+                    scoped_set_config(settings, file_cache_checksum=True), \
+                    mock.patch('tfsnippet.utils.caching._hash_file',
+                               wraps=tfsnippet.utils.caching._hash_file) \
+                    as hash_file:
+                # the verified hash should be recorded after downloading
+                path = cache_dir.download(url + 'payload.zip',
+                                          hasher=hashlib.md5(),
+                                          expected_hash=payload_md5)
+                self.assertTrue(os.path.isfile(manifest_path))
+                with open(manifest_path, 'rb') as f:
+                    manifest = json.loads(f.read().decode('utf-8'))
+                st = os.stat(path)
+                self.assertDictEqual(manifest, {
+                    'payload.zip': {
+                        'size': st.st_size,
+                        'mtime': st.st_mtime,
+                        'inode': st.st_ino,
+                        'algorithm': 'md5',
+                        'hash': payload_md5,
+                    }
+                })
+                self.assertEqual(0, hash_file.call_count)
+
+                # the cached file should not be re-hashed if not changed
+                _ = cache_dir.download(url + 'payload.zip',
+                                       hasher=hashlib.md5(),
+                                       expected_hash=payload_md5)
+                self.assertEqual(0, hash_file.call_count)
+
+                # the cached file should be re-hashed if the hash differs
+                with pytest.raises(IOError, match='Hash not match for '
+                                                  'cached file'):
+                    _ = cache_dir.download(url + 'payload.zip',
+                                           hasher=hashlib.md5(),
+                                           expected_hash='invalid')
+                self.assertEqual(1, hash_file.call_count)
+                self.assertFalse(os.path.isfile(path))
+                self.assertDictEqual({}, cache_dir._manifest.load())
+
+                # download again, and re-hash if the signature changes
+                _ = cache_dir.download(url + 'payload.zip',
+                                       hasher=hashlib.md5(),
+                                       expected_hash=payload_md5)
+                os.utime(path, (st.st_atime + 10, st.st_mtime + 10))
+                _ = cache_dir.download(url + 'payload.zip',
+                                       hasher=hashlib.md5(),
+                                       expected_hash=payload_md5)
+                self.assertEqual(2, hash_file.call_count)
+                _ = cache_dir.download(url + 'payload.zip',
+                                       hasher=hashlib.md5(),
+                                       expected_hash=payload_md5)
+                self.assertEqual(2, hash_file.call_count)
+
+                # the content changed without changing the signature can
+                # only be detected by `verify_all()`
+                self.assertListEqual([], cache_dir.verify_all())
+                st = os.stat(path)
+                with open(path, 'r+b') as f:
+                    f.write(b'12345')
+                os.utime(path, (st.st_atime, st.st_mtime))
+                _ = cache_dir.download(url + 'payload.zip',
+                                       hasher=hashlib.md5(),
+                                       expected_hash=payload_md5)
+                self.assertListEqual([path], cache_dir.verify_all())
+                self.assertTrue(os.path.isfile(path))
+                with pytest.raises(IOError, match='Hash not match for '
+                                                  'cached file'):
+                    _ = cache_dir.download(url + 'payload.zip',
+                                           hasher=hashlib.md5(),
+                                           expected_hash=payload_md5)
+
+                # test remove corrupted files by `verify_all()`
+                _ = cache_dir.download(url + 'payload.zip',
+                                       hasher=hashlib.md5(),
+                                       expected_hash=payload_md5)
+                with open(path, 'r+b') as f:
+                    f.write(b'12345')
+                self.assertListEqual(
+                    [path], cache_dir.verify_all(remove_corrupted=True))
+                self.assertFalse(os.path.isfile(path))
+                self.assertDictEqual({}, cache_dir._manifest.load())
+
+    def test_download_resume(self):
+        with open(get_asset_path('payload.zip'), 'rb') as f:
+            payload = f.read()
+        payload_md5 = hashlib.md5(payload).hexdigest()
+
+        with TemporaryDirectory() as tmpdir:
+            cache_dir = CacheDir('sub-dir', cache_root=tmpdir)
+            cache_path = os.path.join(cache_dir.path, 'payload.zip')
+            temp_path = cache_path + '._downloading_'
+
+            with assets_server(RangeAssetsHTTPRequestHandler) as \
+                    (server, url):
+                # resume from the partial content
+                makedirs(cache_dir.path, exist_ok=True)
+                with open(temp_path, 'wb') as f:
+                    f.write(payload[:100])
+                path = cache_dir.download(url + 'payload.zip',
+                                          hasher=hashlib.md5(),
+                                          expected_hash=payload_md5,
+                                          show_progress=True)
+                self.assertEqual(cache_path, path)
+                self.assertFalse(os.path.isfile(temp_path))
+                self.assertListEqual(['bytes=100-'], server.range_headers)
+                with open(path, 'rb') as f:
+                    self.assertEqual(payload, f.read())
+                os.remove(path)
+
+                # restart if the partial content is too long
+                del server.range_headers[:]
+                with open(temp_path, 'wb') as f:
+                    f.write(payload + b'12345')
+                path = cache_dir.download(url + 'payload.zip',
+                                          hasher=hashlib.md5(),
+                                          expected_hash=payload_md5,
+                                          show_progress=True)
+                self.assertListEqual(['bytes={}-'.format(len(payload) + 5),
+                                      None],
+                                     server.range_headers)
+                with open(path, 'rb') as f:
+                    self.assertEqual(payload, f.read())
+                os.remove(path)
+
+                # the partial content is removed if the hash does not match
+                with open(temp_path, 'wb') as f:
+                    f.write(b'12345')
+                with pytest.raises(IOError,
+                                   match='Hash not match for file downloaded '
+                                         'from {}payload.zip'.format(url)):
+                    _ = cache_dir.download(url + 'payload.zip',
+                                           hasher=hashlib.md5(),
+                                           expected_hash=payload_md5,
+                                           show_progress=True)
+                self.assertFalse(os.path.isfile(cache_path))
+                self.assertFalse(os.path.isfile(temp_path))
+
+            # restart if the server does not support range requests
+            with assets_server() as (server, url):
+                with open(temp_path, 'wb') as f:
+                    f.write(b'12345')
+                path = cache_dir.download(url + 'payload.zip',
+                                          hasher=hashlib.md5(),
+                                          expected_hash=payload_md5,
+                                          show_progress=True)
+                self.assertEqual(1, server.counter[0])
+                with open(path, 'rb') as f:
+                    self.assertEqual(payload, f.read())
+                os.remove(path)
+
+            with assets_server(RangeAssetsHTTPRequestHandler) as \
+                    (server, url):
+                server.etag = '"v1"'
+
+                # the validator is recorded, and sent in "If-Range"
+                with open(temp_path, 'wb') as f:
+                    f.write(payload[:100])
+                with open(temp_path + '.validator', 'wb') as f:
+                    f.write(b'"v1"')
+                path = cache_dir.download(url + 'payload.zip',
+                                          show_progress=True)
+                self.assertListEqual(['bytes=100-'], server.range_headers)
+                with open(path, 'rb') as f:
+                    self.assertEqual(payload, f.read())
+                self.assertFalse(os.path.isfile(temp_path + '.validator'))
+                os.remove(path)
+
+                # restart from byte 0 if the remote file has changed
+                del server.range_headers[:]
+                with open(temp_path, 'wb') as f:
+                    f.write(b'12345')
+                with open(temp_path + '.validator', 'wb') as f:
+                    f.write(b'"v0"')
+                path = cache_dir.download(url + 'payload.zip',
+                                          show_progress=True)
+                self.assertListEqual(['bytes=5-'], server.range_headers)
+                with open(path, 'rb') as f:
+                    self.assertEqual(payload, f.read())
+                os.remove(path)
+
+                # the partial content without a validator or a hasher is
+                # not resumed
+                del server.range_headers[:]
+                with open(temp_path, 'wb') as f:
+                    f.write(b'12345')
+                path = cache_dir.download(url + 'payload.zip',
+                                          show_progress=True)
+                self.assertListEqual([None], server.range_headers)
+                with open(path, 'rb') as f:
+                    self.assertEqual(payload, f.read())
+
+    def test_download_parallel(self):
+        with open(get_asset_path('payload.tar'), 'rb') as f:
+            payload = f.read()
+        payload_sha1 = hashlib.sha1(payload).hexdigest()
+        seg_size = (len(payload) + 2) // 3
+
+        with TemporaryDirectory() as tmpdir:
+            cache_dir = CacheDir('sub-dir', cache_root=tmpdir)
+            cache_path = os.path.join(cache_dir.path, 'payload.tar')
+            temp_path = cache_path + '._downloading_'
+
+            with assets_server(RangeAssetsHTTPRequestHandler) as \
+                    (server, url):
+                # download in 3 segments
+                path = cache_dir.download(url + 'payload.tar',
+                                          hasher=hashlib.sha1(),
+                                          expected_hash=payload_sha1,
+                                          show_progress=True,
+                                          num_connections=3)
+                self.assertEqual(cache_path, path)
+                self.assertListEqual(
+                    sorted(['bytes=0-0'] + [
+                        'bytes={}-{}'.format(
+                            i * seg_size,
+                            min((i + 1) * seg_size, len(payload)) - 1)
+                        for i in range(3)
+                    ]),
+                    sorted(server.range_headers)
+                )
+                with open(path, 'rb') as f:
+                    self.assertEqual(payload, f.read())
+                self.assertListEqual([], [
+                    n for n in os.listdir(cache_dir.path)
+                    if '._downloading_' in n
+                ])
+                os.remove(path)
+
+                # resume the partial segments
+                del server.range_headers[:]
+                with open(temp_path + '.3-0', 'wb') as f:
+                    f.write(payload[:seg_size])
+                with open(temp_path + '.3-1', 'wb') as f:
+                    f.write(payload[seg_size: seg_size + 10])
+                path = cache_dir.download(url + 'payload.tar',
+                                          hasher=hashlib.sha1(),
+                                          expected_hash=payload_sha1,
+                                          show_progress=True,
+                                          num_connections=3)
+                self.assertListEqual(
+                    sorted([
+                        'bytes=0-0',
+                        'bytes={}-{}'.format(seg_size + 10, 2 * seg_size - 1),
+                        'bytes={}-{}'.format(2 * seg_size, len(payload) - 1),
+                    ]),
+                    sorted(server.range_headers)
+                )
+                with open(path, 'rb') as f:
+                    self.assertEqual(payload, f.read())
+                self.assertListEqual([], [
+                    n for n in os.listdir(cache_dir.path)
+                    if '._downloading_' in n
+                ])
+                os.remove(path)
+
+                # discard the partial segments if the remote file has changed
+                server.etag = '"v1"'
+                del server.range_headers[:]
+                with open(temp_path + '.3-0', 'wb') as f:
+                    f.write(b'12345')
+                with open(temp_path + '.validator', 'wb') as f:
+                    f.write(b'"v0"')
+                path = cache_dir.download(url + 'payload.tar',
+                                          hasher=hashlib.sha1(),
+                                          expected_hash=payload_sha1,
+                                          show_progress=True,
+                                          num_connections=3)
+                self.assertListEqual(
+                    sorted(['bytes=0-0'] + [
+                        'bytes={}-{}'.format(
+                            i * seg_size,
+                            min((i + 1) * seg_size, len(payload)) - 1)
+                        for i in range(3)
+                    ]),
+                    sorted(server.range_headers)
+                )
+                with open(path, 'rb') as f:
+                    self.assertEqual(payload, f.read())
+
     @mock.patch('tfsnippet.utils.caching.Extractor', PatchedExtractor)
     def test_extract_file(self):
         with TemporaryDirectory() as tmpdir:
@@ -356,6 +693,89 @@ class CacheDirTestCase(unittest.TestCase):
                 log_file.getvalue()
             )
 
+    def test_lru_eviction(self):
+        with TemporaryDirectory() as tmpdir:
+            cache_dir = CacheDir('sub-dir', cache_root=tmpdir)
+            archive = get_asset_path('payload.tar.gz')
+            a_path = cache_dir.extract_file(archive, extract_dir='a')
+            b_path = cache_dir.extract_file(archive, extract_dir='b')
+            c_path = cache_dir.extract_file(archive, extract_dir='c')
+            size = tfsnippet.utils.caching._get_path_size(a_path)
+            self.assertGreater(size, 0)
+
+            # the items should be listed in the order of the access time
+            def get_usage(cache_dir=cache_dir):
+                return [(n, s, p) for n, s, _, p in cache_dir.iter_usage()]
+
+            self.assertListEqual(
+                [('a', size, False), ('b', size, False), ('c', size, False)],
+                get_usage()
+            )
+            _ = cache_dir.extract_file(archive, extract_dir='a')
+            self.assertListEqual(
+                [('b', size, False), ('c', size, False), ('a', size, False)],
+                get_usage()
+            )
+
+            # the pinned items should not be evicted
+            with pytest.raises(ValueError, match='`max_bytes` is not '
+                                                 'specified'):
+                _ = cache_dir.evict()
+            with cache_dir.pin(b_path) as path:
+                self.assertEqual(b_path, path)
+                self.assertListEqual(
+                    [('c', size, False), ('a', size, False),
+                     ('b', size, True)],
+                    get_usage()
+                )
+                self.assertListEqual([c_path], cache_dir.evict(2 * size))
+                self.assertFalse(os.path.exists(c_path))
+                self.assertTrue(os.path.isdir(b_path))
+            self.assertListEqual(
+                [('a', size, False), ('b', size, False)], get_usage())
+
+            # the items being locked should not be evicted
+            with FileLock(a_path + '.lock'):
+                self.assertListEqual([b_path], cache_dir.evict(0))
+            self.assertListEqual([('a', size, False)], get_usage())
+
+            # test pin errors
+            with pytest.raises(ValueError, match='`path` is not in this '
+                                                 'cache directory'):
+                with cache_dir.pin(os.path.join(tmpdir, 'a')):
+                    pass
+            with pytest.raises(IOError, match='Cached file or directory '
+                                              'does not exist'):
+                with cache_dir.pin(b_path):
+                    pass
+
+            # the size limit of the cache directory should be enforced
+            # after each extraction, except for the extracted item
+            cache_dir2 = CacheDir('sub-dir', cache_root=tmpdir,
+                                  max_bytes=size)
+            self.assertEqual(size, cache_dir2.max_bytes)
+            d_path = cache_dir2.extract_file(archive, extract_dir='d')
+            self.assertFalse(os.path.exists(a_path))
+            self.assertListEqual([('d', size, False)], get_usage(cache_dir2))
+
+            # the global size limit should be enforced across cache dirs
+            other_dir = CacheDir('other-dir', cache_root=tmpdir)
+            with scoped_set_config(settings, file_cache_max_bytes=size):
+                e_path = other_dir.extract_file(archive, extract_dir='e')
+            self.assertFalse(os.path.exists(d_path))
+            self.assertListEqual([], get_usage())
+            self.assertListEqual([('e', size, False)], get_usage(other_dir))
+
+            # test evict the whole cache root
+            self.assertListEqual([e_path], evict_cache(0, cache_root=tmpdir))
+            self.assertFalse(os.path.exists(e_path))
+            self.assertListEqual([], get_usage(other_dir))
+
+            # purge all should clear the usage records
+            _ = cache_dir.extract_file(archive, extract_dir='a')
+            cache_dir.purge_all()
+            self.assertListEqual([], get_usage())
+
     def test_download_and_extract_and_purge_all(self):
         with TemporaryDirectory() as tmpdir:
             cache_dir = CacheDir('sub-dir', cache_root=tmpdir)
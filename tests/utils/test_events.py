@@ -62,6 +62,45 @@ class EventSourceTestCase(unittest.TestCase):
         events.reverse_fire('ev')
         self.assertListEqual(dest, [3, 2, 1])
 
+    def test_get_event_handlers(self):
+        f1 = Mock()
+        f2 = Mock()
+
+        events = EventSource(['ev1', 'ev2'])
+        self.assertEqual((), events.get_event_handlers('ev1'))
+        events.on('ev1', f1)
+        events.on('ev1', f2)
+
+        # the frozen handlers should be cached until being changed
+        handlers = events.get_event_handlers('ev1')
+        self.assertEqual((f1, f2), handlers)
+        self.assertIs(handlers, events.get_event_handlers('ev1'))
+        self.assertEqual((f2, f1), events.get_event_handlers('ev1',
+                                                             reverse=True))
+        events.fire('ev1')
+        self.assertIs(handlers, events.get_event_handlers('ev1'))
+
+        events.off('ev1', f1)
+        self.assertEqual((f2,), events.get_event_handlers('ev1'))
+        events.on('ev1', f1)
+        self.assertEqual((f2, f1), events.get_event_handlers('ev1'))
+        events.clear_event_handlers('ev1')
+        self.assertEqual((), events.get_event_handlers('ev1'))
+        events.on('ev2', f1)
+        events.clear_event_handlers()
+        self.assertEqual((), events.get_event_handlers('ev2'))
+
+        # handlers added during firing should take effect at the next time
+        f2.reset_mock()
+        events.on('ev1', lambda: events.on('ev1', f2))
+        events.fire('ev1')
+        self.assertFalse(f2.called)
+        events.fire('ev1')
+        self.assertEqual(1, f2.call_count)
+
+        with pytest.raises(KeyError, match='`event_key` is not allowed'):
+            _ = events.get_event_handlers('ev3')
+
     def test_clear(self):
         f1 = Mock()
         f2 = Mock()
@@ -29,6 +29,25 @@ class ExtractorTestCase(unittest.TestCase):
                     files
                 )
 
+            # test random access
+            with Extractor.open(archive_file) as e:
+                self.assertListEqual(['a/1.txt', 'b/2.txt', 'c.txt'],
+                                     e.list_names())
+                for name in ['c.txt', 'a/1.txt', 'b/2.txt']:
+                    with maybe_close(e.open_file(name)) as f:
+                        self.assertEqual(name.encode('utf-8'), f.read())
+                with pytest.raises(KeyError, match='File does not exist in '
+                                                   'the archive'):
+                    _ = e.open_file('not-exist.txt')
+                index = e.get_index()
+
+            # test opening the files by the index of another extractor
+            with Extractor.open(archive_file) as e:
+                e.set_index(index)
+                for name in ['c.txt', 'a/1.txt']:
+                    with maybe_close(e.open_file(name)) as f:
+                        self.assertEqual(name.encode('utf-8'), f.read())
+
     def get_asset(self, name):
         return os.path.join(
             os.path.split(os.path.abspath(__file__))[0],
@@ -38,12 +57,18 @@ class ExtractorTestCase(unittest.TestCase):
 
     def test_zip(self):
         self.check_archive_file(ZipExtractor, self.get_asset('payload.zip'))
+        with Extractor.open(self.get_asset('payload.zip')) as e:
+            self.assertTrue(e.supports_random_access)
 
     def test_rar(self):
         self.check_archive_file(RarExtractor, self.get_asset('payload.rar'))
 
     def test_tar(self):
         self.check_archive_file(TarExtractor, self.get_asset('payload.tar'))
+        with Extractor.open(self.get_asset('payload.tar')) as e:
+            self.assertTrue(e.supports_random_access)
+        with Extractor.open(self.get_asset('payload.tar.gz')) as e:
+            self.assertFalse(e.supports_random_access)
         # xz
         if sys.version_info[:2] >= (3, 3):
             self.check_archive_file(
@@ -136,3 +136,25 @@ class RootVariableScopeTestCase(tf.test.TestCase):
                     self.assertEqual(vs.name, '')
                     self.assertEqual(v5.name, 'v5:0')
                     self.assertEqual(op.name, 'outside/op:0')
+
+
+class IsInControlFlowContextTestCase(tf.test.TestCase):
+
+    def test_is_in_control_flow_context(self):
+        with tf.Graph().as_default():
+            self.assertFalse(is_in_control_flow_context())
+            results = []
+
+            def body(i):
+                results.append(is_in_control_flow_context())
+                return i + 1
+
+            _ = tf.while_loop(lambda i: i < 3, body, [tf.constant(0)])
+
+            def branch():
+                results.append(is_in_control_flow_context())
+                return tf.constant(1)
+
+            _ = tf.cond(tf.constant(True), branch, branch)
+            self.assertEqual([True, True, True], results)
+            self.assertFalse(is_in_control_flow_context())
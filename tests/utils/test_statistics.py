@@ -1,9 +1,11 @@
+import json
 import unittest
 
 import numpy as np
 import pytest
 
-from tfsnippet.utils import StatisticsCollector
+from tfsnippet.utils import (StatisticsCollector, ColumnarStatisticsCollector,
+                             LogSumExpAccumulator)
 
 
 class StatisticsCollectorTestCase(unittest.TestCase):
@@ -53,6 +55,17 @@ class StatisticsCollectorTestCase(unittest.TestCase):
         self.assertAlmostEqual(collector.square, 30.1)
         self.assertAlmostEqual(collector.weight_sum, 10.)
 
+    def test_scalar_fast_path(self):
+        collector = StatisticsCollector()
+        collector.collect(2)
+        collector.collect(np.float32(1), weight=3.)
+        collector.collect(7, weight=np.int64(6))
+        self.assertIsInstance(collector.mean, np.ndarray)
+        self.assertEqual(collector.counter, 3)
+        self.assertAlmostEqual(collector.mean, 4.7)
+        self.assertAlmostEqual(collector.square, 30.1)
+        self.assertAlmostEqual(collector.weight_sum, 10.)
+
     def test_reset(self):
         collector = StatisticsCollector()
         collector.collect([2, 1, 7, 6])
@@ -177,3 +190,183 @@ class StatisticsCollectorTestCase(unittest.TestCase):
                 ValueError,
                 match=r'Shape mismatch: \(3,\) not ending with \(3, 2\)'):
             collector.collect([1, 2, 3])
+
+
+class ColumnarStatisticsCollectorTestCase(unittest.TestCase):
+
+    def test_columns(self):
+        collector = ColumnarStatisticsCollector(capacity=1)
+        self.assertEqual(0, len(collector))
+        self.assertEqual(0, collector.index_of('a'))
+        self.assertEqual(1, collector.index_of('b'))
+        self.assertEqual(0, collector.index_of('a'))
+        indices = collector.indices_of(('c', 'a'))
+        np.testing.assert_equal([2, 0], indices)
+        self.assertIs(indices, collector.indices_of(['c', 'a']))
+        self.assertEqual(('a', 'b', 'c'), collector.names)
+        self.assertEqual(['a', 'b', 'c'], list(collector))
+        self.assertEqual(3, len(collector))
+        self.assertIn('a', collector)
+        self.assertNotIn('d', collector)
+        with pytest.raises(KeyError):
+            _ = collector['d']
+        with pytest.raises(ValueError, match='Duplicated column names'):
+            _ = collector.indices_of(('a', 'a'))
+
+        # test empty statistics
+        column = collector['a']
+        self.assertEqual('a', column.name)
+        self.assertEqual((), column.shape)
+        self.assertFalse(column.has_value)
+        self.assertEqual(0, column.counter)
+        self.assertAlmostEqual(column.mean, 0.)
+        self.assertAlmostEqual(column.square, 0.)
+        self.assertAlmostEqual(column.stddev, 0.)
+        self.assertAlmostEqual(column.weight_sum, 0.)
+
+    def test_collect(self):
+        collector = ColumnarStatisticsCollector(capacity=1)
+        indices = collector.indices_of(('a', 'b'))
+        for a, b in [(2, 20), (1, 10), (7, 70), (6, 60)]:
+            collector.collect_columns(indices, [a, b])
+
+        for name, scale in [('a', 1.), ('b', 10.)]:
+            column = collector[name]
+            self.assertTrue(column.has_value)
+            self.assertEqual(4, column.counter)
+            self.assertAlmostEqual(column.mean, 4. * scale)
+            self.assertAlmostEqual(column.square, 22.5 * scale ** 2)
+            self.assertAlmostEqual(column.var, 6.5 * scale ** 2)
+            self.assertAlmostEqual(column.stddev, 2.549509756796 * scale)
+            self.assertAlmostEqual(column.weight_sum, 4.)
+
+        # test weighted scalars and batches, which should agree with
+        # `StatisticsCollector`
+        expected = StatisticsCollector()
+        for values, weight in [(2, 1), (1, 3), ([7, 6], [6, 2]),
+                               (np.array([3., 4.]), 1.), ([], 1.),
+                               ([5], [])]:
+            collector.collect('c', values, weight=weight)
+            expected.collect(values, weight=weight)
+        column = collector['c']
+        self.assertEqual(expected.counter, column.counter)
+        self.assertAlmostEqual(expected.mean, column.mean)
+        self.assertAlmostEqual(expected.square, column.square)
+        self.assertAlmostEqual(expected.weight_sum, column.weight_sum)
+        column.collect(10.)
+        expected.collect(10.)
+        self.assertAlmostEqual(expected.mean, column.mean)
+
+        # test reset
+        collector['a'].reset()
+        self.assertFalse(collector['a'].has_value)
+        self.assertTrue(collector['b'].has_value)
+        collector.reset()
+        self.assertEqual(('a', 'b', 'c'), collector.names)
+        for name in collector:
+            self.assertFalse(collector[name].has_value)
+            self.assertAlmostEqual(collector[name].mean, 0.)
+
+
+def np_log_sum_exp(x, axis):
+    x_max = np.max(x, axis=axis)
+    return x_max + np.log(np.sum(np.exp(x - x_max), axis=axis))
+
+
+class LogSumExpAccumulatorTestCase(unittest.TestCase):
+
+    def test_empty(self):
+        acc = LogSumExpAccumulator()
+        self.assertEqual((), acc.shape)
+        self.assertFalse(acc.has_value)
+        self.assertEqual(0, acc.counter)
+        self.assertEqual(-np.inf, acc.log_sum_exp)
+        self.assertEqual(-np.inf, acc.log_mean_exp)
+
+        acc = LogSumExpAccumulator([2, 3])
+        self.assertEqual((2, 3), acc.shape)
+        np.testing.assert_equal(np.full([2, 3], -np.inf), acc.log_sum_exp)
+
+    def test_collect(self):
+        np.random.seed(1234)
+        x = np.random.normal(size=[50, 3]) * 1000.
+        acc = LogSumExpAccumulator(shape=[3])
+        for i in range(0, 50, 7):
+            acc.collect(x[i: i + 7])
+        acc.collect(np.zeros([0, 3]))  # empty values should be ignored
+        self.assertTrue(acc.has_value)
+        self.assertEqual(50, acc.counter)
+        np.testing.assert_allclose(np_log_sum_exp(x, axis=0), acc.log_sum_exp)
+        np.testing.assert_allclose(
+            np_log_sum_exp(x, axis=0) - np.log(50), acc.log_mean_exp)
+
+        # test multiple batch dimensions
+        acc = LogSumExpAccumulator()
+        acc.collect(x[:20])
+        acc.collect(1.5)
+        self.assertEqual(61, acc.counter)
+        np.testing.assert_allclose(
+            np_log_sum_exp(np.concatenate([x[:20].reshape([-1]), [1.5]]),
+                           axis=0),
+            acc.log_sum_exp
+        )
+
+        # test -inf values
+        acc = LogSumExpAccumulator()
+        acc.collect([-np.inf, -np.inf])
+        self.assertEqual(-np.inf, acc.log_sum_exp)
+        acc.collect(-1000.)
+        np.testing.assert_allclose(-1000., acc.log_sum_exp)
+        np.testing.assert_allclose(-1000. - np.log(3), acc.log_mean_exp)
+
+        # test reset
+        acc.reset()
+        self.assertFalse(acc.has_value)
+        self.assertEqual(-np.inf, acc.log_sum_exp)
+
+    def test_merge_and_state(self):
+        np.random.seed(1234)
+        x = np.random.normal(size=[50, 3]) * 1000.
+        acc = LogSumExpAccumulator(shape=[3])
+        acc.collect(x[:20])
+        acc2 = LogSumExpAccumulator(shape=[3])
+        acc2.collect(x[20:])
+        acc.merge(acc2)
+        acc.merge(LogSumExpAccumulator(shape=[3]))
+        self.assertEqual(50, acc.counter)
+        np.testing.assert_allclose(np_log_sum_exp(x, axis=0), acc.log_sum_exp)
+
+        # test serialize by strict JSON
+        acc3 = LogSumExpAccumulator.from_state(
+            json.loads(json.dumps(acc.get_state(), allow_nan=False)))
+        self.assertEqual((3,), acc3.shape)
+        self.assertEqual(50, acc3.counter)
+        np.testing.assert_allclose(acc.log_mean_exp, acc3.log_mean_exp)
+
+        # test the non-finite numbers are encoded as strings
+        state = LogSumExpAccumulator().get_state()
+        self.assertEqual('-inf', state['max'])
+        empty = LogSumExpAccumulator.from_state(
+            json.loads(json.dumps(state, allow_nan=False)))
+        self.assertEqual(-np.inf, empty.log_sum_exp)
+
+        acc = LogSumExpAccumulator(shape=[3])
+        acc.collect([[-np.inf, 1., -np.inf], [-np.inf, 2., -np.inf]])
+        acc2 = LogSumExpAccumulator(shape=[3])
+        acc2.collect([[1., -np.inf, -np.inf]])
+        acc.merge(acc2)
+        state = acc.get_state()
+        self.assertEqual([1., 2., '-inf'], state['max'])
+        acc3 = LogSumExpAccumulator.from_state(
+            json.loads(json.dumps(state, allow_nan=False)))
+        self.assertEqual(3, acc3.counter)
+        np.testing.assert_equal(acc.log_sum_exp, acc3.log_sum_exp)
+
+    def test_shape_mismatch(self):
+        acc = LogSumExpAccumulator(shape=[3])
+        with pytest.raises(ValueError, match=r'Shape mismatch: \(4,\) not '
+                                             r'ending with \(3,\)'):
+            acc.collect(np.zeros([4]))
+        with pytest.raises(ValueError, match=r'Shape mismatch: \(2,\) vs '
+                                             r'\(3,\)'):
+            acc.merge(LogSumExpAccumulator(shape=[2]))
@@ -45,3 +45,79 @@ class ImportanceSamplingLogLikelihoodTestCase(tf.test.TestCase):
                 ll_k,
                 log_mean_exp(log_p - log_q, axis=0, keepdims=True)
             ]))
+
+
+class ChunkedImportanceSamplingLogLikelihoodTestCase(tf.test.TestCase):
+
+    def test_chunked(self):
+        np.random.seed(1234)
+        log_p = np.random.normal(size=[4, 13]).astype(np.float32)
+        log_q = np.random.normal(size=[4, 13]).astype(np.float32)
+        chunk_sizes = []
+
+        def log_weights_fn(n_samples):
+            # every chunk produces the same log-weights, thus the estimator
+            # over `n_samples` equals to that over the repeated log-weights
+            chunk_sizes.append(n_samples)
+            return (tf.constant(log_p[:n_samples]),
+                    tf.constant(log_q[:n_samples]))
+
+        def expected(n_samples, chunk_size):
+            log_w = log_p[:chunk_size] - log_q[:chunk_size]
+            log_w = np.tile(log_w, [n_samples // chunk_size + 1, 1])
+            return sess.run(log_mean_exp(log_w[:n_samples], axis=0))
+
+        with self.test_session() as sess:
+            # test the samples are drawn in a single chunk
+            ll = chunked_importance_sampling_log_likelihood(
+                log_weights_fn, n_samples=3, chunk_size=4)
+            self.assertEqual([3], chunk_sizes)
+            assert_allclose(expected(3, 3), sess.run(ll))
+
+            # test multiple chunks
+            chunk_sizes[:] = []
+            ll = chunked_importance_sampling_log_likelihood(
+                log_weights_fn, n_samples=12, chunk_size=4)
+            self.assertEqual([4, 4], chunk_sizes)
+            assert_allclose(expected(12, 4), sess.run(ll))
+
+            # test multiple chunks, with the last chunk being masked
+            ll = chunked_importance_sampling_log_likelihood(
+                log_weights_fn, n_samples=10, chunk_size=4, keepdims=True)
+            self.assertEqual([1, 13], ll.get_shape().as_list())
+            assert_allclose(expected(10, 4)[np.newaxis, ...], sess.run(ll))
+
+            # test the log-weights of large magnitude
+            ll = chunked_importance_sampling_log_likelihood(
+                lambda n: (tf.constant(log_p[:n] * 1000.),
+                           tf.constant(log_q[:n] * 1000.)),
+                n_samples=10, chunk_size=3
+            )
+            log_w = np.tile((log_p - log_q)[:3] * 1000., [4, 1])[:10]
+            np.testing.assert_allclose(
+                sess.run(log_mean_exp(log_w, axis=0)), sess.run(ll),
+                rtol=1e-5
+            )
+
+            # test the estimator with random samples
+            ll = chunked_importance_sampling_log_likelihood(
+                lambda n: (tf.random_normal([n, 5], stddev=.1),
+                           tf.zeros([n, 5])),
+                n_samples=1000, chunk_size=64
+            )
+            np.testing.assert_allclose(
+                np.log(np.mean(np.exp(np.random.normal(
+                    scale=.1, size=[100000])))),
+                sess.run(ll), atol=1e-2
+            )
+
+    def test_errors(self):
+        def fn(n):
+            return tf.zeros([n]), tf.zeros([n])
+
+        with pytest.raises(ValueError,
+                           match='`n_samples` must be at least 1'):
+            _ = chunked_importance_sampling_log_likelihood(fn, 0, 1)
+        with pytest.raises(ValueError,
+                           match='`chunk_size` must be at least 1'):
+            _ = chunked_importance_sampling_log_likelihood(fn, 1, 0)
@@ -1,4 +1,5 @@
 import warnings
+import weakref
 from collections import OrderedDict
 
 import six
@@ -7,9 +8,114 @@ from frozendict import frozendict
 
 from tfsnippet.distributions import Distribution, as_distribution
 from tfsnippet.stochastic import StochasticTensor
-from tfsnippet.utils import get_default_scope_name, is_tensor_object
+from tfsnippet.utils import (get_default_scope_name, is_tensor_object, Config,
+                             is_in_control_flow_context)
 
-__all__ = ['BayesianNet']
+__all__ = ['BayesianNet', 'memoized_builder']
+
+
+def _make_cache_key(obj, refs):
+    """
+    Make the cache key of `obj` for :func:`memoized_builder`.
+
+    Tensors, distributions and Bayesian networks are identified by their
+    object identities, and are appended to `refs`, such that they can be
+    kept alive along with the cached results.  Configs, dicts, lists and
+    tuples are converted into keys recursively.  Other objects are
+    identified by their values.
+
+    Raises:
+        TypeError: If `obj` cannot be converted into a cache key.
+    """
+    if is_tensor_object(obj) or isinstance(obj, (Distribution, BayesianNet)):
+        refs.append(obj)
+        return ('id', id(obj))
+    if isinstance(obj, Config):
+        return (type(obj), _make_cache_key(obj.to_dict(), refs))
+    if isinstance(obj, (dict, frozendict)):
+        return (dict, frozenset(
+            (k, _make_cache_key(v, refs)) for k, v in six.iteritems(obj)))
+    if isinstance(obj, (list, tuple)):
+        return (type(obj), tuple(_make_cache_key(v, refs) for v in obj))
+    hash(obj)  # raise TypeError if `obj` is not hashable
+    return (type(obj), obj)
+
+
+def memoized_builder(fn):
+    """
+    Decorate a builder function of :class:`BayesianNet`, such that the
+    constructed networks will be cached and reused.
+
+    The results of the decorated function are cached in the default graph,
+    keyed by the identities of the tensor arguments (e.g., the observations
+    and the :class:`StochasticTensor` from a variational net), and by the
+    values of the other arguments (e.g., the configs).  Calling the decorated
+    function with the same arguments again returns the cached result,
+    without building any new graph nodes.  For example:
+
+    .. code-block:: python
+
+        @spt.memoized_builder
+        def p_net(observed=None, n_z=None):
+            net = spt.BayesianNet(observed=observed)
+            ...
+            return net
+
+        @spt.memoized_builder
+        def q_net(x, observed=None, n_z=None):
+            net = spt.BayesianNet(observed=observed)
+            ...
+            return net
+
+        # the training objective and the test NLL share the same variational
+        # net and the same model net, as well as their log-densities
+        chain = q_net(input_x, n_z=n_z).chain(p_net, observed={'x': input_x})
+        test_chain = q_net(input_x, n_z=n_z).chain(
+            p_net, observed={'x': input_x})
+        assert(chain is test_chain)
+
+    The results are also keyed by the name of the current variable scope.
+    If any of the arguments cannot be converted into a cache key (e.g., a
+    NumPy array), or if the decorated function is called inside a control
+    flow context (e.g., the body of ``tf.while_loop``), whose tensors cannot
+    be used outside of it, the decorated function will be called without
+    caching.
+    The decorated function should create its variables with reuse enabled
+    (e.g., via :func:`~tfsnippet.utils.global_reuse`), since different
+    arguments still lead to a new construction.
+
+    Args:
+        fn: The builder function.
+
+    Returns:
+        The decorated builder function.  Its cache can be cleared by
+        calling ``clear_cache()`` on it.
+    """
+    # {graph: {key: (result, refs)}}
+    caches = weakref.WeakKeyDictionary()
+
+    @six.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if is_in_control_flow_context():
+            return fn(*args, **kwargs)
+        refs = []
+        try:
+            key = (_make_cache_key(args, refs), _make_cache_key(kwargs, refs),
+                   tf.get_variable_scope().name)
+        except TypeError:
+            return fn(*args, **kwargs)
+
+        cache = caches.setdefault(tf.get_default_graph(), {})
+        if key not in cache:
+            cache[key] = (fn(*args, **kwargs), refs)
+        return cache[key][0]
+
+    def clear_cache():
+        caches.clear()
+
+    wrapper.clear_cache = clear_cache
+    wrapper._is_memoized_builder = True
+    return wrapper
 
 
 class BayesianNet(object):
@@ -112,6 +218,7 @@ class BayesianNet(object):
             for name, tensor in (six.iteritems(observed) if observed else ())
         ])
         self._stochastic_tensors = OrderedDict()
+        self._chain_cache = {}
 
     @property
     def observed(self):
@@ -350,6 +457,11 @@ class BayesianNet(object):
         Treat this :class:`BayesianNet` as variational, and build the model
         net chained after this variational net.
 
+        If `model_builder` is decorated by :func:`memoized_builder`, the
+        constructed chain will be cached in this :class:`BayesianNet`, and
+        reused by the subsequent calls with the same arguments, unless
+        called inside a control flow context.
+
         Args:
             model_builder: Function which receives the `observed` dict, and
                 produce the model :class:`BayesianNet` or a tuple of the model
@@ -380,6 +492,22 @@ class BayesianNet(object):
         """
         from tfsnippet.variational.chain import VariationalChain
 
+        cache_key = None
+        if getattr(model_builder, '_is_memoized_builder', False) and \
+                not is_in_control_flow_context():
+            refs = []
+            try:
+                cache_key = _make_cache_key(
+                    (model_builder, latent_names, latent_axis, observed,
+                     kwargs, tf.get_variable_scope().name),
+                    refs
+                )
+            except TypeError:
+                pass
+            else:
+                if cache_key in self._chain_cache:
+                    return self._chain_cache[cache_key][0]
+
         # build the observed dict: observed + latent samples
         merged_obs = {}
         # add the user-provided observed dict
@@ -408,13 +536,16 @@ class BayesianNet(object):
             model, log_joint = model_and_log_joint, None
 
         # build the VariationalModelChain
-        return VariationalChain(
+        chain = VariationalChain(
             variational=self,
             model=model,
             log_joint=log_joint,
             latent_names=latent_names,
             latent_axis=latent_axis,
         )
+        if cache_key is not None:
+            self._chain_cache[cache_key] = (chain, refs)
+        return chain
 
     chain = variational_chain
     """Alias for :meth:`variational_chain`."""
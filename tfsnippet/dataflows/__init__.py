@@ -1,3 +1,4 @@
+from .archive_flow import *
 from .array_flow import *
 from .base import *
 from .data_mappers import *
@@ -5,10 +6,11 @@ from .gather_flow import *
 from .iterator_flow import *
 from .mapper_flow import *
 from .seq_flow import *
+from .shard_flow import *
 from .threading_flow import *
 
 __all__ = [
-    'ArrayFlow', 'DataFlow', 'DataMapper', 'ExtraInfoDataFlow', 'GatherFlow',
-    'IteratorFactoryFlow', 'MapperFlow', 'SeqFlow', 'SlidingWindow',
-    'ThreadingFlow',
+    'ArchiveFlow', 'ArrayFlow', 'DataFlow', 'DataMapper', 'ExtraInfoDataFlow',
+    'GatherFlow', 'IteratorFactoryFlow', 'MapperFlow', 'SeqFlow', 'ShardFlow',
+    'SlidingWindow', 'ThreadingFlow',
 ]
@@ -0,0 +1,186 @@
+from collections import deque
+from multiprocessing.pool import ThreadPool
+
+import numpy as np
+
+from tfsnippet.utils import Extractor, maybe_close, generate_random_seed
+from .base import DataFlow
+
+__all__ = ['ArchiveFlow']
+
+
+class ArchiveFlow(DataFlow):
+    """
+    Using the files in an archive as data source flow.
+
+    The files are read directly from the archive stream, without being
+    extracted to disk.  Each file is decoded into data items by a
+    user-supplied `decoder` in a pool of background threads, and the
+    decoded items are then stacked into mini-batches.  For example::
+
+        def decode(name, content):
+            # returns the (x, y) item of a file
+            return imread(BytesIO(content)), int(name.split('/')[0])
+
+        archive_flow = DataFlow.archive(
+            'train.zip', decode, batch_size=64, shuffle=True,
+            name_filter=lambda name: name.endswith('.png'), num_workers=4
+        )
+        for batch_x, batch_y in archive_flow:
+            ...
+
+    Shuffling requires the files to be read in random order, thus it is
+    only supported for the archives which can be randomly accessed, e.g.,
+    ".zip" and ".tar" files.  The files will be indexed only once, when the
+    data flow is constructed, and the index is reused in every epoch.
+    """
+
+    def __init__(self, archive_file, decoder, batch_size, shuffle=False,
+                 skip_incomplete=False, name_filter=None, num_workers=1,
+                 random_state=None):
+        """
+        Construct an :class:`ArchiveFlow`.
+
+        Args:
+            archive_file (str): The path of the archive file.
+            decoder ((str, bytes) -> tuple): The function to decode the
+                name and the content of a file into a tuple of data items.
+                If it returns a single item instead of a tuple, then each
+                mini-batch will have only one array.
+            batch_size (int): Size of each mini-batch.
+            shuffle (bool): Whether or not to shuffle the files before
+                iterating? (default :obj:`False`)
+            skip_incomplete (bool): Whether or not to exclude the last
+                mini-batch if it is incomplete? (default :obj:`False`)
+            name_filter ((str) -> bool): If specified, only the files whose
+                names are accepted by this function will be decoded.
+            num_workers (int): The number of background threads to decode
+                the files.  If 0, will decode the files in the iterating
+                thread.  (default 1)
+            random_state (RandomState): Optional numpy RandomState for
+                shuffling data before each epoch.  (default :obj:`None`,
+                construct a new :class:`RandomState`).
+
+        Raises:
+            IOError: If `archive_file` is not a supported archive.
+            ValueError: If `shuffle` is :obj:`True`, but `archive_file`
+                cannot be randomly accessed.
+        """
+        # check the parameters
+        batch_size = int(batch_size)
+        if batch_size < 1:
+            raise ValueError('`batch_size` must be at least 1.')
+        num_workers = int(num_workers)
+        if num_workers < 0:
+            raise ValueError('`num_workers` must be at least 0.')
+        index = names = None
+        with Extractor.open(archive_file) as extractor:
+            if shuffle:
+                if not extractor.supports_random_access:
+                    raise ValueError('The archive file cannot be randomly '
+                                     'accessed, thus cannot be shuffled: '
+                                     '{!r}'.format(archive_file))
+                index = extractor.get_index()
+                names = [n for n in index
+                         if name_filter is None or name_filter(n)]
+
+        # memorize the parameters
+        self._archive_file = archive_file
+        self._decoder = decoder
+        self._batch_size = batch_size
+        self._is_shuffled = bool(shuffle)
+        self._skip_incomplete = bool(skip_incomplete)
+        self._name_filter = name_filter
+        self._num_workers = num_workers
+        self._random_state = \
+            random_state or np.random.RandomState(generate_random_seed())
+
+        # the file index and the accepted file names, for shuffling
+        self._index = index
+        self._names = names
+
+    @property
+    def archive_file(self):
+        """Get the path of the archive file."""
+        return self._archive_file
+
+    @property
+    def batch_size(self):
+        """Get the size of each mini-batch."""
+        return self._batch_size
+
+    @property
+    def is_shuffled(self):
+        """Whether or not the files are shuffled before each epoch?"""
+        return self._is_shuffled
+
+    @property
+    def skip_incomplete(self):
+        """
+        Whether or not to exclude the last mini-batch if it is incomplete?
+        """
+        return self._skip_incomplete
+
+    @property
+    def num_workers(self):
+        """Get the number of background threads to decode the files."""
+        return self._num_workers
+
+    def _accept_name(self, name):
+        return self._name_filter is None or self._name_filter(name)
+
+    def _iter_files(self, extractor):
+        if self.is_shuffled:
+            extractor.set_index(self._index)
+            indices = np.arange(len(self._names))
+            self._random_state.shuffle(indices)
+            for i in indices:
+                name = self._names[i]
+                with maybe_close(extractor.open_file(name)) as f:
+                    yield name, f.read()
+        else:
+            for name, f in extractor.iter_extract():
+                with maybe_close(f):
+                    if self._accept_name(name):
+                        yield name, f.read()
+
+    def _iter_items(self, files):
+        if self.num_workers == 0:
+            for name, content in files:
+                yield self._decoder(name, content)
+        else:
+            # the files are read from the archive in this thread, while
+            # the decoding is done in the pool.  the number of pending
+            # files is bounded, such that the whole archive will not be
+            # read into memory before the decoders catch up.
+            max_pending = 2 * self.num_workers
+            pending = deque()
+            pool = ThreadPool(self.num_workers)
+            try:
+                for name, content in files:
+                    pending.append(
+                        pool.apply_async(self._decoder, (name, content)))
+                    if len(pending) >= max_pending:
+                        yield pending.popleft().get()
+                while pending:
+                    yield pending.popleft().get()
+            finally:
+                pool.close()
+                pool.join()
+
+    def _make_batch(self, items):
+        return tuple(np.stack([item[i] for item in items])
+                     for i in range(len(items[0])))
+
+    def _minibatch_iterator(self):
+        with Extractor.open(self.archive_file) as extractor:
+            buf = []
+            for item in self._iter_items(self._iter_files(extractor)):
+                if not isinstance(item, (tuple, list)):
+                    item = (item,)
+                buf.append(item)
+                if len(buf) == self.batch_size:
+                    yield self._make_batch(buf)
+                    buf = []
+            if buf and not self.skip_incomplete:
+                yield self._make_batch(buf)
@@ -210,6 +210,28 @@ class DataFlow(object):
         indices = tuple(indices)
         return self.map(lambda *arrays: tuple(arrays[i] for i in indices))
 
+    def shard(self, num_shards, index):
+        """
+        Construct a :class:`~tfsnippet.dataflows.ShardFlow`, which takes
+        one shard of the mini-batches from this flow.  If this flow is a
+        shuffled :class:`~tfsnippet.dataflows.ArrayFlow`, the samples are
+        sharded before shuffling.
+
+        Args:
+            num_shards (int): The total number of shards.
+            index (int): The index of the shard, within
+                ``[0, num_shards)``.
+
+        Returns:
+            tfsnippet.dataflow.ShardFlow: The data flow of the shard.
+
+        Raises:
+            ValueError: If this flow is shuffled but not an
+                :class:`~tfsnippet.dataflows.ArrayFlow`.
+        """
+        from .shard_flow import ShardFlow
+        return ShardFlow(self, num_shards=num_shards, index=index)
+
     # -------- here starts the factory methods for data flows --------
     @staticmethod
     def gather(flows):
@@ -289,6 +311,42 @@ class DataFlow(object):
             skip_incomplete=skip_incomplete, random_state=random_state
         )
 
+    @staticmethod
+    def archive(archive_file, decoder, batch_size, shuffle=False,
+                skip_incomplete=False, name_filter=None, num_workers=1,
+                random_state=None):
+        """
+        Construct an :class:`~tfsnippet.dataflows.ArchiveFlow`.
+
+        Args:
+            archive_file (str): The path of the archive file.
+            decoder ((str, bytes) -> tuple): The function to decode the
+                name and the content of a file into a tuple of data items.
+            batch_size (int): Size of each mini-batch.
+            shuffle (bool): Whether or not to shuffle the files before
+                iterating? (default :obj:`False`)
+            skip_incomplete (bool): Whether or not to exclude the last
+                mini-batch if it is incomplete? (default :obj:`False`)
+            name_filter ((str) -> bool): If specified, only the files whose
+                names are accepted by this function will be decoded.
+            num_workers (int): The number of background threads to decode
+                the files.  If 0, will decode the files in the iterating
+                thread.  (default 1)
+            random_state (RandomState): Optional numpy RandomState for
+                shuffling data before each epoch.  (default :obj:`None`,
+                construct a new :class:`RandomState`).
+
+        Returns:
+            tfsnippet.dataflow.ArchiveFlow: The data flow from the archive.
+        """
+        from .archive_flow import ArchiveFlow
+        return ArchiveFlow(
+            archive_file=archive_file, decoder=decoder, batch_size=batch_size,
+            shuffle=shuffle, skip_incomplete=skip_incomplete,
+            name_filter=name_filter, num_workers=num_workers,
+            random_state=random_state
+        )
+
     @staticmethod
     def iterator_factory(factory):
         """
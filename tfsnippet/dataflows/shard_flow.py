@@ -0,0 +1,107 @@
+from .array_flow import ArrayFlow
+from .base import DataFlow
+
+__all__ = ['ShardFlow']
+
+
+class ShardFlow(DataFlow):
+    """
+    Data flow which takes one shard of the mini-batches from source flow.
+
+    The mini-batches of the source flow are dealt to the shards in a
+    round-robin manner, i.e., the `index`-th shard takes the mini-batches
+    ``index, index + num_shards, index + 2 * num_shards, ...``.  The last
+    round of mini-batches is dropped if it cannot be dealt to every shard,
+    such that all the shards produce the same number of mini-batches.
+    This is required by synchronous data-parallel training, where the
+    workers should run the same number of steps.
+
+    However, a shuffled source would be shuffled independently by each
+    worker, such that the shards of its mini-batches would overlap.  Thus
+    for a shuffled :class:`ArrayFlow`, the samples (instead of the
+    mini-batches) are split into `num_shards` contiguous shards of equal
+    size before shuffling, and each shard is shuffled on its own.  The
+    remaining ``data_length % num_shards`` samples are dropped.  Other
+    shuffled sources are rejected.
+
+    Usage::
+
+        source_flow = DataFlow.arrays([x, y], batch_size=256, shuffle=True)
+        shard_flow = source_flow.shard(num_shards=4, index=worker_index)
+    """
+
+    def __init__(self, source, num_shards, index):
+        """
+        Construct a :class:`ShardFlow`.
+
+        Args:
+            source (DataFlow): The source data flow.
+            num_shards (int): The total number of shards.
+            index (int): The index of the shard, within
+                ``[0, num_shards)``.
+
+        Raises:
+            ValueError: If `num_shards` or `index` is invalid, or if
+                `source` is shuffled but not an :class:`ArrayFlow`.
+        """
+        num_shards = int(num_shards)
+        index = int(index)
+        if num_shards < 1:
+            raise ValueError('`num_shards` must be at least 1: got {}'.
+                             format(num_shards))
+        if index < 0 or index >= num_shards:
+            raise ValueError('`index` must be within [0, {}): got {}'.
+                             format(num_shards, index))
+
+        # shard the samples of a shuffled source before shuffling
+        shard_source = None
+        if getattr(source, 'is_shuffled', False):
+            if not isinstance(source, ArrayFlow):
+                raise ValueError('Only a shuffled `ArrayFlow` can be sharded, '
+                                 'otherwise each shard would be shuffled '
+                                 'independently: got {!r}'.format(source))
+            shard_length = source.data_length // num_shards
+            shard_slice = slice(index * shard_length,
+                                (index + 1) * shard_length)
+            shard_source = ArrayFlow(
+                [a[shard_slice] for a in source.the_arrays],
+                batch_size=source.batch_size,
+                shuffle=True,
+                skip_incomplete=source.skip_incomplete,
+                random_state=source._random_state
+            )
+
+        self._source = source
+        self._num_shards = num_shards
+        self._index = index
+        self._shard_source = shard_source
+
+    @property
+    def source(self):
+        """Get the source data flow."""
+        return self._source
+
+    @property
+    def num_shards(self):
+        """Get the total number of shards."""
+        return self._num_shards
+
+    @property
+    def index(self):
+        """Get the index of this shard."""
+        return self._index
+
+    def _minibatch_iterator(self):
+        if self._shard_source is not None:
+            for batch in self._shard_source:
+                yield batch
+            return
+
+        selected = None
+        for i, batch in enumerate(self._source):
+            position = i % self._num_shards
+            if position == self._index:
+                selected = batch
+            if position == self._num_shards - 1:
+                yield selected
+                selected = None
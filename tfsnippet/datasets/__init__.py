@@ -1,7 +1,9 @@
 from .cifar import *
 from .fashion_mnist import *
+from .lazy_dataset import *
 from .mnist import *
 
 __all__ = [
-    'load_cifar10', 'load_cifar100', 'load_fashion_mnist', 'load_mnist',
+    'LazyDataset', 'load_cifar10', 'load_cifar100', 'load_fashion_mnist',
+    'load_mnist',
 ]
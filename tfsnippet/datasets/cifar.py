@@ -5,6 +5,7 @@ import six
 import numpy as np
 
 from tfsnippet.utils import CacheDir, validate_enum_arg
+from .lazy_dataset import LazyDataset
 
 if six.PY2:
     import cPickle as pickle
@@ -65,8 +66,15 @@ def _validate_x_shape(x_shape, channels_last):
     return x_shape
 
 
+def _get_load_x_args(channels_last, x_shape, x_dtype, normalize_x, lazy):
+    if lazy:
+        # keep the raw uint8 pixels, the conversion is done by `LazyDataset`
+        return _validate_x_shape(None, channels_last), np.uint8, False
+    return x_shape, x_dtype, normalize_x
+
+
 def load_cifar10(channels_last=True, x_shape=None, x_dtype=np.float32,
-                 y_dtype=np.int32, normalize_x=False):
+                 y_dtype=np.int32, normalize_x=False, lazy=False):
     """
     Load the CIFAR-10 dataset as NumPy arrays.
 
@@ -80,13 +88,20 @@ def load_cifar10(channels_last=True, x_shape=None, x_dtype=np.float32,
         y_dtype: Cast each label into this data type.  Default `np.int32`.
         normalize_x (bool): Whether or not to normalize x into ``[0, 1]``,
             by dividing each pixel value with 255.?  (default :obj:`False`)
+        lazy (bool): If :obj:`True`, keep the images as `np.uint8` arrays
+            in :class:`LazyDataset` objects, and defer the conversion
+            specified by `x_shape`, `x_dtype` and `normalize_x` until each
+            mini-batch is produced.  (default :obj:`False`)
 
     Returns:
         (np.ndarray, np.ndarray), (np.ndarray, np.ndarray): The
-            (train_x, train_y), (test_x, test_y)
+            (train_x, train_y), (test_x, test_y).  If `lazy` is :obj:`True`,
+            returns the (train, test) :class:`LazyDataset` objects instead.
     """
     # check the arguments
     x_shape = _validate_x_shape(x_shape, channels_last)
+    load_x_shape, load_x_dtype, load_normalize_x = _get_load_x_args(
+        channels_last, x_shape, x_dtype, normalize_x, lazy)
 
     # fetch data
     path = CacheDir('cifar').download_and_extract(
@@ -95,14 +110,15 @@ def load_cifar10(channels_last=True, x_shape=None, x_dtype=np.float32,
 
     # load the data
     train_num = 50000
-    train_x = np.zeros((train_num,) + x_shape, dtype=x_dtype)
+    train_x = np.zeros((train_num,) + load_x_shape, dtype=load_x_dtype)
     train_y = np.zeros((train_num,), dtype=y_dtype)
 
     for i in range(1, 6):
         path = os.path.join(data_dir, 'data_batch_{}'.format(i))
         x, y = _load_batch(
-            path, channels_last=channels_last, x_shape=x_shape,
-            x_dtype=x_dtype, y_dtype=y_dtype, normalize_x=normalize_x,
+            path, channels_last=channels_last, x_shape=load_x_shape,
+            x_dtype=load_x_dtype, y_dtype=y_dtype,
+            normalize_x=load_normalize_x,
             expected_batch_label='training batch {} of 5'.format(i)
         )
         (train_x[(i - 1) * 10000: i * 10000, ...],
@@ -110,17 +126,25 @@ def load_cifar10(channels_last=True, x_shape=None, x_dtype=np.float32,
 
     path = os.path.join(data_dir, 'test_batch')
     test_x, test_y = _load_batch(
-        path, channels_last=channels_last, x_shape=x_shape,
-        x_dtype=x_dtype, y_dtype=y_dtype, normalize_x=normalize_x,
+        path, channels_last=channels_last, x_shape=load_x_shape,
+        x_dtype=load_x_dtype, y_dtype=y_dtype,
+        normalize_x=load_normalize_x,
         expected_batch_label='testing batch 1 of 1'
     )
     assert(len(test_x) == len(test_y) == 10000)
 
+    if lazy:
+        return tuple(
+            LazyDataset(x, y, x_shape=x_shape, x_dtype=x_dtype,
+                        normalize_x=normalize_x)
+            for x, y in ((train_x, train_y), (test_x, test_y))
+        )
     return (train_x, train_y), (test_x, test_y)
 
 
 def load_cifar100(label_mode='fine', channels_last=True, x_shape=None,
-                  x_dtype=np.float32, y_dtype=np.int32, normalize_x=False):
+                  x_dtype=np.float32, y_dtype=np.int32, normalize_x=False,
+                  lazy=False):
     """
     Load the CIFAR-100 dataset as NumPy arrays.
 
@@ -135,14 +159,21 @@ def load_cifar100(label_mode='fine', channels_last=True, x_shape=None,
         y_dtype: Cast each label into this data type.  Default `np.int32`.
         normalize_x (bool): Whether or not to normalize x into ``[0, 1]``,
             by dividing each pixel value with 255.?  (default :obj:`False`)
+        lazy (bool): If :obj:`True`, keep the images as `np.uint8` arrays
+            in :class:`LazyDataset` objects, and defer the conversion
+            specified by `x_shape`, `x_dtype` and `normalize_x` until each
+            mini-batch is produced.  (default :obj:`False`)
 
     Returns:
         (np.ndarray, np.ndarray), (np.ndarray, np.ndarray): The
-            (train_x, train_y), (test_x, test_y)
+            (train_x, train_y), (test_x, test_y).  If `lazy` is :obj:`True`,
+            returns the (train, test) :class:`LazyDataset` objects instead.
     """
     # check the arguments
     label_mode = validate_enum_arg('label_mode', label_mode, ('fine', 'coarse'))
     x_shape = _validate_x_shape(x_shape, channels_last)
+    load_x_shape, load_x_dtype, load_normalize_x = _get_load_x_args(
+        channels_last, x_shape, x_dtype, normalize_x, lazy)
 
     # fetch data
     path = CacheDir('cifar').download_and_extract(
@@ -152,8 +183,9 @@ def load_cifar100(label_mode='fine', channels_last=True, x_shape=None,
     # load the data
     path = os.path.join(data_dir, 'train')
     train_x, train_y = _load_batch(
-        path, channels_last=channels_last, x_shape=x_shape,
-        x_dtype=x_dtype, y_dtype=y_dtype, normalize_x=normalize_x,
+        path, channels_last=channels_last, x_shape=load_x_shape,
+        x_dtype=load_x_dtype, y_dtype=y_dtype,
+        normalize_x=load_normalize_x,
         expected_batch_label='training batch 1 of 1',
         labels_key='{}_labels'.format(label_mode)
     )
@@ -161,11 +193,18 @@ def load_cifar100(label_mode='fine', channels_last=True, x_shape=None,
 
     path = os.path.join(data_dir, 'test')
     test_x, test_y = _load_batch(
-        path, channels_last=channels_last, x_shape=x_shape,
-        x_dtype=x_dtype, y_dtype=y_dtype, normalize_x=normalize_x,
+        path, channels_last=channels_last, x_shape=load_x_shape,
+        x_dtype=load_x_dtype, y_dtype=y_dtype,
+        normalize_x=load_normalize_x,
         expected_batch_label='testing batch 1 of 1',
         labels_key='{}_labels'.format(label_mode)
     )
     assert(len(test_x) == len(test_y) == 10000)
 
+    if lazy:
+        return tuple(
+            LazyDataset(x, y, x_shape=x_shape, x_dtype=x_dtype,
+                        normalize_x=normalize_x)
+            for x, y in ((train_x, train_y), (test_x, test_y))
+        )
     return (train_x, train_y), (test_x, test_y)
@@ -5,6 +5,7 @@ import numpy as np
 import idx2numpy
 
 from tfsnippet.utils import CacheDir
+from .lazy_dataset import LazyDataset
 
 __all__ = ['load_fashion_mnist']
 
@@ -36,7 +37,7 @@ def _validate_x_shape(x_shape):
 
 
 def load_fashion_mnist(x_shape=(28, 28), x_dtype=np.float32,
-                       y_dtype=np.int32, normalize_x=False):
+                       y_dtype=np.int32, normalize_x=False, lazy=False):
     """
     Load the Fashion MNIST dataset as NumPy arrays.
 
@@ -48,23 +49,39 @@ def load_fashion_mnist(x_shape=(28, 28), x_dtype=np.float32,
         y_dtype: Cast each label into this data type.  Default `np.int32`.
         normalize_x (bool): Whether or not to normalize x into ``[0, 1]``,
             by dividing each pixel value with 255.?  (default :obj:`False`)
+        lazy (bool): If :obj:`True`, keep the images as `np.uint8` arrays
+            in :class:`LazyDataset` objects, and defer the conversion
+            specified by `x_shape`, `x_dtype` and `normalize_x` until each
+            mini-batch is produced.  (default :obj:`False`)
 
     Returns:
         (np.ndarray, np.ndarray), (np.ndarray, np.ndarray): The
-            (train_x, train_y), (test_x, test_y)
+            (train_x, train_y), (test_x, test_y).  If `lazy` is :obj:`True`,
+            returns the (train, test) :class:`LazyDataset` objects instead.
     """
     # check arguments
     x_shape = _validate_x_shape(x_shape)
 
     # load data
-    train_x = _fetch_array(TRAIN_X_URI, TRAIN_X_MD5).astype(x_dtype)
+    train_x = _fetch_array(TRAIN_X_URI, TRAIN_X_MD5)
     train_y = _fetch_array(TRAIN_Y_URI, TRAIN_Y_MD5).astype(y_dtype)
-    test_x = _fetch_array(TEST_X_URI, TEST_X_MD5).astype(x_dtype)
+    test_x = _fetch_array(TEST_X_URI, TEST_X_MD5)
     test_y = _fetch_array(TEST_Y_URI, TEST_Y_MD5).astype(y_dtype)
 
     assert(len(train_x) == len(train_y) == 60000)
     assert(len(test_x) == len(test_y) == 10000)
 
+    if lazy:
+        return tuple(
+            LazyDataset(x, y, x_shape=x_shape, x_dtype=x_dtype,
+                        normalize_x=normalize_x)
+            for x, y in ((train_x, train_y), (test_x, test_y))
+        )
+
+    # change dtype
+    train_x = train_x.astype(x_dtype)
+    test_x = test_x.astype(x_dtype)
+
     # change shape
     train_x = train_x.reshape([len(train_x)] + list(x_shape))
     test_x = test_x.reshape([len(test_x)] + list(x_shape))
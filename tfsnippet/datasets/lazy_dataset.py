@@ -0,0 +1,166 @@
+import numpy as np
+
+from tfsnippet.dataflows import DataFlow
+
+__all__ = ['LazyDataset']
+
+
+class LazyDataset(object):
+    """
+    A dataset which keeps its `x` array in the raw (compact) storage, and
+    only converts the data type, normalizes and reshapes `x` for each
+    mini-batch when being iterated.
+
+    For example, the images of CIFAR-10 take only 1/4 of the memory when
+    stored as `np.uint8`, compared to `np.float32`.  Using this class, the
+    conversion to `np.float32` is deferred until each mini-batch is produced::
+
+        train, test = load_cifar10(normalize_x=True, lazy=True)
+
+        # each mini-batch is converted into float32 in [0, 1]
+        train_flow = train.as_flow(batch_size=64, shuffle=True)
+        for [x, y] in train_flow:
+            ...
+
+        # the full arrays can still be materialized on request
+        test_x, test_y = test.get_arrays()
+    """
+
+    def __init__(self, x, y, x_shape=None, x_dtype=np.float32,
+                 normalize_x=False):
+        """
+        Construct a new :class:`LazyDataset`.
+
+        Args:
+            x (np.ndarray): The raw `x` array, at least 1-d.
+            y (np.ndarray): The `y` array, with the same length as `x`.
+            x_shape: The default shape of each `x` item in the mini-batches.
+                If not specified, will use ``x.shape[1:]``.
+            x_dtype: The default data type of `x` in the mini-batches.
+                (default `np.float32`)
+            normalize_x (bool): Whether or not to normalize `x` into
+                ``[0, 1]`` by default, by dividing each value with 255.?
+                (default :obj:`False`)
+        """
+        x = np.asarray(x)
+        y = np.asarray(y)
+        if len(x.shape) < 1:
+            raise ValueError('`x` must be at least 1-d array.')
+        if len(x) != len(y):
+            raise ValueError('`x` and `y` must have the same data length.')
+
+        self._x = x
+        self._y = y
+        self._x_shape = self._validate_x_shape(x_shape)
+        self._x_dtype = x_dtype
+        self._normalize_x = bool(normalize_x)
+
+    def __len__(self):
+        return len(self._x)
+
+    def _validate_x_shape(self, x_shape):
+        if x_shape is None:
+            return tuple(self._x.shape[1:])
+        x_shape = tuple([int(v) for v in x_shape])
+        if np.prod(x_shape) != np.prod(self._x.shape[1:]):
+            raise ValueError('`x_shape` does not product to {}: {!r}'.
+                             format(int(np.prod(self._x.shape[1:])), x_shape))
+        return x_shape
+
+    @property
+    def x(self):
+        """Get the raw `x` array."""
+        return self._x
+
+    @property
+    def y(self):
+        """Get the `y` array."""
+        return self._y
+
+    @property
+    def x_shape(self):
+        """Get the default shape of each `x` item in the mini-batches."""
+        return self._x_shape
+
+    @property
+    def x_dtype(self):
+        """Get the default data type of `x` in the mini-batches."""
+        return self._x_dtype
+
+    @property
+    def normalize_x(self):
+        """Whether or not to normalize `x` into ``[0, 1]`` by default?"""
+        return self._normalize_x
+
+    def _get_converter(self, x_dtype, normalize_x, x_shape):
+        x_dtype = self._x_dtype if x_dtype is None else x_dtype
+        normalize_x = \
+            self._normalize_x if normalize_x is None else bool(normalize_x)
+        x_shape = self._x_shape if x_shape is None else \
+            self._validate_x_shape(x_shape)
+
+        def convert(x):
+            if normalize_x:
+                # `astype` always makes a copy, thus we can divide in-place
+                x = x.astype(x_dtype)
+                x /= np.asarray(255., dtype=x.dtype)
+            else:
+                x = np.asarray(x, dtype=x_dtype)
+            if x.shape[1:] != x_shape:
+                x = x.reshape((len(x),) + x_shape)
+            return x
+
+        return convert
+
+    def as_flow(self, batch_size, shuffle=False, skip_incomplete=False,
+                x_dtype=None, normalize_x=None, x_shape=None,
+                random_state=None):
+        """
+        Construct a :class:`~tfsnippet.dataflows.DataFlow`, which converts
+        `x` in each mini-batch.
+
+        Args:
+            batch_size (int): Size of each mini-batch.
+            shuffle (bool): Whether or not to shuffle data before iterating?
+                (default :obj:`False`)
+            skip_incomplete (bool): Whether or not to exclude the last
+                mini-batch if it is incomplete? (default :obj:`False`)
+            x_dtype: Cast `x` into this data type.  If not specified, use
+                the default data type of this dataset.
+            normalize_x (bool): Whether or not to normalize `x` into
+                ``[0, 1]``?  If not specified, use the default setting of
+                this dataset.
+            x_shape: Reshape each `x` item into this shape.  If not
+                specified, use the default shape of this dataset.
+            random_state (RandomState): Optional numpy RandomState for
+                shuffling data before each epoch.  (default :obj:`None`,
+                construct a new :class:`RandomState`).
+
+        Returns:
+            DataFlow: The data flow, yielding mini-batches of ``(x, y)``.
+        """
+        convert = self._get_converter(x_dtype, normalize_x, x_shape)
+        source = DataFlow.arrays(
+            [self._x, self._y], batch_size=batch_size, shuffle=shuffle,
+            skip_incomplete=skip_incomplete, random_state=random_state
+        )
+        return source.map(lambda x: (convert(x),), array_indices=0)
+
+    def get_arrays(self, x_dtype=None, normalize_x=None, x_shape=None):
+        """
+        Materialize the converted `x` array, along with the `y` array.
+
+        Args:
+            x_dtype: Cast `x` into this data type.  If not specified, use
+                the default data type of this dataset.
+            normalize_x (bool): Whether or not to normalize `x` into
+                ``[0, 1]``?  If not specified, use the default setting of
+                this dataset.
+            x_shape: Reshape each `x` item into this shape.  If not
+                specified, use the default shape of this dataset.
+
+        Returns:
+            (np.ndarray, np.ndarray): The converted `x` and the `y` arrays.
+        """
+        convert = self._get_converter(x_dtype, normalize_x, x_shape)
+        return convert(self._x), self._y
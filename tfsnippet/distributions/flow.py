@@ -1,9 +1,13 @@
+import weakref
+
 import tensorflow as tf
 
 from tfsnippet.stochastic import StochasticTensor
 from tfsnippet.layers import BaseFlow
 from tfsnippet.utils import (validate_group_ndims_arg,
                              get_default_scope_name,
+                             is_tensor_object,
+                             is_in_control_flow_context,
                              TensorWrapper,
                              register_tensor_wrapper_class)
 from .base import Distribution
@@ -53,6 +57,14 @@ class FlowDistribution(Distribution):
     """
     Transform a :class:`Distribution` by a :class:`BaseFlow`, as a new
     distribution.
+
+    The log-densities of each `given` tensor are cached, such that the
+    inverse transformation is performed only once for each tensor, and
+    the log-densities of different `group_ndims` are derived from the cached
+    log-densities.  The log-densities of the samples are cached at sampling
+    time, thus :meth:`log_prob` on the samples (or any
+    :class:`~tfsnippet.utils.TensorWrapper` of the samples, including the
+    :class:`StochasticTensor`) never performs the inverse transformation.
     """
 
     def __init__(self, distribution, flow):
@@ -84,6 +96,9 @@ class FlowDistribution(Distribution):
 
         self._flow = flow
         self._distribution = distribution
+        # {id(given): (weakref(given), log_prob,
+        #              {group_ndims: reduced log_prob})}
+        self._log_prob_cache = {}
 
         tmp_distrib = distribution.expand_value_ndims(
             flow.x_value_ndims - distribution.value_ndims)
@@ -142,10 +157,15 @@ class FlowDistribution(Distribution):
             if not is_reparameterized:
                 y = tf.stop_gradient(y)  # important!
 
-            # compute log p(y) = log p(x) - log |dy/dx|
+            # compute log p(y) = log p(x) - log |dy/dx|, cache it for `y`,
             # and then apply `group_ndims` on log p(y)
-            log_py = reduce_group_ndims(
-                tf.reduce_sum, log_px - log_det, group_ndims)
+            log_py, reduced = self._cache_log_prob(
+                y, FlowDistributionDerivedTensor(
+                    tensor=log_px - log_det,
+                    flow_origin=x
+                )
+            )
+            log_py = self._reduce_log_prob(log_py, reduced, group_ndims)
 
             # compose the transformed tensor
             return StochasticTensor(
@@ -154,37 +174,78 @@ class FlowDistribution(Distribution):
                 n_samples=n_samples,
                 group_ndims=group_ndims,
                 is_reparameterized=is_reparameterized,
-                log_prob=FlowDistributionDerivedTensor(
-                    tensor=log_py,
-                    flow_origin=x
-                ),
+                log_prob=log_py,
                 flow_origin=x
             )
 
+    def _cache_log_prob(self, given, log_prob):
+        # the log-densities built inside a control flow context (e.g., the
+        # body of ``tf.while_loop``) cannot be used outside of it, thus
+        # are not cached
+        if is_in_control_flow_context():
+            return log_prob, None
+        # refer to `given` weakly, and remove its entry once it is collected
+        cache = self._log_prob_cache
+        key = id(given)
+        cache[key] = (weakref.ref(given, lambda _: cache.pop(key, None)),
+                      log_prob, {})
+        return cache[key][1:]
+
+    def _get_cached_log_prob(self, given):
+        cached = self._log_prob_cache.get(id(given))
+        if cached is None or cached[0]() is not given:
+            return None, None
+        return cached[1:]
+
+    @staticmethod
+    def _reduce_log_prob(log_prob, reduced, group_ndims):
+        # reduce the log-densities of each element by `group_ndims`, with
+        # the constant `group_ndims` memorized in `reduced` if not None
+        group_ndims = validate_group_ndims_arg(group_ndims)
+        if not is_tensor_object(group_ndims):
+            if group_ndims == 0:
+                return log_prob
+            if reduced is not None and group_ndims in reduced:
+                return reduced[group_ndims]
+        ret = FlowDistributionDerivedTensor(
+            tensor=reduce_group_ndims(
+                tf.reduce_sum, log_prob.tensor, group_ndims),
+            flow_origin=log_prob.flow_origin
+        )
+        if reduced is not None and not is_tensor_object(group_ndims) and \
+                not is_in_control_flow_context():
+            reduced[group_ndims] = ret
+        return ret
+
     def log_prob(self, given, group_ndims=0, name=None):
         given = tf.convert_to_tensor(given)
         with tf.name_scope(
                 name,
                 default_name='FlowDistribution.log_prob',
                 values=[given]):
-            # x, log |dx/dy|
-            x, log_det = self._flow.inverse_transform(given)
+            log_py, reduced = self._get_cached_log_prob(given)
+            if log_py is None:
+                # x, log |dx/dy|
+                x, log_det = self._flow.inverse_transform(given)
 
-            # log p(x)
-            ndims_diff = (self.flow.x_value_ndims -
-                          self.base_distribution.value_ndims)
-            log_px = self._distribution.log_prob(x, group_ndims=ndims_diff)
+                # log p(x)
+                ndims_diff = (self.flow.x_value_ndims -
+                              self.base_distribution.value_ndims)
+                log_px = self._distribution.log_prob(
+                    x, group_ndims=ndims_diff)
 
-            # compute log p(y) = log p(x) + log |dx/dy|,
-            # and then apply `group_ndims` on log p(x)
-            log_py = reduce_group_ndims(
-                tf.reduce_sum, log_px + log_det, group_ndims)
+                # compute log p(y) = log p(x) + log |dx/dy|, cache it for
+                # `given`, and then apply `group_ndims` on log p(y)
+                log_py, reduced = self._cache_log_prob(
+                    given, FlowDistributionDerivedTensor(
+                        tensor=log_px + log_det,
+                        flow_origin=StochasticTensor(
+                            distribution=self.base_distribution, tensor=x)
+                    )
+                )
+            log_py = self._reduce_log_prob(log_py, reduced, group_ndims)
 
-        return FlowDistributionDerivedTensor(
-            tensor=log_py,
-            flow_origin=StochasticTensor(
-                distribution=self.base_distribution, tensor=x)
-        )
+        return log_py
 
     def prob(self, given, group_ndims=0, name=None):
         with tf.name_scope(
@@ -1,17 +1,103 @@
+import numpy as np
 import tensorflow as tf
 
-from tfsnippet.ops import log_sum_exp
+from tfsnippet.ops import log_sum_exp, broadcast_to_shape
 from tfsnippet.stochastic import StochasticTensor
 from tfsnippet.utils import (is_tensor_object, concat_shapes, get_shape,
                              settings, assert_deps)
 from .base import Distribution
-from .univariate import Categorical
+from .multivariate import OnehotCategorical
+from .univariate import Normal, Bernoulli, Categorical, Uniform
 from .utils import reduce_group_ndims, compute_density_immediately
 from .wrapper import as_distribution
 
 __all__ = ['Mixture']
 
 
+# The component families which can be batched by stacking their parameters,
+# as ``{type: (param_names, param_tail_ndims, factory)}``, where
+# `param_tail_ndims` is the number of the parameter dimensions after the
+# batch dimensions, and ``factory(component, **params)`` constructs a new
+# distribution of the same family as `component` from `params`.
+_BATCHABLE_FAMILIES = {
+    Normal: (
+        ('mean', 'logstd'), 0,
+        lambda c, mean, logstd: Normal(
+            mean=mean, logstd=logstd, is_reparameterized=c.is_reparameterized)
+    ),
+    Uniform: (
+        ('minval', 'maxval'), 0,
+        lambda c, minval, maxval: Uniform(
+            minval=minval, maxval=maxval,
+            is_reparameterized=c.is_reparameterized)
+    ),
+    Bernoulli: (
+        ('logits',), 0,
+        lambda c, logits: Bernoulli(logits=logits, dtype=c.dtype)
+    ),
+    Categorical: (
+        ('logits',), 1,
+        lambda c, logits: Categorical(logits=logits, dtype=c.dtype)
+    ),
+    OnehotCategorical: (
+        ('logits',), 1,
+        lambda c, logits: OnehotCategorical(logits=logits, dtype=c.dtype)
+    ),
+}
+
+
+def _get_batchable_params(components):
+    """
+    Get the parameters of `components`, if they can be batched.
+
+    Returns:
+        list[list[tf.Tensor]] or None: The parameters of each component,
+            or :obj:`None` if the components are not of the same batchable
+            family, or their parameters do not agree in dtype and tail shape.
+    """
+    family = type(components[0])
+    if family not in _BATCHABLE_FAMILIES:
+        return None
+    param_names, tail_ndims, _ = _BATCHABLE_FAMILIES[family]
+
+    params = []
+    for c in components:
+        if type(c) is not family or \
+                c.is_reparameterized != components[0].is_reparameterized:
+            return None
+        params.append([tf.convert_to_tensor(getattr(c, n))
+                       for n in param_names])
+
+    for i, first_param in enumerate(params[0]):
+        first_shape = first_param.get_shape()
+        if first_shape.ndims is None:
+            return None
+        first_tail = first_shape[first_shape.ndims - tail_ndims:]
+        if not first_tail.is_fully_defined():
+            return None
+        for c_params in params[1:]:
+            shape = c_params[i].get_shape()
+            if c_params[i].dtype != first_param.dtype or \
+                    shape.ndims is None or \
+                    (shape[shape.ndims - tail_ndims:].as_list() !=
+                     first_tail.as_list()):
+                return None
+
+    return params
+
+
+def _flatten(x, tail_ndims):
+    """Flatten all the dimensions of `x` except the last `tail_ndims` ones."""
+    if tail_ndims > 0:
+        tail_shape = get_shape(x)[-tail_ndims:]
+        x_static_tail = x.get_shape()[-tail_ndims:]
+        x = tf.reshape(x, concat_shapes([[-1], tail_shape]))
+        x.set_shape(tf.TensorShape([None]).concatenate(x_static_tail))
+        return x
+    else:
+        return tf.reshape(x, [-1])
+
+
 class Mixture(Distribution):
     """
     Mixture distribution.
@@ -28,7 +114,8 @@ class Mixture(Distribution):
     of the k-th component distribution.
     """
 
-    def __init__(self, categorical, components, is_reparameterized=False):
+    def __init__(self, categorical, components, is_reparameterized=False,
+                 batch_components=True, ancestral_sampling=True):
         """
         Construct a new :class:`Mixture`.
 
@@ -40,12 +127,33 @@ class Mixture(Distribution):
             is_reparameterized (bool): Whether or not this mixture distribution
                 is re-parameterized?  If :obj:`True`, the `components` must
                 all be re-parameterized.  The `categorical` will be treated
-                as constant, and the mixture samples will be composed by
+                as constant, and the mixture samples will be composed of the
+                samples of the selected components (see `batch_components`
+                and `ancestral_sampling`), such that the gradients can be
+                propagated back directly through these samples.
+                If :obj:`False`, `tf.stop_gradient` will be applied on the
+                mixture samples, such that no gradient will be propagated
+                back through these samples.
+            batch_components (bool): Whether or not to stack the parameters
+                of the components into a single batched distribution, if
+                the components are of the same family (e.g., all are
+                :class:`Normal`) with agreed parameter shapes?  If
+                :obj:`True`, `log_prob` will be computed by one vectorized
+                operation over all the components, and `sample` will only
+                draw samples from the selected parameters of each
+                categorical sample.  (default :obj:`True`)
+            ancestral_sampling (bool): Whether or not to draw only one
+                sample from the selected component for each categorical
+                sample, if the components are not batched?  The categorical
+                samples are partitioned by the components, and each
+                component draws samples only at its own positions (from
+                the gathered parameters if its family is supported by
+                `batch_components`, otherwise by gathering from its full
+                samples), then the samples are stitched together.  If
+                :obj:`False`, the mixture samples will be composed by
                 `one_hot(categorical samples) * stack([component samples])`,
-                such that the gradients can be propagated back directly
-                through these samples.  If :obj:`False`, `tf.stop_gradient`
-                will be applied on the mixture samples, such that no gradient
-                will be propagated back through these samples.
+                which draws samples from every component.
+                (default :obj:`True`)
         """
         components = tuple(as_distribution(c) for c in components)
         is_reparameterized = bool(is_reparameterized)
@@ -141,8 +249,20 @@ class Mixture(Distribution):
                 for c in components[1:]:
                     batch_shape = assert_batch_shape(c, batch_shape)
 
+        # stack the parameters of the components along a new component axis
+        # right after the batch dimensions, if possible
+        batched = None
+        if batch_components:
+            params = _get_batchable_params(components)
+            if params is not None:
+                with tf.name_scope('Mixture.batch_components'):
+                    batched = self._stack_components(
+                        components, params, batch_shape)
+
         self._categorical = categorical
         self._components = components
+        self._batched = batched
+        self._ancestral_sampling = bool(ancestral_sampling)
 
         super(Mixture, self).__init__(
             dtype=components[0].dtype,
@@ -183,6 +303,67 @@ class Mixture(Distribution):
         """
         return len(self._components)
 
+    @property
+    def batched_components(self):
+        """
+        Get the batched distribution of the stacked components.
+
+        Its batch shape is ``batch_shape + [n_components]``.
+
+        Returns:
+            Distribution or None: The batched distribution, or :obj:`None`
+                if the components are not batched.
+        """
+        return self._batched
+
+    @staticmethod
+    def _stack_components(components, params, batch_shape):
+        param_names, tail_ndims, factory = \
+            _BATCHABLE_FAMILIES[type(components[0])]
+        batch_static_shape = components[0].get_batch_shape()
+        if batch_static_shape.is_fully_defined():
+            batch_shape = tuple(batch_static_shape.as_list())
+
+        stacked = {}
+        for i, name in enumerate(param_names):
+            param_shape = params[0][i].get_shape()
+            tail_shape = tuple(
+                param_shape[param_shape.ndims - tail_ndims:].as_list())
+            target_shape = concat_shapes([batch_shape, tail_shape])
+            stacked[name] = tf.stack(
+                [broadcast_to_shape(p[i], target_shape) for p in params],
+                axis=-tail_ndims - 1
+            )
+        return factory(components[0], **stacked)
+
+    def _select_batched_params(self, cat):
+        # select the parameters of the batched components according to
+        # the categorical samples, by gathering from the flatten parameters
+        # of shape ``[batch_size * n_components] + tail_shape``, at the
+        # indices ``batch_index * n_components + cat``
+        family = type(self._batched)
+        param_names, tail_ndims, factory = _BATCHABLE_FAMILIES[family]
+        _, batch_size = self._get_batch_size()
+        flat_cat = tf.cast(tf.reshape(cat, [-1]), dtype=tf.int32)
+        flat_indices = tf.range(tf.size(flat_cat, out_type=tf.int32))
+        indices = (flat_indices % batch_size) * self.n_components + flat_cat
+
+        selected = {}
+        for name in param_names:
+            param = tf.convert_to_tensor(getattr(self._batched, name))
+            param = tf.gather(_flatten(param, tail_ndims), indices)
+            if tail_ndims > 0:
+                tail_static_shape = param.get_shape()[1:]
+                param = tf.reshape(param, concat_shapes(
+                    [get_shape(cat), get_shape(param)[1:]]))
+                param.set_shape(
+                    cat.get_shape().concatenate(tail_static_shape))
+            else:
+                param = tf.reshape(param, get_shape(cat))
+                param.set_shape(cat.get_shape())
+            selected[name] = param
+        return factory(self._batched, **selected)
+
     def _cat_prob(self, log_softmax):
         softmax_fn = tf.nn.log_softmax if log_softmax else tf.nn.softmax
         probs = softmax_fn(self._categorical.logits, axis=-1, name='cat_prob')
@@ -192,30 +373,25 @@ class Mixture(Distribution):
                compute_density=None, name=None):
         self._validate_sample_is_reparameterized_arg(is_reparameterized)
 
-        #######################################################################
-        # slow routine: generate the mixture by one_hot * stack([c.sample()]) #
-        #######################################################################
         with tf.name_scope(name or 'Mixture.sample'):
             cat = self.categorical.sample(n_samples, group_ndims=0)
-            mask = tf.one_hot(cat, self.n_components, dtype=self.dtype, axis=-1)
-            if self.value_ndims > 0:
-                static_shape = (mask.get_shape().as_list() +
-                                [1] * self.value_ndims)
-                dynamic_shape = concat_shapes([get_shape(mask),
-                                               [1] * self.value_ndims])
-                mask = tf.reshape(mask, dynamic_shape)
-                mask.set_shape(static_shape)
-            mask = tf.stop_gradient(mask)
-
-            # derive the mixture samples
-            c_samples = [
-                c.sample(n_samples, group_ndims=0)
-                for c in self.components
-            ]
-            samples = tf.reduce_sum(
-                mask * tf.stack(c_samples, axis=-self.value_ndims - 1),
-                axis=-self.value_ndims - 1
-            )
+
+            if self._batched is not None:
+                ###############################################################
+                # fast routine: sample from the selected parameters           #
+                ###############################################################
+                selected = self._select_batched_params(cat)
+                samples = selected.sample(group_ndims=0).tensor
+            elif self._ancestral_sampling:
+                ###############################################################
+                # ancestral routine: sample each component at its positions   #
+                ###############################################################
+                samples = self._sample_by_partition(cat, n_samples)
+            else:
+                ###############################################################
+                # slow routine: generate by one_hot * stack([c.sample()])     #
+                ###############################################################
+                samples = self._sample_by_mask(cat, n_samples)
 
             if not self.is_reparameterized:
                 samples = tf.stop_gradient(samples)
@@ -233,20 +409,115 @@ class Mixture(Distribution):
 
             return t
 
+    def _get_batch_size(self):
+        # get the batch shape, and the number of elements in a batch
+        batch_static_shape = self.get_batch_shape()
+        if batch_static_shape.is_fully_defined():
+            batch_shape = tuple(batch_static_shape.as_list())
+            batch_size = int(np.prod(batch_shape))
+        else:
+            batch_shape = self.batch_shape
+            batch_size = tf.reduce_prod(batch_shape)
+        return batch_shape, batch_size
+
+    def _sample_by_partition(self, cat, n_samples):
+        # the categorical samples are of shape ``sample_shape + batch_shape``,
+        # thus the index of a flatten position `i` in the flatten batch is
+        # ``i % batch_size``.
+        batch_shape, batch_size = self._get_batch_size()
+        flat_cat = tf.reshape(cat, [-1])
+        flat_indices = tf.range(tf.size(flat_cat, out_type=tf.int32))
+        partitions = tf.dynamic_partition(
+            flat_indices, tf.cast(flat_cat, dtype=tf.int32),
+            self.n_components
+        )
+
+        c_samples = []
+        for c, indices in zip(self.components, partitions):
+            if type(c) in _BATCHABLE_FAMILIES:
+                # gather the parameters of the selected positions, and draw
+                # one sample from each of them
+                param_names, tail_ndims, factory = _BATCHABLE_FAMILIES[type(c)]
+                batch_indices = indices % batch_size
+                params = {}
+                for name in param_names:
+                    param = tf.convert_to_tensor(getattr(c, name))
+                    param_shape = get_shape(param)
+                    if tail_ndims > 0:
+                        param_shape = param_shape[-tail_ndims:]
+                    else:
+                        param_shape = ()
+                    param = broadcast_to_shape(
+                        param, concat_shapes([batch_shape, param_shape]))
+                    params[name] = tf.gather(
+                        _flatten(param, tail_ndims), batch_indices)
+                c_sample = factory(c, **params).sample(group_ndims=0).tensor
+            else:
+                # the parameters of this component cannot be gathered,
+                # thus draw the full samples and gather the selected ones
+                c_sample = c.sample(n_samples, group_ndims=0).tensor
+                c_sample = tf.gather(
+                    _flatten(c_sample, self.value_ndims), indices)
+            c_samples.append(c_sample)
+
+        samples = tf.dynamic_stitch(partitions, c_samples)
+        samples_static_shape = cat.get_shape().concatenate(
+            samples.get_shape()[1:])
+        if self.value_ndims > 0:
+            samples = tf.reshape(samples, concat_shapes(
+                [get_shape(cat), get_shape(samples)[1:]]))
+        else:
+            samples = tf.reshape(samples, get_shape(cat))
+        samples.set_shape(samples_static_shape)
+        return samples
+
+    def _sample_by_mask(self, cat, n_samples):
+        mask = tf.one_hot(cat, self.n_components, dtype=self.dtype, axis=-1)
+        if self.value_ndims > 0:
+            static_shape = (mask.get_shape().as_list() +
+                            [1] * self.value_ndims)
+            dynamic_shape = concat_shapes([get_shape(mask),
+                                           [1] * self.value_ndims])
+            mask = tf.reshape(mask, dynamic_shape)
+            mask.set_shape(static_shape)
+        mask = tf.stop_gradient(mask)
+
+        # derive the mixture samples
+        c_samples = [
+            c.sample(n_samples, group_ndims=0)
+            for c in self.components
+        ]
+        samples = tf.reduce_sum(
+            mask * tf.stack(c_samples, axis=-self.value_ndims - 1),
+            axis=-self.value_ndims - 1
+        )
+        return samples
+
     def log_prob(self, given, group_ndims=0, name=None):
         given = tf.convert_to_tensor(given)
 
         with tf.name_scope(name or 'Mixture.log_prob', values=[given]):
-            cat_log_probs = self._cat_prob(log_softmax=True)
-            c_log_probs = [
-                c.log_prob(given, group_ndims=0)
-                for c in self.components
-            ]
-            log_probs = tf.stack(
-                [cat + c for cat, c in zip(cat_log_probs, c_log_probs)],
-                axis=0
-            )
-            log_prob = log_sum_exp(log_probs, axis=0)
+            if self._batched is not None:
+                # fast routine: insert the component axis into `given`,
+                # and evaluate all the components at once
+                cat_log_probs = tf.nn.log_softmax(
+                    self._categorical.logits, axis=-1, name='cat_prob')
+                c_log_probs = self._batched.log_prob(
+                    tf.expand_dims(given, axis=-self.value_ndims - 1),
+                    group_ndims=0
+                )
+                log_prob = log_sum_exp(cat_log_probs + c_log_probs, axis=-1)
+            else:
+                cat_log_probs = self._cat_prob(log_softmax=True)
+                c_log_probs = [
+                    c.log_prob(given, group_ndims=0)
+                    for c in self.components
+                ]
+                log_probs = tf.stack(
+                    [cat + c for cat, c in zip(cat_log_probs, c_log_probs)],
+                    axis=0
+                )
+                log_prob = log_sum_exp(log_probs, axis=0)
             log_prob = reduce_group_ndims(
                 tf.reduce_sum, log_prob, group_ndims=group_ndims)
             return log_prob
@@ -6,7 +6,7 @@ from matplotlib import pyplot as plt
 from tfsnippet.distributions import Bernoulli
 from tfsnippet.stochastic import StochasticTensor
 from tfsnippet.trainer import merge_feed_dict, resolve_feed_dict
-from tfsnippet.utils import get_default_session_or_error
+from tfsnippet.utils import get_default_session_or_error, LogSumExpAccumulator
 from .mlresults import MLResults
 
 __all__ = [
@@ -15,7 +15,8 @@ __all__ = [
 ]
 
 
-def collect_outputs(outputs, inputs, data_flow, feed_dict=None, session=None):
+def collect_outputs(outputs, inputs, data_flow, feed_dict=None, session=None,
+                    log_sum_exp_outputs=None):
     """
     Run TensorFlow graph by mini-batch and concat outputs from each batch.
 
@@ -26,15 +27,23 @@ def collect_outputs(outputs, inputs, data_flow, feed_dict=None, session=None):
         feed_dict: Optional, additional feed dict.
         session: The TensorFlow session.  If not specified, use the
             default session.
+        log_sum_exp_outputs (Iterable[int]): Optional, the indices of the
+            outputs to be reduced by log-sum-exp along the first axis,
+            instead of being concatenated.  Such an output is returned as
+            a :class:`LogSumExpAccumulator`, which can be further merged
+            with the accumulators from other data shards or processes.
 
     Returns:
-        tuple[np.ndarray]: The concatenated outputs.
+        tuple[np.ndarray or LogSumExpAccumulator]: The concatenated outputs,
+            or the accumulators of the log-sum-exp outputs.
     """
     outputs = list(outputs)
     inputs = list(inputs)
     session = session or get_default_session_or_error()
+    log_sum_exp_outputs = set(int(i) for i in (log_sum_exp_outputs or ()))
 
     collected = [[] for _ in range(len(outputs))]
+    accumulators = {}
     for batch in data_flow:
         batch_feed_dict = merge_feed_dict(
             feed_dict,
@@ -42,10 +51,22 @@ def collect_outputs(outputs, inputs, data_flow, feed_dict=None, session=None):
         )
         batch_feed_dict = resolve_feed_dict(batch_feed_dict)
         for i, o in enumerate(session.run(outputs, feed_dict=batch_feed_dict)):
-            collected[i].append(o)
+            if i in log_sum_exp_outputs:
+                if i not in accumulators:
+                    accumulators[i] = LogSumExpAccumulator(shape=o.shape[1:])
+                accumulators[i].collect(o)
+            else:
+                collected[i].append(o)
 
     for i, batches in enumerate(collected):
-        collected[i] = np.concatenate(batches, axis=0)
+        if i in log_sum_exp_outputs:
+            if i in accumulators:
+                collected[i] = accumulators[i]
+            else:  # the data flow is empty
+                collected[i] = LogSumExpAccumulator(
+                    shape=outputs[i].get_shape().as_list()[1:])
+        else:
+            collected[i] = np.concatenate(batches, axis=0)
     return tuple(collected)
 
 
@@ -5,19 +5,22 @@ from .core import *
 from .flows import *
 from .initialization import *
 from .normalization import *
+from .recompute import *
 from .regularization import *
 from .utils import *
 
 __all__ = [
     'ActNorm', 'BaseFlow', 'BaseLayer', 'CouplingLayer', 'FeatureMappingFlow',
-    'FeatureShufflingFlow', 'InvertFlow', 'InvertibleActivation',
-    'InvertibleActivationFlow', 'InvertibleConv2d', 'InvertibleDense',
-    'LeakyReLU', 'MultiLayerFlow', 'PixelCNN2DOutput', 'PlanarNormalizingFlow',
-    'ReshapeFlow', 'SequentialFlow', 'SpaceToDepthFlow', 'SplitFlow',
-    'act_norm', 'as_gated', 'avg_pool2d', 'broadcast_log_det_against_input',
-    'conv2d', 'deconv2d', 'default_kernel_initializer', 'dense', 'dropout',
-    'global_avg_pool2d', 'l2_regularizer', 'max_pool2d', 'pixelcnn_2d_input',
-    'pixelcnn_2d_output', 'pixelcnn_conv2d_resnet', 'planar_normalizing_flows',
-    'resnet_conv2d_block', 'resnet_deconv2d_block', 'resnet_general_block',
-    'shifted_conv2d', 'weight_norm',
+    'FeatureShufflingFlow', 'FrozenAffineFlow', 'InvertFlow',
+    'InvertibleActivation', 'InvertibleActivationFlow', 'InvertibleConv2d',
+    'InvertibleDense', 'LeakyReLU', 'MultiLayerFlow', 'PixelCNN2DOutput',
+    'PlanarNormalizingFlow', 'ReshapeFlow', 'SequentialFlow',
+    'SpaceToDepthFlow', 'SplitFlow', 'act_norm', 'as_gated', 'avg_pool2d',
+    'broadcast_log_det_against_input', 'conv2d', 'deconv2d',
+    'default_kernel_initializer', 'dense', 'dropout', 'global_avg_pool2d',
+    'l2_regularizer', 'max_pool2d', 'pixelcnn_2d_input', 'pixelcnn_2d_output',
+    'pixelcnn_conv2d_resnet', 'pixelcnn_conv2d_resnet_receptive_field',
+    'planar_normalizing_flows', 'recompute_sequential', 'resnet_conv2d_block',
+    'resnet_deconv2d_block', 'resnet_general_block', 'shifted_conv2d',
+    'weight_norm',
 ]
@@ -7,6 +7,7 @@ from .shifted import *
 __all__ = [
     'PixelCNN2DOutput', 'avg_pool2d', 'conv2d', 'deconv2d',
     'global_avg_pool2d', 'max_pool2d', 'pixelcnn_2d_input',
-    'pixelcnn_2d_output', 'pixelcnn_conv2d_resnet', 'resnet_conv2d_block',
+    'pixelcnn_2d_output', 'pixelcnn_conv2d_resnet',
+    'pixelcnn_conv2d_resnet_receptive_field', 'resnet_conv2d_block',
     'resnet_deconv2d_block', 'resnet_general_block', 'shifted_conv2d',
 ]
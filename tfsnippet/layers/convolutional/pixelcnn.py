@@ -4,7 +4,8 @@ import tensorflow as tf
 from tensorflow.contrib.framework import add_arg_scope
 
 from tfsnippet.utils import (add_name_arg_doc, get_static_shape, get_shape,
-                             add_name_and_scope_arg_doc, InputSpec)
+                             add_name_and_scope_arg_doc, InputSpec,
+                             validate_int_tuple_arg)
 from tfsnippet.ops import shift
 from .utils import validate_conv2d_input
 from .conv2d_ import conv2d
@@ -14,7 +15,7 @@ from .shifted import shifted_conv2d
 __all__ = [
     'PixelCNN2DOutput',
     'pixelcnn_2d_input', 'pixelcnn_2d_output',
-    'pixelcnn_conv2d_resnet',
+    'pixelcnn_conv2d_resnet', 'pixelcnn_conv2d_resnet_receptive_field',
 ]
 
 
@@ -308,3 +309,66 @@ def pixelcnn_conv2d_resnet(input,
         )
 
     return PixelCNN2DOutput(vertical=vertical, horizontal=horizontal)
+
+
+def pixelcnn_conv2d_resnet_receptive_field(n_layers,
+                                           vertical_kernel_size=(2, 3),
+                                           horizontal_kernel_size=(2, 2)):
+    """
+    Get the receptive field of a PixelCNN 2D network, which is composed of
+    :func:`pixelcnn_2d_input`, `n_layers` :func:`pixelcnn_conv2d_resnet`
+    blocks with unit strides, and :func:`pixelcnn_2d_output`.
+
+    The output of such a network at each pixel only depends on the input
+    pixels within the rectangle of `top` rows above (and the current row),
+    `left` columns to the left and `right` columns to the right of that
+    pixel.  This can be used as the `receptive_field` argument of
+    :func:`~tfsnippet.ops.pixelcnn_2d_sample`.  If other layers are applied
+    on the output, e.g., a 1x1 convolution, the receptive field stays the
+    same; otherwise it should be enlarged accordingly.
+
+    Args:
+        n_layers (int): The number of :func:`pixelcnn_conv2d_resnet` blocks.
+        vertical_kernel_size (int or tuple[int]): The `vertical_kernel_size`
+            of the blocks.
+        horizontal_kernel_size (int or tuple[int]): The
+            `horizontal_kernel_size` of the blocks.
+
+    Returns:
+        (int, int, int): The ``(top, left, right)`` receptive field.
+    """
+    n_layers = int(n_layers)
+    if n_layers < 0:
+        raise ValueError('`n_layers` must be non-negative: got {}'.
+                         format(n_layers))
+    vertical_kernel_size = validate_int_tuple_arg(
+        'vertical_kernel_size', vertical_kernel_size)
+    horizontal_kernel_size = validate_int_tuple_arg(
+        'horizontal_kernel_size', horizontal_kernel_size)
+    if len(vertical_kernel_size) == 1:
+        vertical_kernel_size *= 2
+    if len(horizontal_kernel_size) == 1:
+        horizontal_kernel_size *= 2
+
+    # track the (top, left, right) receptive field of both stacks,
+    # according to the paddings of `shifted_conv2d`
+    def union(a, b):
+        return tuple(max(x, y) for x, y in zip(a, b))
+
+    def vertical_conv(field):
+        kh, kw = vertical_kernel_size
+        return (field[0] + kh - 1, field[1] + (kw - 1) // 2,
+                field[2] + kw // 2)
+
+    def horizontal_conv(field):
+        kh, kw = horizontal_kernel_size
+        return field[0] + kh - 1, field[1] + kw - 1, field[2]
+
+    vertical = (1, 0, 0)  # shifted down by one row
+    horizontal = (0, 1, 0)  # shifted right by one column
+    for _ in range(n_layers):
+        vertical = union(vertical, vertical_conv(vertical_conv(vertical)))
+        residual = union(horizontal_conv(horizontal), vertical)
+        horizontal = union(horizontal, horizontal_conv(residual))
+
+    return horizontal
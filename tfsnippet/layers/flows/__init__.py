@@ -1,6 +1,7 @@
 from .base import *
 from .branch import *
 from .coupling import *
+from .frozen import *
 from .invert import *
 from .linear import *
 from .planar_nf import *
@@ -11,8 +12,8 @@ from .utils import *
 
 __all__ = [
     'BaseFlow', 'CouplingLayer', 'FeatureMappingFlow', 'FeatureShufflingFlow',
-    'InvertFlow', 'InvertibleConv2d', 'InvertibleDense', 'MultiLayerFlow',
-    'PlanarNormalizingFlow', 'ReshapeFlow', 'SequentialFlow',
+    'FrozenAffineFlow', 'InvertFlow', 'InvertibleConv2d', 'InvertibleDense',
+    'MultiLayerFlow', 'PlanarNormalizingFlow', 'ReshapeFlow', 'SequentialFlow',
     'SpaceToDepthFlow', 'SplitFlow', 'broadcast_log_det_against_input',
     'planar_normalizing_flows',
 ]
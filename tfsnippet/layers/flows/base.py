@@ -1,9 +1,11 @@
 import tensorflow as tf
 
+from tfsnippet.ops import with_custom_gradient
 from tfsnippet.utils import (DocInherit, add_name_and_scope_arg_doc,
                              get_default_scope_name, get_static_shape,
                              InputSpec, is_integer, assert_deps,
-                             maybe_check_numerics, maybe_add_histogram)
+                             maybe_check_numerics, maybe_add_histogram,
+                             get_default_session_or_error)
 from ..base import BaseLayer
 from .utils import assert_log_det_shape_matches_input, ZeroLogDet
 
@@ -288,6 +290,49 @@ class BaseFlow(BaseLayer):
         y, _ = self.transform(x, compute_y=True, compute_log_det=False)
         return y
 
+    def _freeze(self, session):
+        # flows without a constant form are kept as-is by default
+        return self
+
+    def freeze(self, session=None):
+        """
+        Get a frozen flow for inference, whose parameters are evaluated
+        once and baked in as constants.
+
+        The frozen flow has the same :meth:`transform` and
+        :meth:`inverse_transform` as this flow (up to round-off errors),
+        but no longer reads the variables.  :class:`InvertibleDense`,
+        :class:`InvertibleConv2d` and single-axis :class:`ActNorm` are
+        frozen into :class:`FrozenAffineFlow`, with the inverse kernel and
+        the log-determinant precomputed, and the adjacent ones in a
+        :class:`SequentialFlow` are folded into one (e.g., an
+        :class:`ActNorm` is folded into the following
+        :class:`InvertibleConv2d`).  Flows without a constant form are
+        kept as-is.  The frozen flow does not follow further updates of
+        the variables.
+
+        Args:
+            session (tf.Session): The session to evaluate the parameters.
+                If not specified, use the default session.
+
+        Returns:
+            BaseFlow: The frozen flow, which might be this flow itself.
+
+        Raises:
+            RuntimeError: If the flow has not been built.
+        """
+        from .frozen import copy_built_state
+
+        if not self._has_built:
+            raise RuntimeError('`freeze` cannot be called before the flow '
+                               'has been built: {!r}'.format(self))
+        if session is None:
+            session = get_default_session_or_error()
+        frozen = self._freeze(session)
+        if not frozen._has_built:
+            copy_built_state(frozen, self)
+        return frozen
+
 
 def sum_log_det(log_det_list, name='sum_log_det'):
     """
@@ -307,21 +352,39 @@ def sum_log_det(log_det_list, name='sum_log_det'):
 
 
 class MultiLayerFlow(BaseFlow):
-    """Base class for multi-layer normalizing flows."""
+    """
+    Base class for multi-layer normalizing flows.
+
+    If `invertible_backprop` is :obj:`True`, the gradients of
+    :meth:`transform` will be computed by reconstructing the input of each
+    layer from its output via :meth:`_inverse_transform_layer` during the
+    backward pass (as in RevNet, Gomez et al., 2017), instead of keeping
+    the intermediate activations of all layers.  The activation memory then
+    becomes constant in the number of layers, at the cost of one inverse
+    and one extra forward transformation of each layer during the backward
+    pass.  This requires the flow to be explicitly invertible, and the
+    reconstruction to be numerically accurate.  Note that the layers with
+    data-dependent initialization (e.g., :class:`ActNorm`) should be
+    initialized by a separated forward pass before using this option.
+    """
 
     @add_name_and_scope_arg_doc
-    def __init__(self, n_layers, **kwargs):
+    def __init__(self, n_layers, invertible_backprop=False, **kwargs):
         """
         Construct a new :class:`MultiLayerFlow`.
 
         Args:
             n_layers (int): Number of flow layers.
+            invertible_backprop (bool): Whether or not to compute the
+                gradients of :meth:`transform` by reconstructing the
+                inputs of each layer from its outputs? (default :obj:`False`)
             \\**kwargs: Other named arguments passed to :class:`BaseFlow`.
         """
         n_layers = int(n_layers)
         if n_layers < 1:
             raise ValueError('`n_layers` must be larger than 0.')
         self._n_layers = n_layers
+        self._invertible_backprop = bool(invertible_backprop)
         self._layer_params = []
 
         super(MultiLayerFlow, self).__init__(**kwargs)
@@ -336,10 +399,115 @@ class MultiLayerFlow(BaseFlow):
         """
         return self._n_layers
 
+    @property
+    def invertible_backprop(self):
+        """
+        Whether or not to compute the gradients of :meth:`transform` by
+        reconstructing the inputs of each layer from its outputs?
+        """
+        return self._invertible_backprop
+
     def _transform_layer(self, layer_id, x, compute_y, compute_log_det):
         raise NotImplementedError()
 
+    def _transform_invertible_backprop(self, x, compute_y, compute_log_det):
+        if not self.explicitly_invertible:
+            raise RuntimeError('`invertible_backprop` requires the flow to be '
+                               'explicitly invertible: {!r}'.format(self))
+
+        # a `ZeroLogDet` has no gradient, thus is kept out of the
+        # custom gradient function
+        zero_log_det = []
+
+        def forward(x):
+            log_det_list = []
+            for i in range(self._n_layers):
+                with tf.name_scope('_{}'.format(i)):
+                    x, log_det = self._transform_layer(
+                        layer_id=i,
+                        x=x,
+                        compute_y=True,
+                        compute_log_det=compute_log_det
+                    )
+                    log_det_list.append(log_det)
+
+            outputs = [x]
+            if compute_log_det:
+                log_det = sum_log_det(log_det_list)
+                if isinstance(log_det, ZeroLogDet):
+                    zero_log_det.append(log_det)
+                else:
+                    outputs.append(log_det)
+            return outputs
+
+        def backward(inputs, variables, outputs, grad_outputs):
+            y = outputs[0]
+            grad_y = grad_outputs[0]
+            if grad_y is None:
+                # `tf.gradients` would take `grad_ys = None` as ones
+                grad_y = tf.zeros_like(y)
+            grad_log_det = grad_outputs[1] if len(outputs) > 1 else None
+            grad_vars = [[] for _ in variables]
+
+            for i in range(self._n_layers - 1, -1, -1):
+                with tf.name_scope('_{}'.format(i)):
+                    # the input of the first layer is kept by the custom
+                    # gradient op, thus need not be reconstructed
+                    if i > 0:
+                        x, _ = self._inverse_transform_layer(
+                            layer_id=i, y=y, compute_x=True,
+                            compute_log_det=False
+                        )
+                    else:
+                        x = inputs[0]
+                    x = tf.stop_gradient(x)
+
+                    # re-compute the forward transformation of this layer,
+                    # and back-propagate the gradients through it
+                    y, log_det = self._transform_layer(
+                        layer_id=i,
+                        x=x,
+                        compute_y=True,
+                        compute_log_det=grad_log_det is not None
+                    )
+                    ys, grad_ys = [y], [grad_y]
+                    if grad_log_det is not None and \
+                            not isinstance(log_det, ZeroLogDet):
+                        ys.append(log_det)
+                        grad_ys.append(grad_log_det)
+                    grads = tf.gradients(ys, [x] + variables, grad_ys=grad_ys)
+
+                    for g, acc in zip(grads[1:], grad_vars):
+                        if g is not None:
+                            acc.append(tf.convert_to_tensor(g))
+                    grad_y = grads[0]
+                    if grad_y is None:
+                        grad_y = tf.zeros_like(x)
+                    y = x
+
+            grad_vars = [
+                None if not acc else (acc[0] if len(acc) == 1
+                                      else tf.add_n(acc))
+                for acc in grad_vars
+            ]
+            return [grad_y], grad_vars
+
+        outputs = with_custom_gradient(
+            forward, [x], backward, name='invertible_backprop')
+        y = outputs[0] if compute_y else None
+        if not compute_log_det:
+            log_det = None
+        elif zero_log_det:
+            log_det = zero_log_det[0]
+        else:
+            log_det = outputs[1]
+        return y, log_det
+
     def _transform(self, x, compute_y, compute_log_det):
+        if self._invertible_backprop:
+            return self._transform_invertible_backprop(
+                x, compute_y, compute_log_det)
+
         # apply transformation of each layer
         log_det_list = []
         for i in range(self._n_layers):
@@ -0,0 +1,351 @@
+import numpy as np
+import tensorflow as tf
+
+from tfsnippet.utils import (add_name_and_scope_arg_doc, get_static_shape,
+                             reopen_variable_scope)
+from .base import FeatureMappingFlow
+from .linear import apply_log_det_factor
+from .utils import broadcast_log_det_against_input
+
+__all__ = ['FrozenAffineFlow']
+
+
+def kernel_dot(a, b):
+    """
+    Compute the product of two kernels, each of which is either a diagonal
+    kernel (1-d array) or a full kernel matrix (2-d array).
+    """
+    if a.ndim == 1 and b.ndim == 1:
+        return a * b
+    elif a.ndim == 1:
+        return a[:, np.newaxis] * b
+    elif b.ndim == 1:
+        return a * b[np.newaxis, :]
+    else:
+        return np.dot(a, b)
+
+
+def vector_kernel_dot(v, kernel):
+    """Compute the product of a vector `v` and a diagonal or full kernel."""
+    if kernel.ndim == 1:
+        return v * kernel
+    return np.dot(v, kernel)
+
+
+def copy_built_state(target, x_flow, y_flow=None):
+    """
+    Mark the `target` flow as built, with the input spec of `x` copied from
+    `x_flow`, and the input spec of `y` copied from `y_flow`.
+    """
+    y_flow = y_flow or x_flow
+    target._x_input_spec = x_flow._x_input_spec
+    target._y_input_spec = y_flow._y_input_spec
+    target._has_built = True
+    return target
+
+
+class FrozenAffineFlow(FeatureMappingFlow):
+    """
+    An affine flow with constant parameters, ``y = x * kernel + bias``,
+    where the `kernel` is applied on the feature `axis`.
+
+    The `kernel` can be either a diagonal kernel (i.e., an element-wise
+    scale, given as a 1-d array), or a full kernel matrix (2-d array).
+    The inverse kernel and the log-determinant are computed only once on
+    construction, instead of being derived from the variables at each
+    transformation.  This flow is mainly produced by :meth:`BaseFlow.freeze`
+    for inference, for example::
+
+        flow = spt.layers.SequentialFlow([
+            spt.layers.ActNorm(axis=-1, value_ndims=3),
+            spt.layers.InvertibleConv2d(),
+            ...
+        ])
+        # ... train the flow ...
+        frozen_flow = flow.freeze()  # `ActNorm` is folded into the kernel
+                                     # of the `InvertibleConv2d`
+        x, log_det = frozen_flow.inverse_transform(y)
+    """
+
+    @add_name_and_scope_arg_doc
+    def __init__(self, kernel, bias=None, inv_kernel=None, log_det=None,
+                 axis=-1, value_ndims=1, require_batch_dims=False, name=None,
+                 scope=None):
+        """
+        Construct a new :class:`FrozenAffineFlow`.
+
+        Args:
+            kernel (np.ndarray): The diagonal kernel of shape ``(n,)``, or
+                the full kernel matrix of shape ``(n, n)``, where `n` is
+                the number of features.
+            bias (np.ndarray): The bias of shape ``(n,)``.  If not
+                specified, no bias will be added.
+            inv_kernel (np.ndarray): The inverse of `kernel`, with the same
+                shape as `kernel`.  If not specified, will be computed
+                from `kernel`.
+            log_det (float): The log-determinant of `kernel`, i.e.,
+                ``log |det(kernel)|``.  If not specified, will be computed
+                from `kernel`.
+            axis (int): The feature axis, on which to apply the kernel.
+            value_ndims (int): Number of value dimensions in both `x` and `y`.
+                `x.ndims - value_ndims == log_det.ndims` and
+                `y.ndims - value_ndims == log_det.ndims`.
+            require_batch_dims (bool): Whether or not to require the inputs
+                to have at least `value_ndims + 1` dimensions?
+                (default :obj:`False`)
+        """
+        kernel = np.asarray(kernel)
+        if kernel.ndim not in (1, 2) or \
+                (kernel.ndim == 2 and kernel.shape[0] != kernel.shape[1]):
+            raise ValueError('`kernel` must be a 1-d array or a square '
+                             'matrix: got shape {!r}'.format(kernel.shape))
+        n_features = kernel.shape[0]
+        dtype = kernel.dtype
+
+        if bias is not None:
+            bias = np.asarray(bias, dtype=dtype)
+            if bias.shape != (n_features,):
+                raise ValueError('The shape of `bias` does not match the '
+                                 'kernel: {!r} vs {!r}'.
+                                 format(bias.shape, kernel.shape))
+
+        if inv_kernel is None:
+            if kernel.ndim == 1:
+                inv_kernel = 1. / kernel
+            else:
+                inv_kernel = np.linalg.inv(kernel)
+        inv_kernel = np.asarray(inv_kernel, dtype=dtype)
+        if inv_kernel.shape != kernel.shape:
+            raise ValueError('The shape of `inv_kernel` does not match the '
+                             'kernel: {!r} vs {!r}'.
+                             format(inv_kernel.shape, kernel.shape))
+
+        if log_det is None:
+            if kernel.ndim == 1:
+                log_det = np.sum(np.log(np.abs(kernel)))
+            else:
+                log_det = np.linalg.slogdet(kernel)[1]
+        log_det = np.asarray(log_det, dtype=dtype)
+
+        self._kernel_value = kernel
+        self._bias_value = bias
+        self._inv_kernel_value = inv_kernel
+        self._log_det_value = log_det
+
+        super(FrozenAffineFlow, self).__init__(
+            axis=int(axis), value_ndims=value_ndims,
+            require_batch_dims=require_batch_dims, name=name, scope=scope
+        )
+
+        # the constant tensors are created only once, such that the
+        # parameters would not be copied into the graph at each call
+        with reopen_variable_scope(self.variable_scope):
+            self._kernel = tf.constant(kernel, name='kernel')
+            self._inv_kernel = tf.constant(inv_kernel, name='inv_kernel')
+            self._log_det = tf.constant(log_det, name='log_det')
+            self._bias = None
+            if bias is not None:
+                self._bias = tf.constant(bias, name='bias')
+
+    @property
+    def kernel(self):
+        """
+        Get the kernel.
+
+        Returns:
+            np.ndarray: The diagonal kernel or the full kernel matrix.
+        """
+        return self._kernel_value
+
+    @property
+    def bias(self):
+        """
+        Get the bias.
+
+        Returns:
+            np.ndarray or None: The bias, or :obj:`None` if no bias.
+        """
+        return self._bias_value
+
+    @property
+    def inv_kernel(self):
+        """
+        Get the inverse kernel.
+
+        Returns:
+            np.ndarray: The inverse of the diagonal kernel or the full
+                kernel matrix.
+        """
+        return self._inv_kernel_value
+
+    @property
+    def log_det(self):
+        """
+        Get the log-determinant of the kernel.
+
+        Returns:
+            np.ndarray: The scalar log-determinant.
+        """
+        return self._log_det_value
+
+    @property
+    def explicitly_invertible(self):
+        return True
+
+    def invert(self):
+        """
+        Get the inverted flow from this flow.
+
+        Unlike other flows, the inverse of a :class:`FrozenAffineFlow` is
+        also a :class:`FrozenAffineFlow`, with the kernel and the inverse
+        kernel swapped, such that it can be further folded into other
+        frozen flows.  It is built if this flow has been built.
+
+        Returns:
+            FrozenAffineFlow: The inverted flow.
+        """
+        bias = None
+        if self._bias_value is not None:
+            bias = -vector_kernel_dot(
+                self._bias_value, self._inv_kernel_value)
+        flow = FrozenAffineFlow(
+            kernel=self._inv_kernel_value,
+            bias=bias,
+            inv_kernel=self._kernel_value,
+            log_det=-self._log_det_value,
+            axis=self.axis,
+            value_ndims=self.value_ndims,
+            require_batch_dims=self.require_batch_dims,
+        )
+        if self._has_built:
+            flow._x_input_spec = self._y_input_spec
+            flow._y_input_spec = self._x_input_spec
+            flow._has_built = True
+        return flow
+
+    def _build(self, input=None):
+        n_features = get_static_shape(input)[self.axis]
+        if n_features != self._kernel_value.shape[0]:
+            raise ValueError('The feature axis of `input` does not match the '
+                             'kernel: input {}, axis {}, kernel shape {!r}'.
+                             format(input, self.axis,
+                                    self._kernel_value.shape))
+
+    def _apply_kernel(self, input, kernel):
+        # `axis` has been resolved to a negative integer when building
+        axis = self.axis
+        if self._kernel_value.ndim == 1:
+            return input * tf.reshape(kernel, [-1] + [1] * (-axis - 1))
+
+        rank = len(get_static_shape(input))
+        axis += rank
+        output = tf.tensordot(input, kernel, axes=[[axis], [0]])
+        if axis != rank - 1:
+            output = tf.transpose(
+                output,
+                list(range(axis)) + [rank - 1] + list(range(axis, rank - 1))
+            )
+        return output
+
+    def _reshape_bias(self):
+        return tf.reshape(self._bias, [-1] + [1] * (-self.axis - 1))
+
+    def _transform(self, x, compute_y, compute_log_det):
+        # compute y
+        y = None
+        if compute_y:
+            y = self._apply_kernel(x, self._kernel)
+            if self._bias is not None:
+                y += self._reshape_bias()
+
+        # compute log_det
+        log_det = None
+        if compute_log_det:
+            log_det = apply_log_det_factor(
+                self._log_det, x, self.axis, self.value_ndims)
+            log_det = broadcast_log_det_against_input(
+                log_det, x, value_ndims=self.value_ndims)
+
+        return y, log_det
+
+    def _inverse_transform(self, y, compute_x, compute_log_det):
+        # compute x
+        x = None
+        if compute_x:
+            shifted = y
+            if self._bias is not None:
+                shifted = y - self._reshape_bias()
+            x = self._apply_kernel(shifted, self._inv_kernel)
+
+        # compute log_det
+        log_det = None
+        if compute_log_det:
+            log_det = apply_log_det_factor(
+                -self._log_det, y, self.axis, self.value_ndims)
+            log_det = broadcast_log_det_against_input(
+                log_det, y, value_ndims=self.value_ndims)
+
+        return x, log_det
+
+
+def fold_frozen_flows(flows):
+    """
+    Fold the adjacent :class:`FrozenAffineFlow` in `flows` into one, if
+    they share the same feature axis and value dimensions.
+
+    Args:
+        flows (Iterable[BaseFlow]): The built flows.
+
+    Returns:
+        list[BaseFlow]: The folded flows.
+    """
+    ret = []
+    for flow in flows:
+        prev = ret[-1] if ret else None
+        if isinstance(prev, FrozenAffineFlow) and \
+                isinstance(flow, FrozenAffineFlow) and \
+                prev.axis == flow.axis and \
+                prev.value_ndims == flow.value_ndims and \
+                prev.kernel.shape[0] == flow.kernel.shape[0] and \
+                prev.kernel.dtype == flow.kernel.dtype:
+            ret[-1] = fold_frozen_affine_flows(prev, flow)
+        else:
+            ret.append(flow)
+    return ret
+
+
+def fold_frozen_affine_flows(first, second):
+    """
+    Fold two built :class:`FrozenAffineFlow` into one, which is equivalent
+    to applying `first` and then `second`.
+    """
+    # ``(x * k1 + b1) * k2 + b2 = x * (k1 * k2) + (b1 * k2 + b2)``,
+    # computed in float64 to reduce the round-off errors
+    dtype = first.kernel.dtype
+    k1, k2, inv_k1, inv_k2 = (
+        np.asarray(a, dtype=np.float64)
+        for a in (first.kernel, second.kernel,
+                  first.inv_kernel, second.inv_kernel)
+    )
+    bias = None
+    if first.bias is not None:
+        bias = vector_kernel_dot(
+            np.asarray(first.bias, dtype=np.float64), k2)
+    if second.bias is not None:
+        b2 = np.asarray(second.bias, dtype=np.float64)
+        bias = b2 if bias is None else bias + b2
+    if bias is not None:
+        bias = bias.astype(dtype)
+
+    flow = FrozenAffineFlow(
+        kernel=kernel_dot(k1, k2).astype(dtype),
+        bias=bias,
+        inv_kernel=kernel_dot(inv_k2, inv_k1).astype(dtype),
+        log_det=(np.asarray(first.log_det, dtype=np.float64) +
+                 np.asarray(second.log_det, dtype=np.float64)).astype(dtype),
+        axis=first.axis,
+        value_ndims=first.value_ndims,
+        require_batch_dims=(first.require_batch_dims or
+                            second.require_batch_dims),
+    )
+    return copy_built_state(flow, first, second)
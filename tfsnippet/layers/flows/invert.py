@@ -45,6 +45,14 @@ class InvertFlow(BaseFlow):
     def explicitly_invertible(self):
         return True
 
+    def freeze(self, session=None):
+        # `InvertFlow` is never built by itself, thus the original flow is
+        # frozen and then inverted
+        frozen = self._flow.freeze(session)
+        if frozen is self._flow:
+            return self
+        return frozen.invert()
+
     def build(self, input=None):  # pragma: no cover
         # since `flow` should be inverted, we should build `flow` in
         # `inverse_transform` rather than in `transform` or `build`
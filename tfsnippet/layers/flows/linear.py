@@ -31,6 +31,23 @@ def apply_log_det_factor(log_det, input, axis, value_ndims):
     return log_det
 
 
+def freeze_invertible_matrix(flow, session):
+    from .frozen import FrozenAffineFlow
+    kernel, inv_kernel, log_det = session.run([
+        flow._kernel_matrix.matrix,
+        flow._kernel_matrix.inv_matrix,
+        flow._kernel_matrix.log_det,
+    ])
+    return FrozenAffineFlow(
+        kernel=kernel,
+        inv_kernel=inv_kernel,
+        log_det=log_det,
+        axis=flow.axis,
+        value_ndims=flow.value_ndims,
+        require_batch_dims=flow.require_batch_dims,
+    )
+
+
 class InvertibleDense(FeatureMappingFlow):
     """
     Invertible dense layer, modified from the invertible 1x1 2d convolution
@@ -83,6 +100,9 @@ class InvertibleDense(FeatureMappingFlow):
             scope='kernel'
         )
 
+    def _freeze(self, session):
+        return freeze_invertible_matrix(self, session)
+
     def _transform(self, x, compute_y, compute_log_det):
         # compute y
         y = None
@@ -175,6 +195,9 @@ class InvertibleConv2d(FeatureMappingFlow):
             scope='kernel'
         )
 
+    def _freeze(self, session):
+        return freeze_invertible_matrix(self, session)
+
     def _transform(self, x, compute_y, compute_log_det):
         # compute y
         y = None
@@ -1,5 +1,6 @@
 from tfsnippet.utils import add_name_and_scope_arg_doc
 from .base import BaseFlow, MultiLayerFlow
+from .frozen import fold_frozen_flows
 
 __all__ = ['SequentialFlow']
 
@@ -10,12 +11,20 @@ class SequentialFlow(MultiLayerFlow):
     """
 
     @add_name_and_scope_arg_doc
-    def __init__(self, flows, name=None, scope=None):
+    def __init__(self, flows, invertible_backprop=False, name=None,
+                 scope=None):
         """
         Construct a new :class:`SequentialFlow`.
 
         Args:
             flows (Iterable[BaseFlow]): The flow list.
+            invertible_backprop (bool): Whether or not to compute the
+                gradients of :meth:`transform` by reconstructing the inputs
+                of each flow from its outputs, instead of keeping the
+                intermediate outputs of all the flows?  Requires all the
+                flows to be explicitly invertible.  See
+                :class:`MultiLayerFlow` for more details.
+                (default :obj:`False`)
         """
         flows = tuple(flows)  # type: tuple[BaseFlow]
         if not flows:
@@ -34,8 +43,18 @@ class SequentialFlow(MultiLayerFlow):
                     format(i + 1, i, flow2.x_value_ndims, flow1.y_value_ndims)
                 )
 
+        if invertible_backprop:
+            for i, flow in enumerate(flows):
+                if not flow.explicitly_invertible:
+                    raise ValueError(
+                        '`invertible_backprop` requires all the flows to be '
+                        'explicitly invertible, but the {}-th flow is not: '
+                        '{!r}'.format(i, flow)
+                    )
+
         super(SequentialFlow, self).__init__(
-            n_layers=len(flows), x_value_ndims=flows[0].x_value_ndims,
+            n_layers=len(flows), invertible_backprop=invertible_backprop,
+            x_value_ndims=flows[0].x_value_ndims,
             y_value_ndims=flows[-1].y_value_ndims, name=name, scope=scope
         )
         self._flows = flows
@@ -68,3 +87,13 @@ class SequentialFlow(MultiLayerFlow):
     def _inverse_transform_layer(self, layer_id, y, compute_x, compute_log_det):
         flow = self._flows[layer_id]
         return flow.inverse_transform(y, compute_x, compute_log_det)
+
+    def _freeze(self, session):
+        flows = [flow.freeze(session) for flow in self._flows]
+        flows = fold_frozen_flows(flows)
+        if len(flows) == 1:
+            return flows[0]
+        if len(flows) == len(self._flows) and \
+                all(a is b for a, b in zip(flows, self._flows)):
+            return self
+        return SequentialFlow(flows)
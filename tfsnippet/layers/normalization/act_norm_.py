@@ -9,7 +9,7 @@ from tfsnippet.utils import (InputSpec, ParamSpec, add_name_and_scope_arg_doc,
                              validate_int_tuple_arg, get_dimensions_size,
                              validate_enum_arg, model_variable,
                              maybe_add_histogram, settings, deprecated_arg)
-from ..flows import FeatureMappingFlow
+from ..flows import FeatureMappingFlow, FrozenAffineFlow
 
 __all__ = ['ActNorm', 'act_norm']
 
@@ -164,6 +164,33 @@ class ActNorm(FeatureMappingFlow):
     def explicitly_invertible(self):
         return True
 
+    def _freeze(self, session):
+        # only the single-axis `ActNorm` can be expressed as a diagonal kernel
+        if len(self.axis) != 1:
+            return self
+        if not self._initialized:
+            raise RuntimeError('`ActNorm` must be initialized by `transform` '
+                               'or `apply` before freezing: {!r}'.format(self))
+
+        if self._scale_type == 'exp':
+            scale = ExpScale(self._pre_scale, self._epsilon)
+        else:
+            assert(self._scale_type == 'linear')
+            scale = LinearScale(self._pre_scale, self._epsilon)
+        bias, scale, inv_scale, log_scale = session.run([
+            self._bias, scale.scale(), scale.inv_scale(), scale.log_scale()])
+
+        # ``y = (x + bias) * scale = x * scale + bias * scale``
+        return FrozenAffineFlow(
+            kernel=scale,
+            bias=bias * scale,
+            inv_kernel=inv_scale,
+            log_det=np.sum(log_scale),
+            axis=self.axis[0],
+            value_ndims=self.value_ndims,
+            require_batch_dims=self.require_batch_dims,
+        )
+
     def _transform(self, x, compute_y, compute_log_det):
         if not self._initialized:  # pragma: no cover
             if settings.auto_histogram:
@@ -0,0 +1,93 @@
+import tensorflow as tf
+
+from tfsnippet.ops import recompute_grad
+from tfsnippet.utils import add_name_arg_doc
+from .convolutional import PixelCNN2DOutput
+
+__all__ = ['recompute_sequential']
+
+
+def _to_tensors(value):
+    if isinstance(value, PixelCNN2DOutput):
+        return [value.vertical, value.horizontal]
+    return [tf.convert_to_tensor(value)]
+
+
+def _from_tensors(tensors, like):
+    if isinstance(like, PixelCNN2DOutput):
+        return PixelCNN2DOutput(vertical=tensors[0], horizontal=tensors[1])
+    return tensors[0]
+
+
+@add_name_arg_doc
+def recompute_sequential(input, layers, segment_size=1, name=None):
+    """
+    Apply `layers` sequentially on `input`, where the intermediate
+    activations within every `segment_size` layers are not kept for the
+    backward pass, but re-computed from the segment input when computing
+    the gradients (see :func:`~tfsnippet.ops.recompute_grad`).
+
+    For example, to build a deep stack of ResNet blocks, which only keeps
+    the output of every 4 blocks in the forward pass::
+
+        h_x = spt.layers.recompute_sequential(
+            h_x,
+            [partial(spt.layers.resnet_conv2d_block, out_channels=64,
+                     kernel_size=3)] * 16,
+            segment_size=4
+        )
+
+    `segment_size` controls the trade-off between memory and computation.
+    With ``segment_size=1``, only the output of each layer is kept, while
+    the intermediate tensors within the layers are re-computed.  A larger
+    `segment_size` keeps fewer layer outputs, but the activations of one
+    whole segment must be re-computed at once.  ``sqrt(len(layers))`` is
+    usually a good choice for a uniform stack.  In any case, the forward
+    pass is run twice in total.
+
+    The layers should be deterministic.  See
+    :func:`~tfsnippet.ops.recompute_grad` for more details.
+
+    Args:
+        input (Tensor or PixelCNN2DOutput): The input.
+        layers (Iterable[(Tensor or PixelCNN2DOutput) -> (Tensor or
+            PixelCNN2DOutput)]): The layer functions, e.g.,
+            :func:`resnet_conv2d_block`, :func:`resnet_deconv2d_block` or
+            :func:`pixelcnn_conv2d_resnet` with other arguments bound.
+        segment_size (int or None): The number of layers in each
+            re-computed segment.  If :obj:`None`, all the layers will be
+            put in one segment. (default 1)
+
+    Returns:
+        tf.Tensor or PixelCNN2DOutput: The output of the last layer.
+    """
+    layers = list(layers)
+    if not layers:
+        raise ValueError('`layers` must not be empty.')
+    if segment_size is None:
+        segment_size = len(layers)
+    segment_size = int(segment_size)
+    if segment_size < 1:
+        raise ValueError('`segment_size` must be at least 1: got {}'.
+                         format(segment_size))
+
+    def apply_segment(segment, input):
+        output_like = []
+
+        def fn(*tensors):
+            output = _from_tensors(tensors, input)
+            for layer in segment:
+                output = layer(output)
+            if not output_like:
+                output_like.append(output)
+            return _to_tensors(output)
+
+        outputs = recompute_grad(fn, _to_tensors(input))
+        return _from_tensors(outputs, output_like[0])
+
+    with tf.name_scope(name, default_name='recompute_sequential'):
+        output = input
+        for start in range(0, len(layers), segment_size):
+            output = apply_segment(
+                layers[start: start + segment_size], output)
+        return output
@@ -2,6 +2,7 @@ from .assertions import *
 from .classification import *
 from .control_flows import *
 from .convolution import *
+from .custom_gradient import *
 from .evaluation import *
 from .loop import *
 from .misc import *
@@ -15,8 +16,9 @@ __all__ = [
     'broadcast_concat', 'broadcast_to_shape', 'broadcast_to_shape_strict',
     'classification_accuracy', 'convert_to_tensor_and_cast', 'depth_to_space',
     'flatten_to_ndims', 'log_mean_exp', 'log_sum_exp', 'maybe_clip_value',
-    'pixelcnn_2d_sample', 'prepend_dims', 'reshape_tail', 'shift',
-    'smart_cond', 'softmax_classification_output', 'space_to_depth',
+    'pixelcnn_2d_sample', 'prepend_dims', 'recompute_grad', 'reshape_tail',
+    'shift', 'smart_cond', 'softmax_classification_output', 'space_to_depth',
     'transpose_conv2d_axis', 'transpose_conv2d_channels_last_to_x',
     'transpose_conv2d_channels_x_to_last', 'unflatten_from_ndims',
+    'with_custom_gradient',
 ]
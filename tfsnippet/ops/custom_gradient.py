@@ -0,0 +1,238 @@
+import uuid
+from contextlib import contextmanager
+from functools import partial
+
+import tensorflow as tf
+from tensorflow.contrib.framework import arg_scope, current_arg_scope
+from tensorflow.python.framework import function
+
+from tfsnippet.utils import add_name_arg_doc
+
+__all__ = ['recompute_grad', 'with_custom_gradient']
+
+
+@contextmanager
+def custom_getter_scope(custom_getter):
+    """
+    Install `custom_getter` on the current variable scope, composed with
+    its existing custom getter, without opening a new variable scope.
+
+    The variable scopes opened within this context will inherit the
+    composed custom getter.
+
+    Args:
+        custom_getter: The custom getter.
+    """
+    scope = tf.get_variable_scope()
+    old_getter = scope.custom_getter
+    if old_getter is not None:
+        def composed_getter(getter, *args, **kwargs):
+            return custom_getter(
+                partial(old_getter, getter), *args, **kwargs)
+        new_getter = composed_getter
+    else:
+        new_getter = custom_getter
+
+    scope.set_custom_getter(new_getter)
+    try:
+        yield
+    finally:
+        scope.set_custom_getter(old_getter)
+
+
+def get_dependent_variables(outputs, inputs):
+    """
+    Get the trainable variables which `outputs` depend on, without passing
+    through `inputs`.
+
+    Args:
+        outputs (Iterable[tf.Tensor]): The output tensors.
+        inputs (Iterable[tf.Tensor]): The input tensors, where to stop
+            searching for the variables.
+
+    Returns:
+        list[tf.Variable]: The dependent trainable variables, in the order
+            of ``tf.trainable_variables()``.
+    """
+    # `v.op` is the variable op for reference variables, and is the handle
+    # op for resource variables, both of which are read by the dependent ops
+    variables = tf.trainable_variables()
+    var_ops = {v.op: i for i, v in enumerate(variables)}
+    stop_ops = set(t.op for t in inputs)
+
+    found = set()
+    visited = set()
+    stack = [t.op for t in outputs]
+    while stack:
+        op = stack.pop()
+        if op in visited or op in stop_ops:
+            continue
+        visited.add(op)
+        if op in var_ops:
+            found.add(var_ops[op])
+        else:
+            stack.extend(t.op for t in op.inputs)
+            stack.extend(op.control_inputs)
+
+    return [variables[i] for i in sorted(found)]
+
+
+@add_name_arg_doc
+def with_custom_gradient(fn, inputs, grad_fn, name=None):
+    """
+    Compute ``fn(*inputs)``, with the gradients computed by `grad_fn`,
+    instead of back-propagating through the operations created by `fn`.
+
+    Since no gradient is back-propagated through the operations of `fn`,
+    their outputs need not be kept for the backward pass, which can be
+    used to trade computation for memory.  For example, the following
+    code computes the gradients of an invertible function by reconstructing
+    its input from its output::
+
+        def grad_fn(inputs, variables, outputs, grad_outputs):
+            x = tf.stop_gradient(inverse_f(outputs[0]))
+            y = f(x)
+            grads = tf.gradients(
+                [y], [x] + variables, grad_ys=grad_outputs)
+            return grads[:1], grads[1:]
+
+        y = with_custom_gradient(lambda x: [f(x)], [x], grad_fn)[0]
+
+    Args:
+        fn ((\\*tf.Tensor) -> Iterable[tf.Tensor]): The function, which
+            receives `inputs` and returns a list of output tensors.
+        inputs (Iterable[Tensor]): The input tensors.
+        grad_fn: The function to compute the gradients, which receives
+            ``(inputs, variables, outputs, grad_outputs)``, and returns
+            ``(grad_inputs, grad_variables)``.  `variables` are the
+            trainable variables used by `fn` (excluding those used to
+            compute `inputs`), and the returned gradients may be :obj:`None`.
+
+    Returns:
+        list[tf.Tensor]: The outputs of `fn`.
+    """
+    inputs = [tf.convert_to_tensor(t) for t in inputs]
+
+    with tf.name_scope(name, default_name='with_custom_gradient',
+                       values=inputs):
+        outputs = [tf.convert_to_tensor(t) for t in fn(*inputs)]
+        if not outputs:
+            raise ValueError('`fn` must return at least one output.')
+        variables = get_dependent_variables(outputs, inputs)
+        var_tensors = [tf.convert_to_tensor(v) for v in variables]
+        n_inputs, n_variables = len(inputs), len(variables)
+
+        def python_grad_func(op, *grad_outputs):
+            # the inputs and outputs are passed to `grad_fn` via identity ops
+            # depending on `grad_outputs`, such that any re-computation in
+            # `grad_fn` cannot be scheduled before the backward pass reaches
+            # here, otherwise the saved memory would be consumed in advance
+            op_inputs = list(op.inputs)
+            deps = [g for g in grad_outputs if g is not None]
+            with tf.control_dependencies(deps):
+                grad_fn_inputs = [tf.identity(t) for t in op_inputs[:n_inputs]]
+                grad_fn_outputs = [
+                    tf.identity(t) for t in op_inputs[n_inputs + n_variables:]]
+            grad_inputs, grad_variables = grad_fn(
+                grad_fn_inputs,
+                variables,
+                grad_fn_outputs,
+                list(grad_outputs)
+            )
+            grad_inputs = list(grad_inputs)
+            grad_variables = list(grad_variables)
+            if len(grad_inputs) != n_inputs or \
+                    len(grad_variables) != n_variables:
+                raise ValueError(
+                    'The number of gradients returned by `grad_fn` does not '
+                    'match the number of inputs and variables: {} vs {}, '
+                    'and {} vs {}.'.format(len(grad_inputs), n_inputs,
+                                           len(grad_variables), n_variables)
+                )
+            return tuple(grad_inputs + grad_variables +
+                         [None] * len(outputs))
+
+        # The function takes the inputs, the variables and the outputs of
+        # `fn`, and returns the outputs as-is.  Thus the gradients can only
+        # be back-propagated to the inputs and the variables via
+        # `python_grad_func`.  The function name must be unique, since the
+        # gradient function is looked up by name.
+        @function.Defun(
+            *[t.dtype.base_dtype for t in inputs + var_tensors + outputs],
+            func_name='CustomGradientIdentity_{}'.format(uuid.uuid4().hex),
+            python_grad_func=python_grad_func,
+            shape_func=lambda op: [t.get_shape() for t in outputs]
+        )
+        def identity(*args):
+            return tuple(tf.identity(t) for t in args[n_inputs + n_variables:])
+
+        ret = identity(*(inputs + var_tensors + outputs))
+        if not isinstance(ret, (tuple, list)):
+            ret = [ret]
+        return list(ret)
+
+
+@add_name_arg_doc
+def recompute_grad(fn, inputs, name=None):
+    """
+    Compute ``fn(*inputs)`` without keeping the intermediate activations of
+    `fn` for the backward pass, and re-compute them from `inputs` when the
+    gradients are computed (i.e., gradient checkpointing).
+
+    Only `inputs` and the outputs of `fn` are kept until the backward pass,
+    at the cost of running `fn` twice.  For example, applying this function
+    on every `k` blocks of a deep network would reduce the activation memory
+    of `n` blocks from `O(n)` to `O(n / k + k)`, which is minimized at
+    ``k = sqrt(n)``.
+
+    The variables requested by `fn` via ``tf.get_variable`` in the forward
+    pass are recorded, and are returned in the same order when `fn` is
+    re-computed, such that `fn` might create its variables as usual.  The
+    ``arg_scope`` of the forward pass is also restored for re-computation.
+    However, `fn` should be deterministic: operations with random outputs
+    (e.g., dropout) will produce different outputs in the re-computation,
+    and operations with side-effects (e.g., the moving average updates of
+    batch normalization) will be executed twice.
+
+    Args:
+        fn ((\\*tf.Tensor) -> Iterable[tf.Tensor]): The function, which
+            receives `inputs` and returns a list of output tensors.
+        inputs (Iterable[Tensor]): The input tensors.
+
+    Returns:
+        list[tf.Tensor]: The outputs of `fn`.
+    """
+    recorded_variables = []
+    recorded_arg_scope = []
+
+    def record_getter(getter, *args, **kwargs):
+        v = getter(*args, **kwargs)
+        recorded_variables.append(v)
+        return v
+
+    def forward(*args):
+        # the backward pass is usually built outside of the `arg_scope`
+        # of the forward pass, thus it should be captured for re-computation
+        recorded_arg_scope.append(current_arg_scope())
+        with custom_getter_scope(record_getter):
+            return list(fn(*args))
+
+    def grad_fn(inputs, variables, outputs, grad_outputs):
+        variables_iter = iter(recorded_variables)
+
+        def replay_getter(getter, *args, **kwargs):
+            try:
+                return next(variables_iter)
+            except StopIteration:
+                raise RuntimeError('`fn` requested more variables when '
+                                   're-computed than in the forward pass.')
+
+        with arg_scope(recorded_arg_scope[0]), \
+                custom_getter_scope(replay_getter):
+            re_outputs = list(fn(*inputs))
+        grads = tf.gradients(
+            re_outputs, inputs + variables, grad_ys=grad_outputs)
+        return grads[:len(inputs)], grads[len(inputs):]
+
+    return with_custom_gradient(
+        forward, inputs, grad_fn, name=name or 'recompute_grad')
@@ -8,20 +8,63 @@ from .type_utils import convert_to_tensor_and_cast
 __all__ = ['pixelcnn_2d_sample']
 
 
+def minimum(a, b):
+    if is_tensor_object(a) or is_tensor_object(b):
+        return tf.minimum(a, b)
+    return min(a, b)
+
+
 @add_name_arg_doc
 def pixelcnn_2d_sample(fn, inputs, height, width, channels_last=True,
-                       start=0, end=None, back_prop=False,
-                       parallel_iterations=1, swap_memory=False,
-                       name=None):
+                       start=0, end=None, receptive_field=None,
+                       back_prop=False, parallel_iterations=1,
+                       swap_memory=False, name=None):
     """
     Sample output from a PixelCNN 2D network, pixel-by-pixel.
 
+    By default, `fn` is evaluated on the whole image at each iteration.
+    If `receptive_field` is specified, `fn` will only be evaluated on the
+    window of the inputs which covers the receptive field of the pixel to
+    be sampled at each iteration, which is much cheaper than the whole
+    image when the receptive field is small.  For example::
+
+        def fn(i, inputs, window):
+            # `inputs[0]` is the window of the partially sampled `x`
+            h = spt.layers.pixelcnn_2d_input(inputs[0])
+            for _ in range(n_layers):
+                h = spt.layers.pixelcnn_conv2d_resnet(h, out_channels=64)
+            logits = spt.layers.conv2d(
+                spt.layers.pixelcnn_2d_output(h), n_classes, (1, 1))
+            return [sample_from(logits)]
+
+        x = spt.ops.pixelcnn_2d_sample(
+            fn, [x], height, width,
+            receptive_field=spt.layers.pixelcnn_conv2d_resnet_receptive_field(
+                n_layers)
+        )
+
+    The window has ``min(top + 1, height)`` rows and
+    ``min(left + right + 1, width)`` columns, and is placed such that each
+    of its borders either coincides with the border of the image, or lies
+    outside of the receptive field of the sampled pixel.  Thus the zero
+    paddings of the (shifted) convolutions are the same as the whole image,
+    and the output at the sampled pixel is identical.  `fn` must be local,
+    i.e., the output at each pixel must only depend on the inputs within
+    its receptive field (thus e.g., batch normalization must be in the
+    inference mode).
+
     Args:
         fn: `(i: tf.Tensor, inputs: tuple[tf.Tensor]) -> tuple[tf.Tensor]`,
             the function to derive the outputs of PixelCNN 2D network at
             iteration `i`.  `inputs` are the pixel-by-pixel outputs gathered
             through iteration `0` to iteration `i - 1`.  The iteration index
-            `i` may range from `0` to `height * width - 1`.
+            `i` may range from `0` to `height * width - 1`.  If
+            `receptive_field` is specified, `fn` is called as
+            ``fn(i, inputs, window)``, where `inputs` are the windows of
+            the gathered outputs, `window` is the ``(row, column)`` position
+            of the window in the image (which can be used to take the window
+            of other per-pixel tensors, e.g., the conditional features), and
+            the outputs must have the same shape as the windows.
         inputs (Iterable[tf.Tensor]): The initial input tensors.
             All the tensors must be at least 4-d, with identical shape.
         height (int or tf.Tensor): The height of the outputs.
@@ -31,6 +74,12 @@ def pixelcnn_2d_sample(fn, inputs, height, width, channels_last=True,
         start (int or tf.Tensor): The start iteration, default `0`.
         end (int or tf.Tensor): The end (exclusive) iteration.
             Default `height * width`.
+        receptive_field (None or (int, int, int)): The ``(top, left,
+            right)`` receptive field of `fn`, i.e., the output at each
+            pixel only depends on the inputs at most `top` rows above,
+            `left` columns to the left and `right` columns to the right of
+            that pixel.  See
+            :func:`~tfsnippet.layers.pixelcnn_conv2d_resnet_receptive_field`.
         back_prop, parallel_iterations, swap_memory: Arguments passed to
             :func:`tf.while_loop`.
 
@@ -48,6 +97,13 @@ def pixelcnn_2d_sample(fn, inputs, height, width, channels_last=True,
     height = to_int(height)
     width = to_int(width)
 
+    if receptive_field is not None:
+        receptive_field = tuple(int(v) for v in receptive_field)
+        if len(receptive_field) != 3 or any(v < 0 for v in receptive_field):
+            raise ValueError('`receptive_field` must be a tuple of three '
+                             'non-negative integers: got {!r}'.
+                             format(receptive_field))
+
     inputs = list(inputs)
     if not inputs:
         raise ValueError('`inputs` must not be empty.')
@@ -70,8 +126,10 @@ def pixelcnn_2d_sample(fn, inputs, height, width, channels_last=True,
         # the mask shape
         if channels_last:
             mask_shape = [height, width, 1]
+            h_axis, w_axis = -3, -2
         else:
             mask_shape = [height, width]
+            h_axis, w_axis = -2, -1
 
         if any(is_tensor_object(t) for t in mask_shape):
             mask_shape = tf.stack(mask_shape, axis=0)
@@ -79,6 +137,42 @@ def pixelcnn_2d_sample(fn, inputs, height, width, channels_last=True,
         # the input dynamic shape
         input_shape = get_shape(inputs[0])
 
+        # the position index of each element, such that the selector of
+        # each iteration can be derived by a single comparison
+        positions = broadcast_to_shape(
+            tf.reshape(tf.range(total_size, dtype=tf.int32), mask_shape),
+            input_shape
+        )
+
+        # the window shape
+        if receptive_field is not None:
+            top, left, right = receptive_field
+            window_size = [
+                minimum(height, top + 1),
+                minimum(width, left + right + 1),
+            ]
+            rank = len(get_static_shape(inputs[0]))
+            window_static_shape = list(get_static_shape(inputs[0]))
+            for axis, size in zip((h_axis, w_axis), window_size):
+                window_static_shape[axis] = \
+                    None if is_tensor_object(size) else size
+
+            def take_window(x, row, col):
+                begin = [0] * rank
+                begin[h_axis], begin[w_axis] = row, col
+                size = [-1] * rank
+                size[h_axis], size[w_axis] = window_size
+                x = tf.slice(x, tf.stack(begin, axis=0),
+                             tf.stack(size, axis=0))
+                x.set_shape(window_static_shape)
+                return x
+
+            def put_window(x, row, col):
+                paddings = [[0, 0]] * rank
+                paddings[h_axis] = [row, height - row - window_size[0]]
+                paddings[w_axis] = [col, width - col - window_size[1]]
+                return tf.pad(x, tf.stack(paddings, axis=0))
+
         # the pixelcnn sampling loop
         def loop_cond(idx, _):
             return idx < end
@@ -87,20 +181,21 @@ def pixelcnn_2d_sample(fn, inputs, height, width, channels_last=True,
             inputs = tuple(inputs)
 
             # prepare for the output mask
-            selector = tf.reshape(
-                tf.concat(
-                    [tf.ones([idx], dtype=tf.uint8),
-                     tf.zeros([1], dtype=tf.uint8),
-                     tf.ones([total_size - idx - 1], dtype=tf.uint8)],
-                    axis=0
-                ),
-                mask_shape
-            )
-            selector = tf.cast(broadcast_to_shape(selector, input_shape),
-                               dtype=tf.bool)
+            selector = tf.not_equal(positions, idx)
 
             # obtain the outputs
-            outputs = list(fn(idx, inputs))
+            if receptive_field is not None:
+                row = tf.clip_by_value(
+                    idx // width - top, 0, height - window_size[0])
+                col = tf.clip_by_value(
+                    idx % width - left, 0, width - window_size[1])
+                outputs = list(fn(
+                    idx,
+                    tuple(take_window(t, row, col) for t in inputs),
+                    (row, col)
+                ))
+            else:
+                outputs = list(fn(idx, inputs))
             if len(outputs) != len(inputs):
                 raise ValueError('The length of outputs != inputs: {} vs {}'.
                                  format(len(outputs), len(inputs)))
@@ -115,6 +210,8 @@ def pixelcnn_2d_sample(fn, inputs, height, width, channels_last=True,
                         '{output} vs {input}'.
                         format(idx=i, output=output_dtype, input=input_dtype)
                     )
+                if receptive_field is not None:
+                    output = put_window(output, row, col)
                 outputs[i] = tf.where(selector, input, output)
 
             return idx + 1, tuple(outputs)
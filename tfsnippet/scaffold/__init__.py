@@ -1,11 +1,15 @@
 from .checkpoint import *
 from .event_keys import *
 from .logging_ import *
+from .profiling import *
 from .scheduled_var import *
+from .summary_writer import *
 from .train_loop_ import *
 
 __all__ = [
-    'AnnealingVariable', 'CheckpointSavableObject', 'CheckpointSaver',
-    'DefaultMetricFormatter', 'EventKeys', 'MetricFormatter', 'MetricLogger',
-    'ScheduledVariable', 'TrainLoop', 'summarize_variables',
+    'AnnealingVariable', 'AsyncSummaryWriter', 'CheckpointSavableObject',
+    'CheckpointSaver', 'DefaultMetricFormatter', 'EventKeys',
+    'MetricFormatter', 'MetricLogger', 'OpStats', 'ScheduledVariable',
+    'TrainLoop', 'VariableSnapshot', 'format_op_stats', 'get_op_stats',
+    'save_step_profile', 'summarize_variables',
 ]
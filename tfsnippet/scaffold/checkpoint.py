@@ -1,7 +1,11 @@
 import copy
+import glob
 import os
 from collections import OrderedDict
+from logging import getLogger
+from threading import Thread, Semaphore
 
+import numpy as np
 import six
 import tensorflow as tf
 
@@ -12,10 +16,12 @@ from .scheduled_var import ScheduledVariable
 
 if six.PY2:
     import cPickle as pkl
+    from Queue import Queue
 else:
     import pickle as pkl
+    from queue import Queue
 
-__all__ = ['CheckpointSavableObject', 'CheckpointSaver']
+__all__ = ['CheckpointSavableObject', 'CheckpointSaver', 'VariableSnapshot']
 
 CHECKPOINT_VAR_NAME = 'tfsnippet_checkpoint_pickle_variable_' \
                       'd2a4b5a2c0ca48b9855bce2953bc11d5'
@@ -71,15 +77,214 @@ class CheckpointSerialVar(object):
         session.run(self._assign_op, feed_dict={self._assign_ph: value})
 
 
+def _normalize_variables(variables):
+    def check_var(var):
+        if not isinstance(var, (tf.Variable, ScheduledVariable)):
+            raise TypeError('Not a variable: {!r}'.format(var))
+        if isinstance(var, ScheduledVariable):
+            var = var.variable
+        return var
+
+    def normalize_var_name(var):
+        name = var.name
+        if name.endswith(':0'):
+            name = name[:-2]
+        return name
+
+    if isinstance(variables, (dict, OrderedDict)):
+        return {k: check_var(v) for k, v in six.iteritems(variables)}
+    else:
+        return {normalize_var_name(v): v for v in map(check_var, variables)}
+
+
+def _checkpoint_path(save_dir, filename, global_step):
+    path = os.path.join(save_dir, filename)
+    if global_step is not None:
+        path = '{}-{}'.format(path, int(global_step))
+    return path
+
+
+def _remove_checkpoint_files(checkpoint_path):
+    for path in glob.glob(checkpoint_path + '.*'):
+        os.remove(path)
+
+
+class _AsyncCheckpointWriter(object):
+    """
+    Write checkpoints from snapshot variable values in a background thread.
+
+    The snapshot values are loaded into a shadow graph, which holds one
+    variable for each saved variable (under the same checkpoint name, and
+    with the same dtype and shape), and are then saved by a shadow
+    :class:`tf.train.Saver`.  The checkpoint files are first written with a
+    temporary name, and then renamed on completion, such that readers never
+    see partially written checkpoint files.  The temporary files of a failed
+    checkpoint are removed.
+    """
+
+    def __init__(self, save_dir, filename, max_to_keep, max_pending,
+                 var_specs):
+        self.save_dir = save_dir
+        self.filename = filename
+        self.max_to_keep = max_to_keep
+        self._slots = Semaphore(max_pending)
+        self._queue = Queue()
+        self._error = None
+        self._closed = False
+        self._var_specs = var_specs  # {name: (dtype, shape)}
+
+        # the shadow graph is built in the background thread at the first
+        # time a checkpoint is written
+        self._graph = None
+        self._session = None
+        self._placeholders = None
+        self._init_op = None
+        self._saver = None
+
+        # the checkpoint paths, oldest first
+        self._checkpoints = []
+        state = tf.train.get_checkpoint_state(save_dir)
+        if state is not None:
+            self._checkpoints = list(state.all_model_checkpoint_paths)
+
+        self._worker = Thread(target=self._worker_func)
+        self._worker.daemon = True
+        self._worker.start()
+
+    def _build_shadow_graph(self):
+        self._graph = tf.Graph()
+        with self._graph.as_default():
+            self._placeholders = {}
+            var_dict = {}
+            for name, (dtype, shape) in six.iteritems(self._var_specs):
+                ph = tf.placeholder(dtype=dtype, shape=shape)
+                self._placeholders[name] = ph
+                var_dict[name] = tf.Variable(ph, trainable=False,
+                                             collections=[])
+            self._init_op = tf.group(
+                *[v.initializer for v in six.itervalues(var_dict)])
+            self._saver = tf.train.Saver(var_list=var_dict, max_to_keep=None)
+        self._session = tf.Session(graph=self._graph)
+
+    def _write(self, values, global_step, meta_file):
+        # write the checkpoint files with a temporary name
+        temp_path = _checkpoint_path(
+            self.save_dir, '._saving_' + self.filename, global_step)
+        try:
+            if self._graph is None:
+                self._build_shadow_graph()
+            self._session.run(self._init_op, feed_dict={
+                self._placeholders[k]: v for k, v in six.iteritems(values)
+            })
+            self._saver.save(self._session, temp_path,
+                             write_meta_graph=False, write_state=False)
+            if meta_file is not None:
+                os.rename(meta_file, temp_path + '.meta')
+        except Exception:
+            # remove the partially written files
+            _remove_checkpoint_files(temp_path)
+            if meta_file is not None and os.path.exists(meta_file):
+                os.remove(meta_file)
+            raise
+
+        # rename the files, the index file at last, such that the new
+        # checkpoint becomes visible only if all the other files are ready
+        path = _checkpoint_path(self.save_dir, self.filename, global_step)
+        _remove_checkpoint_files(path)
+        temp_files = sorted(glob.glob(temp_path + '.*'),
+                            key=lambda f: f.endswith('.index'))
+        for temp_file in temp_files:
+            os.rename(temp_file, path + temp_file[len(temp_path):])
+
+        # update the checkpoint state, and remove the old checkpoints
+        if path in self._checkpoints:
+            self._checkpoints.remove(path)
+        self._checkpoints.append(path)
+        if self.max_to_keep:
+            while len(self._checkpoints) > self.max_to_keep:
+                _remove_checkpoint_files(self._checkpoints.pop(0))
+        tf.train.update_checkpoint_state(
+            self.save_dir, path, all_model_checkpoint_paths=self._checkpoints)
+
+    def _worker_func(self):
+        while True:
+            item = self._queue.get()
+            if item is None:  # the stop signal from `close`
+                self._queue.task_done()
+                break
+            values, global_step, meta_file = item
+            try:
+                self._write(values, global_step, meta_file)
+            except Exception as ex:
+                getLogger(__name__).warning(
+                    'Failed to write checkpoint.', exc_info=True)
+                if self._error is None:
+                    self._error = ex
+            finally:
+                self._slots.release()
+                self._queue.task_done()
+
+    def _raise_error(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def submit(self, values, global_step, meta_file):
+        """
+        Submit the snapshot values to be written.  Blocks if the number
+        of pending checkpoints reaches the limit.
+
+        Returns:
+            str: The path of the checkpoint to be written.
+        """
+        if self._closed:
+            raise RuntimeError('The checkpoint writer has been closed.')
+        self._raise_error()
+        self._slots.acquire()
+        self._queue.put((values, global_step, meta_file))
+        return _checkpoint_path(self.save_dir, self.filename, global_step)
+
+    def wait(self):
+        """Wait until all the pending checkpoints have been written."""
+        self._queue.join()
+        self._raise_error()
+
+    def close(self):
+        """
+        Wait until all the pending checkpoints have been written, then stop
+        the background thread and close the shadow session.
+        """
+        if not self._closed:
+            self._closed = True
+            self._queue.put(None)
+            self._worker.join()
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+        self._raise_error()
+
+
 class CheckpointSaver(VarScopeObject):
     """
     Save and restore :class:`tf.Variable`, :class:`ScheduledVariable` and
     :class:`CheckpointSavableObject` with :class:`tf.train.Saver`.
+
+    If `async_save` is :obj:`True`, :meth:`save` only fetches the values of
+    the variables with one ``session.run``, and then the checkpoint files are
+    written in a background thread, without blocking the caller::
+
+        saver = CheckpointSaver(variables, save_dir, async_save=True)
+        for epoch in ...:
+            ...
+            saver.save(global_step=epoch)  # returns immediately
+        saver.wait()  # wait until all the checkpoints are written
+        saver.close()  # release the background thread
     """
 
     @add_name_and_scope_arg_doc
     def __init__(self, variables, save_dir, objects=None,
                  filename='checkpoint.dat', max_to_keep=None, save_meta=True,
+                 async_save=False, max_pending_saves=1,
                  name=None, scope=None):
         """
         Construct a new :class:`CheckpointSaver`.
@@ -97,31 +302,15 @@ class CheckpointSaver(VarScopeObject):
                 If :obj:`None` or `0`, keep all versions.
             save_meta (bool): Whether or not to save the graph meta in
                  checkpoint files?
+            async_save (bool): Whether or not to write the checkpoint files
+                in a background thread? (default :obj:`False`)
+            max_pending_saves (int): The maximum number of checkpoints being
+                written in background.  If reached, :meth:`save` will block
+                until the earliest pending checkpoint has been written.
+                Only used if `async_save` is :obj:`True`. (default 1)
         """
         # check the argument `variables`
-        def check_var(var):
-            if not isinstance(var, (tf.Variable, ScheduledVariable)):
-                raise TypeError('Not a variable: {!r}'.format(var))
-            if isinstance(var, ScheduledVariable):
-                var = var.variable
-            return var
-
-        def normalize_var_name(var):
-            name = var.name
-            if name.endswith(':0'):
-                name = name[:-2]
-            return name
-
-        if isinstance(variables, (dict, OrderedDict)):
-            variables = {
-                k: check_var(v)
-                for k, v in six.iteritems(variables)
-            }
-        else:
-            variables = {
-                normalize_var_name(v): v
-                for v in map(check_var, variables)
-            }
+        variables = _normalize_variables(variables)
         if CHECKPOINT_VAR_NAME in variables:
             raise KeyError('Name is reserved for `variables`: {}'.
                            format(CHECKPOINT_VAR_NAME))
@@ -137,11 +326,17 @@ class CheckpointSaver(VarScopeObject):
             raise KeyError('Name is reserved for `objects`: {}'.
                            format(CHECKPOINT_VAR_NAME))
 
+        max_pending_saves = int(max_pending_saves)
+        if max_pending_saves < 1:
+            raise ValueError('`max_pending_saves` must be at least 1.')
+
         self._variables = variables
         self._objects = objects
         self._save_dir = os.path.abspath(save_dir)
         self._filename = str(filename)
         self._save_meta = bool(save_meta)
+        self._async_save = bool(async_save)
+        self._max_pending_saves = max_pending_saves
 
         super(CheckpointSaver, self).__init__(name=name, scope=scope)
 
@@ -163,9 +358,25 @@ class CheckpointSaver(VarScopeObject):
                 max_to_keep=max_to_keep
             )
 
+        # the variables to fetch for asynchronous saving
+        self._async_var_names = sorted(variables)
+        self._async_vars = [variables[k] for k in self._async_var_names]
+
         # recover the internal states
         self.recover_internal_states()
 
+        # the background writer for asynchronous saving
+        self._async_writer = None  # type: _AsyncCheckpointWriter
+        if self._async_save:
+            self._async_writer = _AsyncCheckpointWriter(
+                save_dir=self._save_dir, filename=self._filename,
+                max_to_keep=max_to_keep, max_pending=max_pending_saves,
+                var_specs={
+                    k: (v.dtype.base_dtype, v.get_shape())
+                    for k, v in six.iteritems(self._var_dict)
+                }
+            )
+
     @property
     def save_dir(self):
         """Get the checkpoint directory."""
@@ -181,6 +392,16 @@ class CheckpointSaver(VarScopeObject):
         """Whether or not to save graph meta?"""
         return self._save_meta
 
+    @property
+    def async_save(self):
+        """Whether or not to write the checkpoint files in background?"""
+        return self._async_save
+
+    @property
+    def max_pending_saves(self):
+        """Get the maximum number of checkpoints written in background."""
+        return self._max_pending_saves
+
     @property
     def saver(self):
         """
@@ -202,12 +423,40 @@ class CheckpointSaver(VarScopeObject):
         """
         Get the path of the latest checkpoint file.
 
+        If `async_save` is enabled, this method will wait until all the
+        pending checkpoints have been written.
+
         Returns:
             str or None: The path of the latest checkpoint file, or
                 :obj:`None` if no checkpoint file is found.
         """
+        self.wait()
         return tf.train.latest_checkpoint(self._save_dir)
 
+    def wait(self):
+        """
+        Wait until all the checkpoints being written in background have been
+        written.  Does nothing if `async_save` is not enabled.
+
+        Raises:
+            Exception: If any error occurred while writing the checkpoints.
+        """
+        if self._async_writer is not None:
+            self._async_writer.wait()
+
+    def close(self):
+        """
+        Wait until all the checkpoints being written in background have been
+        written, and release the background thread and its resources.
+        Does nothing if `async_save` is not enabled.  This saver can no
+        longer save checkpoints in background after closed.
+
+        Raises:
+            Exception: If any error occurred while writing the checkpoints.
+        """
+        if self._async_writer is not None:
+            self._async_writer.close()
+
     def restore_latest(self, ignore_non_exist=False, session=None):
         """
         Restore the latest checkpoint file.
@@ -237,6 +486,7 @@ class CheckpointSaver(VarScopeObject):
                 If not specified, restore into the default session.
         """
         session = session or get_default_session_or_error()
+        self.wait()
 
         # restore the variables
         self._saver.restore(session, save_path)
@@ -261,12 +511,36 @@ class CheckpointSaver(VarScopeObject):
             session (tf.Session): The session to save.
                 If not specified, select the default session.
 
+        If `async_save` is enabled, the values of the variables and the
+        states of the savable objects are taken at the time this method is
+        called, while the checkpoint file is written in background.
+        Call :meth:`wait` to ensure it has been written.
+
         Returns:
             str: The path of the saved checkpoint file.
         """
         session = session or get_default_session_or_error()
+        if not os.path.isdir(self.save_dir):
+            makedirs(self.save_dir, exist_ok=True)
+
+        if self._async_writer is not None:
+            return self._save_async(session, global_step)
 
         # save the states of savable objects into serial var
+        serialized_states = self._serialize_object_states()
+        if serialized_states is not None:
+            self._serial_var.set(serialized_states)
+
+        # now save the variables to checkpoint file
+        return self._saver.save(
+            session,
+            os.path.join(self.save_dir, self.filename),
+            global_step=global_step,
+            write_meta_graph=self.save_meta
+        )
+
+    def _serialize_object_states(self):
+        serialized_states = None
         if self._objects:
             object_states = {}
             for key, obj in six.iteritems(self._objects):
@@ -274,14 +548,190 @@ class CheckpointSaver(VarScopeObject):
 
             serialized_states = pkl.dumps(
                 object_states, protocol=pkl.HIGHEST_PROTOCOL)
-            self._serial_var.set(serialized_states)
+        return serialized_states
 
-        # now save the variables to checkpoint file
+    def save_values(self, values, global_step=None, session=None):
+        """
+        Save the specified variable values to a checkpoint file, instead of
+        the current values of the variables in the session.
+
+        This method requires `async_save` to be enabled, since the values
+        are written by the background writer.  For example, to save the
+        values taken by a :class:`VariableSnapshot`::
+
+            snapshot = VariableSnapshot(variables)
+            saver = CheckpointSaver(variables, save_dir, async_save=True)
+
+            snapshot.take()
+            ...
+            saver.save_values(snapshot.values, global_step=step)
+
+        Args:
+            values (dict[str, np.ndarray]): The values of all the variables,
+                with the same names as used by this saver.  The values will
+                be casted to the dtypes of the variables.
+            global_step (int or tf.Tensor): The global step counter.
+            session (tf.Session): The session to evaluate `global_step`
+                and to save the states of savable objects.
+                If not specified, select the default session.
+
+        Returns:
+            str: The path of the saved checkpoint file.
+
+        Raises:
+            RuntimeError: If `async_save` is not enabled.
+            KeyError: If `values` does not match the variables of this saver.
+            ValueError: If the shape of any value does not match the shape
+                of its variable.
+        """
+        if self._async_writer is None:
+            raise RuntimeError('`save_values` requires `async_save` to be '
+                               'enabled.')
+        if set(values) != set(self._async_var_names):
+            raise KeyError('`values` does not match the variables of this '
+                           'saver: got {!r}, expected {!r}.'.
+                           format(sorted(values), self._async_var_names))
+
+        # cast the values to the dtypes of the variables, otherwise the
+        # checkpoint could not be restored into the variables
+        casted = {}
+        for name, value in six.iteritems(values):
+            var = self._variables[name]
+            value = np.asarray(
+                value, dtype=var.dtype.base_dtype.as_numpy_dtype)
+            if not var.get_shape().is_compatible_with(value.shape):
+                raise ValueError(
+                    'The shape of `values[{!r}]` does not match the '
+                    'variable: {!r} vs {}'.format(name, value.shape,
+                                                  var.get_shape())
+                )
+            casted[name] = value
+        values = casted
+
+        session = session or get_default_session_or_error()
         if not os.path.isdir(self.save_dir):
             makedirs(self.save_dir, exist_ok=True)
-        return self._saver.save(
-            session,
-            os.path.join(self.save_dir, self.filename),
-            global_step=global_step,
-            write_meta_graph=self.save_meta
-        )
+        return self._save_async(session, global_step, values=values)
+
+    def _save_async(self, session, global_step, values=None):
+        # serialize the states of savable objects in the caller thread
+        serialized_states = self._serialize_object_states()
+
+        # snapshot the variables (and the global step) with one session.run
+        fetches = list(self._async_vars) if values is None else []
+        if isinstance(global_step, (tf.Variable, tf.Tensor)):
+            fetches.append(global_step)
+        fetched = session.run(fetches) if fetches else []
+        if isinstance(global_step, (tf.Variable, tf.Tensor)):
+            global_step = fetched.pop()
+        if values is None:
+            values = dict(zip(self._async_var_names, fetched))
+        else:
+            values = dict(values)
+        if serialized_states is not None:
+            values[CHECKPOINT_VAR_NAME] = serialized_states
+
+        # the graph can only be exported in the caller thread
+        meta_file = None
+        if self.save_meta:
+            meta_file = os.path.join(
+                self.save_dir, '._exporting_{}-{}.meta'.format(
+                    self.filename, global_step))
+            self._saver.export_meta_graph(meta_file)
+
+        return self._async_writer.submit(values, global_step, meta_file)
+
+
+class VariableSnapshot(object):
+    """
+    In-memory snapshot of variable values.
+
+    All the variables are fetched with one ``session.run`` by :meth:`take`,
+    and assigned back with one grouped assignment operation by
+    :meth:`restore`.  This is much cheaper than saving a checkpoint file,
+    if the snapshot is taken frequently, e.g., the best parameters for
+    early-stopping::
+
+        snapshot = VariableSnapshot(params)
+        for epoch in ...:
+            ...
+            if is_best_valid_loss:
+                snapshot.take()
+        snapshot.restore()
+    """
+
+    def __init__(self, variables, name=None):
+        """
+        Construct a new :class:`VariableSnapshot`.
+
+        Args:
+            variables: A list of variables, or a dict `(name -> variable)`.
+                A variable might be a :class:`tf.Variable` or a
+                :class:`ScheduledVariable`.  The names of the variables
+                are the same as those used by :class:`CheckpointSaver`.
+            name (str): Name scope of the assignment operations.
+        """
+        variables = _normalize_variables(variables)
+        self._names = sorted(variables)
+        self._variables = [variables[k] for k in self._names]
+        self._values = None
+
+        with tf.name_scope(name, default_name='VariableSnapshot'):
+            self._assign_phs = [
+                tf.placeholder(dtype=v.dtype.base_dtype, shape=v.get_shape())
+                for v in self._variables
+            ]
+            self._assign_op = tf.group(*[
+                tf.assign(v, ph)
+                for v, ph in zip(self._variables, self._assign_phs)
+            ])
+
+    @property
+    def has_value(self):
+        """Whether or not a snapshot has been taken?"""
+        return self._values is not None
+
+    @property
+    def values(self):
+        """
+        Get the snapshot values.
+
+        Returns:
+            dict[str, np.ndarray] or None: The values of the variables, or
+                :obj:`None` if no snapshot has been taken.
+        """
+        if self._values is not None:
+            return dict(zip(self._names, self._values))
+
+    def take(self, session=None):
+        """
+        Take a snapshot of the current variable values.
+
+        Args:
+            session (tf.Session): The session to fetch the variables.
+                If not specified, select the default session.
+        """
+        session = session or get_default_session_or_error()
+        self._values = session.run(self._variables)
+
+    def restore(self, session=None):
+        """
+        Assign the snapshot values back to the variables.
+
+        Args:
+            session (tf.Session): The session to assign the variables.
+                If not specified, select the default session.
+
+        Raises:
+            RuntimeError: If no snapshot has been taken.
+        """
+        if self._values is None:
+            raise RuntimeError('No snapshot has been taken.')
+        session = session or get_default_session_or_error()
+        session.run(self._assign_op, feed_dict={
+            ph: v for ph, v in zip(self._assign_phs, self._values)
+        })
+
+    def clear(self):
+        """Discard the snapshot values."""
+        self._values = None
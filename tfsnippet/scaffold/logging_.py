@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 import functools
 import re
-from collections import defaultdict, OrderedDict
+from collections import OrderedDict
 from itertools import chain
 
 import numpy as np
@@ -10,10 +10,11 @@ import tensorflow as tf
 from natsort import natsorted
 
 from tfsnippet.utils import (humanize_duration,
-                             StatisticsCollector,
+                             ColumnarStatisticsCollector,
                              get_default_session_or_error,
                              DocInherit)
 from .scheduled_var import ScheduledVariable
+from .summary_writer import AsyncSummaryWriter
 
 __all__ = [
     'MetricFormatter',
@@ -125,7 +126,9 @@ class MetricLogger(object):
         Construct the :class:`MetricLogger`.
 
         Args:
-            summary_writer: TensorFlow summary writer.
+            summary_writer: TensorFlow summary writer, or an instance of
+                :class:`AsyncSummaryWriter`.  In the latter case, the
+                summary protos will be constructed in the background thread.
             summary_metric_prefix (str): The prefix for the metrics committed
                 to `summary_writer`.  This will not affect the summaries
                 added via :meth:`add_summary`. (default "")
@@ -149,7 +152,7 @@ class MetricLogger(object):
         self._summary_commit_freqs = dict(summary_commit_freqs or ())
 
         # accumulators for various metrics
-        self._metrics = defaultdict(StatisticsCollector)
+        self._metrics = ColumnarStatisticsCollector()
         self._metrics_skip_counter = {}
         self.clear()
 
@@ -159,17 +162,19 @@ class MetricLogger(object):
         Get the dict of metric collectors.
 
         Returns:
-            dict[str, StatisticsCollector]: The metric collectors.
+            dict[str, StatisticsCollector]: The metric collectors.  Each
+                collector is a column of a
+                :class:`~tfsnippet.utils.ColumnarStatisticsCollector`,
+                having the same properties as a scalar
+                :class:`~tfsnippet.utils.StatisticsCollector`.
         """
-        return self._metrics
+        return OrderedDict((k, self._metrics[k]) for k in self._metrics)
 
     def clear(self):
         """Clear all the metric statistics."""
-        # Instead of calling ``self._metrics.clear()``, we reset every
-        # collector object (so that they can be reused).
-        # This may help reduce the time cost on GC.
-        for k, v in six.iteritems(self._metrics):
-            v.reset()
+        # Instead of discarding the metric columns, we reset the statistics
+        # (so that the columns can be reused).
+        self._metrics.reset()
         self._metrics_skip_counter.clear()
         for k, v in six.iteritems(self._summary_commit_freqs):
             self._metrics_skip_counter[k] = v - 1
@@ -191,35 +196,57 @@ class MetricLogger(object):
             global_step (int or tf.Variable or tf.Tensor): The global step
                 counter. (optional)
         """
-        tf_summary_values = []
-        for k, v in six.iteritems(metrics):
-            if isinstance(v, ScheduledVariable):
-                v = v.get()
-            v = np.asarray(v)
-            self._metrics[k].collect(v)
-
-            if self._summary_writer is not None and \
-                    (self._summary_skip_pattern is None or
-                     not self._summary_skip_pattern.match(k)):
+        names = tuple(metrics)
+        if not names:
+            return
+
+        # fast path: if all metrics are scalars, collect them all at once
+        # with a constant number of NumPy operations.
+        try:
+            values = np.fromiter(six.itervalues(metrics), dtype=np.float64,
+                                 count=len(names))
+        except (TypeError, ValueError):
+            values = []
+            for k, v in six.iteritems(metrics):
+                if isinstance(v, ScheduledVariable):
+                    v = v.get()
+                v = np.asarray(v)
+                self._metrics.collect(k, v)
+                values.append(v)
+        else:
+            self._metrics.collect_columns(
+                self._metrics.indices_of(names), values)
+
+        if self._summary_writer is None:
+            return
+
+        summary_values = OrderedDict()
+        for k, v in zip(names, values):
+            if self._summary_skip_pattern is None or \
+                    not self._summary_skip_pattern.match(k):
                 skip_count = self._metrics_skip_counter.get(k, 0)
                 freq_limit = self._summary_commit_freqs.get(k, 1)
                 if skip_count + 1 >= freq_limit:
                     self._metrics_skip_counter[k] = 0
                     tag = self._summary_metric_prefix + k
-                    tf_summary_values.append(
-                        tf.summary.Summary.Value(
-                            tag=tag, simple_value=v.mean()
-                        )
-                    )
+                    summary_values[tag] = float(np.mean(v))
                 else:
                     self._metrics_skip_counter[k] = skip_count + 1
 
-        if tf_summary_values:
-            summary = tf.summary.Summary(value=tf_summary_values)
+        if summary_values:
             if global_step is not None and \
                     isinstance(global_step, (tf.Variable, tf.Tensor)):
                 global_step = get_default_session_or_error().run(global_step)
-            self._summary_writer.add_summary(summary, global_step=global_step)
+            if isinstance(self._summary_writer, AsyncSummaryWriter):
+                self._summary_writer.add_metrics(
+                    summary_values, global_step=global_step)
+            else:
+                summary = tf.summary.Summary(value=[
+                    tf.summary.Summary.Value(tag=tag, simple_value=value)
+                    for tag, value in six.iteritems(summary_values)
+                ])
+                self._summary_writer.add_summary(
+                    summary, global_step=global_step)
 
     def format_logs(self):
         """
@@ -229,7 +256,7 @@ class MetricLogger(object):
             str: The formatted metric statistics.
         """
         buf = []
-        for key in self._formatter.sort_metrics(six.iterkeys(self._metrics)):
+        for key in self._formatter.sort_metrics(self._metrics.names):
             metric = self._metrics[key]
             if metric.has_value:
                 name = key.replace('_', ' ')
@@ -0,0 +1,146 @@
+import codecs
+import os
+from collections import namedtuple
+
+import six
+from tensorflow.python.client import timeline
+
+from tfsnippet.utils import ConsoleTable, makedirs
+
+__all__ = ['OpStats', 'get_op_stats', 'format_op_stats', 'save_step_profile']
+
+
+OpStats = namedtuple('OpStats', ['name', 'op_type', 'time_micros',
+                                 'memory_bytes'])
+"""The execution statistics of an operation in a traced ``session.run``."""
+
+
+def _get_op_type(node_stats):
+    # the timeline label is formatted as "name = OpType(inputs...)"
+    label = node_stats.timeline_label
+    if ' = ' in label:
+        return label.split(' = ', 1)[1].split('(', 1)[0]
+    return ''
+
+
+def get_op_stats(run_metadata):
+    """
+    Get the execution statistics of each operation from the run metadata
+    of a traced ``session.run``.
+
+    If an operation is reported by more than one device (e.g., a GPU
+    kernel is reported by both the GPU device and its stream), the largest
+    execution time and memory are taken.
+
+    Args:
+        run_metadata (tf.RunMetadata): The run metadata, obtained by
+            ``session.run(..., options=tf.RunOptions(
+            trace_level=tf.RunOptions.FULL_TRACE), run_metadata=...)``.
+
+    Returns:
+        list[OpStats]: The statistics of the operations.
+    """
+    stats = {}
+    for dev_stats in run_metadata.step_stats.dev_stats:
+        for node_stats in dev_stats.node_stats:
+            name = node_stats.node_name
+            time_micros = node_stats.all_end_rel_micros
+            memory_bytes = sum(m.total_bytes for m in node_stats.memory)
+            if name in stats:
+                old = stats[name]
+                stats[name] = old._replace(
+                    op_type=old.op_type or _get_op_type(node_stats),
+                    time_micros=max(old.time_micros, time_micros),
+                    memory_bytes=max(old.memory_bytes, memory_bytes)
+                )
+            else:
+                stats[name] = OpStats(
+                    name=name,
+                    op_type=_get_op_type(node_stats),
+                    time_micros=time_micros,
+                    memory_bytes=memory_bytes
+                )
+    return sorted(six.itervalues(stats), key=lambda s: s.name)
+
+
+def _format_bytes(size):
+    for unit in ('B', 'KB', 'MB'):
+        if size < 1024:
+            return '{:.4g} {}'.format(size, unit)
+        size /= 1024.
+    return '{:.4g} GB'.format(size)
+
+
+def format_op_stats(op_stats, top_k=20):
+    """
+    Format the top operations by execution time and by memory as tables.
+
+    Args:
+        op_stats (Iterable[OpStats]): The statistics of the operations.
+        top_k (int): The number of operations in each table. (default 20)
+
+    Returns:
+        str: The formatted tables.
+    """
+    op_stats = list(op_stats)
+    total_time = sum(s.time_micros for s in op_stats)
+    total_memory = sum(s.memory_bytes for s in op_stats)
+
+    def make_table(title, key):
+        table = ConsoleTable(4, col_align=['<', '<', '>', '>'])
+        table.add_title(title)
+        table.add_hr('=')
+        table.add_row(['Name', 'Type', 'Time', 'Memory'])
+        table.add_hr('-')
+        for s in sorted(op_stats, key=key, reverse=True)[:top_k]:
+            table.add_row([s.name, s.op_type,
+                           '{:.3f} ms'.format(s.time_micros * 1e-3),
+                           _format_bytes(s.memory_bytes)])
+        table.add_hr('-')
+        table.add_row(['Total ({} ops)'.format(len(op_stats)), '',
+                       '{:.3f} ms'.format(total_time * 1e-3),
+                       _format_bytes(total_memory)])
+        return table.format()
+
+    return '\n\n'.join([
+        make_table('Top Ops by Time', lambda s: s.time_micros),
+        make_table('Top Ops by Memory', lambda s: s.memory_bytes),
+    ])
+
+
+def save_step_profile(run_metadata, save_dir, name, top_k=20):
+    """
+    Save the profile of a traced ``session.run`` into `save_dir`.
+
+    Two files will be saved: ``name + '.trace.json'``, the timeline in
+    Chrome trace format (which can be opened at ``chrome://tracing``), and
+    ``name + '.ops.txt'``, the top operations formatted by
+    :func:`format_op_stats`.
+
+    Args:
+        run_metadata (tf.RunMetadata): The run metadata of the traced
+            ``session.run``.
+        save_dir (str): The directory, where to save the profile files.
+        name (str): The name of the profile files.
+        top_k (int): The number of operations in each table of the
+            operation statistics. (default 20)
+
+    Returns:
+        (str, str): The paths of the Chrome trace file, and of the operation
+            statistics file.
+    """
+    if not os.path.isdir(save_dir):
+        makedirs(save_dir, exist_ok=True)
+
+    trace_path = os.path.join(save_dir, name + '.trace.json')
+    trace = timeline.Timeline(run_metadata.step_stats). \
+        generate_chrome_trace_format(show_memory=True)
+    with codecs.open(trace_path, 'wb', 'utf-8') as f:
+        f.write(trace)
+
+    stats_path = os.path.join(save_dir, name + '.ops.txt')
+    with codecs.open(stats_path, 'wb', 'utf-8') as f:
+        f.write(format_op_stats(get_op_stats(run_metadata), top_k=top_k))
+        f.write('\n')
+
+    return trace_path, stats_path
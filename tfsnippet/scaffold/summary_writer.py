@@ -0,0 +1,223 @@
+from collections import OrderedDict
+from logging import getLogger
+from threading import Thread, Event
+
+import six
+import tensorflow as tf
+
+if six.PY2:
+    from Queue import Queue, Empty
+else:
+    from queue import Queue, Empty
+
+__all__ = ['AsyncSummaryWriter']
+
+
+class AsyncSummaryWriter(object):
+    """
+    Wrapper of a TensorFlow summary writer, which constructs the summary
+    protos and writes them in a background thread.
+
+    The metric values added via :meth:`add_metrics` are buffered, such that
+    the metrics for the same step are merged into one summary proto.  The
+    writing requests are kept in a bounded queue, thus the caller will be
+    blocked only if the background thread falls behind by `max_queue`
+    requests.
+
+    .. code-block:: python
+
+        with tf.summary.FileWriter(log_dir) as sw:
+            writer = AsyncSummaryWriter(sw)
+            try:
+                for step in ...:
+                    writer.add_metrics({'loss': loss}, global_step=step)
+                    writer.add_summary(summary, global_step=step)
+                    ...
+                    writer.flush()  # wait until everything is written
+            finally:
+                writer.close()
+
+    Note that closing this writer will not close the wrapped writer.
+    """
+
+    _FLUSH = object()
+    _STOP = object()
+
+    def __init__(self, summary_writer, max_queue=1024, merge_timeout=1.):
+        """
+        Construct a new :class:`AsyncSummaryWriter`.
+
+        Args:
+            summary_writer: The TensorFlow summary writer to be wrapped.
+            max_queue (int): The maximum number of pending requests.
+                (default 1024)
+            merge_timeout (float): The buffered metrics will be written
+                if no new request arrives within this number of seconds.
+                (default 1.)
+        """
+        max_queue = int(max_queue)
+        if max_queue < 1:
+            raise ValueError('`max_queue` must be at least 1.')
+        self._summary_writer = summary_writer
+        self._max_queue = max_queue
+        self._merge_timeout = float(merge_timeout)
+        self._queue = Queue(max_queue)
+        self._error = None
+        self._closed = False
+
+        self._worker = Thread(target=self._worker_func)
+        self._worker.daemon = True
+        self._worker.start()
+
+    @property
+    def summary_writer(self):
+        """Get the wrapped TensorFlow summary writer."""
+        return self._summary_writer
+
+    @property
+    def max_queue(self):
+        """Get the maximum number of pending requests."""
+        return self._max_queue
+
+    def _worker_func(self):
+        pending_step = None
+        pending_values = OrderedDict()
+
+        def write_pending():
+            if pending_values:
+                summary = tf.summary.Summary(value=[
+                    tf.summary.Summary.Value(tag=tag, simple_value=value)
+                    for tag, value in six.iteritems(pending_values)
+                ])
+                self._summary_writer.add_summary(
+                    summary, global_step=pending_step)
+                pending_values.clear()
+
+        while True:
+            try:
+                item = self._queue.get(
+                    timeout=self._merge_timeout if pending_values else None)
+            except Empty:
+                item = None
+
+            try:
+                if item is None:
+                    write_pending()
+                elif item[0] == 'metrics':
+                    _, metrics, global_step = item
+                    if global_step != pending_step:
+                        write_pending()
+                        pending_step = global_step
+                    pending_values.update(metrics)
+                elif item[0] == 'summary':
+                    _, summary, global_step = item
+                    write_pending()
+                    self._summary_writer.add_summary(
+                        summary, global_step=global_step)
+                elif item[0] == 'run_metadata':
+                    _, run_metadata, tag, global_step = item
+                    write_pending()
+                    self._summary_writer.add_run_metadata(
+                        run_metadata, tag, global_step=global_step)
+                else:
+                    write_pending()
+                    command, done_event = item
+                    if command is self._FLUSH:
+                        self._summary_writer.flush()
+                    done_event.set()
+                    if command is self._STOP:
+                        break
+            except Exception as ex:
+                getLogger(__name__).warning(
+                    'Failed to write summary.', exc_info=True)
+                if self._error is None:
+                    self._error = ex
+                pending_values.clear()
+                if item is not None and \
+                        item[0] not in ('metrics', 'summary', 'run_metadata'):
+                    item[1].set()
+                    if item[0] is self._STOP:  # pragma: no cover
+                        break
+
+    def _raise_error(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def _put(self, item):
+        if self._closed:
+            raise RuntimeError('The summary writer has been closed.')
+        self._raise_error()
+        self._queue.put(item)
+
+    def _wait(self, command):
+        done_event = Event()
+        self._put((command, done_event))
+        done_event.wait()
+        self._raise_error()
+
+    def add_metrics(self, metrics, global_step=None):
+        """
+        Add scalar metrics as summary.
+
+        The metrics for the same `global_step` added consecutively will be
+        merged into one summary proto.  If a metric is added more than once
+        for the same step, only the last value will be written.
+
+        Args:
+            metrics (dict[str, float]): Dict from the summary tags to the
+                scalar metric values.
+            global_step (int): The global step counter.  (optional)
+        """
+        if metrics:
+            self._put(('metrics', dict(metrics), global_step))
+
+    def add_summary(self, summary, global_step=None):
+        """
+        Add a summary object.
+
+        Args:
+            summary (tf.summary.Summary or bytes): TensorFlow summary object,
+                or serialized summary.
+            global_step (int): The global step counter.  (optional)
+        """
+        self._put(('summary', summary, global_step))
+
+    def add_run_metadata(self, run_metadata, tag, global_step=None):
+        """
+        Add the run metadata of a traced ``session.run``.
+
+        Args:
+            run_metadata (tf.RunMetadata): The run metadata.
+            tag (str): The tag of the run metadata.
+            global_step (int): The global step counter.  (optional)
+        """
+        self._put(('run_metadata', run_metadata, tag, global_step))
+
+    def flush(self):
+        """
+        Wait until all the pending summaries have been written, and flush
+        the wrapped writer.
+
+        Raises:
+            Exception: If any error occurred while writing the summaries.
+        """
+        self._wait(self._FLUSH)
+
+    def close(self):
+        """
+        Flush all the pending summaries, and stop the background thread.
+        Does nothing if already closed.
+
+        Raises:
+            Exception: If any error occurred while writing the summaries.
+        """
+        if not self._closed:
+            try:
+                self._wait(self._FLUSH)
+            finally:
+                done_event = Event()
+                self._queue.put((self._STOP, done_event))
+                done_event.wait()
+                self._worker.join()
+                self._closed = True
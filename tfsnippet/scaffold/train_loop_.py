@@ -5,7 +5,7 @@ import os
 import re
 import time
 import warnings
-from collections import OrderedDict
+from collections import OrderedDict, deque
 from contextlib import contextmanager
 from logging import getLogger
 
@@ -16,19 +16,43 @@ from tfsnippet.dataflows import DataFlow
 from tfsnippet.utils import (StatisticsCollector, DisposableContext,
                              humanize_duration, ETA, EventSource,
                              TemporaryDirectory)
-from .checkpoint import CheckpointSavableObject, CheckpointSaver
+from .checkpoint import (CheckpointSavableObject, CheckpointSaver,
+                         VariableSnapshot)
 from .event_keys import EventKeys
 from .logging_ import summarize_variables, DefaultMetricFormatter, MetricLogger
+from .profiling import save_step_profile
+from .summary_writer import AsyncSummaryWriter
 
 __all__ = ['TrainLoop']
 
 EPOCH_TIME_METRIC = 'epoch_time'
 STEP_TIME_METRIC = 'step_time'
+DATA_TIME_METRIC = 'data_time'
+COMPUTE_TIME_METRIC = 'compute_time'
+EXAMPLES_PER_SEC_METRIC = 'examples_per_sec'
+INPUT_BOUND_RATIO_METRIC = 'input_bound_ratio'
+INPUT_BOUND_RATIO_WINDOW = 100
 TIME_METRIC_PATTERN = re.compile(r'.*(time|timer)$')
 TRAIN_LOOP_STATES_CKPT_NAME = '$$/tfsnippet_train_loop_states_variable'
 EARLY_STOPPING_STATES_CKPT_NAME = '$$/tfsnippet_early_stopping_states_variable'
 
 
+def _infer_batch_size(step_data):
+    # the step data may report its own batch size, e.g., the micro-batches
+    # of one optimizer step with gradient accumulation
+    batch_size = getattr(step_data, 'batch_size', None)
+    if isinstance(batch_size, six.integer_types):
+        return batch_size
+
+    # the step data is usually a tuple of arrays, e.g., ``(x, y)``
+    if isinstance(step_data, (tuple, list)) and step_data:
+        step_data = step_data[0]
+    try:
+        return len(step_data)
+    except TypeError:
+        return None
+
+
 class TrainLoopStates(CheckpointSavableObject):
     """
     Internal states of a :class:`TrainLoop`, which can be saved via a
@@ -138,12 +162,14 @@ class TrainLoop(DisposableContext):
                  max_epoch=None,
                  max_step=None,
                  metric_formatter=DefaultMetricFormatter(),
+                 throughput_metrics=False,
 
                  # checkpoint related arguments
                  checkpoint_dir=None,
                  checkpoint_epoch_freq=None,
                  checkpoint_max_to_keep=None,
                  checkpoint_save_objects=None,
+                 checkpoint_async=False,
                  restore_checkpoint=True,
 
                  # summary related arguments
@@ -153,11 +179,18 @@ class TrainLoop(DisposableContext):
                  summary_metric_prefix='metrics/',
                  summary_skip_pattern=re.compile(r'.*(time|timer)$'),
                  summary_commit_freqs=None,
+                 summary_async=False,
+
+                 # profiling related arguments
+                 profile_steps=None,
+                 profile_dir=None,
 
                  # validation and early-stopping related arguments
                  valid_metric_name='valid_loss',
                  valid_metric_smaller_is_better=None,
-                 early_stopping=False):
+                 early_stopping=False,
+                 early_stopping_in_memory=False,
+                 early_stopping_save_interval=None):
         """
         Construct the :class:`TrainLoop`.
 
@@ -182,6 +215,15 @@ class TrainLoop(DisposableContext):
                 step counter, rather than the epoch-wise step counter.
                 (default :obj:`None`)
             metric_formatter (MetricFormatter): The training metrics formatter.
+            throughput_metrics (bool): Whether or not to collect the
+                throughput metrics in :meth:`iter_steps`?  If :obj:`True`,
+                the time spent on fetching the step data from the data flow,
+                and the time spent on the step body, will be collected as
+                ``data_time`` and ``compute_time``.  If the batch size can be
+                inferred from the step data, ``examples_per_sec`` will also be
+                collected.  Besides, ``input_bound_ratio``, the fraction of
+                time spent on fetching the data over the last
+                100 steps, will be collected.  (default :obj:`False`)
 
             checkpoint_dir (str): If specified, will save checkpoint files to
                 this directory, when :meth:`make_checkpoint()` is called.
@@ -192,6 +234,11 @@ class TrainLoop(DisposableContext):
                 versions to keep. If :obj:`None` or `0`, keep all versions.
             checkpoint_save_objects (dict[str, CheckpointSavableObject]): If
                 specified, will save and restore the states of these objects.
+            checkpoint_async (bool): Whether or not to write the checkpoint
+                files in a background thread?  If :obj:`True`, the variables
+                are fetched with one ``session.run`` at each checkpoint,
+                and the pending checkpoints are waited for when exiting the
+                loop.  (default :obj:`False`)
             restore_checkpoint (bool or str): If :obj:`True`, will restore
                 the latest checkpoint.  If a str, it should be the path of
                 a checkpoint file, and will restore from this checkpoint.
@@ -212,6 +259,20 @@ class TrainLoop(DisposableContext):
             summary_commit_freqs (dict[str, int] or None): If specified,
                 a metric will be committed to `summary_writer` no more frequent
                 than ``summary_commit_freqs[metric]``. (default :obj:`None`)
+            summary_async (bool): Whether or not to construct and write the
+                summaries in a background thread, via
+                :class:`AsyncSummaryWriter`?  If :obj:`True`, the summaries
+                are guaranteed to be written to `summary_writer` only at the
+                end of each epoch, and when exiting the loop.
+                (default :obj:`False`)
+
+            profile_steps (Iterable[int] or None): If specified, these steps
+                will be traced by the trainers (see :attr:`is_profile_step`),
+                and the run metadata will be added via
+                :meth:`add_run_metadata`.
+            profile_dir (str): Directory for writing the Chrome trace files
+                and the operation statistics of the traced steps.  If not
+                specified, will use `summary_dir`.
 
             valid_metric_name (str): Name of the validation metric.
             valid_metric_smaller_is_better (bool): Whether or not the smaller
@@ -226,6 +287,19 @@ class TrainLoop(DisposableContext):
                 The variables will only be restored if the training loop
                 is exited without any error or interruption, including
                 the Ctrl+C KeyboardInterrupt.
+            early_stopping_in_memory (bool): Whether or not to keep the best
+                values of `param_vars` in memory, instead of saving a
+                checkpoint file at every new best validation metric?
+                If :obj:`True`, the values are fetched with one
+                ``session.run``, and restored with one grouped assignment.
+                (default :obj:`False`)
+            early_stopping_save_interval (float or None): If specified, and if
+                `early_stopping_in_memory` is :obj:`True` and `checkpoint_dir`
+                is specified, the best values in memory will be written to
+                the early-stopping checkpoint at most once every this number
+                of seconds.  The best values are always written before a
+                checkpoint is made by :meth:`make_checkpoint`, such that
+                the training can be resumed with the correct best values.
         """
         # regularize the parameters
         if not isinstance(param_vars, (dict, OrderedDict)):
@@ -251,6 +325,21 @@ class TrainLoop(DisposableContext):
                     'a file path is specified for `restore_checkpoint`.'
                 )
             restore_checkpoint = os.path.abspath(restore_checkpoint)
+        if early_stopping_save_interval is not None:
+            early_stopping_save_interval = float(early_stopping_save_interval)
+            if early_stopping_save_interval < 0:
+                raise ValueError(
+                    '`early_stopping_save_interval` must be non-negative: '
+                    'got {}'.format(early_stopping_save_interval)
+                )
+        if profile_steps is not None:
+            profile_steps = frozenset(int(s) for s in profile_steps)
+        else:
+            profile_steps = frozenset()
+        if profile_dir is not None:
+            profile_dir = os.path.abspath(profile_dir)
+        elif summary_dir is not None and summary_writer is None:
+            profile_dir = os.path.abspath(summary_dir)
         save_objects = dict(checkpoint_save_objects or ())
         for key in (TRAIN_LOOP_STATES_CKPT_NAME,
                     EARLY_STOPPING_STATES_CKPT_NAME):
@@ -282,6 +371,7 @@ class TrainLoop(DisposableContext):
         self._max_epoch = max_epoch
         self._max_step = max_step
         self._metric_formatter = metric_formatter
+        self._throughput_metrics = bool(throughput_metrics)
 
         self._summary_dir = summary_dir
         self._summary_writer = summary_writer
@@ -289,9 +379,16 @@ class TrainLoop(DisposableContext):
         self._summary_graph = summary_graph
         self._summary_skip_pattern = summary_skip_pattern
         self._summary_commit_freqs = dict(summary_commit_freqs or ())
+        self._summary_async = bool(summary_async)
         self._own_summary_writer = own_summary_writer
+        self._async_summary_writer = None  # type: AsyncSummaryWriter
+
+        self._profile_steps = profile_steps
+        self._profile_dir = profile_dir
 
         self._use_early_stopping = early_stopping
+        self._early_stopping_in_memory = bool(early_stopping_in_memory)
+        self._early_stopping_save_interval = early_stopping_save_interval
         self._valid_metric_name = valid_metric_name
         self._valid_metric_smaller_is_better = smaller_is_better
 
@@ -330,7 +427,8 @@ class TrainLoop(DisposableContext):
                 objects=save_objects,
                 save_dir=os.path.join(checkpoint_dir, 'checkpoint'),
                 max_to_keep=checkpoint_max_to_keep,
-                save_meta=False
+                save_meta=False,
+                async_save=checkpoint_async
             )
 
         # the checkpoint saver for early stopping
@@ -344,9 +442,19 @@ class TrainLoop(DisposableContext):
                 self._param_vars,
                 save_dir=os.path.join(checkpoint_dir, 'early_stopping'),
                 max_to_keep=2,
-                save_meta=False
+                save_meta=False,
+                async_save=self._early_stopping_in_memory
             )
 
+        # the in-memory snapshot for early stopping
+        self._early_stopping_snapshot = None  # type: VariableSnapshot
+        self._early_stopping_snapshot_step = None
+        self._early_stopping_snapshot_saved = True
+        self._early_stopping_last_save_time = None
+
+        if self._use_early_stopping and self._early_stopping_in_memory:
+            self._early_stopping_snapshot = VariableSnapshot(self._param_vars)
+
         # euphemeral train loop states
         self._eta = None
         self._step_metrics = None  # type: MetricLogger
@@ -358,6 +466,11 @@ class TrainLoop(DisposableContext):
         self._epoch_start_time = None
         self._step_start_time = None
 
+        # the (data time, total time) of the recent steps, along with the
+        # running sums, for computing the input-bound ratio
+        self._input_bound_window = deque()
+        self._input_bound_sums = [0., 0.]
+
         # the active data flow of current epoch
         self._data_flow = None  # type: DataFlow
         self._step_data = None  # the data of the current step
@@ -368,10 +481,16 @@ class TrainLoop(DisposableContext):
             self._summary_writer = tf.summary.FileWriter(
                 self._summary_dir, graph=self._summary_graph)
 
+        # write the summaries in background if required
+        summary_writer = self._summary_writer
+        if self._summary_async and summary_writer is not None:
+            self._async_summary_writer = AsyncSummaryWriter(summary_writer)
+            summary_writer = self._async_summary_writer
+
         # create the metric accumulators
         self._step_metrics = MetricLogger(formatter=self._metric_formatter)
         self._epoch_metrics = MetricLogger(
-            summary_writer=self._summary_writer,
+            summary_writer=summary_writer,
             summary_metric_prefix=self._summary_metric_prefix,
             summary_skip_pattern=self._summary_skip_pattern,
             summary_commit_freqs=self._summary_commit_freqs,
@@ -379,7 +498,7 @@ class TrainLoop(DisposableContext):
         )
 
         # create the early-stopping saver if required
-        if self._use_early_stopping:
+        if self._use_early_stopping and not self._early_stopping_in_memory:
             if self._early_stopping_saver is None:
                 self._early_stopping_temp_dir = TemporaryDirectory()
                 dir_path = self._early_stopping_temp_dir.__enter__()
@@ -415,30 +534,81 @@ class TrainLoop(DisposableContext):
 
     def _exit(self, exc_type, exc_val, exc_tb):
         try:
+            # wait for the background summary writer.  Its error is logged
+            # instead of raised, such that the rest of the cleanup always
+            # runs, and the error in flight (if any) is not replaced.
+            if self._async_summary_writer is not None:
+                try:
+                    self._async_summary_writer.close()
+                except Exception:
+                    getLogger(__name__).warning(
+                        'Failed to write the summaries in background.',
+                        exc_info=True
+                    )
+                finally:
+                    self._async_summary_writer = None
+
             # close the summary writer
             if self._own_summary_writer:
                 self._summary_writer.close()
                 self._summary_writer = None
                 self._own_summary_writer = False
 
-            # restore the early-stopping variables if no error
-            if self._early_stopping_saver is not None:
-                if exc_type is None:
-                    es_latest = self._early_stopping_saver.latest_checkpoint()
-                    if es_latest is None:  # pragma: no cover
+            # restore the early-stopping variables from memory if no error,
+            # otherwise fallback to the early-stopping checkpoint (if any)
+            snapshot_restored = False
+            if self._early_stopping_snapshot is not None:
+                if exc_type is None and \
+                        self._early_stopping_snapshot.has_value:
+                    self._early_stopping_snapshot.restore()
+                    snapshot_restored = True
+                elif self._early_stopping_saver is None:
+                    if exc_type is None:  # pragma: no cover
                         warnings.warn(
                             'Early-stopping has never been triggered! '
                             'The variables will keep their latest values. '
                             'Did you forget to add corresponding metric?'
                         )
-                    else:
-                        self._early_stopping_saver.restore(es_latest)
+                    else:  # pragma: no cover
+                        warnings.warn(
+                            'Early-stopping variables are not restored, '
+                            'because an error or an interruption has '
+                            'occurred.'
+                        )
+                self._early_stopping_snapshot.clear()
+
+            # restore the early-stopping variables if no error
+            if self._early_stopping_saver is not None:
+                try:
+                    self._early_stopping_saver.wait()
+                    if snapshot_restored:
+                        pass  # restored from the in-memory snapshot
+                    elif exc_type is None:
+                        es_latest = \
+                            self._early_stopping_saver.latest_checkpoint()
+                        if es_latest is None:  # pragma: no cover
+                            warnings.warn(
+                                'Early-stopping has never been triggered! '
+                                'The variables will keep their latest '
+                                'values.  Did you forget to add '
+                                'corresponding metric?'
+                            )
+                        else:
+                            self._early_stopping_saver.restore(es_latest)
+                    else:  # pragma: no cover
+                        warnings.warn(
+                            'Early-stopping variables are not restored, '
+                            'because an error or an interruption has '
+                            'occurred.'
+                        )
+                finally:
+                    # release the background thread of the saver
+                    self._early_stopping_saver.close()
                     self._early_stopping_saver = None
-                else:  # pragma: no cover
-                    warnings.warn(
-                        'Early-stopping variables are not restored, because '
-                        'an error or an interruption has occurred.'
-                    )
+
+            # wait for the background checkpoint writer, and release it
+            if self._checkpoint_saver is not None:
+                self._checkpoint_saver.close()
 
         finally:
             try:
@@ -472,6 +642,33 @@ class TrainLoop(DisposableContext):
             self.collect_metrics(metrics={STEP_TIME_METRIC: duration})
             self._step_start_time = None
 
+    def _commit_throughput_metrics(self, data_time, compute_time, step_data):
+        metrics = {COMPUTE_TIME_METRIC: compute_time}
+        if data_time is not None:
+            total_time = data_time + compute_time
+            metrics[DATA_TIME_METRIC] = data_time
+
+            # the examples per second
+            batch_size = _infer_batch_size(step_data)
+            if batch_size is not None and total_time > 0:
+                metrics[EXAMPLES_PER_SEC_METRIC] = batch_size / total_time
+
+            # the input-bound ratio over the recent steps
+            window = self._input_bound_window
+            sums = self._input_bound_sums
+            window.append((data_time, total_time))
+            sums[0] += data_time
+            sums[1] += total_time
+            if len(window) > INPUT_BOUND_RATIO_WINDOW:
+                old_data_time, old_total_time = window.popleft()
+                sums[0] -= old_data_time
+                sums[1] -= old_total_time
+            if sums[1] > 0:
+                metrics[INPUT_BOUND_RATIO_METRIC] = \
+                    min(max(sums[0] / sums[1], 0.), 1.)
+
+        self.collect_metrics(metrics=metrics)
+
     def get_progress(self):
         """
         Get the progress of training.
@@ -586,6 +783,41 @@ class TrainLoop(DisposableContext):
         """Whether or not a step is open?"""
         return self._within_step
 
+    @property
+    def profile_steps(self):
+        """
+        Get the steps to be traced.
+
+        Returns:
+            frozenset[int]: The steps to be traced.
+        """
+        return self._profile_steps
+
+    @property
+    def profile_dir(self):
+        """Get the directory for writing the profile files."""
+        return self._profile_dir
+
+    @property
+    def is_profile_step(self):
+        """
+        Whether or not the current step should be traced?
+
+        The trainers check this property in each step, and run the step with
+        ``tf.RunOptions(trace_level=tf.RunOptions.FULL_TRACE)`` if it is
+        :obj:`True`.  For example::
+
+            if loop.is_profile_step:
+                run_metadata = tf.RunMetadata()
+                session.run(train_op, options=tf.RunOptions(
+                    trace_level=tf.RunOptions.FULL_TRACE),
+                    run_metadata=run_metadata)
+                loop.add_run_metadata(run_metadata)
+            else:
+                session.run(train_op)
+        """
+        return self._within_step and self.step in self._profile_steps
+
     def make_checkpoint(self):
         """
         Make a checkpoint.
@@ -602,8 +834,30 @@ class TrainLoop(DisposableContext):
         """
         if not self._checkpoint_saver:
             raise RuntimeError('Checkpoint directory is not configured.')
+        # the early-stopping checkpoint must be consistent with the best
+        # valid metric stored in the train loop states
+        self._save_early_stopping_snapshot(force=True)
         self._checkpoint_saver.save(self._states.step)
 
+    def _save_early_stopping_snapshot(self, force=False):
+        if self._early_stopping_snapshot is None or \
+                self._early_stopping_saver is None or \
+                self._early_stopping_snapshot_saved or \
+                not self._early_stopping_snapshot.has_value:
+            return
+        if not force:
+            interval = self._early_stopping_save_interval
+            last_time = self._early_stopping_last_save_time
+            if interval is None or (last_time is not None and
+                                    time.time() - last_time < interval):
+                return
+        self._early_stopping_saver.save_values(
+            self._early_stopping_snapshot.values,
+            global_step=self._early_stopping_snapshot_step
+        )
+        self._early_stopping_snapshot_saved = True
+        self._early_stopping_last_save_time = time.time()
+
     def iter_epochs(self):
         """
         Iterate through the epochs.
@@ -638,6 +892,8 @@ class TrainLoop(DisposableContext):
 
                 self._commit_epoch_stop_time()
                 self._steps_per_epoch = float(self.step) / self.epoch
+                if self._async_summary_writer is not None:
+                    self._async_summary_writer.flush()
 
                 # do checkpoint if configured
                 if self._checkpoint_epoch_freq is not None and \
@@ -698,21 +954,24 @@ class TrainLoop(DisposableContext):
 
             while loop_condition():
                 # prepare for the step data
+                data_time = None
                 if self._data_flow is None:
                     yield_obj = self.step + 1
                     step_data = None
                 else:
+                    data_start_time = time.time()
                     try:
                         step_data = self._data_flow.next_batch()
                     except StopIteration:
                         break
+                    data_time = time.time() - data_start_time
                     yield_obj = self.step + 1, step_data
 
                 # yield this step
                 self._states.step += 1
                 self._within_step = True
                 self._step_data = step_data
-                self._step_start_time = time.time()
+                self._step_start_time = compute_start_time = time.time()
 
                 self.events.fire(EventKeys.BEFORE_STEP, self)
                 try:
@@ -722,6 +981,11 @@ class TrainLoop(DisposableContext):
                     break
                 self.events.reverse_fire(EventKeys.AFTER_STEP, self)
 
+                if self._throughput_metrics:
+                    self._commit_throughput_metrics(
+                        data_time, time.time() - compute_start_time,
+                        step_data
+                    )
                 self._commit_step_stop_time()
         finally:
             self._within_step = False
@@ -796,7 +1060,12 @@ class TrainLoop(DisposableContext):
                     self._is_best_valid_metric = True
 
                     # early-stopping save variables
-                    if self._early_stopping_saver is not None:
+                    if self._early_stopping_snapshot is not None:
+                        self._early_stopping_snapshot.take()
+                        self._early_stopping_snapshot_step = self.step
+                        self._early_stopping_snapshot_saved = False
+                        self._save_early_stopping_snapshot()
+                    elif self._early_stopping_saver is not None:
                         self._early_stopping_saver.save(global_step=self.step)
                 else:
                     self._is_best_valid_metric = False
@@ -840,9 +1109,40 @@ class TrainLoop(DisposableContext):
                 or serialized summary.
         """
         self._require_entered()
-        self._summary_writer.add_summary(summary, global_step=self.step)
+        if self._async_summary_writer is not None:
+            self._async_summary_writer.add_summary(
+                summary, global_step=self.step)
+        else:
+            self._summary_writer.add_summary(summary, global_step=self.step)
         self.events.fire(EventKeys.SUMMARY_ADDED, self, summary)
 
+    def add_run_metadata(self, run_metadata, tag=None):
+        """
+        Add the run metadata of a traced ``session.run``, with ``self.step``
+        as `global_step`.
+
+        The Chrome trace file and the operation statistics will be written
+        to :attr:`profile_dir` (see :func:`save_step_profile`), and the run
+        metadata will be added to the summary writer, such that it can be
+        viewed in the graph page of TensorBoard.
+
+        Args:
+            run_metadata (tf.RunMetadata): The run metadata.
+            tag (str): The tag of the run metadata.  If not specified,
+                will use ``'step_{}'.format(self.step)``.
+        """
+        self._require_entered()
+        if tag is None:
+            tag = 'step_{}'.format(self.step)
+        if self._profile_dir is not None:
+            save_step_profile(run_metadata, self._profile_dir, tag)
+        if self._async_summary_writer is not None:
+            self._async_summary_writer.add_run_metadata(
+                run_metadata, tag, global_step=self.step)
+        elif self._summary_writer is not None:
+            self._summary_writer.add_run_metadata(
+                run_metadata, tag, global_step=self.step)
+
     def get_eta(self):
         """
         Get the estimated time ahead (ETA).
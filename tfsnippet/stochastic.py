@@ -1,7 +1,8 @@
 import tensorflow as tf
 
 from tfsnippet.utils import (TensorWrapper, register_tensor_wrapper_class,
-                             validate_n_samples_arg, is_tensor_object)
+                             validate_n_samples_arg, is_tensor_object,
+                             is_in_control_flow_context)
 
 __all__ = ['StochasticTensor']
 
@@ -70,6 +71,9 @@ class StochasticTensor(TensorWrapper):
         self._self_flow_origin = flow_origin
         self._self_log_prob = log_prob
         self._self_prob = None
+        # {group_ndims: log_prob} for constant `group_ndims` other than the
+        # configured one
+        self._self_log_prob_cache = {}
 
     def __repr__(self):
         return 'StochasticTensor({!r})'.format(self.tensor)
@@ -154,10 +158,66 @@ class StochasticTensor(TensorWrapper):
         """
         return self._self_flow_origin
 
+    def _get_cached_log_prob(self, group_ndims):
+        # find the cached log-densities with the largest constant
+        # `group_ndims` not greater than the specified one
+        candidates = list(self._self_log_prob_cache.items())
+        if self._self_log_prob is not None and \
+                not is_tensor_object(self.group_ndims):
+            candidates.append((self.group_ndims, self._self_log_prob))
+        candidates = [(k, v) for k, v in candidates if k <= group_ndims]
+        if candidates:
+            return max(candidates, key=lambda c: c[0])
+        return None, None
+
+    def _derive_log_prob(self, group_ndims, name):
+        from tfsnippet.distributions import (reduce_group_ndims,
+                                             FlowDistributionDerivedTensor)
+
+        # dynamic `group_ndims` cannot be derived from the cached log-densities
+        if is_tensor_object(group_ndims):
+            return self.distribution.log_prob(
+                self.tensor, group_ndims, name=name)
+
+        base_ndims, log_p = self._get_cached_log_prob(group_ndims)
+        if log_p is None:
+            # compute the log-densities of each element, which can be
+            # reduced to any other constant `group_ndims` afterwards
+            base_ndims = 0
+            log_p = self.distribution.log_prob(self.tensor, 0, name=name)
+            if is_in_control_flow_context():
+                pass  # cannot be used outside of the control flow context
+            elif not is_tensor_object(self.group_ndims) and \
+                    self.group_ndims == 0:
+                self._self_log_prob = log_p
+            else:
+                self._self_log_prob_cache[0] = log_p
+
+        if base_ndims < group_ndims:
+            with tf.name_scope(name,
+                               default_name='StochasticTensor.log_prob'):
+                reduced = reduce_group_ndims(
+                    tf.reduce_sum, log_p, group_ndims - base_ndims)
+            if isinstance(log_p, FlowDistributionDerivedTensor):
+                # copy the `flow origin` information to the reduced tensor
+                reduced = FlowDistributionDerivedTensor(
+                    reduced, flow_origin=log_p.flow_origin)
+            log_p = reduced
+        return log_p
+
     def log_prob(self, group_ndims=None, name=None):
         """
         Compute the log-densities of this :class:`StochasticTensor`.
 
+        The log-densities are cached for the configured `group_ndims` and
+        for each constant `group_ndims`.  The log-densities of a constant
+        `group_ndims` are derived by reducing the cached log-densities of
+        a smaller `group_ndims` if any, instead of being computed by the
+        distribution again.  The log-densities of other `group_ndims` than
+        the configured one are not cached inside a control flow context
+        (e.g., the body of ``tf.while_loop``), since they cannot be used
+        outside of it.
+
         Args:
             group_ndims (int or tf.Tensor): If specified, overriding the
                 configured `group_ndims`.
@@ -168,13 +228,19 @@ class StochasticTensor(TensorWrapper):
         """
         if group_ndims is None or group_ndims == self.group_ndims:
             if self._self_log_prob is None:
-                self._self_log_prob = \
-                    self.distribution.log_prob(
-                        self.tensor, self.group_ndims, name=name)
+                self._self_log_prob = self._derive_log_prob(
+                    self.group_ndims, name=name)
             return self._self_log_prob
+        elif is_tensor_object(group_ndims):
+            return self._derive_log_prob(group_ndims, name=name)
         else:
-            return self.distribution.log_prob(
-                self.tensor, group_ndims, name=name)
+            group_ndims = int(group_ndims)
+            if group_ndims not in self._self_log_prob_cache:
+                log_p = self._derive_log_prob(group_ndims, name=name)
+                if is_in_control_flow_context():
+                    return log_p
+                self._self_log_prob_cache[group_ndims] = log_p
+            return self._self_log_prob_cache[group_ndims]
 
     def prob(self, group_ndims=None, name=None):
         """
@@ -205,8 +271,7 @@ class StochasticTensor(TensorWrapper):
             return self._self_prob
         else:
             with tf.name_scope(name, default_name='StochasticTensor.prob'):
-                log_p = self.distribution.log_prob(self.tensor, group_ndims)
-                p = compute_prob(log_p)
+                p = compute_prob(self.log_prob(group_ndims))
             return p
 
 
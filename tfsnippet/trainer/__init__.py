@@ -1,13 +1,16 @@
 from .base_trainer import *
+from .distributed import *
 from .dynamic_values import *
 from .evaluator import *
 from .feed_dict import *
+from .gradient_accumulator import *
 from .loss_trainer import *
 from .trainer import *
 from .validator import *
 
 __all__ = [
-    'AnnealingScalar', 'BaseTrainer', 'DynamicValue', 'Evaluator',
-    'LossTrainer', 'Trainer', 'Validator', 'auto_batch_weight',
-    'merge_feed_dict', 'resolve_feed_dict',
+    'AnnealingScalar', 'BaseTrainer', 'DistributedContext', 'DynamicValue',
+    'Evaluator', 'GradientAccumulator', 'LossTrainer', 'Trainer', 'Validator',
+    'auto_batch_weight', 'merge_feed_dict', 'resolve_feed_dict',
+    'run_distributed',
 ]
@@ -30,6 +30,85 @@ class OnEveryFewCalls(object):
         return '{}:{}:{}'.format(self.callback, self.key, self.freq)
 
 
+class StepEventScheduler(object):
+    """
+    Scheduler of a step event of :class:`BaseTrainer`.
+
+    If all the handlers of the event are hooks registered by methods like
+    :meth:`BaseTrainer.evaluate_after_steps`, the scheduler computes the
+    next step at which any of these hooks is due.  Then the event is not
+    dispatched at all until that step, and only the due hooks are called at
+    that step.  Otherwise the event is fired as usual.
+
+    The schedule is re-computed whenever the handlers of the event have
+    been changed, or the step counter is out of the scheduled range.
+    """
+
+    def __init__(self, events, event_key, reverse=False):
+        """
+        Construct a new :class:`StepEventScheduler`.
+
+        Args:
+            events (EventSource): The event source.
+            event_key (str): The key of the step event.
+            reverse (bool): Whether or not to call the handlers in reversed
+                order of registration? (default :obj:`False`)
+        """
+        self._events = events
+        self._event_key = event_key
+        self._reverse = reverse
+        self._handlers = None  # the handlers the schedule is computed from
+        self._hooks = None  # the step hooks, or None if not schedulable
+        self._start_step = None  # the step where the schedule starts
+        self._next_step = None  # the next step where any hook is due
+
+    def _compile(self, handlers):
+        self._handlers = handlers
+        if all(isinstance(h, OnEveryFewCalls) and h.key == 'step'
+               for h in handlers):
+            self._hooks = tuple((h.freq, h.callback) for h in handlers)
+        else:
+            self._hooks = None
+        self._start_step = self._next_step = None
+
+    def _schedule(self, step):
+        self._start_step = step
+        self._next_step = min((step + freq - 1) // freq * freq
+                              for freq, _ in self._hooks)
+
+    def fire(self, trainer):
+        """
+        Fire the event if any of the handlers is due at the current step.
+
+        The step counter is read from ``trainer.loop.step`` at the time
+        this method is called, just as the handlers would do.
+
+        Args:
+            trainer (BaseTrainer): The trainer, passed to the handlers.
+        """
+        handlers = self._events.get_event_handlers(
+            self._event_key, reverse=self._reverse)
+        if handlers is not self._handlers:
+            self._compile(handlers)
+        if not handlers:
+            return
+
+        if self._hooks is None:
+            for h in handlers:
+                h(trainer)
+            return
+
+        step = trainer.loop.step
+        if self._next_step is None or \
+                not (self._start_step <= step <= self._next_step):
+            self._schedule(step)
+        if step == self._next_step:
+            for freq, callback in self._hooks:
+                if step % freq == 0:
+                    callback()
+            self._schedule(step + 1)
+
+
 @DocInherit
 class BaseTrainer(object):
     """
@@ -77,6 +156,9 @@ class BaseTrainer(object):
         trainer.evaluate_after_epochs(
             lambda: print('after epoch callback'), 10)  # run every 10 epochs
         trainer.log_after_steps(1000)  # call `loop.print_logs` every 1000 steps
+
+    If all the handlers of a step event are such hooks, the event will not
+    be dispatched at all at the steps where none of these hooks is due.
     """
 
     def __init__(self, loop):
@@ -137,6 +219,19 @@ class BaseTrainer(object):
             ensure_variables_initialized()
             self.loop.print_training_summary()
 
+            # the schedulers of step events, which skip the steps where
+            # none of the event handlers is due
+            before_step = StepEventScheduler(
+                self.events, EventKeys.BEFORE_STEP)
+            step_evaluation = StepEventScheduler(
+                self.events, EventKeys.STEP_EVALUATION)
+            step_annealing = StepEventScheduler(
+                self.events, EventKeys.STEP_ANNEALING)
+            step_logging = StepEventScheduler(
+                self.events, EventKeys.STEP_LOGGING)
+            after_step = StepEventScheduler(
+                self.events, EventKeys.AFTER_STEP, reverse=True)
+
             for _ in self.loop.iter_epochs():
                 # trigger before epoch event
                 self.events.fire(EventKeys.BEFORE_EPOCH, self)
@@ -144,16 +239,16 @@ class BaseTrainer(object):
                 # run steps of this epoch
                 for payload in self._iter_steps():
                     # trigger before step event
-                    self.events.fire(EventKeys.BEFORE_STEP, self)
+                    before_step.fire(self)
 
                     # run the step
                     self._run_step(session, payload)
 
                     # trigger after step events
-                    self.events.fire(EventKeys.STEP_EVALUATION, self)
-                    self.events.fire(EventKeys.STEP_ANNEALING, self)
-                    self.events.fire(EventKeys.STEP_LOGGING, self)
-                    self.events.reverse_fire(EventKeys.AFTER_STEP, self)
+                    step_evaluation.fire(self)
+                    step_annealing.fire(self)
+                    step_logging.fire(self)
+                    after_step.fire(self)
 
                 # trigger after epoch events
                 self.events.fire(EventKeys.EPOCH_EVALUATION, self)
@@ -0,0 +1,444 @@
+import multiprocessing as mp
+import socket
+import time
+import traceback
+from contextlib import contextmanager
+from logging import getLogger
+
+import six
+import tensorflow as tf
+
+if six.PY2:
+    from Queue import Empty
+else:
+    from queue import Empty
+
+__all__ = ['DistributedContext', 'run_distributed']
+
+
+def _pick_local_ports(count):
+    # bind all the sockets before closing any of them, such that the
+    # picked ports are distinct
+    sockets = []
+    try:
+        for _ in range(count):
+            s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            s.bind(('127.0.0.1', 0))
+            sockets.append(s)
+        return [s.getsockname()[1] for s in sockets]
+    finally:
+        for s in sockets:
+            s.close()
+
+
+def _make_local_cluster_spec(num_workers, num_ps):
+    ports = _pick_local_ports(num_ps + num_workers)
+    return {
+        'ps': ['127.0.0.1:{}'.format(p) for p in ports[:num_ps]],
+        'worker': ['127.0.0.1:{}'.format(p) for p in ports[num_ps:]],
+    }
+
+
+class DistributedContext(object):
+    """
+    The context of a worker in between-graph data-parallel training.
+
+    Each worker process builds its own copy of the graph, with the variables
+    placed on the parameter servers by :meth:`replica_device_setter`, and
+    trains on its own shard of the data by :meth:`shard`.  The updates can
+    be either synchronous, where the gradients of all the workers are
+    aggregated for each update by ``tf.train.SyncReplicasOptimizer``, or
+    asynchronous, where each worker updates the variables independently.
+
+    A worker function, which is usually launched by :func:`run_distributed`,
+    might look like::
+
+        def train_worker(ctx, train_x):
+            with tf.device(ctx.replica_device_setter()):
+                input_x = tf.placeholder(...)
+                loss = ...
+                global_step = tf.train.get_or_create_global_step()
+                optimizer = ctx.wrap_optimizer(tf.train.AdamOptimizer())
+                train_op = optimizer.minimize(loss, global_step=global_step)
+
+            train_flow = DataFlow.arrays([train_x], batch_size=64)
+            with ctx.session(), \\
+                    spt.TrainLoop(params, max_epoch=10) as loop:
+                trainer = spt.Trainer(
+                    loop, train_op, [input_x], ctx.shard(train_flow))
+                trainer.run()
+    """
+
+    def __init__(self, cluster_spec, task_index, sync=True):
+        """
+        Construct a new :class:`DistributedContext`.
+
+        Args:
+            cluster_spec (dict[str, list[str]] or tf.train.ClusterSpec):
+                The cluster specification, with a "ps" job and a "worker"
+                job.
+            task_index (int): The index of this worker task.
+            sync (bool): Whether or not to use synchronous updates?
+                (default :obj:`True`)
+        """
+        cluster_spec = tf.train.ClusterSpec(cluster_spec)
+        num_workers = cluster_spec.num_tasks('worker')
+        task_index = int(task_index)
+        if task_index < 0 or task_index >= num_workers:
+            raise ValueError('`task_index` must be within [0, {}): got {}'.
+                             format(num_workers, task_index))
+
+        self._cluster_spec = cluster_spec
+        self._task_index = task_index
+        self._num_workers = num_workers
+        self._sync = bool(sync)
+        self._server = None
+        self._sync_optimizer = None
+
+    @property
+    def cluster_spec(self):
+        """
+        Get the cluster specification.
+
+        Returns:
+            tf.train.ClusterSpec: The cluster specification.
+        """
+        return self._cluster_spec
+
+    @property
+    def task_index(self):
+        """Get the index of this worker task."""
+        return self._task_index
+
+    @property
+    def num_workers(self):
+        """Get the total number of workers."""
+        return self._num_workers
+
+    @property
+    def is_chief(self):
+        """
+        Whether or not this worker is the chief?
+
+        The chief worker (the worker with index 0) initializes the variables.
+        It is also expected to be the only worker which saves checkpoints
+        and writes summaries.
+        """
+        return self._task_index == 0
+
+    @property
+    def sync(self):
+        """Whether or not to use synchronous updates?"""
+        return self._sync
+
+    @property
+    def session_config(self):
+        """
+        Get the session config of this worker, which restricts the worker to
+        communicate with only the parameter servers and itself.
+
+        Returns:
+            tf.ConfigProto: The session config.
+        """
+        return tf.ConfigProto(device_filters=[
+            '/job:ps', '/job:worker/task:{}'.format(self._task_index)])
+
+    @property
+    def server(self):
+        """
+        Get the TensorFlow server of this worker, which will be started
+        at the first access of this property.
+
+        Returns:
+            tf.train.Server: The TensorFlow server.
+        """
+        if self._server is None:
+            self._server = tf.train.Server(
+                self._cluster_spec, job_name='worker',
+                task_index=self._task_index, config=self.session_config
+            )
+        return self._server
+
+    def replica_device_setter(self):
+        """
+        Get the device function, which places the variables on the parameter
+        servers, and the other operations on this worker.
+
+        Returns:
+            The device function, to be used with ``tf.device(...)``.
+        """
+        return tf.train.replica_device_setter(
+            worker_device='/job:worker/task:{}'.format(self._task_index),
+            cluster=self._cluster_spec
+        )
+
+    def wrap_optimizer(self, optimizer):
+        """
+        Wrap the optimizer for the update mode of this context.
+
+        For synchronous updates, the optimizer is wrapped by
+        ``tf.train.SyncReplicasOptimizer``, which aggregates the gradients
+        of all the workers for each update.  Its `apply_gradients` (or
+        `minimize`) must be called with `global_step`.  For asynchronous
+        updates, the optimizer is returned as-is.
+
+        Args:
+            optimizer (tf.train.Optimizer): The optimizer.
+
+        Returns:
+            tf.train.Optimizer: The wrapped optimizer.
+        """
+        if not self._sync:
+            return optimizer
+        if self._sync_optimizer is not None:
+            raise RuntimeError('`wrap_optimizer` can only be called once in '
+                               'synchronous mode.')
+        self._sync_optimizer = tf.train.SyncReplicasOptimizer(
+            optimizer,
+            replicas_to_aggregate=self._num_workers,
+            total_num_replicas=self._num_workers
+        )
+        return self._sync_optimizer
+
+    def shard(self, data_flow):
+        """
+        Take the shard of `data_flow` for this worker.
+
+        Args:
+            data_flow (DataFlow): The data flow.
+
+        Returns:
+            DataFlow: The data flow of this worker.
+        """
+        return data_flow.shard(self._num_workers, self._task_index)
+
+    @contextmanager
+    def session(self, finish_timeout=600.):
+        """
+        Open a session connected to the server of this worker, and set it
+        as the default session.
+
+        The chief worker initializes the variables, while the other workers
+        wait until the variables have been initialized.  Thus the operations
+        of this context should be created before entering this context.
+
+        In synchronous mode, each worker waits for a token from the chief
+        worker after each update, and a worker with more steps than the
+        others would wait forever once the others have exited.  Thus when
+        exiting this context, the chief worker keeps supplying tokens until
+        all the workers have exited this context, or until `finish_timeout`
+        seconds have elapsed.
+
+        Args:
+            finish_timeout (float): The maximum number of seconds for the
+                chief worker to wait for the other workers to exit this
+                context.  If :obj:`None`, wait forever. (default 600)
+
+        Yields:
+            tf.Session: The session.
+        """
+        hooks = []
+        finish_op = num_finished = tokens_op = None
+        if self._sync_optimizer is not None:
+            hooks.append(
+                self._sync_optimizer.make_session_run_hook(self.is_chief))
+
+            # the number of workers which have exited this context
+            with tf.device(self.replica_device_setter()):
+                num_finished = tf.Variable(
+                    0, dtype=tf.int32, trainable=False,
+                    name='num_finished_replicas'
+                )
+            finish_op = tf.assign_add(num_finished, 1)
+            if self.is_chief:
+                tokens_op = self._sync_optimizer.get_init_tokens_op(
+                    num_tokens=self._num_workers)
+        for hook in hooks:
+            hook.begin()
+
+        session_manager = tf.train.SessionManager(
+            local_init_op=tf.local_variables_initializer(),
+            ready_op=tf.report_uninitialized_variables(),
+            ready_for_local_init_op=tf.report_uninitialized_variables(
+                tf.global_variables()),
+            recovery_wait_secs=1
+        )
+        if self.is_chief:
+            session = session_manager.prepare_session(
+                self.server.target, init_op=tf.global_variables_initializer(),
+                config=self.session_config
+            )
+        else:
+            session = session_manager.wait_for_session(
+                self.server.target, config=self.session_config)
+
+        coord = tf.train.Coordinator()
+        error_raised = False
+        try:
+            for hook in hooks:
+                hook.after_create_session(session, coord)
+            with session.as_default():
+                yield session
+        except BaseException:
+            error_raised = True
+            raise
+        finally:
+            try:
+                if finish_op is not None:
+                    session.run(finish_op)
+                if tokens_op is not None:
+                    self._supply_tokens(session, coord, tokens_op,
+                                        num_finished, finish_timeout)
+                coord.request_stop()
+                coord.join(stop_grace_period_secs=5, ignore_live_threads=True)
+            except Exception:
+                # do not mask the error raised within this context
+                if not error_raised:
+                    raise
+                getLogger(__name__).warning(
+                    'Failed to finish the session of worker %s.',
+                    self._task_index, exc_info=True
+                )
+            finally:
+                coord.request_stop()
+                session.close()
+
+    def _supply_tokens(self, session, coord, tokens_op, num_finished,
+                       timeout):
+        # keep the token queue supplied, until all the workers have
+        # finished their steps
+        deadline = None if timeout is None else time.time() + timeout
+        while not coord.should_stop() and \
+                session.run(num_finished) < self._num_workers:
+            if deadline is not None and time.time() >= deadline:
+                getLogger(__name__).warning(
+                    'Not all the workers have finished within %s seconds, '
+                    'stop waiting for them.', timeout
+                )
+                break
+            session.run(tokens_op)
+            time.sleep(.1)
+
+
+def _ps_main(cluster_spec, task_index):
+    server = tf.train.Server(tf.train.ClusterSpec(cluster_spec),
+                             job_name='ps', task_index=task_index)
+    server.join()
+
+
+def _worker_main(queue, cluster_spec, task_index, sync, worker_fn, args,
+                 kwargs):
+    try:
+        ctx = DistributedContext(cluster_spec, task_index, sync=sync)
+        queue.put((task_index, 1, worker_fn(ctx, *args, **kwargs)))
+    except Exception:
+        queue.put((task_index, 0, traceback.format_exc()))
+
+
+def run_distributed(worker_fn, num_workers, sync=True, args=(), kwargs=None,
+                    num_ps=1, timeout=None):
+    """
+    Run between-graph data-parallel training with local worker processes
+    and parameter servers, which communicate via the loopback interface.
+
+    Each worker process calls ``worker_fn(ctx, *args, **kwargs)``, where
+    `ctx` is the :class:`DistributedContext` of that worker.  The processes
+    are started by the "spawn" method (except on Python 2), thus
+    `worker_fn`, `args` and `kwargs` must be picklable, e.g., `worker_fn`
+    should be a module-level function.
+
+    Args:
+        worker_fn ((DistributedContext, \\*args, \\**kwargs) -> any): The
+            worker function.  Its return value should be picklable.
+        num_workers (int): The number of worker processes.
+        sync (bool): Whether or not to use synchronous updates?
+            (default :obj:`True`)
+        args (tuple): The positional arguments for `worker_fn`.
+        kwargs (dict): The named arguments for `worker_fn`.
+        num_ps (int): The number of parameter server processes. (default 1)
+        timeout (float): The maximum number of seconds to wait for all the
+            workers to finish.  If not specified, wait forever.
+
+    Returns:
+        list: The return values of `worker_fn` in each worker, ordered by
+            the worker indices.
+
+    Raises:
+        RuntimeError: If any worker failed, or if the workers have not
+            finished within `timeout` seconds.
+    """
+    num_workers = int(num_workers)
+    num_ps = int(num_ps)
+    if num_workers < 1:
+        raise ValueError('`num_workers` must be at least 1: got {}'.
+                         format(num_workers))
+    if num_ps < 1:
+        raise ValueError('`num_ps` must be at least 1: got {}'.format(num_ps))
+
+    if timeout is not None:
+        timeout = float(timeout)
+
+    cluster_spec = _make_local_cluster_spec(num_workers, num_ps)
+    mp_ctx = mp if six.PY2 else mp.get_context('spawn')
+    queue = mp_ctx.Queue()
+    ps_processes = [
+        mp_ctx.Process(target=_ps_main, args=(cluster_spec, i))
+        for i in range(num_ps)
+    ]
+    worker_processes = [
+        mp_ctx.Process(
+            target=_worker_main,
+            args=(queue, cluster_spec, i, sync, worker_fn, tuple(args),
+                  dict(kwargs or ()))
+        )
+        for i in range(num_workers)
+    ]
+
+    def check_timeout(running):
+        if deadline is not None and time.time() >= deadline:
+            raise RuntimeError(
+                'The workers have not finished within {} seconds: workers '
+                '{} are still running.'.format(timeout, sorted(running))
+            )
+
+    deadline = None if timeout is None else time.time() + timeout
+    try:
+        for p in ps_processes + worker_processes:
+            p.daemon = True
+            p.start()
+
+        results = [None] * num_workers
+        pending = set(range(num_workers))
+        while pending:
+            check_timeout(pending)
+            try:
+                task_index, succeeded, value = queue.get(timeout=1)
+            except Empty:
+                for i in pending:
+                    if not worker_processes[i].is_alive() and queue.empty():
+                        raise RuntimeError(
+                            'Worker {} exited unexpectedly with exit code '
+                            '{}.'.format(i, worker_processes[i].exitcode)
+                        )
+                continue
+            if not succeeded:
+                raise RuntimeError(
+                    'Worker {} failed, the traceback of sub-process is:\n'
+                    '  {}'.format(task_index, '\n  '.join(value.split('\n')))
+                )
+            results[task_index] = value
+            pending.discard(task_index)
+
+        for i, p in enumerate(worker_processes):
+            while p.is_alive():
+                check_timeout([i])
+                p.join(1)
+        return results
+
+    finally:
+        # the parameter servers never exit by themselves
+        for p in ps_processes + worker_processes:
+            if p.is_alive():
+                p.terminate()
+            if p.pid is not None:
+                p.join()
@@ -6,7 +6,8 @@ import six
 import tensorflow as tf
 
 from tfsnippet.dataflows import DataFlow
-from tfsnippet.utils import get_default_session_or_error, EventSource
+from tfsnippet.utils import (get_default_session_or_error, EventSource,
+                             LogSumExpAccumulator)
 from tfsnippet.scaffold import TrainLoop, EventKeys
 
 from .feed_dict import resolve_feed_dict, merge_feed_dict
@@ -51,7 +52,8 @@ class Evaluator(object):
 
     def __init__(self, loop, metrics, inputs, data_flow, feed_dict=None,
                  time_metric_name='eval_time',
-                 batch_weight_func=auto_batch_weight):
+                 batch_weight_func=auto_batch_weight,
+                 log_mean_exp_metrics=None):
         """
         Construct a new :class:`Evaluator`.
 
@@ -80,6 +82,14 @@ class Evaluator(object):
                 to compute the metric weight for each mini-batch.  If
                 :obj:`None`, will use 1. as the metric weight.
                 (default :func:`auto_batch_weight`)
+            log_mean_exp_metrics (Iterable[str]): The names of the metrics,
+                which are the log-weights of importance sampling, with the
+                sample axis as the first axis, e.g., of shape
+                ``(n_samples, batch_size)``.  Each of these metrics is
+                reduced by log-mean-exp over the sample axis for each data
+                point, e.g., giving the importance sampled log-likelihood
+                :math:`\\log p(x)`, and then averaged over all the data
+                points, instead of the weighted average of the mini-batches.
         """
         if not isinstance(metrics, (dict, OrderedDict)):
             metrics = {loop.valid_metric_name: metrics}
@@ -88,8 +98,15 @@ class Evaluator(object):
              tf.convert_to_tensor(v) if not isinstance(v, tf.Tensor) else v)
             for k, v in six.iteritems(metrics)
         ])
-        for v in six.itervalues(metrics):
-            if v.get_shape() is not None and len(v.get_shape()) != 0:
+        log_mean_exp_metrics = tuple(str(k) for k in
+                                     (log_mean_exp_metrics or ()))
+        for k in log_mean_exp_metrics:
+            if k not in metrics:
+                raise KeyError('Log-mean-exp metric is not one of the '
+                               'metrics: {!r}'.format(k))
+        for k, v in six.iteritems(metrics):
+            if k not in log_mean_exp_metrics and \
+                    v.get_shape() is not None and len(v.get_shape()) != 0:
                 raise ValueError('Metric is not a scalar tensor: {!r}'.
                                  format(v))
 
@@ -104,6 +121,7 @@ class Evaluator(object):
         self._feed_dict = dict(feed_dict or ())
         self._time_metric_name = time_metric_name
         self._batch_weight_func = batch_weight_func
+        self._log_mean_exp_metrics = log_mean_exp_metrics
         self._last_metrics_dict = {}  # store the metrics of last evaluation
 
     @property
@@ -176,6 +194,16 @@ class Evaluator(object):
         """Get the function to compute the metric weight for each mini-batch."""
         return self._batch_weight_func
 
+    @property
+    def log_mean_exp_metrics(self):
+        """
+        Get the names of the metrics to be reduced by log-mean-exp.
+
+        Returns:
+            tuple[str]: The names of the log-mean-exp metrics.
+        """
+        return self._log_mean_exp_metrics
+
     @property
     def last_metrics_dict(self):
         """
@@ -212,6 +240,15 @@ class Evaluator(object):
         metric_values = []
         metric_weights = []
 
+        # the metrics to be averaged, and the metrics to be reduced by
+        # log-mean-exp, identified by their indices in `metric_names`
+        avg_indices = [i for i, k in enumerate(metric_names)
+                       if k not in self._log_mean_exp_metrics]
+        lme_indices = [i for i, k in enumerate(metric_names)
+                       if k in self._log_mean_exp_metrics]
+        lme_sums = {i: 0. for i in lme_indices}
+        lme_counts = {i: 0 for i in lme_indices}
+
         with timeit():
             # trigger before evaluation event
             self.events.fire(EventKeys.BEFORE_EXECUTION, self)
@@ -235,7 +272,8 @@ class Evaluator(object):
 
                 # run the mini-batch
                 batch_values = self._run_batch(session, feed_dict)
-                for i, v in enumerate(batch_values):
+                for i in avg_indices:
+                    v = batch_values[i]
                     if len(np.asarray(v).shape) != 0:  # pragma: no cover
                         raise ValueError(
                             'Metric is not a scalar: tensor {!r}, value {!r}.'.
@@ -243,19 +281,34 @@ class Evaluator(object):
                         )
 
                 # accumulate the metrics
-                metric_values.append(np.asarray(batch_values))
+                metric_values.append(
+                    np.asarray([batch_values[i] for i in avg_indices]))
+                for i in lme_indices:
+                    # log-mean-exp over the sample axis for each data point
+                    v = np.atleast_1d(batch_values[i])
+                    acc = LogSumExpAccumulator(shape=v.shape[1:])
+                    acc.collect(v)
+                    lme_sums[i] += np.sum(acc.log_mean_exp)
+                    lme_counts[i] += np.size(acc.log_mean_exp)
 
             # now merge all batch metrics and do logging
             if metric_values:
-                metric_values = np.average(
-                    np.stack(metric_values, axis=0),
-                    axis=0,
-                    weights=np.asarray(metric_weights),
-                )
-                assert(len(metric_names) == len(metric_values))
-                self._last_metrics_dict = metrics_dict = {
-                    k: v for k, v in zip(metric_names, metric_values)
-                }
+                metrics_dict = {}
+                if avg_indices:
+                    avg_values = np.average(
+                        np.stack(metric_values, axis=0),
+                        axis=0,
+                        weights=np.asarray(metric_weights),
+                    )
+                    assert(len(avg_indices) == len(avg_values))
+                    metrics_dict.update({
+                        metric_names[i]: v
+                        for i, v in zip(avg_indices, avg_values)
+                    })
+                for i in lme_indices:
+                    metrics_dict[metric_names[i]] = \
+                        lme_sums[i] / max(lme_counts[i], 1)
+                self._last_metrics_dict = metrics_dict
                 self.loop.collect_metrics(metrics_dict)
 
             # trigger after evaluation event
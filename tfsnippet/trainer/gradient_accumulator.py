@@ -0,0 +1,159 @@
+import tensorflow as tf
+
+from tfsnippet.utils import VarScopeObject, reopen_variable_scope
+
+__all__ = ['GradientAccumulator']
+
+
+class GradientAccumulator(VarScopeObject):
+    """
+    Accumulates the gradients of several micro-batches, and applies the
+    averaged gradients by an optimizer at once.
+
+    This enables training with a large effective batch size, while the
+    peak memory is bounded by the size of each micro-batch.  It is
+    usually used along with :class:`Trainer`, for example::
+
+        optimizer = tf.train.AdamOptimizer(learning_rate)
+        grads = optimizer.compute_gradients(loss, var_list=params)
+        accumulator = spt.GradientAccumulator(optimizer, grads)
+
+        with spt.TrainLoop(params, max_epoch=10) as loop:
+            trainer = spt.Trainer(
+                loop, accumulator, [input_x], train_data,
+                metrics={'loss': loss}, accumulate_steps=4
+            )
+            trainer.run()
+
+    Each run of :attr:`accumulate_op` adds the gradients of the fed
+    micro-batch to the accumulator variables, and a run of :attr:`apply_op`
+    applies the average of the accumulated gradients, then resets the
+    accumulators.
+    """
+
+    def __init__(self, optimizer, grads_and_vars, global_step=None,
+                 name=None, scope=None):
+        """
+        Construct a new :class:`GradientAccumulator`.
+
+        Args:
+            optimizer (tf.train.Optimizer): The optimizer.
+            grads_and_vars (list[(tf.Tensor, tf.Variable)]): The gradients
+                and variables, e.g., obtained by
+                ``optimizer.compute_gradients(loss)``.  The pairs whose
+                gradients are :obj:`None` are ignored.
+            global_step (tf.Variable): The global step variable, to be
+                increased by ``optimizer.apply_gradients``.  (optional)
+            name (str): Default name of the variable scope.  Will be
+                uniquified.  If not specified, generate one according to
+                the class name.
+            scope (str): The name of the variable scope.
+        """
+        grads_and_vars = [(g, v) for g, v in grads_and_vars if g is not None]
+        if not grads_and_vars:
+            raise ValueError('No gradient is given.')
+
+        super(GradientAccumulator, self).__init__(name=name, scope=scope)
+        self._optimizer = optimizer
+        self._variables = [v for _, v in grads_and_vars]
+
+        with reopen_variable_scope(self.variable_scope):
+            # the accumulator variables are not trainable, and are initialized
+            # along with other global variables
+            self._accumulators = []
+            for i, (g, v) in enumerate(grads_and_vars):
+                self._accumulators.append(tf.get_variable(
+                    'accumulator_{}'.format(i),
+                    shape=v.get_shape(),
+                    dtype=v.dtype.base_dtype,
+                    initializer=tf.zeros_initializer(),
+                    trainable=False
+                ))
+            self._count = tf.get_variable(
+                'count', shape=(), dtype=tf.float32,
+                initializer=tf.zeros_initializer(), trainable=False
+            )
+
+            with tf.name_scope('accumulate'):
+                accumulate_ops = []
+                for acc, (g, v) in zip(self._accumulators, grads_and_vars):
+                    if isinstance(g, tf.IndexedSlices):
+                        accumulate_ops.append(
+                            tf.scatter_add(acc, g.indices, g.values))
+                    else:
+                        accumulate_ops.append(tf.assign_add(acc, g))
+                accumulate_ops.append(tf.assign_add(self._count, 1.))
+                self._accumulate_op = tf.group(*accumulate_ops)
+
+            with tf.name_scope('reset'):
+                self._reset_op = tf.group(*(
+                    [tf.assign(acc, tf.zeros_like(acc))
+                     for acc in self._accumulators] +
+                    [tf.assign(self._count, 0.)]
+                ))
+
+            with tf.name_scope('apply'):
+                count = tf.maximum(self._count, 1.)
+                averaged = [
+                    (acc / tf.cast(count, dtype=acc.dtype.base_dtype), v)
+                    for acc, v in zip(self._accumulators, self._variables)
+                ]
+                apply_op = optimizer.apply_gradients(
+                    averaged, global_step=global_step)
+                with tf.control_dependencies([apply_op]):
+                    self._apply_op = tf.group(*(
+                        [tf.assign(acc, tf.zeros_like(acc))
+                         for acc in self._accumulators] +
+                        [tf.assign(self._count, 0.)]
+                    ))
+
+    @property
+    def optimizer(self):
+        """Get the optimizer."""
+        return self._optimizer
+
+    @property
+    def variables(self):
+        """
+        Get the variables to be optimized.
+
+        Returns:
+            list[tf.Variable]: The variables.
+        """
+        return self._variables
+
+    @property
+    def accumulators(self):
+        """
+        Get the accumulator variables, one for each variable to be optimized.
+
+        Returns:
+            list[tf.Variable]: The accumulator variables.
+        """
+        return self._accumulators
+
+    @property
+    def count(self):
+        """Get the variable of the number of accumulated micro-batches."""
+        return self._count
+
+    @property
+    def accumulate_op(self):
+        """
+        Get the operation to add the gradients of the fed micro-batch
+        to the accumulators.
+        """
+        return self._accumulate_op
+
+    @property
+    def apply_op(self):
+        """
+        Get the operation to apply the averaged accumulated gradients,
+        and then reset the accumulators.
+        """
+        return self._apply_op
+
+    @property
+    def reset_op(self):
+        """Get the operation to reset the accumulators."""
+        return self._reset_op
@@ -13,14 +13,16 @@ class LossTrainer(Trainer):
     """
 
     def __init__(self, loop, loss, train_op, inputs, data_flow, feed_dict=None,
-                 metric_name='loss'):
+                 metric_name='loss', accumulate_steps=1,
+                 count_micro_steps=False):
         """
         Construct a new :class:`LossTrainer`.
 
         Args:
             loop (TrainLoop): The training loop object.
             loss (tf.Tensor): The training loss.
-            train_op (tf.Operation): The training operation.
+            train_op (tf.Operation or GradientAccumulator): The training
+                operation, or the gradient accumulator.
             inputs (list[tf.Tensor]): The input placeholders. The number of
                 tensors, and the order of tensors, should both match the arrays
                 of each mini-batch data, provided by `data_flow`.
@@ -30,10 +32,18 @@ class LossTrainer(Trainer):
                 the arrays provided by `data_flow` in each step.
                 (default :obj:`None`)
             metric_name (str): The metric name for collecting training loss.
+            accumulate_steps (int): The number of micro-batches, whose
+                gradients are accumulated for each optimizer step.
+                See :class:`Trainer`.  (default 1)
+            count_micro_steps (bool): Whether or not to count each
+                micro-batch as a step of `loop`?  See :class:`Trainer`.
+                (default :obj:`False`)
         """
         super(LossTrainer, self).__init__(
             loop=loop, train_op=train_op, inputs=inputs, data_flow=data_flow,
-            feed_dict=feed_dict, metrics={metric_name: loss}
+            feed_dict=feed_dict, metrics={metric_name: loss},
+            accumulate_steps=accumulate_steps,
+            count_micro_steps=count_micro_steps
         )
 
     @property
@@ -1,14 +1,29 @@
+import numpy as np
 import six
+import tensorflow as tf
 
 from tfsnippet.scaffold import TrainLoop
-from tfsnippet.utils import is_tensor_object
+from tfsnippet.utils import (is_tensor_object, ensure_variables_initialized,
+                             get_default_session_or_error)
 from .base_trainer import BaseTrainer
 from .feed_dict import resolve_feed_dict, merge_feed_dict
+from .gradient_accumulator import GradientAccumulator
 
 
 __all__ = ['Trainer']
 
 
+class _MicroBatchGroup(list):
+    """
+    The micro-batches of one optimizer step, which reports the total number
+    of examples as `batch_size` to :class:`TrainLoop`.
+    """
+
+    @property
+    def batch_size(self):
+        return sum(len(batch_data[0]) for batch_data in self)
+
+
 class Trainer(BaseTrainer):
     """
     A subclass of :class:`BaseTrainer`, executing a training operation per step.
@@ -60,17 +75,42 @@ class Trainer(BaseTrainer):
             # run the main training loop
             trainer.run()
 
+    The steps listed in ``TrainLoop(profile_steps=...)`` are run with full
+    tracing, and their Chrome trace files and operation statistics are
+    written via :meth:`TrainLoop.add_run_metadata`.
+
+    To train with a large effective batch size under limited memory, the
+    gradients of several micro-batches can be accumulated before being
+    applied, by passing a :class:`GradientAccumulator` as `train_op`::
+
+        grads = optimizer.compute_gradients(loss, var_list=params)
+        accumulator = spt.GradientAccumulator(optimizer, grads)
+        trainer = spt.Trainer(
+            loop, accumulator, [input_x, input_y], train_data,
+            metrics={'loss': loss}, accumulate_steps=4
+        )
+
+    The metrics are then averaged across the micro-batches of each
+    optimizer step.  By default, each step of the training loop runs
+    `accumulate_steps` micro-batches and applies the optimizer once.
+    If `count_micro_steps` is :obj:`True`, each step of the loop runs
+    one micro-batch instead, and the optimizer is applied at every
+    `accumulate_steps` steps.  In both cases, the gradients of the remaining
+    micro-batches are applied at the end of each epoch.
+
     See Also:
         :class:`tfsnippet.trainer.BaseTrainer`
     """
 
     def __init__(self, loop, train_op, inputs, data_flow, feed_dict=None,
-                 metrics=None, summaries=None):
+                 metrics=None, summaries=None, accumulate_steps=1,
+                 count_micro_steps=False):
         """
 
         Args:
             loop (TrainLoop): The training loop object.
-            train_op (tf.Operation): The training operation.
+            train_op (tf.Operation or GradientAccumulator): The training
+                operation, or the gradient accumulator.
             inputs (list[tf.Tensor]): The input placeholders.
                 The number of tensors, and the order of tensors, should
                 both match the arrays of each mini-batch data, provided
@@ -90,10 +130,29 @@ class Trainer(BaseTrainer):
                 of summaries to be run and along with `train_op`, and later
                 to be added to ``loop.summary_writer``.
                 If ``loop.summary_writer`` is None, then no summary will be run.
+                If gradients are accumulated, the summaries will be run along
+                with the last micro-batch of each optimizer step.
+            accumulate_steps (int): The number of micro-batches, whose
+                gradients are accumulated for each optimizer step.
+                If greater than 1, `train_op` must be a
+                :class:`GradientAccumulator`.  (default 1)
+            count_micro_steps (bool): Whether or not to count each
+                micro-batch as a step of `loop`?  If :obj:`False`, each
+                optimizer step is counted as a step of `loop`.
+                (default :obj:`False`)
         """
         if loop.max_epoch is None and loop.max_step is None:
             raise ValueError('At least one of `max_epoch`, `max_step` should '
                              'be configured for `loop`.')
+        accumulate_steps = int(accumulate_steps)
+        if accumulate_steps < 1:
+            raise ValueError('`accumulate_steps` must be at least 1: got {}'.
+                             format(accumulate_steps))
+        if accumulate_steps > 1 and \
+                not isinstance(train_op, GradientAccumulator):
+            raise TypeError('`train_op` must be a `GradientAccumulator` if '
+                            '`accumulate_steps` > 1: got {!r}'.
+                            format(train_op))
         if summaries is not None and is_tensor_object(summaries):
             summaries = [summaries]
         super(Trainer, self).__init__(loop=loop)
@@ -105,6 +164,11 @@ class Trainer(BaseTrainer):
         self._train_op = train_op
         self._metrics = dict(metrics or ())
         self._summaries = list(summaries or ())
+        self._accumulate_steps = accumulate_steps
+        self._count_micro_steps = bool(count_micro_steps)
+
+        # the metric values of the micro-batches not applied yet
+        self._pending_metrics = []
 
     @property
     def inputs(self):
@@ -138,7 +202,7 @@ class Trainer(BaseTrainer):
 
     @property
     def train_op(self):
-        """Get the training operation."""
+        """Get the training operation, or the gradient accumulator."""
         return self._train_op
 
     @property
@@ -151,12 +215,55 @@ class Trainer(BaseTrainer):
         """Get the summaries to be computed along with `train_op`."""
         return self._summaries
 
-    def _iter_steps(self):
-        return self.loop.iter_steps(self.data_flow)
+    @property
+    def accumulate_steps(self):
+        """Get the number of micro-batches for each optimizer step."""
+        return self._accumulate_steps
 
-    def _run_step(self, session, payload):
-        # prepare for the feed dict of this step
-        step, batch_data = payload
+    @property
+    def count_micro_steps(self):
+        """Whether or not to count each micro-batch as a step of `loop`?"""
+        return self._count_micro_steps
+
+    def _is_accumulating(self):
+        return isinstance(self._train_op, GradientAccumulator)
+
+    def run(self):
+        if self._is_accumulating():
+            # discard the gradients left by an interrupted run
+            accumulator = self._train_op
+            ensure_variables_initialized(
+                accumulator.accumulators + [accumulator.count])
+            get_default_session_or_error().run(accumulator.reset_op)
+            self._pending_metrics = []
+        super(Trainer, self).run()
+
+    def _iter_steps(self):
+        if not self._is_accumulating():
+            return self.loop.iter_steps(self.data_flow)
+        elif self._count_micro_steps:
+            return self._iter_micro_steps()
+        else:
+            return self.loop.iter_steps(self._iter_micro_batch_groups())
+
+    def _iter_micro_steps(self):
+        for payload in self.loop.iter_steps(self.data_flow):
+            yield payload
+        if self._pending_metrics:
+            self._apply_gradients(get_default_session_or_error())
+
+    def _iter_micro_batch_groups(self):
+        group = _MicroBatchGroup()
+        for batch_data in self.data_flow:
+            group.append(batch_data)
+            if len(group) >= self._accumulate_steps:
+                yield group
+                group = _MicroBatchGroup()
+        if group:
+            yield group
+
+    def _run_batch(self, session, op, batch_data, run_summaries=True):
+        # prepare for the feed dict of this batch
         feed_dict = resolve_feed_dict(
             merge_feed_dict(
                 self.feed_dict,
@@ -164,22 +271,72 @@ class Trainer(BaseTrainer):
             )
         )
 
-        # run the training operation if batch data is not null
-        metric_names = list(six.iterkeys(self.metrics))
-        metric_tensors = [self.metrics[k] for k in metric_names]
-        if self.loop.summary_writer is not None:
+        # run the operation along with the metrics and the summaries
+        metric_tensors = [self.metrics[k] for k in self._metric_names()]
+        if run_summaries and self.loop.summary_writer is not None:
             summary_tensors = self._summaries
         else:
             summary_tensors = []
+        run_kwargs = {}
+        if self.loop.is_profile_step and run_summaries:
+            run_kwargs['options'] = tf.RunOptions(
+                trace_level=tf.RunOptions.FULL_TRACE)
+            run_kwargs['run_metadata'] = tf.RunMetadata()
         session_out = session.run(
-            [self._train_op] + metric_tensors + summary_tensors,
-            feed_dict=feed_dict
+            [op] + metric_tensors + summary_tensors,
+            feed_dict=feed_dict, **run_kwargs
         )
+        if run_kwargs:
+            self.loop.add_run_metadata(run_kwargs['run_metadata'])
         metric_values = session_out[1: len(session_out) - len(summary_tensors)]
         summaries = session_out[len(session_out) - len(summary_tensors):]
 
-        # collect the metrics and the summaries
-        self.loop.collect_metrics(
-            {n: v for n, v in zip(metric_names, metric_values)})
+        # add the summaries, and return the metric values
         for summary in summaries:
             self.loop.add_summary(summary)
+        return metric_values
+
+    def _metric_names(self):
+        return list(six.iterkeys(self.metrics))
+
+    def _accumulate_gradients(self, session, batch_data, is_last):
+        self._pending_metrics.append(self._run_batch(
+            session, self._train_op.accumulate_op, batch_data,
+            run_summaries=is_last
+        ))
+
+    def _apply_gradients(self, session):
+        session.run(self._train_op.apply_op,
+                    feed_dict=resolve_feed_dict(self.feed_dict))
+
+        # collect the metrics averaged across the micro-batches
+        pending_metrics, self._pending_metrics = self._pending_metrics, []
+        self.loop.collect_metrics({
+            n: np.mean([np.mean(values[i]) for values in pending_metrics])
+            for i, n in enumerate(self._metric_names())
+        })
+
+    def _run_step(self, session, payload):
+        step, batch_data = payload
+
+        if not self._is_accumulating():
+            # run the training operation
+            metric_values = self._run_batch(
+                session, self._train_op, batch_data)
+            self.loop.collect_metrics(
+                {n: v for n, v in zip(self._metric_names(), metric_values)})
+
+        elif self._count_micro_steps:
+            # accumulate one micro-batch, and apply the gradients if enough
+            # micro-batches have been accumulated
+            is_last = len(self._pending_metrics) + 1 >= self._accumulate_steps
+            self._accumulate_gradients(session, batch_data, is_last=is_last)
+            if is_last:
+                self._apply_gradients(session)
+
+        else:
+            # accumulate all the micro-batches of this step, and apply
+            for i, micro_batch in enumerate(batch_data):
+                self._accumulate_gradients(
+                    session, micro_batch, is_last=i == len(batch_data) - 1)
+            self._apply_gradients(session)
@@ -29,29 +29,30 @@ from .type_utils import *
 
 __all__ = [
     'AutoInitAndCloseable', 'BaseRegistry', 'BoolConfigValidator', 'CacheDir',
-    'ClassRegistry', 'Config', 'ConfigField', 'ConfigValidator',
-    'ConsoleTable', 'ContextStack', 'Disposable', 'DisposableContext',
-    'DocInherit', 'ETA', 'EventSource', 'Extractor', 'FloatConfigValidator',
-    'GraphKeys', 'InputSpec', 'IntConfigValidator', 'InvertibleMatrix',
-    'NoReentrantContext', 'ParamSpec', 'PermutationMatrix', 'RarExtractor',
-    'StatisticsCollector', 'StrConfigValidator', 'SummaryCollector',
-    'TFSnippetConfig', 'TarExtractor', 'TemporaryDirectory',
-    'TensorArgValidator', 'TensorSpec', 'TensorWrapper', 'VarScopeObject',
-    'VarScopeRandomState', 'ZipExtractor', 'add_histogram',
-    'add_name_and_scope_arg_doc', 'add_name_arg_doc', 'add_summary',
-    'append_arg_to_doc', 'append_to_doc', 'assert_deps', 'camel_to_underscore',
-    'concat_shapes', 'create_session', 'default_summary_collector',
-    'deprecated', 'deprecated_arg', 'ensure_variables_initialized',
-    'generate_random_seed', 'get_batch_size', 'get_cache_root',
-    'get_config_defaults', 'get_config_validator', 'get_default_scope_name',
+    'ClassRegistry', 'ColumnarStatisticsCollector', 'Config', 'ConfigField',
+    'ConfigValidator', 'ConsoleTable', 'ContextStack', 'Disposable',
+    'DisposableContext', 'DocInherit', 'ETA', 'EventSource', 'Extractor',
+    'FloatConfigValidator', 'GraphKeys', 'InputSpec', 'IntConfigValidator',
+    'InvertibleMatrix', 'LogSumExpAccumulator', 'NoReentrantContext',
+    'ParamSpec', 'PermutationMatrix', 'RarExtractor', 'StatisticsCollector',
+    'StrConfigValidator', 'SummaryCollector', 'TFSnippetConfig',
+    'TarExtractor', 'TemporaryDirectory', 'TensorArgValidator', 'TensorSpec',
+    'TensorWrapper', 'VarScopeObject', 'VarScopeRandomState', 'ZipExtractor',
+    'add_histogram', 'add_name_and_scope_arg_doc', 'add_name_arg_doc',
+    'add_summary', 'append_arg_to_doc', 'append_to_doc', 'assert_deps',
+    'camel_to_underscore', 'concat_shapes', 'create_session',
+    'default_summary_collector', 'deprecated', 'deprecated_arg',
+    'ensure_variables_initialized', 'evict_cache', 'generate_random_seed',
+    'get_batch_size', 'get_cache_root', 'get_config_defaults',
+    'get_config_validator', 'get_default_scope_name',
     'get_default_session_or_error', 'get_dimension_size',
     'get_dimensions_size', 'get_model_variables', 'get_rank',
     'get_reuse_stack_top', 'get_shape', 'get_static_shape',
     'get_uninitialized_variables', 'get_variable_ddi', 'get_variables_as_dict',
     'global_reuse', 'humanize_duration', 'instance_reuse', 'is_float',
-    'is_integer', 'is_shape_equal', 'is_tensor_object',
-    'is_tensorflow_version_higher_or_equal', 'iter_files', 'makedirs',
-    'maybe_add_histogram', 'maybe_check_numerics', 'maybe_close',
+    'is_in_control_flow_context', 'is_integer', 'is_shape_equal',
+    'is_tensor_object', 'is_tensorflow_version_higher_or_equal', 'iter_files',
+    'makedirs', 'maybe_add_histogram', 'maybe_check_numerics', 'maybe_close',
     'minibatch_slices_iterator', 'model_variable', 'print_as_table',
     'register_config_arguments', 'register_config_validator',
     'register_tensor_wrapper_class', 'reopen_variable_scope',
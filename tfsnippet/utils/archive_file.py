@@ -1,6 +1,7 @@
 import sys
 import tarfile
 import zipfile
+from collections import OrderedDict
 
 try:
     import rarfile
@@ -46,6 +47,13 @@ class Extractor(object):
                     print(f.read())
     """
 
+    supports_random_access = False
+    """
+    Whether or not the files can be efficiently opened in arbitrary order
+    by :meth:`open_file`?  For compressed tar archives, opening a file may
+    require decompressing the archive from the beginning.
+    """
+
     def __init__(self, archive_file):
         """
         Initialize the base :class:`Extractor` class.
@@ -54,6 +62,7 @@ class Extractor(object):
             archive_file: The archive file object.
         """
         self._archive_file = archive_file
+        self._members = None  # cache of ``{normalized name: member info}``
 
     def __enter__(self):
         return self
@@ -85,6 +94,80 @@ class Extractor(object):
         """
         raise NotImplementedError()
 
+    def _list_members(self):
+        """
+        List the file members in the archive.  Subclasses should override
+        this to support :meth:`list_names` and :meth:`open_file`.
+
+        Returns:
+            list[(str, any)]: Tuples of ``(name, member info)``.
+        """
+        raise NotImplementedError()
+
+    def _open_member(self, member):
+        """Open the file of a member info returned by :meth:`_list_members`."""
+        raise NotImplementedError()
+
+    def _get_members(self):
+        if self._members is None:
+            self._members = OrderedDict(self._list_members())
+        return self._members
+
+    def get_index(self):
+        """
+        Get the index of the files in the archive.
+
+        Listing the files may require scanning the whole archive (e.g., for
+        tar files).  The index can be passed to :meth:`set_index` of another
+        extractor of the same archive file, such that the files can be
+        opened by :meth:`open_file` without scanning the archive again.
+
+        Returns:
+            OrderedDict: The index of the files, which should be treated
+                as opaque.
+        """
+        return self._get_members()
+
+    def set_index(self, index):
+        """
+        Use the index obtained by :meth:`get_index` from another extractor
+        of the same archive file.
+
+        Args:
+            index (OrderedDict): The index of the files.
+        """
+        self._members = index
+
+    def list_names(self):
+        """
+        Get the names of the files in the archive, in the archive order.
+
+        Returns:
+            list[str]: The names of the files.
+        """
+        return list(self._get_members())
+
+    def open_file(self, name):
+        """
+        Open a file in the archive by its name.
+
+        Args:
+            name (str): The name of the file, as returned by
+                :meth:`list_names`.
+
+        Returns:
+            file-like: The file-like object, which may or may not be
+                closeable.  You may surround it by ``maybe_close()``.
+
+        Raises:
+            KeyError: If `name` does not exist in the archive.
+        """
+        members = self._get_members()
+        if name not in members:
+            raise KeyError('File does not exist in the archive: {!r}'.
+                           format(name))
+        return self._open_member(members[name])
+
     @staticmethod
     def open(file_path):
         """
@@ -118,6 +201,8 @@ class TarExtractor(Extractor):
 
     def __init__(self, fpath):
         super(TarExtractor, self).__init__(tarfile.open(fpath, 'r'))
+        # only the uncompressed tar files can be seeked efficiently
+        self.supports_random_access = fpath.endswith('.tar')
 
     def iter_extract(self):
         for mi in self._archive_file:
@@ -127,13 +212,30 @@ class TarExtractor(Extractor):
                     self._archive_file.extractfile(mi)
                 )
 
+    def _list_members(self):
+        return [(normalize_archive_entry_name(mi.name), mi)
+                for mi in self._archive_file.getmembers() if not mi.isdir()]
+
+    def _open_member(self, member):
+        return self._archive_file.extractfile(member)
+
 
 class ZipExtractor(Extractor):
     """Extractor for ".zip" files."""
 
+    supports_random_access = True
+
     def __init__(self, fpath):
         super(ZipExtractor, self).__init__(zipfile.ZipFile(fpath, 'r'))
 
+    def _list_members(self):
+        return [(normalize_archive_entry_name(mi.filename), mi)
+                for mi in self._archive_file.infolist()
+                if mi.filename[-1] != '/']
+
+    def _open_member(self, member):
+        return self._archive_file.open(member)
+
     def iter_extract(self):
         for mi in self._archive_file.infolist():
             # ignore directory entries
@@ -148,6 +250,8 @@ class ZipExtractor(Extractor):
 class RarExtractor(Extractor):
     """Extractor for ".rar" files."""
 
+    supports_random_access = True
+
     def __init__(self, fpath):
         if rarfile is None:  # pragma: no cover
             raise RuntimeError('Required package not installed: rarfile.')
@@ -161,3 +265,10 @@ class RarExtractor(Extractor):
                 normalize_archive_entry_name(mi.filename),
                 self._archive_file.open(mi)
             )
+
+    def _list_members(self):
+        return [(normalize_archive_entry_name(mi.filename), mi)
+                for mi in self._archive_file.infolist() if not mi.isdir()]
+
+    def _open_member(self, member):
+        return self._archive_file.open(member)
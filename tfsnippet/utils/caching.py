@@ -1,11 +1,21 @@
+import errno
+import hashlib
+import json
 import os
+import re
 import shutil
-from contextlib import contextmanager
+import socket
+import time
+import uuid
+from contextlib import contextmanager, closing
+from logging import getLogger
+from threading import Thread, Lock
 
 import requests
 import six
 import sys
-from filelock import FileLock
+from filelock import FileLock, Timeout
+from requests.adapters import HTTPAdapter
 from tqdm import tqdm
 
 from .archive_file import Extractor
@@ -18,11 +28,16 @@ else:
     from urllib.parse import urlparse
 
 __all__ = [
-    'get_cache_root', 'set_cache_root', 'CacheDir',
+    'get_cache_root', 'set_cache_root', 'CacheDir', 'evict_cache',
 ]
 
 _cache_root = None
 
+CHUNK_SIZE = 8192
+MANIFEST_FILENAME = '.manifest.json'
+USAGE_FILENAME = '.usage.json'
+CONTENT_RANGE_PATTERN = re.compile(r'^\s*bytes\s+(\d+)-(\d+)/(\d+|\*)\s*$')
+
 
 @contextmanager
 def _maybe_tqdm(tqdm_enabled, **kwargs):
@@ -87,10 +102,496 @@ def guess_extract_dir_from_filename(filename):
     return extract_dir
 
 
+def _hash_file(hasher, file_path):
+    """Update `hasher` with the content of `file_path`, return the digest."""
+    with open(file_path, 'rb') as f:
+        chunk = bytearray(CHUNK_SIZE)
+        n_bytes = f.readinto(chunk)
+        while n_bytes > 0:
+            hasher.update(chunk[:n_bytes])
+            n_bytes = f.readinto(chunk)
+    return hasher.hexdigest()
+
+
+def _make_session(num_connections):
+    """Create a :class:`requests.Session` with a connection pool."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1,
+                          pool_maxsize=max(int(num_connections), 1))
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def _parse_content_range(value):
+    """
+    Parse the "Content-Range" header of a HTTP 206 response.
+
+    Returns:
+        (int, int, int or None) or None: ``(start, end, total)``, where
+            `end` is inclusive and `total` is :obj:`None` if unknown.
+            :obj:`None` if `value` cannot be parsed.
+    """
+    m = CONTENT_RANGE_PATTERN.match(value or '')
+    if m:
+        total = m.group(3)
+        return (int(m.group(1)), int(m.group(2)),
+                int(total) if total != '*' else None)
+
+
+def _check_response(req, expected_status=200, expected_start=None):
+    if req.status_code != expected_status:
+        raise IOError('HTTP Error {}: {}'.format(req.status_code, req.content))
+    if expected_start is not None:
+        content_range = _parse_content_range(req.headers.get('Content-Range'))
+        if content_range is None or content_range[0] != expected_start:
+            raise IOError('Invalid Content-Range for range starting at {}: '
+                          '{}'.format(expected_start,
+                                      req.headers.get('Content-Range')))
+        return content_range
+
+
+def _response_validator(req):
+    """
+    Get the validator of the remote file from a HTTP response, which can be
+    sent in the "If-Range" header when resuming the download.  Weak ETags
+    are not allowed in "If-Range", thus "Last-Modified" is used instead.
+    """
+    etag = req.headers.get('ETag')
+    if etag and not etag.startswith('W/'):
+        return etag
+    return req.headers.get('Last-Modified')
+
+
+def _load_validator(temp_file):
+    """Load the validator recorded for the partially downloaded file."""
+    path = temp_file + '.validator'
+    if os.path.isfile(path):
+        with open(path, 'rb') as f:
+            return f.read().decode('utf-8').strip() or None
+
+
+def _save_validator(temp_file, validator):
+    """Record the validator for the partially downloaded file."""
+    path = temp_file + '.validator'
+    if validator:
+        with open(path, 'wb') as f:
+            f.write(validator.encode('utf-8'))
+    elif os.path.isfile(path):
+        os.remove(path)
+
+
+class _RemoteFileChanged(IOError):
+    """The remote file has changed since the partial download."""
+
+
+def _list_partial_files(temp_file):
+    """List the segment files of the partially downloaded `temp_file`."""
+    parent_dir, name = os.path.split(temp_file)
+    if os.path.isdir(parent_dir):
+        return [os.path.join(parent_dir, f) for f in os.listdir(parent_dir)
+                if f.startswith(name + '.')]
+    return []
+
+
+def _remove_partial_files(temp_file):
+    """Remove `temp_file` and all its segment files."""
+    for path in [temp_file] + _list_partial_files(temp_file):
+        if os.path.isfile(path):
+            os.remove(path)
+
+
+class _DownloadProgress(object):
+    """Thread-safe wrapper of the (optional) tqdm progress bar."""
+
+    def __init__(self, t):
+        self._t = t
+        self._lock = Lock()
+
+    def set_total(self, total):
+        if self._t is not None and total is not None:
+            self._t.total = total
+
+    def reset(self):
+        if self._t is not None:
+            with self._lock:
+                self._t.n = 0
+                self._t.refresh()
+
+    def update(self, n):
+        if self._t is not None and n:
+            with self._lock:
+                self._t.update(n)
+
+
+def _probe_remote_file(session, uri):
+    """
+    Probe the content length of `uri` with a one-byte HTTP Range request.
+
+    Returns:
+        (int or None, str or None): The content length, or :obj:`None` if
+            the server does not support HTTP Range requests; and the
+            validator of the remote file, or :obj:`None` if not provided.
+    """
+    with closing(session.get(uri, stream=True,
+                             headers={'Range': 'bytes=0-0'})) as req:
+        if req.status_code == 206:
+            content_range = _parse_content_range(
+                req.headers.get('Content-Range'))
+            if content_range is not None:
+                return content_range[2], _response_validator(req)
+        elif req.status_code not in (200, 416):
+            _check_response(req)
+    return None, None
+
+
+def _download_sequential(session, uri, temp_file, resume, progress, hasher):
+    """Download `uri` into `temp_file`, resuming from the partial content."""
+    offset = 0
+    validator = None
+    if resume and os.path.isfile(temp_file):
+        offset = os.path.getsize(temp_file)
+        validator = _load_validator(temp_file)
+        # without a validator or a hasher, it cannot be ensured that the
+        # partial content comes from the current version of the remote file
+        if validator is None and hasher is None:
+            offset = 0
+
+    headers = {}
+    if offset > 0:
+        headers['Range'] = 'bytes={}-'.format(offset)
+        if validator is not None:
+            headers['If-Range'] = validator
+    req = session.get(uri, stream=True, headers=headers)
+    if offset > 0 and req.status_code == 416:
+        # the partial content does not match the remote file, restart
+        req.close()
+        offset = 0
+        req = session.get(uri, stream=True)
+
+    with closing(req):
+        if offset > 0 and req.status_code == 206:
+            content_range = _check_response(req, 206, expected_start=offset)
+            progress.set_total(content_range[2])
+            mode = 'ab'
+            if hasher is not None:
+                _hash_file(hasher, temp_file)
+            progress.update(offset)
+        else:
+            # the full content is sent if the remote file has changed since
+            # the partial download (or if the server ignores the Range
+            # header), thus restart from byte 0
+            _check_response(req)
+            _save_validator(temp_file, _response_validator(req))
+            cont_length = req.headers.get('Content-Length')
+            if cont_length is not None:
+                try:
+                    progress.set_total(int(cont_length))
+                except ValueError:  # pragma: no cover
+                    pass
+            mode = 'wb'
+
+        # do download the content
+        with open(temp_file, mode) as f:
+            for chunk in req.iter_content(CHUNK_SIZE):
+                if chunk:
+                    f.write(chunk)
+                    if hasher is not None:
+                        hasher.update(chunk)
+                    progress.update(len(chunk))
+
+
+def _download_segment(session, uri, part_file, start, end, progress,
+                      validator=None):
+    """Download the bytes ``[start, end]`` of `uri` into `part_file`."""
+    length = end - start + 1
+    offset = 0
+    if os.path.isfile(part_file):
+        offset = os.path.getsize(part_file)
+        if offset > length:  # pragma: no cover
+            os.remove(part_file)
+            offset = 0
+    progress.update(offset)
+
+    if offset < length:
+        headers = {'Range': 'bytes={}-{}'.format(start + offset, end)}
+        if validator is not None:
+            headers['If-Range'] = validator
+        with closing(session.get(uri, stream=True, headers=headers)) as req:
+            if validator is not None and req.status_code == 200:
+                raise _RemoteFileChanged(
+                    'The remote file has changed during the download: '
+                    '{}'.format(uri))
+            _check_response(req, 206, expected_start=start + offset)
+            with open(part_file, 'ab') as f:
+                for chunk in req.iter_content(CHUNK_SIZE):
+                    if chunk:
+                        f.write(chunk)
+                        progress.update(len(chunk))
+
+    if os.path.getsize(part_file) != length:
+        raise IOError('Incomplete download of bytes {}-{} from {}.'.
+                      format(start, end, uri))
+
+
+def _download_segments(session, uri, temp_file, total_length,
+                       num_connections, resume, progress, hasher,
+                       validator=None):
+    """
+    Download `uri` into `temp_file` by `num_connections` parallel segments.
+
+    Each segment is downloaded into ``temp_file + '.<n>-<i>'``, which can be
+    resumed if the download fails.  The segments are then merged into
+    `temp_file`, and `hasher` is updated during merging.  If the remote
+    file has changed since the partial download, restart from byte 0.
+    """
+    # discard the partial segments of another version of the remote file,
+    # or those which cannot be verified by either a validator or a hasher
+    old_validator = _load_validator(temp_file)
+    if not resume or (old_validator is not None and
+                      old_validator != validator) or \
+            (old_validator is None and hasher is None):
+        _remove_partial_files(temp_file)
+    _save_validator(temp_file, validator)
+
+    progress.set_total(total_length)
+    num_connections = min(num_connections, total_length)
+    seg_size = (total_length + num_connections - 1) // num_connections
+    segments = []
+    for i in range(num_connections):
+        start = i * seg_size
+        end = min(start + seg_size, total_length) - 1
+        part_file = '{}.{}-{}'.format(temp_file, num_connections, i)
+        segments.append((part_file, start, end))
+
+    # download the segments in background threads
+    errors = []
+
+    def worker(part_file, start, end):
+        try:
+            _download_segment(session, uri, part_file, start, end, progress,
+                              validator=validator)
+        except BaseException as ex:
+            errors.append(ex)
+
+    workers = [Thread(target=worker, args=seg) for seg in segments]
+    for w in workers:
+        w.daemon = True
+        w.start()
+    for w in workers:
+        w.join()
+    if errors:
+        if any(isinstance(e, _RemoteFileChanged) for e in errors):
+            _remove_partial_files(temp_file)
+            progress.reset()
+            return _download_sequential(
+                session, uri, temp_file, resume=False, progress=progress,
+                hasher=hasher
+            )
+        raise errors[0]
+
+    # merge the segments into `temp_file`
+    with open(temp_file, 'wb') as dst:
+        for part_file, _, _ in segments:
+            with open(part_file, 'rb') as src:
+                chunk = src.read(CHUNK_SIZE)
+                while chunk:
+                    dst.write(chunk)
+                    if hasher is not None:
+                        hasher.update(chunk)
+                    chunk = src.read(CHUNK_SIZE)
+    for part_file, _, _ in segments:
+        os.remove(part_file)
+
+
+def _file_signature(file_path):
+    """Get the signature of a file, which changes if the file is modified."""
+    st = os.stat(file_path)
+    return {'size': st.st_size, 'mtime': st.st_mtime, 'inode': st.st_ino}
+
+
+class _CacheManifest(object):
+    """
+    The sidecar manifest of a :class:`CacheDir`, which memorizes the
+    signatures and the verified hashes of the cached files.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def load(self):
+        """Load the manifest entries, or an empty dict if not exist."""
+        if os.path.isfile(self.path):
+            try:
+                with open(self.path, 'rb') as f:
+                    entries = json.loads(f.read().decode('utf-8'))
+                if isinstance(entries, dict):
+                    return entries
+            except Exception:  # pragma: no cover
+                getLogger(__name__).warning(
+                    'Corrupted cache manifest is ignored: %s', self.path,
+                    exc_info=True
+                )
+        return {}
+
+    def _save(self, entries):
+        # write to a temporary file and then rename, such that the readers
+        # never see a partially written manifest.
+        temp_path = self.path + '._writing_'
+        with open(temp_path, 'wb') as f:
+            f.write(json.dumps(entries, sort_keys=True).encode('utf-8'))
+        if os.path.isfile(self.path):
+            os.remove(self.path)
+        os.rename(temp_path, self.path)
+
+    @contextmanager
+    def update(self):
+        """
+        Open a context to update the manifest entries.
+
+        Yields:
+            dict: The manifest entries, which will be saved on exit.
+        """
+        parent_dir = os.path.split(self.path)[0]
+        if not os.path.isdir(parent_dir):
+            makedirs(parent_dir, exist_ok=True)
+        with FileLock(self.path + '.lock'):
+            entries = self.load()
+            yield entries
+            self._save(entries)
+
+
+def _get_path_size(path):
+    """Get the total size of a file, or of all the files in a directory."""
+    if not os.path.isdir(path):
+        return os.path.getsize(path)
+    total = 0
+    for parent, _, files in os.walk(path):
+        for name in files:
+            file_path = os.path.join(parent, name)
+            if not os.path.islink(file_path):
+                total += os.path.getsize(file_path)
+    return total
+
+
+def _is_pin_alive(pin):
+    """Check whether or not the process holding `pin` is still alive."""
+    host, pid = pin
+    if os.name == 'nt' or host != socket.gethostname():  # pragma: no cover
+        # we cannot check the process, thus just assume it is alive
+        return True
+    try:
+        os.kill(pid, 0)
+    except OSError as ex:
+        return ex.errno == errno.EPERM
+    return True
+
+
+def _usage_key(cache_root, path):
+    return os.path.relpath(path, cache_root).replace('\\', '/')
+
+
+def _usage_manifest(cache_root):
+    return _CacheManifest(os.path.join(cache_root, USAGE_FILENAME))
+
+
+def _evict_items(cache_root, max_bytes, prefix='', exclude=()):
+    """
+    Evict the least recently used cached items under `cache_root`, until
+    the total size of the items (whose keys start with `prefix`) does not
+    exceed `max_bytes`.  Items which are pinned, being downloaded or
+    being extracted are skipped.
+
+    Returns:
+        list[str]: The absolute paths of the evicted items.
+    """
+    manifest = _usage_manifest(cache_root)
+    candidates = sorted(
+        ((key, entry) for key, entry in six.iteritems(manifest.load())
+         if key.startswith(prefix)),
+        key=lambda item: (item[1].get('atime', 0.), item[0])
+    )
+    total_size = sum(entry.get('size', 0) for _, entry in candidates)
+    exclude = set(os.path.abspath(p) for p in exclude)
+    evicted = []
+
+    for key, entry in candidates:
+        if total_size <= max_bytes:
+            break
+        path = os.path.abspath(os.path.join(cache_root, key))
+        if path in exclude:
+            continue
+        if not os.path.exists(path):  # removed without the manifest updated
+            with manifest.update() as entries:
+                entries.pop(key, None)
+            total_size -= entry.get('size', 0)
+            continue
+
+        # the items being downloaded or extracted hold their locks, thus
+        # we skip an item if its lock cannot be acquired immediately.
+        # the item lock must always be acquired before the manifest lock.
+        lock = FileLock(path + '.lock')
+        try:
+            lock.acquire(timeout=0)
+        except Timeout:
+            continue
+        try:
+            with manifest.update() as entries:
+                latest = entries.get(key)
+                if latest is None:  # already evicted by others
+                    total_size -= entry.get('size', 0)
+                    continue
+                pins = latest.get('pins', {})
+                alive_pins = {k: v for k, v in six.iteritems(pins)
+                              if _is_pin_alive(v)}
+                if alive_pins:
+                    latest['pins'] = alive_pins
+                    continue
+                if os.path.isdir(path):
+                    shutil.rmtree(path)
+                elif os.path.exists(path):
+                    os.remove(path)
+                del entries[key]
+            total_size -= latest.get('size', 0)
+            evicted.append(path)
+        finally:
+            lock.release()
+
+    if evicted:
+        getLogger(__name__).info(
+            'Evicted %d cached item(s) under %s: %s',
+            len(evicted), cache_root, evicted
+        )
+    return evicted
+
+
+def evict_cache(max_bytes, cache_root=None):
+    """
+    Evict the least recently used cached files and directories under
+    `cache_root`, until their total size does not exceed `max_bytes`.
+
+    Only the files and directories obtained via :class:`CacheDir` are
+    tracked and can be evicted.  Items which are pinned by
+    :meth:`CacheDir.pin`, or being downloaded or extracted by any
+    process, will not be evicted.
+
+    Args:
+        max_bytes (int): The maximum total size in bytes.
+        cache_root (str or None): The cache root directory.  If not
+            specified, use ``get_cache_root()``.
+
+    Returns:
+        list[str]: The absolute paths of the evicted files and directories.
+    """
+    if cache_root is None:
+        cache_root = get_cache_root()
+    return _evict_items(os.path.abspath(cache_root), int(max_bytes))
+
+
 class CacheDir(object):
     """Class to manipulate a cache directory."""
 
-    def __init__(self, name, cache_root=None):
+    def __init__(self, name, cache_root=None, max_bytes=None):
         """
         Construct a new :class:`CacheDir`.
 
@@ -98,14 +599,24 @@ class CacheDir(object):
             name (str): The name of the sub-directory under `cache_root`.
             cache_root (str or None): The cache root directory.  If not
                 specified, use ``get_cache_root()``.
+            max_bytes (int or None): The maximum total size in bytes of
+                the cached files and directories in this :class:`CacheDir`.
+                If specified, the least recently used items will be
+                evicted after each download or extraction, once exceeded.
+                (default :obj:`None`, no limit)
         """
         if not name:
             raise ValueError('`name` is required.')
         if cache_root is None:
             cache_root = get_cache_root()
+        if max_bytes is not None:
+            max_bytes = int(max_bytes)
         self._name = name
         self._cache_root = os.path.abspath(cache_root)
         self._path = os.path.abspath(os.path.join(self._cache_root, name))
+        self._max_bytes = max_bytes
+        self._manifest = _CacheManifest(self.resolve(MANIFEST_FILENAME))
+        self._usage = _usage_manifest(self._cache_root)
 
     @property
     def name(self):
@@ -122,6 +633,11 @@ class CacheDir(object):
         """Get the absolute path of this cache directory."""
         return self._path
 
+    @property
+    def max_bytes(self):
+        """Get the maximum total size in bytes of this cache directory."""
+        return self._max_bytes
+
     def resolve(self, sub_path):
         """
         Resolve a sub path relative to ``self.path``.
@@ -143,25 +659,176 @@ class CacheDir(object):
         with FileLock(lock_file):
             yield
 
+    def _usage_prefix(self):
+        return _usage_key(self.cache_root, self.path).rstrip('/') + '/'
+
+    def _record_access(self, path):
+        key = _usage_key(self.cache_root, path)
+        now = time.time()
+        with self._usage.update() as entries:
+            entry = entries.get(key)
+            if entry is None:
+                entry = entries[key] = {'pins': {}}
+            # walking through a large extracted directory is expensive, thus
+            # the size of a directory is only computed at the first time.
+            if 'size' not in entry or not os.path.isdir(path):
+                entry['size'] = _get_path_size(path)
+            entry['atime'] = now
+
+    def _enforce_max_bytes(self, path):
+        if self.max_bytes is not None:
+            _evict_items(self.cache_root, self.max_bytes,
+                         prefix=self._usage_prefix(), exclude=[path])
+        if settings.file_cache_max_bytes is not None:
+            _evict_items(self.cache_root, settings.file_cache_max_bytes,
+                         exclude=[path])
+
+    @contextmanager
+    def pin(self, path):
+        """
+        Pin a cached file or directory, such that it will not be evicted
+        until the context is exited, even by other processes.
+
+        .. code-block:: python
+
+            cache_dir = CacheDir('mnist', max_bytes=2 ** 30)
+            with cache_dir.pin(cache_dir.download(uri)) as path:
+                ...
+
+        Args:
+            path (str): The path of the cached file or directory,
+                which must be in this :class:`CacheDir`.
+
+        Yields:
+            str: The absolute path of the pinned file or directory.
+
+        Raises:
+            ValueError: If `path` is not in this :class:`CacheDir`.
+            IOError: If `path` does not exist, e.g., it has been evicted.
+        """
+        path = os.path.abspath(path)
+        key = _usage_key(self.cache_root, path)
+        if not key.startswith(self._usage_prefix()):
+            raise ValueError('`path` is not in this cache directory: {!r}'.
+                             format(path))
+
+        token = uuid.uuid4().hex
+        with self._usage.update() as entries:
+            if not os.path.exists(path):
+                raise IOError('Cached file or directory does not exist: {}'.
+                              format(path))
+            entry = entries.get(key)
+            if entry is None:
+                entry = entries[key] = {'size': _get_path_size(path)}
+            entry.setdefault('pins', {})[token] = \
+                [socket.gethostname(), os.getpid()]
+            entry['atime'] = time.time()
+
+        try:
+            yield path
+        finally:
+            with self._usage.update() as entries:
+                entry = entries.get(key)
+                if entry is not None:
+                    entry.get('pins', {}).pop(token, None)
+
+    def iter_usage(self):
+        """
+        Iterate through the usage of the cached files and directories in
+        this :class:`CacheDir`, least recently used first.
+
+        Only the files and directories obtained via :meth:`download`,
+        :meth:`extract_file`, :meth:`download_and_extract` or :meth:`pin`
+        are tracked.
+
+        Yields:
+            (str, int, float, bool): The path relative to ``self.path``,
+                the size in bytes, the last access time in seconds since
+                the epoch, and whether or not it is pinned.
+        """
+        prefix = self._usage_prefix()
+        items = sorted(
+            ((key, entry) for key, entry in six.iteritems(self._usage.load())
+             if key.startswith(prefix)),
+            key=lambda item: (item[1].get('atime', 0.), item[0])
+        )
+        for key, entry in items:
+            pinned = any(_is_pin_alive(pin)
+                         for pin in six.itervalues(entry.get('pins', {})))
+            yield (key[len(prefix):], entry.get('size', 0),
+                   entry.get('atime', 0.), pinned)
+
+    def evict(self, max_bytes=None):
+        """
+        Evict the least recently used cached files and directories in this
+        :class:`CacheDir`, until their total size does not exceed
+        `max_bytes`.  Items which are pinned, or being downloaded or
+        extracted by any process, will not be evicted.
+
+        Args:
+            max_bytes (int or None): The maximum total size in bytes.
+                If not specified, use ``self.max_bytes``.
+
+        Returns:
+            list[str]: The absolute paths of the evicted items.
+
+        Raises:
+            ValueError: If neither `max_bytes` nor ``self.max_bytes``
+                is specified.
+        """
+        if max_bytes is None:
+            max_bytes = self.max_bytes
+        if max_bytes is None:
+            raise ValueError('`max_bytes` is not specified, and this '
+                             'cache directory has no size limit.')
+        return _evict_items(self.cache_root, int(max_bytes),
+                            prefix=self._usage_prefix())
+
+    def _manifest_key(self, file_path):
+        return os.path.relpath(file_path, self.path).replace('\\', '/')
+
+    def _record_checksum(self, file_path, hasher, hash_value):
+        name = getattr(hasher, 'name', None)
+        if name is not None:
+            entry = _file_signature(file_path)
+            entry.update({'algorithm': name, 'hash': hash_value})
+            with self._manifest.update() as entries:
+                entries[self._manifest_key(file_path)] = entry
+
+    def _forget_checksum(self, file_path):
+        key = self._manifest_key(file_path)
+        if key in self._manifest.load():
+            with self._manifest.update() as entries:
+                entries.pop(key, None)
+
+    def _verify_cached_file(self, file_path, hasher, expected_hash):
+        # skip the full verification if the file has not been changed
+        # since the last time it was verified with the same hash.
+        entry = self._manifest.load().get(self._manifest_key(file_path))
+        if entry is not None and \
+                entry.get('algorithm') == getattr(hasher, 'name', None) and \
+                entry.get('hash') == expected_hash:
+            signature = _file_signature(file_path)
+            if all(entry.get(k) == v for k, v in six.iteritems(signature)):
+                return
+
+        got_hash = _hash_file(hasher, file_path)
+        if got_hash != expected_hash:
+            os.remove(file_path)
+            self._forget_checksum(file_path)
+            raise IOError(
+                'Hash not match for cached file {}: '
+                '{} vs expected {}'.
+                format(file_path, got_hash, expected_hash)
+            )
+        self._record_checksum(file_path, hasher, expected_hash)
+
     def _download(self, uri, file_path, show_progress, progress_file,
-                  hasher=None, expected_hash=None):
+                  hasher=None, expected_hash=None, resume=True,
+                  num_connections=1):
         if os.path.isfile(file_path):
             if settings.file_cache_checksum and hasher is not None:
-                with open(file_path, 'rb') as f:
-                    chunk = bytearray(8192)
-                    n_bytes = f.readinto(chunk)
-                    while n_bytes > 0:
-                        hasher.update(chunk[:n_bytes])
-                        n_bytes = f.readinto(chunk)
-
-                got_hash = hasher.hexdigest()
-                if got_hash != expected_hash:
-                    os.remove(file_path)
-                    raise IOError(
-                        'Hash not match for cached file {}: '
-                        '{} vs expected {}'.
-                        format(file_path, got_hash, expected_hash)
-                    )
+                self._verify_cached_file(file_path, hasher, expected_hash)
 
         else:
             temp_file = file_path + '._downloading_'
@@ -173,55 +840,60 @@ class CacheDir(object):
                                  desc='Downloading {}'.format(uri),
                                  unit='B', unit_scale=True, unit_divisor=1024,
                                  miniters=1, file=progress_file) as t, \
-                        open(temp_file, 'wb') as f:
-                    req = requests.get(uri, stream=True)
-                    if req.status_code != 200:
-                        raise IOError('HTTP Error {}: {}'.
-                                      format(req.status_code, req.content))
-
-                    # detect the total length
-                    if t is not None:
-                        cont_length = req.headers.get('Content-Length')
-                        if cont_length is not None:
-                            try:
-                                t.total = int(cont_length)
-                            except ValueError:  # pragma: no cover
-                                pass
-
-                    # do download the content
-                    for chunk in req.iter_content(8192):
-                        if chunk:
-                            f.write(chunk)
-                            if hasher is not None:
-                                hasher.update(chunk)
-                            if t is not None:
-                                t.update(len(chunk))
+                        closing(_make_session(num_connections)) as session:
+                    progress = _DownloadProgress(t)
 
-                    if hasher is not None:
-                        got_hash = hasher.hexdigest()
-                        if got_hash != expected_hash:
-                            raise IOError(
-                                'Hash not match for file downloaded from {}: '
-                                '{} vs expected {}'.
-                                format(uri, got_hash, expected_hash)
-                            )
+                    # use parallel segmented download only if the server
+                    # supports HTTP Range requests.
+                    total_length = validator = None
+                    if num_connections > 1:
+                        total_length, validator = \
+                            _probe_remote_file(session, uri)
+
+                    if total_length:
+                        _download_segments(
+                            session, uri, temp_file, total_length,
+                            num_connections=num_connections, resume=resume,
+                            progress=progress, hasher=hasher,
+                            validator=validator
+                        )
+                    else:
+                        _download_sequential(
+                            session, uri, temp_file, resume=resume,
+                            progress=progress, hasher=hasher
+                        )
+
+                if hasher is not None:
+                    got_hash = hasher.hexdigest()
+                    if got_hash != expected_hash:
+                        # the content is corrupted, thus cannot be resumed
+                        _remove_partial_files(temp_file)
+                        raise IOError(
+                            'Hash not match for file downloaded from {}: '
+                            '{} vs expected {}'.
+                            format(uri, got_hash, expected_hash)
+                        )
 
             except BaseException:
                 if not show_progress:
                     progress_file.write('error\n')
                     progress_file.flush()
-                if os.path.isfile(temp_file):  # pragma: no cover
-                    os.remove(temp_file)
+                if not resume:
+                    _remove_partial_files(temp_file)
                 raise
             else:
                 if not show_progress:
                     progress_file.write('ok\n')
                     progress_file.flush()
                 os.rename(temp_file, file_path)
+                _remove_partial_files(temp_file)
+                if hasher is not None:
+                    self._record_checksum(file_path, hasher, expected_hash)
         return file_path
 
     def download(self, uri, filename=None, show_progress=None,
-                 progress_file=sys.stderr, hasher=None, expected_hash=None):
+                 progress_file=sys.stderr, hasher=None, expected_hash=None,
+                 resume=True, num_connections=1):
         """
         Download a file into this :class:`CacheDir`.
 
@@ -241,6 +913,12 @@ class CacheDir(object):
                 If specified, will compute the hash of downloaded content,
                 and validate against `expected_hash`.
             expected_hash (str): The expected hash of downloaded content.
+            resume (bool): Whether or not to keep the partially downloaded
+                content if the download fails, and resume from it via
+                HTTP Range requests at the next time?  (default :obj:`True`)
+            num_connections (int): The number of connections to download
+                the file in parallel segments.  Only takes effect if the
+                server supports HTTP Range requests.  (default 1)
 
         Returns:
             str: The absolute path of the downloaded file.
@@ -257,11 +935,15 @@ class CacheDir(object):
 
         # download the file
         with self._lock_file(file_path):
-            return self._download(
+            self._download(
                 uri, file_path, show_progress=show_progress,
                 progress_file=progress_file, hasher=hasher,
-                expected_hash=expected_hash
+                expected_hash=expected_hash, resume=resume,
+                num_connections=num_connections
             )
+            self._record_access(file_path)
+        self._enforce_max_bytes(file_path)
+        return file_path
 
     def _extract_file(self, archive_file, extract_path, show_progress,
                       progress_file):
@@ -324,15 +1006,19 @@ class CacheDir(object):
         extract_path = os.path.abspath(os.path.join(self.path, extract_dir))
 
         # extract the file
-        with self._lock_file(archive_file):
-            return self._extract_file(
+        with self._lock_file(archive_file), self._lock_file(extract_path):
+            self._extract_file(
                 archive_file, extract_path, show_progress=show_progress,
                 progress_file=progress_file
             )
+            self._record_access(extract_path)
+        self._enforce_max_bytes(extract_path)
+        return extract_path
 
     def download_and_extract(self, uri, filename=None, extract_dir=None,
                              show_progress=None, progress_file=sys.stderr,
-                             hasher=None, expected_hash=None):
+                             hasher=None, expected_hash=None, resume=True,
+                             num_connections=1):
         """
         Download a file into this :class:`CacheDir`, and extract it.
 
@@ -356,6 +1042,12 @@ class CacheDir(object):
                 If specified, will compute the hash of downloaded content,
                 and validate against `expected_hash`.
             expected_hash (str): The expected hash of downloaded content.
+            resume (bool): Whether or not to keep the partially downloaded
+                content if the download fails, and resume from it via
+                HTTP Range requests at the next time?  (default :obj:`True`)
+            num_connections (int): The number of connections to download
+                the file in parallel segments.  Only takes effect if the
+                server supports HTTP Range requests.  (default 1)
 
         Returns:
             str: The absolute path of the extracted directory.
@@ -375,12 +1067,13 @@ class CacheDir(object):
         extract_path = os.path.abspath(os.path.join(self.path, extract_dir))
 
         # download and extract the file
-        with self._lock_file(file_path):
+        with self._lock_file(file_path), self._lock_file(extract_path):
             if not os.path.isdir(extract_path):
                 archive_file = self._download(
                     uri, file_path, show_progress=show_progress,
                     progress_file=progress_file, hasher=hasher,
-                    expected_hash=expected_hash
+                    expected_hash=expected_hash, resume=resume,
+                    num_connections=num_connections
                 )
                 self._extract_file(
                     archive_file, extract_path, show_progress=show_progress,
@@ -388,8 +1081,53 @@ class CacheDir(object):
                 )
                 # download the archive file if we successfully extracted it.
                 os.remove(file_path)
-            return extract_path
+                self._forget_checksum(file_path)
+            self._record_access(extract_path)
+        self._enforce_max_bytes(extract_path)
+        return extract_path
+
+    def verify_all(self, remove_corrupted=False):
+        """
+        Verify all the cached files recorded in the checksum manifest.
+
+        The checksum manifest memorizes the size, the modification time,
+        the inode and the verified hash of each file downloaded with a
+        `hasher`.  If :obj:`settings.file_cache_checksum` is enabled,
+        a cached file will only be fully re-hashed when its size,
+        modification time or inode changes.  This method re-hashes all
+        the recorded files regardless of these signatures, so as to audit
+        the integrity of the cache.
+
+        Args:
+            remove_corrupted (bool): Whether or not to remove the cached
+                files whose hashes do not match? (default :obj:`False`)
+
+        Returns:
+            list[str]: The absolute paths of the corrupted files.
+        """
+        corrupted = []
+        for key, entry in sorted(six.iteritems(self._manifest.load())):
+            file_path = self.resolve(key)
+            with self._lock_file(file_path):
+                if not os.path.isfile(file_path):
+                    self._forget_checksum(file_path)
+                    continue
+                hasher = hashlib.new(entry['algorithm'])
+                if _hash_file(hasher, file_path) == entry['hash']:
+                    # the signature may change without modifying the content
+                    self._record_checksum(file_path, hasher, entry['hash'])
+                else:
+                    corrupted.append(file_path)
+                    self._forget_checksum(file_path)
+                    if remove_corrupted:
+                        os.remove(file_path)
+        return corrupted
 
     def purge_all(self):
         """Delete everything in this :class:`CacheDir`."""
         shutil.rmtree(self.path)
+        prefix = self._usage_prefix()
+        with self._usage.update() as entries:
+            for key in list(entries):
+                if key.startswith(prefix):
+                    del entries[key]
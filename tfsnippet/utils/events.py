@@ -43,10 +43,14 @@ class EventSource(object):
                 names are allowed.
         """
         if allowed_event_keys is not None:
-            allowed_event_keys = tuple(filter(str, allowed_event_keys))
+            allowed_event_keys = frozenset(filter(str, allowed_event_keys))
         self._event_handlers_map = {}  # type: dict[str, list]
         self._allowed_event_keys = allowed_event_keys
 
+        # the handler lists frozen into tuples, ``(handlers, reversed)``,
+        # which are rebuilt only when the handlers have been changed
+        self._frozen_handlers_map = {}  # type: dict[str, tuple]
+
     def on(self, event_key, handler):
         """
         Register a new event handler.
@@ -65,6 +69,7 @@ class EventSource(object):
         if event_key not in self._event_handlers_map:
             self._event_handlers_map[event_key] = []
         self._event_handlers_map[event_key].append(handler)
+        self._frozen_handlers_map.pop(event_key, None)
 
     def off(self, event_key, handler):
         """
@@ -84,16 +89,46 @@ class EventSource(object):
         except (KeyError, ValueError):
             raise ValueError('`handler` is not a registered event handler of '
                              'event `{}`: {}'.format(event_key, handler))
+        self._frozen_handlers_map.pop(event_key, None)
+
+    def _get_frozen_handlers(self, event_key):
+        frozen = self._frozen_handlers_map.get(event_key, None)
+        if frozen is None:
+            if self._allowed_event_keys is not None and \
+                    event_key not in self._allowed_event_keys:
+                raise KeyError('`event_key` is not allowed: {}'.
+                               format(event_key))
+            handlers = tuple(self._event_handlers_map.get(event_key, ()))
+            frozen = (handlers, tuple(reversed(handlers)))
+            self._frozen_handlers_map[event_key] = frozen
+        return frozen
+
+    def get_event_handlers(self, event_key, reverse=False):
+        """
+        Get the registered handlers of an event.
+
+        The returned tuple is cached until the handlers of this event are
+        changed, thus the identity of the tuple can be used to detect
+        whether or not the handlers have been changed.
+
+        Args:
+            event_key (str): The event key.
+            reverse (bool): Whether or not to get the handlers in reversed
+                order of registration? (default :obj:`False`)
+
+        Returns:
+            tuple: The event handlers.
+
+        Raises:
+            KeyError: If `event_key` is not allowed.
+        """
+        return self._get_frozen_handlers(str(event_key))[1 if reverse else 0]
 
     def _fire(self, event_key, args, kwargs, reverse=False):
-        event_key = str(event_key)
-        if self._allowed_event_keys is not None and \
-                event_key not in self._allowed_event_keys:
-            raise KeyError('`event_key` is not allowed: {}'.format(event_key))
-        event_handlers = self._event_handlers_map.get(event_key, None)
-        if event_handlers:
-            for h in (reversed(event_handlers) if reverse else event_handlers):
-                h(*args, **kwargs)
+        event_handlers = \
+            self._get_frozen_handlers(str(event_key))[1 if reverse else 0]
+        for h in event_handlers:
+            h(*args, **kwargs)
 
     def fire(self, event_key, *args, **kwargs):
         """
@@ -134,5 +169,7 @@ class EventSource(object):
         if event_key is not None:
             event_key = str(event_key)
             self._event_handlers_map.pop(event_key, None)
+            self._frozen_handlers_map.pop(event_key, None)
         else:
             self._event_handlers_map.clear()
+            self._frozen_handlers_map.clear()
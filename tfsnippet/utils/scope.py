@@ -6,6 +6,7 @@ from tensorflow.python.ops import variable_scope as variable_scope_ops
 
 __all__ = [
     'get_default_scope_name',
+    'is_in_control_flow_context',
     'reopen_variable_scope',
     'root_variable_scope',
 ]
@@ -85,3 +86,20 @@ def root_variable_scope(**kwargs):
                 yield vs
     finally:
         scope._name = old_name
+
+
+def is_in_control_flow_context():
+    """
+    Whether or not the graph nodes are being built inside a control flow
+    context of the default graph, e.g., the body of ``tf.while_loop`` or
+    a branch of ``tf.cond``?
+
+    The tensors built inside a control flow context cannot be used outside
+    of that context, and vice versa.  Thus the caches of graph nodes should
+    not be shared across such contexts.
+
+    Returns:
+        bool: :obj:`True` if inside a control flow context, :obj:`False`
+            otherwise.
+    """
+    return tf.get_default_graph()._get_control_flow_context() is not None
@@ -22,7 +22,16 @@ class TFSnippetConfig(Config):
     )
     file_cache_checksum = ConfigField(
         bool, default=False,
-        description='Whether or not to validate the checksum of cached files?'
+        description='Whether or not to validate the checksum of cached files? '
+                    'A cached file is re-hashed only if its size, mtime or '
+                    'inode has changed since its last verification.'
+    )
+    file_cache_max_bytes = ConfigField(
+        int, default=None, nullable=True,
+        description='The maximum total size in bytes of the cached files '
+                    'under the cache root.  If exceeded, the least recently '
+                    'used files will be evicted after each download or '
+                    'extraction by `CacheDir`.'
     )
 
 
@@ -1,6 +1,10 @@
 import numpy as np
+import six
 
-__all__ = ['StatisticsCollector']
+__all__ = ['StatisticsCollector', 'ColumnarStatisticsCollector',
+           'LogSumExpAccumulator']
+
+_SCALAR_TYPES = six.integer_types + (float, np.integer, np.floating)
 
 
 class StatisticsCollector(object):
@@ -97,6 +101,16 @@ class StatisticsCollector(object):
         Raises:
             ValueError: If the shape of `values` does not end with `self.shape`.
         """
+        # fast path for collecting a single scalar value
+        if not self._shape and isinstance(values, _SCALAR_TYPES) and \
+                isinstance(weight, _SCALAR_TYPES) and weight > 0:
+            self._weight_sum += weight
+            discount = weight / float(self._weight_sum)
+            self._mean += discount * (values - self._mean)
+            self._square += discount * (values * values - self._square)
+            self._counter += 1
+            return
+
         values = np.asarray(values)
         if not values.size:
             return
@@ -133,3 +147,447 @@ class StatisticsCollector(object):
         update_array(self._mean, values)
         update_array(self._square, values ** 2)
         self._counter += batch_weight.size
+
+
+class LogSumExpAccumulator(object):
+    """
+    Computing :math:`\\log \\sum_{k=1}^K \\exp(x_k)` and
+    :math:`\\log \\frac{1}{K} \\sum_{k=1}^K \\exp(x_k)` online.
+
+    The values are accumulated as :math:`x_{max}` and
+    :math:`\\sum_{k=1}^K \\exp(x_k - x_{max})`, where :math:`x_{max}` is
+    the running maximum, such that the reduction is numerically stable.
+    Accumulators of different batches, or of different processes, can be
+    merged by :meth:`merge`, and the accumulated state can be serialized
+    by :meth:`get_state`.  For example::
+
+        acc = LogSumExpAccumulator(shape=[n_data])
+        for chunk in range(n_chunks):
+            acc.collect(session.run(log_weights))  # [chunk_size, n_data]
+        log_likelihood = acc.log_mean_exp  # [n_data]
+    """
+
+    def __init__(self, shape=()):
+        """
+        Construct the :class:`LogSumExpAccumulator`.
+
+        Args:
+            shape: Shape of the values.  The log-sum-exp will be computed
+                for per element of the values. (default is ``()``).
+        """
+        self._shape = tuple(shape)
+        self.reset()
+
+    def reset(self):
+        """Reset the accumulator to initial state."""
+        self._max = np.full(self._shape, -np.inf)
+        self._sum = np.zeros(self._shape)
+        self._counter = 0
+
+    @property
+    def shape(self):
+        """Get the shape of the values."""
+        return self._shape
+
+    @property
+    def has_value(self):
+        """Whether or not any value has been collected?"""
+        return self._counter > 0
+
+    @property
+    def counter(self):
+        """Get the number of collected values of each element."""
+        return self._counter
+
+    @staticmethod
+    def _shift(x_max):
+        # use 0 as the shift of the elements without any finite value,
+        # so as to avoid ``-inf - (-inf)``
+        return np.where(np.isfinite(x_max), x_max, 0.)
+
+    @staticmethod
+    def _rescale(x_max, x_sum, shift):
+        # rescale `x_sum` shifted by ``_shift(x_max)`` to be shifted by `shift`
+        with np.errstate(over='ignore', invalid='ignore'):
+            factor = np.exp(LogSumExpAccumulator._shift(x_max) - shift)
+            return np.where(x_max == -np.inf, 0., x_sum * factor)
+
+    @property
+    def log_sum_exp(self):
+        """
+        Get :math:`\\log \\sum_{k=1}^K \\exp(x_k)` of the values.
+        It is :math:`-\\infty` if no value has been collected.
+        """
+        shift = self._shift(self._max)
+        with np.errstate(divide='ignore'):
+            return shift + np.log(self._sum)
+
+    @property
+    def log_mean_exp(self):
+        """
+        Get :math:`\\log \\frac{1}{K} \\sum_{k=1}^K \\exp(x_k)` of the
+        values.  It is :math:`-\\infty` if no value has been collected.
+        """
+        return self.log_sum_exp - np.log(max(self._counter, 1))
+
+    def _accumulate(self, x_max, x_sum_fn, counter):
+        new_max = np.maximum(self._max, x_max)
+        shift = self._shift(new_max)
+        self._sum = self._rescale(self._max, self._sum, shift) + \
+            x_sum_fn(shift)
+        self._max = new_max
+        self._counter += counter
+
+    def collect(self, values):
+        """
+        Update the log-sum-exp from values.
+
+        Args:
+            values: Values to be collected in batch, numpy array or scalar
+                whose shape ends with ``self.shape``. The leading shape in
+                front of ``self.shape`` is regarded as the batch shape.
+
+        Raises:
+            ValueError: If the shape of `values` does not end with
+                `self.shape`.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        if not values.size:
+            return
+        if self._shape:
+            if values.shape[-len(self._shape):] != self._shape:
+                raise ValueError(
+                    'Shape mismatch: {} not ending with {}'.format(
+                        values.shape, self._shape
+                    )
+                )
+            batch_shape = values.shape[:-len(self._shape)]
+        else:
+            batch_shape = values.shape
+
+        reduce_axis = tuple(range(len(batch_shape)))
+        self._accumulate(
+            np.max(values, axis=reduce_axis),
+            lambda shift: np.sum(np.exp(values - shift), axis=reduce_axis),
+            int(np.prod(batch_shape, dtype=np.int64))
+        )
+
+    def merge(self, other):
+        """
+        Merge the values accumulated by another accumulator.
+
+        Args:
+            other (LogSumExpAccumulator): The other accumulator.
+
+        Raises:
+            ValueError: If the shape of `other` does not match `self.shape`.
+        """
+        if other.shape != self._shape:
+            raise ValueError('Shape mismatch: {} vs {}'.format(
+                other.shape, self._shape))
+        self._accumulate(
+            other._max,
+            lambda shift: self._rescale(other._max, other._sum, shift),
+            other.counter
+        )
+
+    @staticmethod
+    def _encode_array(x):
+        # encode the non-finite numbers as strings, which are not
+        # supported by strict JSON
+        x = np.asarray(x, dtype=np.float64)
+        return np.where(np.isfinite(x), x.astype(object), x.astype(str)). \
+            tolist()
+
+    def get_state(self):
+        """
+        Get the accumulated state, which consists of only Python lists,
+        numbers and strings, thus can be serialized by JSON or pickle.
+        The non-finite numbers (e.g., the maximum :math:`-\\infty` of an
+        empty accumulator) are encoded as strings, e.g., ``"-inf"``.
+
+        Returns:
+            dict: The accumulated state.
+        """
+        return {
+            'shape': list(self._shape),
+            'max': self._encode_array(self._max),
+            'sum': self._encode_array(self._sum),
+            'counter': self._counter,
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        """
+        Construct a :class:`LogSumExpAccumulator` from the state obtained
+        by :meth:`get_state`.
+
+        Args:
+            state (dict): The accumulated state.
+
+        Returns:
+            LogSumExpAccumulator: The restored accumulator.
+        """
+        ret = cls(shape=state['shape'])
+        ret._max = np.asarray(state['max'], dtype=np.float64). \
+            reshape(ret._shape)
+        ret._sum = np.asarray(state['sum'], dtype=np.float64). \
+            reshape(ret._shape)
+        ret._counter = int(state['counter'])
+        return ret
+
+
+class _ColumnStatistics(object):
+    """
+    The statistics of one column in a :class:`ColumnarStatisticsCollector`,
+    which mimics the interface of a scalar :class:`StatisticsCollector`.
+    """
+
+    def __init__(self, owner, name, index):
+        self._owner = owner
+        self._name = name
+        self._index = index
+
+    def _get(self, row):
+        return self._owner._stats[row, self._index]
+
+    def reset(self):
+        """Reset the statistics of this column."""
+        self._owner._stats[:, self._index] = 0.
+
+    @property
+    def name(self):
+        """Get the name of this column."""
+        return self._name
+
+    @property
+    def shape(self):
+        """Get the shape of the values, which is always ``()``."""
+        return ()
+
+    @property
+    def mean(self):
+        """Get the mean of the values, i.e., :math:`\\mathrm{E}[X]`."""
+        weight_sum = self._get(ColumnarStatisticsCollector.WEIGHT_SUM)
+        if weight_sum > 0:
+            return self._get(ColumnarStatisticsCollector.SUM) / weight_sum
+        return np.float64(0.)
+
+    @property
+    def square(self):
+        """Get :math:`\\mathrm{E}[X^2]` of the values."""
+        weight_sum = self._get(ColumnarStatisticsCollector.WEIGHT_SUM)
+        if weight_sum > 0:
+            return self._get(ColumnarStatisticsCollector.SQUARE_SUM) / \
+                weight_sum
+        return np.float64(0.)
+
+    @property
+    def var(self):
+        """
+        Get the variance of the values, i.e., :math:`\\operatorname{Var}[X]`.
+        """
+        return np.maximum(self.square - self.mean ** 2, 0.)
+
+    @property
+    def stddev(self):
+        """
+        Get the std of the values, i.e.,
+        :math:`\\sqrt{\\operatorname{Var}[X]}`.
+        """
+        return np.sqrt(self.var)
+
+    @property
+    def weight_sum(self):
+        """Get the weight summation."""
+        return self._get(ColumnarStatisticsCollector.WEIGHT_SUM)
+
+    @property
+    def has_value(self):
+        """Whether or not any value has been collected?"""
+        return self.counter > 0
+
+    @property
+    def counter(self):
+        """Get the counter of collected values."""
+        return int(self._get(ColumnarStatisticsCollector.COUNTER))
+
+    def collect(self, values, weight=1.):
+        """
+        Update the statistics from values.
+
+        Args:
+            values: Scalar value, or values to be collected in batch.
+            weight: Weights of the `values`. (default is 1)
+        """
+        self._owner.collect(self._name, values, weight=weight)
+
+
+class ColumnarStatisticsCollector(object):
+    """
+    Computing :math:`\\mathrm{E}[X]` and :math:`\\operatorname{Var}[X]`
+    online for many named scalar metrics at once.
+
+    The running sums of all metrics are kept in one preallocated `float64`
+    array, where each metric is assigned a column index.  Collecting one
+    value for each of the metrics costs a constant number of NumPy
+    operations, regardless of the number of metrics::
+
+        collector = ColumnarStatisticsCollector()
+        indices = collector.indices_of(('loss', 'acc'))
+        for loss, acc in ...:
+            collector.collect_columns(indices, [loss, acc])
+        print(collector['loss'].mean, collector['acc'].stddev)
+
+    Each column obtained by ``collector[name]`` provides the same read-only
+    properties as a scalar :class:`StatisticsCollector`, e.g., `mean`,
+    `stddev` and `counter`.
+    """
+
+    WEIGHT_SUM = 0
+    COUNTER = 1
+    SUM = 2
+    SQUARE_SUM = 3
+
+    def __init__(self, capacity=32):
+        """
+        Construct the :class:`ColumnarStatisticsCollector`.
+
+        Args:
+            capacity (int): The initial number of columns to allocate.
+                The storage will be enlarged automatically. (default 32)
+        """
+        self._stats = np.zeros([4, max(int(capacity), 1)], dtype=np.float64)
+        self._columns = {}  # type: dict[str, _ColumnStatistics]
+        self._names = []
+        self._indices_cache = {}
+
+    def __len__(self):
+        return len(self._names)
+
+    def __contains__(self, name):
+        return name in self._columns
+
+    def __iter__(self):
+        return iter(self._names)
+
+    def __getitem__(self, name):
+        """
+        Get the statistics of a column.
+
+        Args:
+            name (str): Name of the column.
+
+        Returns:
+            The statistics of the column, with the same properties as a
+            scalar :class:`StatisticsCollector`.
+
+        Raises:
+            KeyError: If the column does not exist.
+        """
+        return self._columns[name]
+
+    @property
+    def names(self):
+        """Get the names of the columns, in the order of allocation."""
+        return tuple(self._names)
+
+    def index_of(self, name):
+        """
+        Get the index of a column, allocating a new column if not exist.
+
+        Args:
+            name (str): Name of the column.
+
+        Returns:
+            int: The index of the column.
+        """
+        column = self._columns.get(name)
+        if column is None:
+            index = len(self._names)
+            if index >= self._stats.shape[1]:
+                stats = np.zeros([4, self._stats.shape[1] * 2],
+                                 dtype=np.float64)
+                stats[:, :index] = self._stats
+                self._stats = stats
+            column = self._columns[name] = _ColumnStatistics(self, name, index)
+            self._names.append(name)
+        return column._index
+
+    def indices_of(self, names):
+        """
+        Get the indices of columns, allocating new columns if not exist.
+
+        The result is memoized for each distinct tuple of `names`, so that
+        repeatedly collecting the same set of metrics costs only one
+        dict lookup.
+
+        Args:
+            names (tuple[str]): Names of the columns.
+
+        Returns:
+            np.ndarray: The 1-d int array of the column indices.
+        """
+        names = tuple(names)
+        indices = self._indices_cache.get(names)
+        if indices is None:
+            indices = np.asarray([self.index_of(n) for n in names],
+                                 dtype=np.int64)
+            if len(set(names)) != len(names):
+                raise ValueError('Duplicated column names: {!r}'.
+                                 format(names))
+            self._indices_cache[names] = indices
+        return indices
+
+    def collect_columns(self, indices, values):
+        """
+        Collect one value for each of the specified columns.
+
+        Args:
+            indices (np.ndarray): The distinct column indices, obtained by
+                :meth:`indices_of`.
+            values: The 1-d array of scalar values, one for each column.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        stats = self._stats
+        stats[:2, indices] += 1.  # WEIGHT_SUM and COUNTER
+        stats[self.SUM, indices] += values
+        stats[self.SQUARE_SUM, indices] += values * values
+
+    def collect(self, name, values, weight=1.):
+        """
+        Collect scalar value(s) into a column.
+
+        Args:
+            name (str): Name of the column.
+            values: Scalar value, or values to be collected in batch.
+            weight: Weights of the `values`, should be broadcastable against
+                `values`. (default is 1)
+        """
+        index = self.index_of(name)
+        stats = self._stats
+        if isinstance(values, _SCALAR_TYPES) and \
+                isinstance(weight, _SCALAR_TYPES):
+            stats[self.WEIGHT_SUM, index] += weight
+            stats[self.COUNTER, index] += 1
+            stats[self.SUM, index] += weight * values
+            stats[self.SQUARE_SUM, index] += weight * values * values
+        else:
+            values = np.asarray(values, dtype=np.float64)
+            if not values.size:
+                return
+            weight = np.asarray(weight, dtype=np.float64)
+            if not weight.size:
+                weight = np.asarray(1.)
+            weight = np.broadcast_to(weight, values.shape)
+            stats[self.WEIGHT_SUM, index] += np.sum(weight)
+            stats[self.COUNTER, index] += values.size
+            stats[self.SUM, index] += np.sum(weight * values)
+            stats[self.SQUARE_SUM, index] += np.sum(weight * values * values)
+
+    def reset(self):
+        """
+        Reset the statistics of all columns.  The columns and their indices
+        are kept, so as to be reused.
+        """
+        self._stats.fill(0.)
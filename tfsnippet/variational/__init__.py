@@ -7,6 +7,7 @@ from .objectives import *
 __all__ = [
     'VariationalChain', 'VariationalEvaluation', 'VariationalInference',
     'VariationalLowerBounds', 'VariationalTrainingObjectives',
-    'elbo_objective', 'importance_sampling_log_likelihood', 'iwae_estimator',
+    'chunked_importance_sampling_log_likelihood', 'elbo_objective',
+    'importance_sampling_log_likelihood', 'iwae_estimator',
     'monte_carlo_objective', 'nvil_estimator', 'sgvb_estimator',
 ]
@@ -1,9 +1,11 @@
+import numpy as np
 import tensorflow as tf
 
 from tfsnippet.ops import log_mean_exp
 from .utils import _require_multi_samples
 
-__all__ = ['importance_sampling_log_likelihood']
+__all__ = ['importance_sampling_log_likelihood',
+           'chunked_importance_sampling_log_likelihood']
 
 
 def importance_sampling_log_likelihood(log_joint, latent_log_prob, axis,
@@ -37,3 +39,119 @@ def importance_sampling_log_likelihood(log_joint, latent_log_prob, axis,
         log_p = log_mean_exp(
             log_joint - latent_log_prob, axis=axis, keepdims=keepdims)
         return log_p
+
+
+def chunked_importance_sampling_log_likelihood(log_weights_fn, n_samples,
+                                               chunk_size, keepdims=False,
+                                               name=None):
+    """
+    Compute :math:`\\log p(\\mathbf{x})` by importance sampling, drawing
+    the samples of latent variables in chunks.
+
+    This computes exactly the same estimator as
+    :func:`importance_sampling_log_likelihood` with `n_samples` samples,
+    but only `chunk_size` samples are drawn at a time, inside a
+    ``tf.while_loop``.  A running log-sum-exp of the importance weights is
+    kept for each data point, thus the memory usage is proportional to
+    `chunk_size` rather than `n_samples`.  For example::
+
+        def log_weights_fn(n_z):
+            vi = build_vi(input_x, n_z=n_z)  # samples at the first axis
+            return vi.log_joint, vi.latent_log_prob
+
+        test_ll = spt.variational.chunked_importance_sampling_log_likelihood(
+            log_weights_fn, n_samples=5000, chunk_size=100)
+        evaluator = spt.Evaluator(
+            loop, {'test_nll': -tf.reduce_mean(test_ll)}, [input_x],
+            test_flow
+        )
+
+    `log_weights_fn` is called once outside of the loop for the first chunk,
+    and once more inside the loop body for the other chunks.  Thus the
+    variables it uses should be created at its first call, e.g., by
+    ``tf.make_template``.  If `n_samples` is not a multiple of `chunk_size`,
+    the excess samples of the last chunk are masked out.  The gradients
+    are not propagated through the loop.
+
+    Args:
+        log_weights_fn ((int) -> (tf.Tensor, tf.Tensor)): Function which
+            draws the given number of samples of latent variables, and
+            returns the values of :math:`\\log p(\\mathbf{z},\\mathbf{x})`
+            and :math:`\\log q(\\mathbf{z}|\\mathbf{x})`, with the samples
+            at the first axis.
+        n_samples (int): The total number of samples.
+        chunk_size (int): The number of samples drawn at a time.
+        keepdims (bool): Whether or not to keep the sampling dimension?
+            (default :obj:`False`)
+        name (str): TensorFlow name scope of the graph nodes.
+            (default "chunked_importance_sampling_log_likelihood")
+
+    Returns:
+        tf.Tensor: The computed :math:`\\log p(x)`.
+    """
+    n_samples = int(n_samples)
+    chunk_size = int(chunk_size)
+    if n_samples < 1:
+        raise ValueError('`n_samples` must be at least 1: got {}'.
+                         format(n_samples))
+    if chunk_size < 1:
+        raise ValueError('`chunk_size` must be at least 1: got {}'.
+                         format(chunk_size))
+    chunk_size = min(chunk_size, n_samples)
+    n_chunks = (n_samples + chunk_size - 1) // chunk_size
+
+    with tf.name_scope(
+            name, default_name='chunked_importance_sampling_log_likelihood'):
+        def log_weights(chunk_index):
+            log_joint, latent_log_prob = log_weights_fn(chunk_size)
+            log_w = tf.convert_to_tensor(log_joint) - \
+                tf.convert_to_tensor(latent_log_prob)
+
+            # mask out the samples beyond `n_samples` in the last chunk
+            if n_samples % chunk_size != 0:
+                n_valid = n_samples - chunk_index * chunk_size
+                mask = tf.where(
+                    tf.range(chunk_size) < n_valid,
+                    tf.zeros([chunk_size], dtype=log_w.dtype),
+                    tf.fill([chunk_size], tf.constant(-np.inf, log_w.dtype))
+                )
+                mask = tf.reshape(
+                    mask,
+                    tf.concat([[chunk_size],
+                               tf.ones_like(tf.shape(log_w))[1:]], axis=0)
+                )
+                log_w += mask
+            return log_w
+
+        def safe_max(x):
+            return tf.where(tf.is_finite(x), x, tf.zeros_like(x))
+
+        # the running log-sum-exp is kept as ``log_w_max + log(w_sum)``
+        log_w = log_weights(0)
+        log_w_max = safe_max(tf.reduce_max(log_w, axis=0))
+        w_sum = tf.reduce_sum(tf.exp(log_w - log_w_max), axis=0)
+
+        if n_chunks > 1:
+            def body(chunk_index, log_w_max, w_sum):
+                log_w = log_weights(chunk_index)
+                new_max = safe_max(
+                    tf.maximum(log_w_max, tf.reduce_max(log_w, axis=0)))
+                new_sum = (
+                    w_sum * tf.exp(log_w_max - new_max) +
+                    tf.reduce_sum(tf.exp(log_w - new_max), axis=0)
+                )
+                return chunk_index + 1, new_max, new_sum
+
+            _, log_w_max, w_sum = tf.while_loop(
+                cond=lambda chunk_index, *args: chunk_index < n_chunks,
+                body=body,
+                loop_vars=(tf.constant(1, dtype=tf.int32), log_w_max, w_sum),
+                back_prop=False,
+                parallel_iterations=1,  # one chunk in memory at a time
+            )
+
+        log_p = log_w_max + tf.log(w_sum) - \
+            tf.cast(np.log(n_samples), dtype=w_sum.dtype)
+        if keepdims:
+            log_p = tf.expand_dims(log_p, axis=0)
+        return log_p